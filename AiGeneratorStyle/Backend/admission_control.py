@@ -0,0 +1,273 @@
+# Backend/admission_control.py
+"""
+Admission Control
+ASGI middleware that caps concurrent requests on CPU-heavy routes. Excess
+requests wait in a bounded priority queue (interactive before batch) and
+are turned away with 429 and Retry-After once the queue is full or the
+wait runs out, so cheap endpoints keep their latency under load.
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import math
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from starlette.routing import compile_path
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = {"interactive": 0, "batch": 1}
+PRIORITY_HEADER = b"x-request-priority"
+
+def _cpu_count() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+# Limits per "METHOD /route/template"; override with ADMISSION_LIMITS (JSON object)
+# concurrency: requests running at once, queue: requests allowed to wait,
+# timeout: seconds a request may wait, priority: default for the route
+DEFAULT_ADMISSION_LIMITS = {
+    "POST /api/clothing/fit": {"concurrency": _cpu_count(), "queue": 64, "timeout": 10},
+    "POST /api/avatar/{avatar_id}/face": {"concurrency": max(1, _cpu_count() // 2), "queue": 16, "timeout": 15},
+    "GET /api/avatar/{avatar_id}/thumbnail": {"concurrency": _cpu_count(), "queue": 64, "timeout": 10},
+    "POST /api/avatar/batch/generate": {"concurrency": 2, "queue": 8, "timeout": 30, "priority": "batch"},
+    "POST /api/avatar/batch/get": {"concurrency": 4, "queue": 16, "timeout": 30, "priority": "batch"},
+    "PUT /api/avatar/batch/update": {"concurrency": 2, "queue": 8, "timeout": 30, "priority": "batch"}
+}
+
+def load_admission_limits() -> Dict[str, Dict]:
+    """Default limits merged with the ADMISSION_LIMITS environment override"""
+    limits = {route: dict(limit) for route, limit in DEFAULT_ADMISSION_LIMITS.items()}
+    override = os.getenv("ADMISSION_LIMITS")
+    if override:
+        try:
+            for route, limit in json.loads(override).items():
+                if limit is None:
+                    limits.pop(route, None)
+                else:
+                    limits.setdefault(route, {}).update(limit)
+        except (ValueError, AttributeError) as e:
+            logger.error(f"Ignoring invalid ADMISSION_LIMITS: {e}")
+    return limits
+
+class Overloaded(Exception):
+    """No capacity for the request within its queueing budget"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Retry after {retry_after}s")
+        self.retry_after = retry_after
+
+class AdmissionGate:
+    """
+    Concurrency limit with a bounded priority wait queue
+
+    A released slot is handed directly to the best waiter (lowest priority
+    value, then arrival order), so a late arrival can't overtake the queue.
+    When the queue is full, a request may displace the worst waiter if it
+    has strictly higher priority; otherwise it is rejected at once.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        concurrency: int,
+        queue: int = 0,
+        timeout: float = 10.0,
+        priority: str = "interactive"
+    ):
+        self.name = name
+        self.concurrency = max(1, int(concurrency))
+        self.queue_size = max(0, int(queue))
+        self.timeout = float(timeout)
+        self.default_priority = PRIORITIES.get(priority, 0)
+        self.active = 0
+        # (priority, sequence, future); entries whose future is done are stale
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._queued = [0] * len(PRIORITIES)
+        self._sequence = itertools.count()
+        # Smoothed seconds per request, for Retry-After estimates
+        self.service_time = 0.1
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_seconds = 0.0
+
+    @property
+    def queued(self) -> int:
+        return sum(self._queued)
+
+    async def acquire(self, priority: Optional[int] = None):
+        """
+        Wait for a slot
+
+        Args:
+            priority: Requested priority; it can lower the route's default but not raise it
+
+        Raises:
+            Overloaded: The queue is full or the wait exceeded the timeout
+        """
+        priority = self.default_priority if priority is None else max(self.default_priority, priority)
+        if self.active < self.concurrency and not self.queued:
+            self.active += 1
+            self.admitted += 1
+            return
+
+        if self.queued >= self.queue_size and not self._displace(priority):
+            self.rejected += 1
+            raise Overloaded(self.retry_after())
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self._queued[priority] += 1
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            if not self._granted(future):
+                self._leave(priority, future)
+                self.timed_out += 1
+                raise Overloaded(self.retry_after())
+        except asyncio.CancelledError:
+            # Client went away; give back a slot handed over at the last moment
+            if self._granted(future):
+                self.release()
+            else:
+                self._leave(priority, future)
+            raise
+        finally:
+            self.wait_seconds += time.monotonic() - started
+        self.admitted += 1
+
+    def release(self, service_seconds: Optional[float] = None):
+        if service_seconds is not None:
+            self.service_time += 0.2 * (service_seconds - self.service_time)
+
+        while self._waiters:
+            priority, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            # Hand the slot over without freeing it
+            self._queued[priority] -= 1
+            future.set_result(None)
+            return
+        self.active -= 1
+
+    def retry_after(self) -> int:
+        """Seconds until the queue ahead would likely have drained"""
+        backlog = (self.queued + self.active) / self.concurrency
+        return max(1, math.ceil(backlog * self.service_time))
+
+    def metrics(self) -> Dict:
+        return {
+            "active": self.active,
+            "concurrency": self.concurrency,
+            "queued": {name: self._queued[value] for name, value in PRIORITIES.items()},
+            "queueSize": self.queue_size,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timedOut": self.timed_out,
+            "waitSeconds": round(self.wait_seconds, 3),
+            "serviceSeconds": round(self.service_time, 4)
+        }
+
+    def _granted(self, future: asyncio.Future) -> bool:
+        return future.done() and not future.cancelled() and future.exception() is None
+
+    def _leave(self, priority: int, future: asyncio.Future):
+        if not future.done():
+            future.cancel()
+            self._queued[priority] -= 1
+
+    def _displace(self, priority: int) -> bool:
+        worst = None
+        for entry in self._waiters:
+            if not entry[2].done() and (worst is None or entry[:2] > worst[:2]):
+                worst = entry
+        if worst is None or worst[0] <= priority:
+            return False
+        self._queued[worst[0]] -= 1
+        self.rejected += 1
+        worst[2].set_exception(Overloaded(self.retry_after()))
+        return True
+
+class AdmissionControl:
+    """Gates for the limited routes of one worker"""
+
+    def __init__(self, limits: Dict[str, Dict]):
+        self.routes = []
+        for route, limit in limits.items():
+            method, path = route.split(" ", 1)
+            path_regex, _, _ = compile_path(path)
+            self.routes.append((method.upper(), path_regex, AdmissionGate(route, **limit)))
+
+    def gate(self, method: str, path: str) -> Optional[AdmissionGate]:
+        for route_method, path_regex, gate in self.routes:
+            if route_method == method and path_regex.match(path):
+                return gate
+        return None
+
+    def metrics(self) -> Dict[str, Dict]:
+        """Queue depth and admission counters per limited route"""
+        return {gate.name: gate.metrics() for _, _, gate in self.routes}
+
+class AdmissionControlMiddleware:
+    """
+    Route HTTP requests through the gate of their route
+
+    Routes without a limit pass straight through. Clients can lower a
+    request's priority with the X-Request-Priority header (interactive or
+    batch), but not raise it above the route's default, so bulk routes
+    can't compete with interactive ones.
+    """
+
+    def __init__(self, app, control: AdmissionControl):
+        self.app = app
+        self.control = control
+
+    async def __call__(self, scope, receive, send):
+        gate = self.control.gate(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if gate is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await gate.acquire(_request_priority(scope))
+        except Overloaded as e:
+            await _reject(send, e.retry_after)
+            return
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release(time.monotonic() - started)
+
+def create_admission_control() -> AdmissionControl:
+    """Admission control configured by ADMISSION_LIMITS over the defaults"""
+    return AdmissionControl(load_admission_limits())
+
+def _request_priority(scope) -> Optional[int]:
+    for name, value in scope["headers"]:
+        if name == PRIORITY_HEADER:
+            return PRIORITIES.get(value.decode("latin-1").strip().lower())
+    return None
+
+async def _reject(send, retry_after: int):
+    body = json.dumps({"detail": "Server is busy, please retry later"}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 429,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(retry_after).encode())
+        ]
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,511 @@
+# Backend/asset_proxy.py
+"""
+GLB Asset Proxy
+Fetches third-party avatar models (GitHub sample models, Ready Player Me
+exports) once, keeps them content-addressed on local disk with size-bounded
+LRU eviction, and serves them with byte ranges, precompressed variants and
+immutable caching.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+import re
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+import aiofiles
+import httpx
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+
+from compression import accepted_encodings
+from http_client import CircuitOpenError
+from single_flight import SingleFlight
+from blob_storage import is_digest
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+GLB_MEDIA_TYPE = "model/gltf-binary"
+
+DEFAULT_ALLOWED_HOSTS = "raw.githubusercontent.com,models.readyplayer.me"
+
+# Precompressed sidecars, in server preference order
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+# Keep a compressed variant only when it saves at least this fraction
+MIN_COMPRESSION_SAVING = 0.1
+
+# Objects looked up this recently are never evicted, so whoever looked them up can still read them
+EVICTION_GRACE = 60.0
+
+# Temporary downloads older than this are leftovers of a crashed worker
+TMP_MAX_AGE = 3600.0
+
+CHUNK_SIZE = 256 * 1024
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+class AssetFetchError(Exception):
+    """The origin could not provide the asset"""
+
+class AssetCache:
+    """
+    Content-addressed GLB cache on local disk
+
+    Layout under the root directory:
+        objects/<ab>/<digest>.glb      stored bytes
+        objects/<ab>/<digest>.glb.gz   precompressed variants (.br, .gz)
+        index/<sha256(key)>            digest for a source URL or derived file
+
+    Each URL is fetched, and each derived file built, at most once at a time
+    per worker; once stored, objects are served straight from disk until
+    evicted. The directory may be shared by several workers: the disk is the
+    source of truth, lookups touch the object (its modification time is the
+    LRU clock) and re-fetch it when another worker evicted it, and eviction
+    keeps the whole directory under max_bytes.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        max_bytes: int = 2 * 1024 ** 3,
+        max_object_bytes: int = 64 * 1024 ** 2,
+        allowed_hosts: Optional[List[str]] = None,
+        client=None,
+        timeout: float = 30.0,
+        eviction_grace: float = EVICTION_GRACE
+    ):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+        self.max_object_bytes = max_object_bytes
+        self.allowed_hosts = set(allowed_hosts or DEFAULT_ALLOWED_HOSTS.split(","))
+        self.client = client
+        self.timeout = timeout
+        self.eviction_grace = eviction_grace
+        self._owns_client = client is None
+        # digest -> bytes on disk (original plus variants), least recently used
+        # first; this worker's view, refreshed from disk on every eviction pass
+        self.entries: "OrderedDict[str, int]" = OrderedDict()
+        self.total_bytes = 0
+        # source URL or derived-file key -> digest
+        self.digests: Dict[str, str] = {}
+        self._inflight = SingleFlight()
+
+        for directory in ("objects", "index", "tmp"):
+            os.makedirs(os.path.join(self.root, directory), exist_ok=True)
+        self._scan()
+
+    async def close(self):
+        if self._owns_client and self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def is_allowed(self, url: str) -> bool:
+        parts = urlsplit(url)
+        return parts.scheme == "https" and parts.hostname in self.allowed_hosts
+
+    async def resolve(self, url: str) -> str:
+        """
+        Digest of the asset at url, fetching it from the origin if needed
+
+        Raises:
+            ValueError: the URL is not on an allowed host
+            AssetFetchError: the origin failed or the asset is too large
+        """
+        if not self.is_allowed(url):
+            raise ValueError(f"Asset host not allowed: {url}")
+
+        digest = await self._lookup(url)
+        if digest is not None:
+            return digest
+        return await self._inflight.run(url, lambda: self._fetch(url))
+
+    async def derive(self, digest: str, name: str, transform: Callable[[bytes], bytes]) -> str:
+        """
+        Digest of a file derived from a cached object, building it if needed
+
+        Args:
+            digest: Source object
+            name: Identifies the transform and its version
+            transform: Blocking bytes -> bytes function, run in a thread
+
+        Returns:
+            Digest of the derived object (the source digest when the
+            transform rejects the file with ValueError)
+        """
+        key = f"derived:{digest}:{name}"
+        derived = await self._lookup(key)
+        if derived is not None:
+            return derived
+        return await self._inflight.run(key, lambda: self._build(key, digest, transform))
+
+    async def _lookup(self, key: str) -> Optional[str]:
+        digest = self.digests.get(key) or await asyncio.to_thread(self._read_index, key)
+        if digest and await self.contains(digest):
+            self.digests[key] = digest
+            return digest
+        self.digests.pop(key, None)
+        return None
+
+    async def contains(self, digest: str) -> bool:
+        """Whether the object is on disk, marking it recently used"""
+        if not is_digest(digest):
+            return False
+        if not await asyncio.to_thread(_touch, self.object_path(digest)):
+            # Evicted by another worker
+            stored = self.entries.pop(digest, None)
+            if stored is not None:
+                self.total_bytes -= stored
+            return False
+        if digest in self.entries:
+            self.entries.move_to_end(digest)
+        return True
+
+    def object_path(self, digest: str, suffix: str = "") -> str:
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.glb{suffix}")
+
+    async def _fetch(self, url: str) -> str:
+        if self.client is None:
+            self.client = httpx.AsyncClient(timeout=self.timeout, follow_redirects=True)
+
+        tmp_path = os.path.join(self.root, "tmp", uuid.uuid4().hex)
+        hasher = hashlib.sha256()
+        size = 0
+        try:
+            async with self.client.stream("GET", url) as response:
+                if response.status_code != 200:
+                    raise AssetFetchError(f"Origin returned {response.status_code} for {url}")
+                async with aiofiles.open(tmp_path, "wb") as f:
+                    async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > self.max_object_bytes:
+                            raise AssetFetchError(f"Asset exceeds {self.max_object_bytes} bytes: {url}")
+                        hasher.update(chunk)
+                        await f.write(chunk)
+        except (httpx.HTTPError, CircuitOpenError) as e:
+            await asyncio.to_thread(_remove, tmp_path)
+            raise AssetFetchError(f"Failed to fetch {url}: {e}") from e
+        except Exception:
+            await asyncio.to_thread(_remove, tmp_path)
+            raise
+
+        digest = hasher.hexdigest()
+        await self._add_object(tmp_path, digest)
+        logger.info(f"Cached asset {digest[:12]} ({size} bytes) from {url}")
+        await self._index(url, digest)
+        return digest
+
+    async def _build(self, key: str, digest: str, transform: Callable[[bytes], bytes]) -> str:
+        data = await asyncio.to_thread(_read_bytes, self.object_path(digest))
+        try:
+            derived = await asyncio.to_thread(transform, data)
+        except ValueError as e:
+            logger.warning(f"Serving asset {digest[:12]} unmodified: {e}")
+            derived = data
+
+        derived_digest = hashlib.sha256(derived).hexdigest()
+        if not await self.contains(derived_digest):
+            tmp_path = os.path.join(self.root, "tmp", uuid.uuid4().hex)
+            await asyncio.to_thread(_write_atomic, tmp_path, derived)
+            await self._add_object(tmp_path, derived_digest)
+            logger.info(f"Built {key} ({len(data)} -> {len(derived)} bytes)")
+        await self._index(key, derived_digest)
+        return derived_digest
+
+    async def _add_object(self, tmp_path: str, digest: str):
+        """Move a complete temporary file into the store (or drop it if already stored)"""
+        if await self.contains(digest):
+            await asyncio.to_thread(_remove, tmp_path)
+        else:
+            stored_bytes = await asyncio.to_thread(self._store_object, tmp_path, digest)
+            self.total_bytes += stored_bytes - self.entries.pop(digest, 0)
+            self.entries[digest] = stored_bytes
+
+    async def _index(self, key: str, digest: str):
+        self.digests[key] = digest
+        await asyncio.to_thread(self._write_index, key, digest)
+        await self._evict()
+
+    def _store_object(self, tmp_path: str, digest: str) -> int:
+        """Move a downloaded file into place and write its compressed variants"""
+        path = self.object_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with open(tmp_path, "rb") as f:
+            data = f.read()
+
+        stored = len(data)
+        for encoding, suffix in ENCODINGS:
+            compressed = _compress(encoding, data)
+            if compressed is None or len(compressed) > len(data) * (1 - MIN_COMPRESSION_SAVING):
+                continue
+            _write_atomic(path + suffix, compressed)
+            stored += len(compressed)
+
+        # The original goes last: its presence marks the object complete
+        os.replace(tmp_path, path)
+        return stored
+
+    async def _evict(self):
+        entries, victims = await asyncio.to_thread(self._evict_objects)
+        self.entries = entries
+        self.total_bytes = sum(entries.values())
+
+        if victims:
+            # Forget mappings to evicted objects; index files are checked
+            # against the disk and rebuilt when stale
+            self.digests = {
+                url: digest for url, digest in self.digests.items() if digest in self.entries
+            }
+            logger.info(f"Evicted {len(victims)} cached assets")
+
+    def _evict_objects(self) -> Tuple["OrderedDict[str, int]", List[str]]:
+        """
+        Delete least recently used objects until the directory, across all
+        workers, fits max_bytes; objects inside the grace period stay
+
+        Returns:
+            (remaining entries, least recently used first; evicted digests)
+        """
+        found = self._scan_objects()
+        total = sum(stored for _, _, stored in found)
+        cutoff = time.time() - self.eviction_grace
+        victims = []
+        for modified, digest, stored in found:
+            if total <= self.max_bytes or len(found) - len(victims) <= 1 or modified > cutoff:
+                break
+            self._delete_objects([digest])
+            victims.append(digest)
+            total -= stored
+        entries = OrderedDict((digest, stored) for _, digest, stored in found[len(victims):])
+        return entries, victims
+
+    def _delete_objects(self, digests: List[str]):
+        for digest in digests:
+            # Original first, so a partially deleted object is never served
+            _remove(self.object_path(digest))
+            for _, suffix in ENCODINGS:
+                _remove(self.object_path(digest, suffix))
+
+    def _scan_objects(self) -> List[Tuple[float, str, int]]:
+        """(modification time, digest, stored bytes) of every object on disk, oldest first"""
+        found = []
+        objects_dir = os.path.join(self.root, "objects")
+        for directory in os.listdir(objects_dir):
+            for name in os.listdir(os.path.join(objects_dir, directory)):
+                digest, _, extension = name.partition(".")
+                if extension != "glb" or not is_digest(digest):
+                    continue
+                path = self.object_path(digest)
+                try:
+                    modified, stored = os.path.getmtime(path), os.path.getsize(path)
+                except FileNotFoundError:
+                    # Evicted by another worker meanwhile
+                    continue
+                for _, suffix in ENCODINGS:
+                    if os.path.exists(path + suffix):
+                        stored += os.path.getsize(path + suffix)
+                found.append((modified, digest, stored))
+        return sorted(found)
+
+    def _scan(self):
+        """Rebuild the LRU from disk, oldest modification first"""
+        for _, digest, stored in self._scan_objects():
+            self.entries[digest] = stored
+            self.total_bytes += stored
+
+        # Leftovers from interrupted downloads; other workers may be writing the recent ones
+        tmp_dir = os.path.join(self.root, "tmp")
+        cutoff = time.time() - TMP_MAX_AGE
+        for name in os.listdir(tmp_dir):
+            path = os.path.join(tmp_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    _remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _index_path(self, key: str) -> str:
+        return os.path.join(self.root, "index", hashlib.sha256(key.encode()).hexdigest())
+
+    def _read_index(self, key: str) -> Optional[str]:
+        try:
+            with open(self._index_path(key)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _write_index(self, key: str, digest: str):
+        _write_atomic(self._index_path(key), digest.encode())
+
+    async def serve(self, request: Request, digest: str, cache_control: str) -> Response:
+        """
+        Serve a cached object
+
+        Honors If-None-Match, single byte ranges (with If-Range) and
+        Accept-Encoding; ranged requests always get the identity encoding so
+        offsets refer to the original bytes.
+        """
+        path = self.object_path(digest)
+        etag = f'"{digest}"'
+        headers = {
+            "ETag": etag,
+            "Cache-Control": cache_control,
+            "Accept-Ranges": "bytes",
+            "Vary": "Accept-Encoding"
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag in {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}:
+            return Response(status_code=304, headers=headers)
+
+        try:
+            size = (await asyncio.to_thread(os.stat, path)).st_size
+        except FileNotFoundError:
+            return Response(status_code=404)
+
+        range_header = request.headers.get("range")
+        if_range = request.headers.get("if-range")
+        if range_header and (if_range is None or if_range.strip() == etag):
+            byte_range = _parse_range(range_header, size)
+            if byte_range is None:
+                headers["Content-Range"] = f"bytes */{size}"
+                return Response(status_code=416, headers=headers)
+            if byte_range != (0, size - 1):
+                start, end = byte_range
+                headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+                headers["Content-Length"] = str(end - start + 1)
+                return self._file_response(path, start, end - start + 1, 206, headers, request)
+
+        accepted = accepted_encodings(request.headers.get("accept-encoding", ""))
+        for encoding, suffix in ENCODINGS:
+            if accepted.get(encoding, 0) <= 0:
+                continue
+            try:
+                encoded_size = (await asyncio.to_thread(os.stat, path + suffix)).st_size
+            except FileNotFoundError:
+                continue
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(encoded_size)
+            return self._file_response(path + suffix, 0, encoded_size, 200, headers, request)
+
+        headers["Content-Length"] = str(size)
+        return self._file_response(path, 0, size, 200, headers, request)
+
+    @staticmethod
+    def _file_response(
+        path: str,
+        offset: int,
+        length: int,
+        status_code: int,
+        headers: Dict[str, str],
+        request: Request
+    ) -> Response:
+        if request.method == "HEAD":
+            return Response(status_code=status_code, headers=headers, media_type=GLB_MEDIA_TYPE)
+        return StreamingResponse(
+            _read_file(path, offset, length),
+            status_code=status_code,
+            headers=headers,
+            media_type=GLB_MEDIA_TYPE
+        )
+
+async def _read_file(path: str, offset: int, length: int):
+    async with aiofiles.open(path, "rb") as f:
+        await f.seek(offset)
+        remaining = length
+        while remaining > 0:
+            chunk = await f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single "bytes=" range into inclusive (start, end)
+
+    Multiple ranges are answered with the whole file (allowed by RFC 9110);
+    unsatisfiable or malformed ranges return None.
+    """
+    if "," in header:
+        return (0, size - 1) if size else None
+    match = _RANGE_PATTERN.match(header.strip())
+    if match is None or size == 0:
+        return None
+
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if start >= size or (last and int(last) < start):
+            return None
+    elif last:
+        # Suffix range: the final N bytes
+        start = max(size - int(last), 0)
+        end = size - 1
+        if int(last) == 0:
+            return None
+    else:
+        return None
+    return start, end
+
+def _compress(encoding: str, data: bytes) -> Optional[bytes]:
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(data, quality=11)
+    return None
+
+def _read_bytes(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+def _write_atomic(path: str, data: bytes):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def _touch(path: str) -> bool:
+    """Mark a file recently used; False when it doesn't exist"""
+    try:
+        os.utime(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def proxied_url(url: str, base_url: str) -> str:
+    """Public URL that serves url through the proxy"""
+    return f"{base_url.rstrip('/')}/api/assets/glb?src={quote(url, safe='')}"
+
+def create_asset_cache(client=None) -> AssetCache:
+    """Create the asset cache configured by environment variables"""
+    return AssetCache(
+        os.getenv("ASSET_CACHE_PATH", "./storage/assets"),
+        max_bytes=int(os.getenv("ASSET_CACHE_MAX_BYTES", str(2 * 1024 ** 3))),
+        max_object_bytes=int(os.getenv("ASSET_CACHE_MAX_OBJECT_BYTES", str(64 * 1024 ** 2))),
+        allowed_hosts=[
+            host.strip()
+            for host in os.getenv("ASSET_PROXY_HOSTS", DEFAULT_ALLOWED_HOSTS).split(",")
+            if host.strip()
+        ],
+        client=client
+    )
@@ -0,0 +1,383 @@
+# Backend/avatar_cache.py
+"""
+Avatar Record Cache
+Read-through / write-through cache in front of the avatar store: a small
+in-process L1 per worker and a shared Redis L2, with single-flight loading
+and invalidations pushed to every worker over Redis pub/sub.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from avatar_store import AvatarRecord, AvatarStore
+from serialization import dumps, loads
+from single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "avatar:invalidate"
+
+class MemoryCacheBackend:
+    """In-process stand-in for Redis, for tests and single-process development"""
+
+    def __init__(self):
+        self.values: Dict[str, tuple] = {}
+        self.subscribers: List[Callable] = []
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self.values.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self.values[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: int, only_if_missing: bool = False) -> bool:
+        if only_if_missing and await self.get(key) is not None:
+            return False
+        self.values[key] = (value, time.monotonic() + ttl)
+        return True
+
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return [await self.get(key) for key in keys]
+
+    async def set_many(self, items: Dict[str, bytes], ttl: int, only_if_missing: bool = False):
+        for key, value in items.items():
+            await self.set(key, value, ttl, only_if_missing)
+
+    async def delete(self, key: str):
+        self.values.pop(key, None)
+
+    async def publish(self, channel: str, message: str):
+        for callback in list(self.subscribers):
+            callback(message)
+
+    async def subscribe(self, channel: str, callback: Callable):
+        self.subscribers.append(callback)
+
+    async def close(self):
+        self.subscribers.clear()
+
+class RedisCacheBackend:
+    """Shared cache tier on Redis"""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+        self.client = redis.from_url(url)
+        self._listener: Optional[asyncio.Task] = None
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: int, only_if_missing: bool = False) -> bool:
+        return bool(await self.client.set(key, value, ex=ttl, nx=only_if_missing))
+
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return await self.client.mget(keys) if keys else []
+
+    async def set_many(self, items: Dict[str, bytes], ttl: int, only_if_missing: bool = False):
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(key, value, ex=ttl, nx=only_if_missing)
+            await pipe.execute()
+
+    async def delete(self, key: str):
+        await self.client.delete(key)
+
+    async def publish(self, channel: str, message: str):
+        await self.client.publish(channel, message)
+
+    async def subscribe(self, channel: str, callback: Callable):
+        self._listener = asyncio.create_task(self._listen(channel, callback))
+
+    async def _listen(self, channel: str, callback: Callable):
+        """Deliver pub/sub messages, reconnecting with backoff if Redis goes away"""
+        delay = 0.5
+        while True:
+            try:
+                pubsub = self.client.pubsub()
+                await pubsub.subscribe(channel)
+                delay = 0.5
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        data = message["data"]
+                        callback(data.decode() if isinstance(data, bytes) else data)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Avatar invalidation listener lost Redis connection: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+        await self.client.close()
+
+class _LocalCache:
+    """Bounded LRU with per-entry expiry"""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: OrderedDict = OrderedDict()
+
+    def get(self, key: str):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, value, ttl: Optional[float] = None):
+        self.entries[key] = (value, time.monotonic() + (ttl if ttl is not None else self.ttl))
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def discard(self, key: str):
+        self.entries.pop(key, None)
+
+class AvatarCache:
+    """
+    Cached view of an AvatarStore
+
+    Reads check the worker-local L1, then the shared L2, then the store; only
+    one store load per avatar is in flight per worker at a time. Writes go to
+    the store first, then refresh L2 and tell every other worker to drop its
+    L1 copy. Misses are remembered briefly in L1 so unknown IDs cannot hammer
+    the database.
+    """
+
+    def __init__(
+        self,
+        store: AvatarStore,
+        backend,
+        ttl: int = 300,
+        local_ttl: float = 30.0,
+        local_max_entries: int = 10000,
+        negative_ttl: float = 1.0
+    ):
+        self.store = store
+        self.backend = backend
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.local = _LocalCache(local_max_entries, local_ttl)
+        self.worker_id = uuid.uuid4().hex
+        self._inflight = SingleFlight()
+        # Bumped by every write seen by this worker, to spot writes racing a bulk load
+        self._generation = 0
+
+    async def start(self):
+        # Per process: with a preloaded app, forked workers share the instance built in the master
+        self.worker_id = uuid.uuid4().hex
+        await self.backend.subscribe(INVALIDATION_CHANNEL, self._on_invalidation)
+
+    async def close(self):
+        await self.backend.close()
+
+    async def get(self, avatar_id: str) -> Optional[AvatarRecord]:
+        """Read-through lookup"""
+        entry = self.local.get(avatar_id)
+        if entry is not None:
+            return entry[0]
+
+        return await self._inflight.run(avatar_id, lambda: self._load(avatar_id))
+
+    async def get_many(self, avatar_ids: List[str]) -> Dict[str, AvatarRecord]:
+        """Read-through lookup of many avatars: L1, then one L2 MGET, then one store query"""
+        found: Dict[str, AvatarRecord] = {}
+        missing = []
+        for avatar_id in dict.fromkeys(avatar_ids):
+            entry = self.local.get(avatar_id)
+            if entry is None:
+                missing.append(avatar_id)
+            elif entry[0] is not None:
+                found[avatar_id] = entry[0]
+
+        if missing:
+            try:
+                cached = await self.backend.get_many([self._key(avatar_id) for avatar_id in missing])
+            except Exception as e:
+                logger.warning(f"Avatar cache read failed: {e}")
+                cached = [None] * len(missing)
+
+            still_missing = []
+            for avatar_id, value in zip(missing, cached):
+                if value is None:
+                    still_missing.append(avatar_id)
+                else:
+                    record = _deserialize(value)
+                    self.local.set(avatar_id, record)
+                    found[avatar_id] = record
+
+            if still_missing:
+                generation = self._generation
+                loaded = await self.store.get_many(still_missing)
+                for avatar_id in still_missing:
+                    record = loaded.get(avatar_id)
+                    # A write during the load may be newer than what was read
+                    if generation == self._generation:
+                        self.local.set(avatar_id, record, ttl=None if record else self.negative_ttl)
+                    if record is not None:
+                        found[avatar_id] = record
+                try:
+                    # As in _load, a concurrent writer's newer copy wins over this read
+                    await self.backend.set_many(
+                        {self._key(r.avatar_id): _serialize(r) for r in loaded.values()},
+                        self.ttl,
+                        only_if_missing=True
+                    )
+                except Exception as e:
+                    logger.warning(f"Avatar cache fill failed: {e}")
+
+        return found
+
+    async def put(self, avatar_data: Dict) -> AvatarRecord:
+        """Write-through insert"""
+        record = await self.store.put(avatar_data)
+        await self._publish(record)
+        return record
+
+    async def put_many(self, avatars: List[Dict]) -> List[AvatarRecord]:
+        """Write-through bulk insert"""
+        records = await self.store.put_many(avatars)
+        await self._publish_many(records)
+        return records
+
+    async def update_measurements(
+        self,
+        avatar_id: str,
+        measurements: Dict,
+        updated_at: str
+    ) -> Optional[AvatarRecord]:
+        """Write-through measurement update"""
+        record = await self.store.update_measurements(avatar_id, measurements, updated_at)
+        if record is not None:
+            await self._publish(record)
+        return record
+
+    async def update_measurements_many(
+        self,
+        updates: Dict[str, Dict],
+        updated_at: str
+    ) -> Dict[str, AvatarRecord]:
+        """Write-through bulk measurement update"""
+        records = await self.store.update_measurements_many(updates, updated_at)
+        await self._publish_many(list(records.values()))
+        return records
+
+    async def _load(self, avatar_id: str) -> Optional[AvatarRecord]:
+        try:
+            cached = await self.backend.get(self._key(avatar_id))
+        except Exception as e:
+            # The shared tier is an optimisation; fall back to the store
+            logger.warning(f"Avatar cache read failed: {e}")
+            cached = None
+
+        if cached is not None:
+            record = _deserialize(cached)
+            self.local.set(avatar_id, record)
+            return record
+
+        record = await self.store.get(avatar_id)
+        if record is None:
+            self.local.set(avatar_id, None, ttl=self.negative_ttl)
+            return None
+
+        try:
+            # Don't overwrite a newer copy a concurrent writer may have stored
+            await self.backend.set(self._key(avatar_id), _serialize(record), self.ttl, only_if_missing=True)
+        except Exception as e:
+            logger.warning(f"Avatar cache fill failed: {e}")
+        self.local.set(avatar_id, record)
+        return record
+
+    async def _publish(self, record: AvatarRecord):
+        self._generation += 1
+        self.local.set(record.avatar_id, record)
+        try:
+            await self.backend.set(self._key(record.avatar_id), _serialize(record), self.ttl)
+            await self.backend.publish(INVALIDATION_CHANNEL, f"{self.worker_id}:{record.avatar_id}")
+        except Exception as e:
+            # Other workers converge when their L1 entries expire
+            logger.warning(f"Avatar cache write-through failed: {e}")
+
+    async def _publish_many(self, records: List[AvatarRecord]):
+        if not records:
+            return
+        self._generation += 1
+        for record in records:
+            self.local.set(record.avatar_id, record)
+        try:
+            await self.backend.set_many(
+                {self._key(r.avatar_id): _serialize(r) for r in records}, self.ttl
+            )
+            avatar_ids = ",".join(r.avatar_id for r in records)
+            await self.backend.publish(INVALIDATION_CHANNEL, f"{self.worker_id}:{avatar_ids}")
+        except Exception as e:
+            logger.warning(f"Avatar cache write-through failed: {e}")
+
+    def _on_invalidation(self, message: str):
+        sender, _, avatar_ids = message.partition(":")
+        if sender != self.worker_id:
+            self._generation += 1
+            for avatar_id in avatar_ids.split(","):
+                self.local.discard(avatar_id)
+
+    @staticmethod
+    def _key(avatar_id: str) -> str:
+        return f"avatar:{avatar_id}"
+
+def _serialize(record: AvatarRecord) -> bytes:
+    """Bookkeeping fields on the first line, the record's encoded body after it"""
+    header = dumps({
+        "avatarId": record.avatar_id,
+        "userId": record.user_id,
+        "createdAt": record.created_at.isoformat(),
+        "updatedAt": record.updated_at.isoformat(),
+        "revision": record.revision
+    })
+    return header + b"\n" + record.body
+
+def _deserialize(value: bytes) -> AvatarRecord:
+    header, _, body = value.partition(b"\n")
+    payload = loads(header)
+    return AvatarRecord(
+        avatar_id=payload["avatarId"],
+        data=loads(body),
+        user_id=payload["userId"],
+        created_at=datetime.fromisoformat(payload["createdAt"]),
+        updated_at=datetime.fromisoformat(payload["updatedAt"]),
+        revision=payload["revision"],
+        body=body
+    )
+
+def create_avatar_cache(store: AvatarStore, redis_url: Optional[str] = None) -> AvatarCache:
+    """
+    Create the avatar cache for REDIS_URL
+
+    Without a Redis URL the shared tier is an in-process stand-in, which is
+    only correct for a single worker.
+    """
+    redis_url = redis_url or os.getenv("REDIS_URL")
+    backend = RedisCacheBackend(redis_url) if redis_url else MemoryCacheBackend()
+    return AvatarCache(
+        store,
+        backend,
+        ttl=int(os.getenv("AVATAR_CACHE_TTL", "300")),
+        local_ttl=float(os.getenv("AVATAR_CACHE_LOCAL_TTL", "30")),
+        local_max_entries=int(os.getenv("AVATAR_CACHE_LOCAL_SIZE", "10000"))
+    )
@@ -0,0 +1,569 @@
+# Backend/avatar_store.py
+"""
+Persistent Avatar Store
+Async storage for avatar records with a PostgreSQL backend (asyncpg pool) for
+deployments and a SQLite backend (aiosqlite) for local development and tests.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class AvatarRecord:
+    """One stored avatar plus its bookkeeping columns"""
+    avatar_id: str
+    data: Dict
+    user_id: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+    revision: int = 1
+    # Encoded JSON of data, produced once on write and served as-is on read
+    body: bytes = field(default=b"", repr=False)
+
+    @classmethod
+    def from_avatar_data(cls, avatar_data: Dict) -> "AvatarRecord":
+        """Build a record from the avatar response dict used by the API"""
+        metadata = avatar_data.get("metadata", {})
+        created_at = _parse_timestamp(metadata.get("created_at"))
+        return cls(
+            avatar_id=avatar_data["avatarId"],
+            data=avatar_data,
+            user_id=metadata.get("measurements", {}).get("userId"),
+            created_at=created_at,
+            updated_at=_parse_timestamp(metadata.get("updated_at")) or created_at,
+            body=dumps(avatar_data)
+        )
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+class AvatarStore:
+    """
+    Base class for avatar storage backends
+
+    Single writes are grouped: every put() issued within batch_window seconds
+    (or until max_batch records are queued) is written with one statement, and
+    each caller resumes once its batch has been committed.
+    """
+
+    def __init__(self, batch_window: float = 0.002, max_batch: int = 500):
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self._pending: List = []
+        self._flush_handle = None
+        # Flushes started by the batch timer, kept referenced until they finish
+        self._flushes: Set[asyncio.Task] = set()
+
+    async def connect(self):
+        raise NotImplementedError
+
+    async def close(self):
+        await self._flush()
+        # Let timer flushes already writing finish before subclasses close connections
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    async def get(self, avatar_id: str) -> Optional[AvatarRecord]:
+        records = await self.get_many([avatar_id])
+        return records.get(avatar_id)
+
+    async def get_many(self, avatar_ids: List[str]) -> Dict[str, AvatarRecord]:
+        raise NotImplementedError
+
+    async def list_by_user(
+        self,
+        user_id: str,
+        limit: int = 50,
+        before: Optional[datetime] = None
+    ) -> List[AvatarRecord]:
+        raise NotImplementedError
+
+    async def put(self, avatar_data: Dict) -> AvatarRecord:
+        """Insert or replace an avatar, batched with concurrent writes"""
+        record = AvatarRecord.from_avatar_data(avatar_data)
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((record, future))
+
+        if len(self._pending) >= self.max_batch:
+            await self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.batch_window, self._schedule_flush)
+
+        return await future
+
+    async def put_many(self, avatars: List[Dict]) -> List[AvatarRecord]:
+        """Insert or replace many avatars in one write"""
+        records = [AvatarRecord.from_avatar_data(avatar) for avatar in avatars]
+        if records:
+            await self._write_records(records)
+        return records
+
+    async def update_measurements(
+        self,
+        avatar_id: str,
+        measurements: Dict,
+        updated_at: str
+    ) -> Optional[AvatarRecord]:
+        raise NotImplementedError
+
+    async def update_measurements_many(
+        self,
+        updates: Dict[str, Dict],
+        updated_at: str
+    ) -> Dict[str, AvatarRecord]:
+        """
+        Update measurements for many avatars in one round trip
+
+        Args:
+            updates: avatar_id -> measurements
+            updated_at: ISO timestamp applied to every update
+
+        Returns:
+            Updated records by ID; unknown IDs are absent
+        """
+        raise NotImplementedError
+
+    async def _write_records(self, records: List[AvatarRecord]):
+        raise NotImplementedError
+
+    def _schedule_flush(self):
+        task = asyncio.get_running_loop().create_task(self._flush())
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        try:
+            await self._write_records([record for record, _ in batch])
+        except Exception as e:
+            logger.error(f"Avatar batch write failed ({len(batch)} records): {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for record, future in batch:
+            if not future.done():
+                future.set_result(record)
+
+class PostgresAvatarStore(AvatarStore):
+    """PostgreSQL backend using an asyncpg connection pool"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS avatars (
+            avatar_id TEXT PRIMARY KEY,
+            user_id TEXT,
+            created_at TIMESTAMPTZ NOT NULL,
+            updated_at TIMESTAMPTZ NOT NULL,
+            revision INTEGER NOT NULL DEFAULT 1,
+            data JSONB NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS avatars_user_id_created_at_idx ON avatars (user_id, created_at DESC);
+        CREATE INDEX IF NOT EXISTS avatars_created_at_idx ON avatars (created_at);
+    """
+
+    COLUMNS = "avatar_id, user_id, created_at, updated_at, revision, data::text AS data"
+
+    def __init__(self, dsn: str, min_size: int = 2, max_size: int = 10, **kwargs):
+        super().__init__(**kwargs)
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.pool = None
+
+    async def connect(self):
+        import asyncpg
+        self.pool = await asyncpg.create_pool(
+            self.dsn,
+            min_size=self.min_size,
+            max_size=self.max_size,
+            command_timeout=10
+        )
+        async with self.pool.acquire() as connection:
+            await connection.execute(self.SCHEMA)
+        logger.info(f"Avatar store connected to PostgreSQL (pool {self.min_size}-{self.max_size})")
+
+    async def close(self):
+        await super().close()
+        if self.pool is not None:
+            await self.pool.close()
+
+    async def get_many(self, avatar_ids: List[str]) -> Dict[str, AvatarRecord]:
+        rows = await self.pool.fetch(
+            f"SELECT {self.COLUMNS} FROM avatars WHERE avatar_id = ANY($1::text[])",
+            list(avatar_ids)
+        )
+        return {row["avatar_id"]: self._to_record(row) for row in rows}
+
+    async def list_by_user(
+        self,
+        user_id: str,
+        limit: int = 50,
+        before: Optional[datetime] = None
+    ) -> List[AvatarRecord]:
+        rows = await self.pool.fetch(
+            f"""
+            SELECT {self.COLUMNS} FROM avatars
+            WHERE user_id = $1 AND ($2::timestamptz IS NULL OR created_at < $2)
+            ORDER BY created_at DESC
+            LIMIT $3
+            """,
+            user_id, before, limit
+        )
+        return [self._to_record(row) for row in rows]
+
+    async def update_measurements(
+        self,
+        avatar_id: str,
+        measurements: Dict,
+        updated_at: str
+    ) -> Optional[AvatarRecord]:
+        row = await self.pool.fetchrow(
+            f"""
+            UPDATE avatars SET
+                data = jsonb_set(
+                    jsonb_set(data, '{{metadata,measurements}}', $2::jsonb),
+                    '{{metadata,updated_at}}', to_jsonb($3::text)
+                ),
+                user_id = COALESCE($2::jsonb ->> 'userId', user_id),
+                updated_at = $4,
+                revision = revision + 1
+            WHERE avatar_id = $1
+            RETURNING {self.COLUMNS}
+            """,
+            avatar_id, json.dumps(measurements), updated_at, _parse_timestamp(updated_at)
+        )
+        return self._to_record(row) if row else None
+
+    async def update_measurements_many(
+        self,
+        updates: Dict[str, Dict],
+        updated_at: str
+    ) -> Dict[str, AvatarRecord]:
+        if not updates:
+            return {}
+        rows = await self.pool.fetch(
+            f"""
+            UPDATE avatars AS a SET
+                data = jsonb_set(
+                    jsonb_set(a.data, '{{metadata,measurements}}', u.measurements),
+                    '{{metadata,updated_at}}', to_jsonb($3::text)
+                ),
+                user_id = COALESCE(u.measurements ->> 'userId', a.user_id),
+                updated_at = $4,
+                revision = a.revision + 1
+            FROM unnest($1::text[], $2::jsonb[]) AS u(avatar_id, measurements)
+            WHERE a.avatar_id = u.avatar_id
+            RETURNING a.avatar_id, a.user_id, a.created_at, a.updated_at, a.revision, a.data::text AS data
+            """,
+            list(updates.keys()),
+            [json.dumps(measurements) for measurements in updates.values()],
+            updated_at,
+            _parse_timestamp(updated_at)
+        )
+        return {row["avatar_id"]: self._to_record(row) for row in rows}
+
+    async def _write_records(self, records: List[AvatarRecord]):
+        async with self.pool.acquire() as connection:
+            await connection.executemany(
+                """
+                INSERT INTO avatars (avatar_id, user_id, created_at, updated_at, data)
+                VALUES ($1, $2, $3, $4, $5::jsonb)
+                ON CONFLICT (avatar_id) DO UPDATE SET
+                    user_id = EXCLUDED.user_id,
+                    updated_at = EXCLUDED.updated_at,
+                    data = EXCLUDED.data,
+                    revision = avatars.revision + 1
+                """,
+                [
+                    (r.avatar_id, r.user_id, r.created_at, r.updated_at, r.body.decode())
+                    for r in records
+                ]
+            )
+
+    @staticmethod
+    def _to_record(row) -> AvatarRecord:
+        # The stored JSON text is already a valid encoding of the record
+        body = row["data"].encode()
+        return AvatarRecord(
+            avatar_id=row["avatar_id"],
+            data=loads(body),
+            user_id=row["user_id"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+            revision=row["revision"],
+            body=body
+        )
+
+class SQLiteAvatarStore(AvatarStore):
+    """
+    SQLite backend in WAL mode: one dedicated writer connection and a small
+    pool of read-only connections
+
+    SQLite allows a single writer at a time, so writes queue on the writer
+    here instead of contending for the database lock across the pool.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS avatars (
+            avatar_id TEXT PRIMARY KEY,
+            user_id TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            revision INTEGER NOT NULL DEFAULT 1,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS avatars_user_id_created_at_idx ON avatars (user_id, created_at DESC);
+        CREATE INDEX IF NOT EXISTS avatars_created_at_idx ON avatars (created_at);
+    """
+
+    COLUMNS = "avatar_id, user_id, created_at, updated_at, revision, data"
+
+    def __init__(self, path: str, pool_size: int = 4, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.pool_size = pool_size
+        self._readers: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Queue] = None
+
+    async def connect(self):
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        self._writer = asyncio.Queue()
+        self._writer.put_nowait(await self._open())
+        async with self._acquire_writer() as connection:
+            await connection.executescript(self.SCHEMA)
+            await connection.commit()
+
+        # An in-memory database is private to its connection, so reads share the writer
+        if self.path == ":memory:":
+            self._readers = self._writer
+        else:
+            self._readers = asyncio.Queue()
+            for _ in range(self.pool_size):
+                self._readers.put_nowait(await self._open(read_only=True))
+        logger.info(f"Avatar store connected to SQLite at {self.path} (1 writer, {self._readers.qsize()} readers)")
+
+    async def _open(self, read_only: bool = False):
+        import aiosqlite
+
+        connection = await aiosqlite.connect(self.path)
+        connection.row_factory = aiosqlite.Row
+        await connection.execute("PRAGMA journal_mode=WAL")
+        await connection.execute("PRAGMA synchronous=NORMAL")
+        await connection.execute("PRAGMA busy_timeout=5000")
+        if read_only:
+            await connection.execute("PRAGMA query_only=ON")
+        return connection
+
+    async def close(self):
+        await super().close()
+        # For an in-memory database both are the same queue; the second pass finds it empty
+        for connections in (self._readers, self._writer):
+            while connections is not None and not connections.empty():
+                connection = connections.get_nowait()
+                await connection.close()
+
+    def _acquire(self):
+        return _PooledConnection(self._readers)
+
+    def _acquire_writer(self):
+        return _PooledConnection(self._writer)
+
+    async def get_many(self, avatar_ids: List[str]) -> Dict[str, AvatarRecord]:
+        avatar_ids = list(avatar_ids)
+        records = {}
+        # Stay well below SQLite's bound parameter limit
+        for start in range(0, len(avatar_ids), 500):
+            chunk = avatar_ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            async with self._acquire() as connection:
+                cursor = await connection.execute(
+                    f"SELECT {self.COLUMNS} FROM avatars WHERE avatar_id IN ({placeholders})",
+                    chunk
+                )
+                rows = await cursor.fetchall()
+            for row in rows:
+                records[row["avatar_id"]] = self._to_record(row)
+        return records
+
+    async def list_by_user(
+        self,
+        user_id: str,
+        limit: int = 50,
+        before: Optional[datetime] = None
+    ) -> List[AvatarRecord]:
+        async with self._acquire() as connection:
+            cursor = await connection.execute(
+                f"""
+                SELECT {self.COLUMNS} FROM avatars
+                WHERE user_id = ? AND (? IS NULL OR created_at < ?)
+                ORDER BY created_at DESC
+                LIMIT ?
+                """,
+                (user_id, _format_timestamp(before), _format_timestamp(before), limit)
+            )
+            rows = await cursor.fetchall()
+        return [self._to_record(row) for row in rows]
+
+    async def update_measurements(
+        self,
+        avatar_id: str,
+        measurements: Dict,
+        updated_at: str
+    ) -> Optional[AvatarRecord]:
+        async with self._acquire_writer() as connection:
+            cursor = await connection.execute(
+                """
+                UPDATE avatars SET
+                    data = json_set(
+                        data,
+                        '$.metadata.measurements', json(?),
+                        '$.metadata.updated_at', ?
+                    ),
+                    user_id = COALESCE(json_extract(?, '$.userId'), user_id),
+                    updated_at = ?,
+                    revision = revision + 1
+                WHERE avatar_id = ?
+                RETURNING avatar_id, user_id, created_at, updated_at, revision, data
+                """,
+                (json.dumps(measurements), updated_at, json.dumps(measurements), updated_at, avatar_id)
+            )
+            row = await cursor.fetchone()
+            await connection.commit()
+        return self._to_record(row) if row else None
+
+    async def update_measurements_many(
+        self,
+        updates: Dict[str, Dict],
+        updated_at: str
+    ) -> Dict[str, AvatarRecord]:
+        records = {}
+        # One connection and one transaction for the whole batch
+        async with self._acquire_writer() as connection:
+            for avatar_id, measurements in updates.items():
+                encoded = json.dumps(measurements)
+                cursor = await connection.execute(
+                    """
+                    UPDATE avatars SET
+                        data = json_set(
+                            data,
+                            '$.metadata.measurements', json(?),
+                            '$.metadata.updated_at', ?
+                        ),
+                        user_id = COALESCE(json_extract(?, '$.userId'), user_id),
+                        updated_at = ?,
+                        revision = revision + 1
+                    WHERE avatar_id = ?
+                    RETURNING avatar_id, user_id, created_at, updated_at, revision, data
+                    """,
+                    (encoded, updated_at, encoded, updated_at, avatar_id)
+                )
+                row = await cursor.fetchone()
+                if row is not None:
+                    records[avatar_id] = self._to_record(row)
+            await connection.commit()
+        return records
+
+    async def _write_records(self, records: List[AvatarRecord]):
+        async with self._acquire_writer() as connection:
+            await connection.executemany(
+                """
+                INSERT INTO avatars (avatar_id, user_id, created_at, updated_at, data)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (avatar_id) DO UPDATE SET
+                    user_id = excluded.user_id,
+                    updated_at = excluded.updated_at,
+                    data = excluded.data,
+                    revision = avatars.revision + 1
+                """,
+                [
+                    (
+                        r.avatar_id,
+                        r.user_id,
+                        _format_timestamp(r.created_at),
+                        _format_timestamp(r.updated_at),
+                        r.body.decode()
+                    )
+                    for r in records
+                ]
+            )
+            await connection.commit()
+
+    @staticmethod
+    def _to_record(row) -> AvatarRecord:
+        body = row["data"].encode()
+        return AvatarRecord(
+            avatar_id=row["avatar_id"],
+            data=loads(body),
+            user_id=row["user_id"],
+            created_at=_parse_timestamp(row["created_at"]),
+            updated_at=_parse_timestamp(row["updated_at"]),
+            revision=row["revision"],
+            body=body
+        )
+
+def _format_timestamp(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+class _PooledConnection:
+    """Async context manager that borrows a connection from a queue"""
+
+    def __init__(self, connections: asyncio.Queue):
+        self.connections = connections
+        self.connection = None
+
+    async def __aenter__(self):
+        self.connection = await self.connections.get()
+        return self.connection
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            await self.connection.rollback()
+        self.connections.put_nowait(self.connection)
+
+def create_avatar_store(database_url: Optional[str] = None) -> AvatarStore:
+    """
+    Create the avatar store for a database URL
+
+    Args:
+        database_url: postgresql://... or sqlite:///path (defaults to DATABASE_URL)
+
+    Returns:
+        An unconnected store; call connect() on startup
+    """
+    database_url = database_url or os.getenv("DATABASE_URL", "sqlite:///./storage/avatars.db")
+
+    if database_url.startswith(("postgresql://", "postgres://")):
+        return PostgresAvatarStore(
+            database_url,
+            min_size=int(os.getenv("DATABASE_POOL_MIN", "2")),
+            max_size=int(os.getenv("DATABASE_POOL_MAX", "10"))
+        )
+
+    if database_url.startswith("sqlite://"):
+        path = database_url[len("sqlite://"):]
+        if path.startswith("/"):
+            path = path[1:]
+        return SQLiteAvatarStore(path or ":memory:")
+
+    raise ValueError(f"Unsupported DATABASE_URL: {database_url}")
@@ -0,0 +1,329 @@
+# Backend/benchmark.py
+"""
+API Benchmark
+Drives the FastAPI app with a weighted mix of requests at a fixed
+concurrency and reports throughput and p50/p95/p99 latency per endpoint.
+
+By default the app runs in-process through httpx's ASGI transport, which
+measures the application without socket or server overhead. --server
+starts a local uvicorn instead, and --url targets a running deployment.
+The in-process app and the local uvicorn store avatars in a throwaway
+SQLite file unless --database-url names one.
+
+    python benchmark.py --scenario mixed --concurrency 32 --duration 10 --save baselines/mixed.json
+    python benchmark.py --scenario mixed --compare baselines/mixed.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Relative weights of operations per scenario
+SCENARIOS = {
+    "mixed": {"generate": 10, "get": 45, "update": 10, "catalog": 25, "fit": 10},
+    "read-heavy": {"get": 70, "catalog": 25, "generate": 5},
+    "write-heavy": {"generate": 45, "update": 45, "get": 10},
+    "generate": {"generate": 1},
+    "get": {"get": 1},
+    "update": {"update": 1},
+    "catalog": {"catalog": 1},
+    "fit": {"fit": 1}
+}
+
+CATALOG_QUERIES = [
+    {},
+    {"type": "shirt"},
+    {"sort": "price_asc", "limit": "20"},
+    {"facets": "true"},
+    {"maxPrice": "60", "sort": "price_desc"}
+]
+
+# Avatars created before timing starts so reads and updates have targets
+SEED_AVATARS = 50
+
+def _measurements(rng: random.Random) -> Dict:
+    return {
+        "height": round(rng.uniform(150, 200), 1),
+        "weight": round(rng.uniform(45, 120), 1),
+        "chest": round(rng.uniform(80, 120), 1),
+        "waist": round(rng.uniform(60, 110), 1),
+        "hips": round(rng.uniform(80, 120), 1)
+    }
+
+class Workload:
+    """Issues one request per call to run(), keeping a pool of known avatar ids"""
+
+    def __init__(self, client: httpx.AsyncClient, seed: int):
+        self.client = client
+        self.rng = random.Random(seed)
+        self.avatar_ids: List[str] = []
+
+    async def seed_avatars(self, count: int):
+        for _ in range(count):
+            await self.generate()
+
+    async def run(self, operation: str) -> httpx.Response:
+        return await getattr(self, operation)()
+
+    async def generate(self) -> httpx.Response:
+        response = await self.client.post("/api/avatar/generate", json=_measurements(self.rng))
+        if response.status_code == 200:
+            self.avatar_ids.append(response.json()["avatarId"])
+        return response
+
+    async def get(self) -> httpx.Response:
+        return await self.client.get(f"/api/avatar/{self.rng.choice(self.avatar_ids)}")
+
+    async def update(self) -> httpx.Response:
+        avatar_id = self.rng.choice(self.avatar_ids)
+        return await self.client.put(f"/api/avatar/{avatar_id}/update", json=_measurements(self.rng))
+
+    async def catalog(self) -> httpx.Response:
+        return await self.client.get("/api/clothing/catalog", params=self.rng.choice(CATALOG_QUERIES))
+
+    async def fit(self) -> httpx.Response:
+        return await self.client.post("/api/clothing/fit", json={
+            "avatarId": self.rng.choice(self.avatar_ids),
+            "clothingId": "shirt-001",
+            "size": self.rng.choice(["S", "M", "L"])
+        })
+
+async def run_load(
+    client: httpx.AsyncClient,
+    scenario: str,
+    concurrency: int,
+    duration: float,
+    requests: Optional[int] = None,
+    seed: int = 1
+) -> Dict:
+    """Run the scenario and collect latencies per operation"""
+    workload = Workload(client, seed)
+    await workload.seed_avatars(SEED_AVATARS)
+
+    operations = list(SCENARIOS[scenario])
+    weights = list(SCENARIOS[scenario].values())
+    latencies: Dict[str, List[float]] = {operation: [] for operation in operations}
+    errors: Dict[str, int] = {operation: 0 for operation in operations}
+    remaining = [requests]
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_seed: int):
+        rng = random.Random(worker_seed)
+        while time.perf_counter() < deadline:
+            if remaining[0] is not None:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            operation = rng.choices(operations, weights)[0]
+            started = time.perf_counter()
+            try:
+                response = await workload.run(operation)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies[operation].append(time.perf_counter() - started)
+            if failed:
+                errors[operation] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(seed * 1000 + i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return summarize(latencies, errors, elapsed)
+
+def summarize(latencies: Dict[str, List[float]], errors: Dict[str, int], elapsed: float) -> Dict:
+    """Requests per second and latency percentiles (milliseconds) per operation and overall"""
+    def stats(samples: List[float], error_count: int) -> Dict:
+        samples = sorted(samples)
+        return {
+            "requests": len(samples),
+            "errors": error_count,
+            "rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+            "p50Ms": _percentile(samples, 50),
+            "p95Ms": _percentile(samples, 95),
+            "p99Ms": _percentile(samples, 99),
+            "maxMs": round(samples[-1] * 1000, 3) if samples else None
+        }
+
+    endpoints = {
+        operation: stats(samples, errors[operation])
+        for operation, samples in latencies.items()
+        if samples
+    }
+    everything = [sample for samples in latencies.values() for sample in samples]
+    return {
+        "elapsedSeconds": round(elapsed, 3),
+        "total": stats(everything, sum(errors.values())),
+        "endpoints": endpoints
+    }
+
+def compare(result: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Regressions against a saved baseline: throughput down or p95/p99 up by more than tolerance"""
+    regressions = []
+    for name, current in [("total", result["total"])] + sorted(result["endpoints"].items()):
+        previous = baseline["total"] if name == "total" else baseline["endpoints"].get(name)
+        if not previous or not previous["requests"]:
+            continue
+        if current["rps"] < previous["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: {current['rps']} req/s vs {previous['rps']} baseline")
+        for key in ("p95Ms", "p99Ms"):
+            if previous[key] and current[key] is not None and current[key] > previous[key] * (1 + tolerance):
+                regressions.append(f"{name}: {key} {current[key]} vs {previous[key]} baseline")
+    return regressions
+
+def app_environment(database_url: str) -> Dict[str, str]:
+    """Settings for an app started by the benchmark"""
+    return {
+        "DATABASE_URL": database_url,
+        # Background thumbnail renders fetch remote models and would skew timings
+        "THUMBNAILS_ENABLED": os.getenv("THUMBNAILS_ENABLED", "false")
+    }
+
+async def benchmark_in_process(args, environment: Dict[str, str]) -> Dict:
+    # Before main is imported: it reads its settings at import time
+    os.environ.update(environment)
+    from main import app
+
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            return await run_load(client, args.scenario, args.concurrency, args.duration, args.requests, args.seed)
+    finally:
+        await app.router.shutdown()
+
+async def benchmark_url(args, base_url: str) -> Dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        return await run_load(client, args.scenario, args.concurrency, args.duration, args.requests, args.seed)
+
+def start_server(workers: int, environment: Dict[str, str]) -> Tuple[subprocess.Popen, str]:
+    """Start uvicorn on a free local port and wait until it answers"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    env = dict(os.environ, **environment)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            if httpx.get(f"{base_url}/api/health", timeout=1.0).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn did not start within 30s")
+
+def print_report(result: Dict):
+    print(f"{'endpoint':<12}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in sorted(result["endpoints"].items()) + [("total", result["total"])]:
+        # Percentiles are None without samples
+        p50, p95, p99 = (_cell(stats[key]) for key in ("p50Ms", "p95Ms", "p99Ms"))
+        print(f"{name:<12}{stats['requests']:>10}{stats['errors']:>8}{stats['rps']:>10}{p50:>10}{p95:>10}{p99:>10}")
+
+def _cell(value: Optional[float]) -> str:
+    return "-" if value is None else str(value)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="API throughput and latency benchmark")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="mixed")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load")
+    parser.add_argument("--requests", type=int, help="stop after this many requests")
+    parser.add_argument("--seed", type=int, default=1)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--server", action="store_true", help="benchmark a local uvicorn instead of in-process")
+    target.add_argument("--url", help="benchmark a running server")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers with --server")
+    parser.add_argument(
+        "--database-url",
+        help="DATABASE_URL of the in-process or --server app (default: a throwaway SQLite file)"
+    )
+    parser.add_argument("--save", help="write the result as a JSON baseline")
+    parser.add_argument("--compare", help="baseline JSON to compare against; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    process = None
+    if args.url:
+        mode = "url"
+        result = asyncio.run(benchmark_url(args, args.url))
+    else:
+        # Seed avatars and benchmark writes never reach the developer's database
+        with tempfile.TemporaryDirectory(prefix="benchmark-") as scratch:
+            database_url = args.database_url or f"sqlite:///{os.path.join(scratch, 'avatars.db')}"
+            environment = app_environment(database_url)
+            if args.server:
+                mode = "uvicorn"
+                process, base_url = start_server(args.workers, environment)
+                try:
+                    result = asyncio.run(benchmark_url(args, base_url))
+                finally:
+                    process.terminate()
+                    process.wait()
+            else:
+                mode = "in-process"
+                result = asyncio.run(benchmark_in_process(args, environment))
+
+    result.update({
+        "scenario": args.scenario,
+        "mode": mode,
+        "concurrency": args.concurrency,
+        "python": platform.python_version(),
+        "recordedAt": datetime.now().isoformat()
+    })
+    print_report(result)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Saved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} of {args.compare}")
+    return 0
+
+def _percentile(samples: List[float], percentile: float) -> Optional[float]:
+    """Nearest-rank percentile of sorted samples, in milliseconds"""
+    if not samples:
+        return None
+    index = min(len(samples) - 1, max(0, math.ceil(percentile / 100 * len(samples)) - 1))
+    return round(samples[index] * 1000, 3)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,505 @@
+# Backend/blob_storage.py
+"""
+Blob Storage
+Async object storage for avatar meshes, fitted garments, textures and
+thumbnails, on local disk (via aiofiles), S3-compatible buckets (AWS S3,
+MinIO) or in memory.
+
+Large objects are streamed in both directions: uploads go out as
+multipart uploads with several parts in flight, downloads are ranged and
+read chunk by chunk, so a worker never holds a whole artifact in memory.
+put_content() stores objects under their SHA-256, so identical uploads
+are kept once.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import uuid
+from typing import AsyncIterable, AsyncIterator, Dict, List, Optional, Tuple
+
+import aiofiles
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 256 * 1024
+
+# S3 requires parts of at least 5 MiB (except the last)
+PART_SIZE = 8 * 1024 * 1024
+MAX_CONCURRENCY = 4
+
+class BlobNotFoundError(Exception):
+    """No object is stored under the key"""
+
+def content_key(digest: str, prefix: str = "sha256", suffix: str = "") -> str:
+    """Key of a content-addressed object, fanned out by the digest's first byte"""
+    return f"{prefix}/{digest[:2]}/{digest}{suffix}"
+
+def is_digest(value: str) -> bool:
+    """True for a lowercase hex SHA-256 digest"""
+    return len(value) == 64 and all(c in "0123456789abcdef" for c in value)
+
+class BlobStorage:
+    """
+    Operations shared by the storage backends
+
+    Backends implement exists, size, stream, write, write_stream, delete
+    and _store_spooled; read, download and put_content build on those.
+    """
+
+    spool_dir: Optional[str] = None
+
+    async def read(self, key: str) -> Optional[bytes]:
+        """Whole object, for small ones (manifests, thumbnails); None if missing"""
+        try:
+            return b"".join([chunk async for chunk in self.stream(key)])
+        except BlobNotFoundError:
+            return None
+
+    async def download(self, key: str, path: str):
+        """Copy an object to a local file, chunk by chunk"""
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            async with aiofiles.open(tmp_path, "wb") as f:
+                async for chunk in self.stream(key):
+                    await f.write(chunk)
+            await asyncio.to_thread(os.replace, tmp_path, path)
+        except BaseException:
+            await asyncio.to_thread(_remove, tmp_path)
+            raise
+
+    async def put_content(
+        self,
+        chunks: AsyncIterable[bytes],
+        content_type: str,
+        prefix: str = "sha256",
+        suffix: str = "",
+        max_bytes: Optional[int] = None
+    ) -> Dict:
+        """
+        Store a stream under its content hash, once
+
+        The stream is spooled to a temporary file while it is hashed; it is
+        only uploaded when no object with the same digest exists.
+
+        Args:
+            chunks: Object content
+            content_type: Media type stored with the object
+            prefix: Key prefix, e.g. "meshes"
+            suffix: Key suffix, e.g. ".glb"
+            max_bytes: Reject larger streams with ValueError
+
+        Returns:
+            {"key", "digest", "size", "created"}
+        """
+        os.makedirs(self._spool_directory(), exist_ok=True)
+        tmp_path = os.path.join(self._spool_directory(), uuid.uuid4().hex)
+        hasher = hashlib.sha256()
+        size = 0
+        try:
+            async with aiofiles.open(tmp_path, "wb") as f:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if max_bytes is not None and size > max_bytes:
+                        raise ValueError(f"Content exceeds {max_bytes} bytes")
+                    hasher.update(chunk)
+                    await f.write(chunk)
+
+            digest = hasher.hexdigest()
+            key = content_key(digest, prefix, suffix)
+            created = not await self.exists(key)
+            if created:
+                await self._store_spooled(key, tmp_path, size, content_type)
+        finally:
+            await asyncio.to_thread(_remove, tmp_path)
+
+        if created:
+            logger.info(f"Stored {key} ({size} bytes)")
+        return {"key": key, "digest": digest, "size": size, "created": created}
+
+    def _spool_directory(self) -> str:
+        return self.spool_dir or os.path.join(tempfile.gettempdir(), "blob-spool")
+
+class MemoryBlobStorage(BlobStorage):
+    """In-process stand-in for tests and local development"""
+
+    def __init__(self):
+        self.objects: Dict[str, bytes] = {}
+        self.content_types: Dict[str, str] = {}
+
+    async def exists(self, key: str) -> bool:
+        return key in self.objects
+
+    async def size(self, key: str) -> Optional[int]:
+        data = self.objects.get(key)
+        return None if data is None else len(data)
+
+    async def stream(self, key: str, offset: int = 0, length: Optional[int] = None) -> AsyncIterator[bytes]:
+        data = self.objects.get(key)
+        if data is None:
+            raise BlobNotFoundError(key)
+        end = len(data) if length is None else min(offset + length, len(data))
+        for start in range(offset, end, CHUNK_SIZE):
+            yield data[start:min(start + CHUNK_SIZE, end)]
+
+    async def write(self, key: str, data: bytes, content_type: str):
+        self.objects[key] = bytes(data)
+        self.content_types[key] = content_type
+
+    async def write_stream(self, key: str, chunks: AsyncIterable[bytes], content_type: str) -> int:
+        data = b"".join([chunk async for chunk in chunks])
+        await self.write(key, data, content_type)
+        return len(data)
+
+    async def delete(self, key: str):
+        self.objects.pop(key, None)
+        self.content_types.pop(key, None)
+
+    async def _store_spooled(self, key: str, path: str, size: int, content_type: str):
+        async with aiofiles.open(path, "rb") as f:
+            await self.write(key, await f.read(), content_type)
+
+class LocalBlobStorage(BlobStorage):
+    """Objects as files under a root directory; writes land atomically via rename"""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        # Spooled uploads are renamed into place, so they must be on the same filesystem
+        self.spool_dir = os.path.join(self.root, ".tmp")
+        os.makedirs(self.spool_dir, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        parts = key.split("/")
+        if any(part in ("", ".", "..") for part in parts):
+            raise ValueError(f"Invalid storage key: {key}")
+        return os.path.join(self.root, *parts)
+
+    async def exists(self, key: str) -> bool:
+        return await asyncio.to_thread(os.path.exists, self.path(key))
+
+    async def size(self, key: str) -> Optional[int]:
+        try:
+            return (await asyncio.to_thread(os.stat, self.path(key))).st_size
+        except FileNotFoundError:
+            return None
+
+    async def stream(self, key: str, offset: int = 0, length: Optional[int] = None) -> AsyncIterator[bytes]:
+        try:
+            f = await aiofiles.open(self.path(key), "rb")
+        except FileNotFoundError:
+            raise BlobNotFoundError(key) from None
+        try:
+            await f.seek(offset)
+            remaining = length
+            while remaining is None or remaining > 0:
+                chunk = await f.read(CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            await f.close()
+
+    async def write(self, key: str, data: bytes, content_type: str):
+        async def single():
+            yield data
+        await self.write_stream(key, single(), content_type)
+
+    async def write_stream(self, key: str, chunks: AsyncIterable[bytes], content_type: str) -> int:
+        tmp_path = os.path.join(self.spool_dir, uuid.uuid4().hex)
+        size = 0
+        try:
+            async with aiofiles.open(tmp_path, "wb") as f:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    await f.write(chunk)
+            await self._store_spooled(key, tmp_path, size, content_type)
+        finally:
+            await asyncio.to_thread(_remove, tmp_path)
+        return size
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(_remove, self.path(key))
+
+    async def _store_spooled(self, key: str, path: str, size: int, content_type: str):
+        target = self.path(key)
+        await asyncio.to_thread(os.makedirs, os.path.dirname(target), exist_ok=True)
+        await asyncio.to_thread(os.replace, path, target)
+
+class S3BlobStorage(BlobStorage):
+    """
+    Objects in an S3-compatible bucket (AWS S3, MinIO)
+
+    boto3 is blocking, so every call runs in a thread; objects larger than
+    one part go up as multipart uploads with up to max_concurrency parts
+    in flight, and download() fetches byte ranges in parallel.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        endpoint_url: Optional[str] = None,
+        cache_control: Optional[str] = None,
+        part_size: int = PART_SIZE,
+        max_concurrency: int = MAX_CONCURRENCY
+    ):
+        import boto3
+        from botocore.config import Config
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.cache_control = cache_control
+        self.part_size = max(part_size, 5 * 1024 * 1024)
+        self.max_concurrency = max(1, max_concurrency)
+        # One pooled connection per concurrent part, plus headroom for other requests
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            config=Config(max_pool_connections=self.max_concurrency * 2 + 2)
+        )
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def _put_args(self, content_type: str) -> Dict:
+        args = {"ContentType": content_type}
+        if self.cache_control:
+            args["CacheControl"] = self.cache_control
+        return args
+
+    async def exists(self, key: str) -> bool:
+        return await self.size(key) is not None
+
+    async def size(self, key: str) -> Optional[int]:
+        from botocore.exceptions import ClientError
+        try:
+            response = await asyncio.to_thread(self.client.head_object, Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if _is_missing(e):
+                return None
+            raise
+        return response["ContentLength"]
+
+    async def stream(self, key: str, offset: int = 0, length: Optional[int] = None) -> AsyncIterator[bytes]:
+        from botocore.exceptions import ClientError
+        args = {"Bucket": self.bucket, "Key": self._key(key)}
+        if offset or length is not None:
+            last = "" if length is None else str(offset + length - 1)
+            args["Range"] = f"bytes={offset}-{last}"
+        if length == 0:
+            return
+        try:
+            response = await asyncio.to_thread(self.client.get_object, **args)
+        except ClientError as e:
+            if _is_missing(e):
+                raise BlobNotFoundError(key) from None
+            raise
+
+        body = response["Body"]
+        try:
+            while True:
+                chunk = await asyncio.to_thread(body.read, CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            body.close()
+
+    async def write(self, key: str, data: bytes, content_type: str):
+        await asyncio.to_thread(
+            self.client.put_object,
+            Bucket=self.bucket,
+            Key=self._key(key),
+            Body=data,
+            **self._put_args(content_type)
+        )
+
+    async def write_stream(self, key: str, chunks: AsyncIterable[bytes], content_type: str) -> int:
+        """
+        Upload a stream of unknown length
+
+        Chunks are gathered into parts; at most max_concurrency parts are
+        uploading and one is filling at any time. A stream shorter than
+        one part is sent with a single PUT.
+        """
+        buffer = bytearray()
+        upload = None
+        size = 0
+        try:
+            async for chunk in chunks:
+                buffer += chunk
+                size += len(chunk)
+                if len(buffer) >= self.part_size:
+                    if upload is None:
+                        upload = await self._start_multipart(key, content_type)
+                    await upload.submit(bytes(buffer))
+                    buffer.clear()
+
+            if upload is None:
+                await self.write(key, bytes(buffer), content_type)
+            else:
+                if buffer:
+                    await upload.submit(bytes(buffer))
+                await upload.complete()
+        except BaseException:
+            if upload is not None:
+                await upload.abort()
+            raise
+        return size
+
+    async def download(self, key: str, path: str):
+        """Fetch an object into a local file with parallel ranged GETs"""
+        size = await self.size(key)
+        if size is None:
+            raise BlobNotFoundError(key)
+        if size <= self.part_size:
+            await super().download(key, path)
+            return
+
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch(offset: int):
+            async with semaphore:
+                async with aiofiles.open(tmp_path, "r+b") as f:
+                    await f.seek(offset)
+                    async for chunk in self.stream(key, offset, min(self.part_size, size - offset)):
+                        await f.write(chunk)
+
+        try:
+            async with aiofiles.open(tmp_path, "wb") as f:
+                await f.truncate(size)
+            await asyncio.gather(*(fetch(offset) for offset in range(0, size, self.part_size)))
+            await asyncio.to_thread(os.replace, tmp_path, path)
+        except BaseException:
+            await asyncio.to_thread(_remove, tmp_path)
+            raise
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self.client.delete_object, Bucket=self.bucket, Key=self._key(key))
+
+    async def _store_spooled(self, key: str, path: str, size: int, content_type: str):
+        if size <= self.part_size:
+            async with aiofiles.open(path, "rb") as f:
+                await self.write(key, await f.read(), content_type)
+            return
+
+        upload = await self._start_multipart(key, content_type)
+        try:
+            async with aiofiles.open(path, "rb") as f:
+                while True:
+                    part = await f.read(self.part_size)
+                    if not part:
+                        break
+                    await upload.submit(part)
+            await upload.complete()
+        except BaseException:
+            await upload.abort()
+            raise
+
+    async def _start_multipart(self, key: str, content_type: str) -> "_MultipartUpload":
+        response = await asyncio.to_thread(
+            self.client.create_multipart_upload,
+            Bucket=self.bucket,
+            Key=self._key(key),
+            **self._put_args(content_type)
+        )
+        return _MultipartUpload(self, self._key(key), response["UploadId"])
+
+class _MultipartUpload:
+    """Parts of one multipart upload, sent concurrently in the background"""
+
+    def __init__(self, storage: S3BlobStorage, key: str, upload_id: str):
+        self.storage = storage
+        self.key = key
+        self.upload_id = upload_id
+        self.parts: List[Tuple[int, str]] = []
+        self.tasks: List[asyncio.Task] = []
+        self.slots = asyncio.Semaphore(storage.max_concurrency)
+
+    async def submit(self, data: bytes):
+        """Start uploading the next part; waits while max_concurrency parts are in flight"""
+        await self.slots.acquire()
+        number = len(self.tasks) + 1
+        self.tasks.append(asyncio.create_task(self._upload(number, data)))
+
+    async def complete(self):
+        await asyncio.gather(*self.tasks)
+        await asyncio.to_thread(
+            self.storage.client.complete_multipart_upload,
+            Bucket=self.storage.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            MultipartUpload={"Parts": [
+                {"PartNumber": number, "ETag": etag} for number, etag in sorted(self.parts)
+            ]}
+        )
+
+    async def abort(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        try:
+            await asyncio.to_thread(
+                self.storage.client.abort_multipart_upload,
+                Bucket=self.storage.bucket,
+                Key=self.key,
+                UploadId=self.upload_id
+            )
+        except Exception as e:
+            logger.warning(f"Could not abort multipart upload of {self.key}: {e}")
+
+    async def _upload(self, number: int, data: bytes):
+        try:
+            response = await asyncio.to_thread(
+                self.storage.client.upload_part,
+                Bucket=self.storage.bucket,
+                Key=self.key,
+                UploadId=self.upload_id,
+                PartNumber=number,
+                Body=data
+            )
+            self.parts.append((number, response["ETag"]))
+        finally:
+            self.slots.release()
+
+def _is_missing(error) -> bool:
+    return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def create_blob_storage(
+    kind: Optional[str] = None,
+    path: Optional[str] = None,
+    prefix: str = "",
+    cache_control: Optional[str] = None
+) -> BlobStorage:
+    """
+    Storage backend configured by environment variables
+
+    Args:
+        kind: "local", "s3" or "memory" (default: BLOB_STORAGE, else local)
+        path: Root directory for local storage (default: BLOB_STORAGE_PATH)
+        prefix: Key prefix inside the S3 bucket
+        cache_control: Cache-Control stored with S3 objects
+    """
+    kind = (kind or os.getenv("BLOB_STORAGE", "local")).lower()
+    if kind == "s3":
+        return S3BlobStorage(
+            bucket=os.environ["S3_BUCKET_NAME"],
+            prefix=prefix,
+            endpoint_url=os.getenv("S3_ENDPOINT_URL"),
+            cache_control=cache_control,
+            part_size=int(os.getenv("S3_PART_SIZE", str(PART_SIZE))),
+            max_concurrency=int(os.getenv("S3_MAX_CONCURRENCY", str(MAX_CONCURRENCY)))
+        )
+    if kind == "memory":
+        return MemoryBlobStorage()
+    return LocalBlobStorage(path or os.getenv("BLOB_STORAGE_PATH", "./storage/blobs"))
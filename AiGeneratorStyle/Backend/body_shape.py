@@ -0,0 +1,232 @@
+# Backend/body_shape.py
+"""
+Body Shape
+Vectorised Ready Player Me body shape parameters for columns of
+measurements, plus chunked CSV/NDJSON readers so partner imports of
+millions of customer rows run in bounded memory.
+
+    python body_shape.py customers.csv --output shapes.csv
+"""
+
+import argparse
+import itertools
+import logging
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple, Union
+
+import numpy as np
+
+from serialization import loads
+
+logger = logging.getLogger(__name__)
+
+# BMI bins: type i covers BMI_EDGES[i-1] <= bmi < BMI_EDGES[i]
+BODY_TYPES = ("thin", "athletic", "average", "muscular", "heavy")
+BMI_EDGES = np.array([18.5, 22.0, 25.0, 28.0])
+# Values outside [BMI_MIN, BMI_MAX) (and missing heights) classify as average
+BMI_MIN = 0.0
+BMI_MAX = 100.0
+DEFAULT_BODY_TYPE = BODY_TYPES.index("average")
+
+BODY_TYPE_WEIGHT = np.array([-0.5, 0.0, 0.3, 0.5, 1.0])
+BODY_TYPE_MUSCLE = np.array([0.0, 0.5, 0.2, 0.8, 0.1])
+
+MEASUREMENT_COLUMNS = ("height", "weight", "chest", "waist", "hips")
+# Used where a measurement is missing
+MEASUREMENT_DEFAULTS = {"height": 170.0, "weight": 70.0, "chest": 95.0, "waist": 80.0, "hips": 95.0}
+# (centre, half-range) mapping a girth onto Ready Player Me's -1..1 morph scale
+GIRTH_NORMALIZATION = {"chest": (95.0, 30.0), "waist": (80.0, 25.0), "hips": (95.0, 30.0)}
+AVERAGE_HEIGHT_M = 1.7
+
+CHUNK_ROWS = 65536
+
+# Numeric columns written by the CLI after bodyType
+OUTPUT_COLUMNS = ("bmi", "weight", "muscle", "chest", "waist", "hips", "height")
+
+def classify_bmi(bmi: np.ndarray) -> np.ndarray:
+    """Body type index (into BODY_TYPES) per BMI value"""
+    codes = np.searchsorted(BMI_EDGES, bmi, side="right").astype(np.uint8)
+    codes[~((bmi >= BMI_MIN) & (bmi < BMI_MAX))] = DEFAULT_BODY_TYPE
+    return codes
+
+def compute_body_shapes(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Body shape parameters for many people at once
+
+    Args:
+        columns: Equal-length arrays keyed by measurement name (cm and kg);
+            NaN or absent columns fall back to MEASUREMENT_DEFAULTS
+
+    Returns:
+        Arrays: bodyType (index into BODY_TYPES), bmi, and the morph targets
+        weight, muscle, chest, waist, hips and height
+    """
+    length = len(next(iter(columns.values()))) if columns else 0
+    values = {}
+    for name in MEASUREMENT_COLUMNS:
+        column = columns.get(name)
+        if column is None:
+            values[name] = np.full(length, MEASUREMENT_DEFAULTS[name])
+        else:
+            column = np.asarray(column, dtype=np.float64)
+            values[name] = np.where(np.isnan(column), MEASUREMENT_DEFAULTS[name], column)
+
+    height_m = values["height"] / 100
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bmi = values["weight"] / (height_m * height_m)
+    body_type = classify_bmi(bmi)
+
+    shapes = {
+        "bodyType": body_type,
+        "bmi": bmi,
+        "weight": np.clip(BODY_TYPE_WEIGHT[body_type], -1, 1),
+        "muscle": np.clip(BODY_TYPE_MUSCLE[body_type], 0, 1)
+    }
+    for name, (centre, half_range) in GIRTH_NORMALIZATION.items():
+        shapes[name] = np.clip((values[name] - centre) / half_range, -1, 1)
+    shapes["height"] = height_m / AVERAGE_HEIGHT_M
+    return shapes
+
+def body_shape_record(shapes: Dict[str, np.ndarray], index: int) -> Dict:
+    """One row of compute_body_shapes() output as the single-avatar response shape"""
+    body_type = BODY_TYPES[shapes["bodyType"][index]]
+    return {
+        "bodyType": body_type,
+        "morphTargets": {
+            name: float(shapes[name][index])
+            for name in ("weight", "muscle", "chest", "waist", "hips", "height")
+        },
+        "metadata": {
+            "bmi": round(float(shapes["bmi"][index]), 2),
+            "bodyType": body_type
+        }
+    }
+
+def read_csv_chunks(
+    source: TextIO,
+    chunk_rows: int = CHUNK_ROWS,
+    id_column: Optional[str] = None
+) -> Iterator[Tuple[Optional[List[str]], Dict[str, np.ndarray]]]:
+    """
+    Measurement columns from a CSV with a header row, chunk_rows at a time
+
+    Only the measurement columns (and id_column) are parsed. Quoted fields
+    and empty numeric cells are not supported; write NaN for a missing value.
+
+    Yields:
+        (ids or None, {column: float64 array})
+    """
+    header = [name.strip() for name in source.readline().strip().split(",")]
+    positions = {name: header.index(name) for name in MEASUREMENT_COLUMNS if name in header}
+    if not positions:
+        raise ValueError(f"CSV has none of the columns {', '.join(MEASUREMENT_COLUMNS)}")
+    id_position = header.index(id_column) if id_column else None
+    names = list(positions)
+    usecols = [positions[name] for name in names]
+
+    while True:
+        lines = list(itertools.islice(source, chunk_rows))
+        if not lines:
+            return
+        table = np.loadtxt(lines, delimiter=",", usecols=usecols, dtype=np.float64, ndmin=2)
+        ids = None
+        if id_position is not None:
+            ids = [line.split(",", id_position + 1)[id_position].strip() for line in lines]
+        yield ids, {name: table[:, i] for i, name in enumerate(names)}
+
+def read_ndjson_chunks(
+    source: TextIO,
+    chunk_rows: int = CHUNK_ROWS,
+    id_column: Optional[str] = None
+) -> Iterator[Tuple[Optional[List[str]], Dict[str, np.ndarray]]]:
+    """Measurement columns from newline-delimited JSON objects, chunk_rows at a time"""
+    while True:
+        lines = [line for line in itertools.islice(source, chunk_rows) if line.strip()]
+        if not lines:
+            return
+        rows = loads("[" + ",".join(lines) + "]")
+        count = len(rows)
+        columns = {
+            name: np.fromiter(
+                (row.get(name) if row.get(name) is not None else np.nan for row in rows),
+                dtype=np.float64,
+                count=count
+            )
+            for name in MEASUREMENT_COLUMNS
+        }
+        ids = [str(row.get(id_column, "")) for row in rows] if id_column else None
+        yield ids, columns
+
+def stream_body_shapes(
+    source: Union[str, TextIO],
+    file_format: Optional[str] = None,
+    chunk_rows: int = CHUNK_ROWS,
+    id_column: Optional[str] = None
+) -> Iterator[Tuple[Optional[List[str]], Dict[str, np.ndarray]]]:
+    """
+    Body shapes for every row of a CSV or NDJSON file, one chunk at a time
+
+    Args:
+        source: Path or open text file
+        file_format: "csv" or "ndjson" (default: from the file extension, else csv)
+        chunk_rows: Rows parsed and computed per chunk, bounding memory
+        id_column: Column carried through alongside the results
+
+    Yields:
+        (ids or None, compute_body_shapes() arrays) per chunk
+    """
+    if isinstance(source, str):
+        if file_format is None:
+            file_format = "ndjson" if source.endswith((".ndjson", ".jsonl")) else "csv"
+        with open(source, "r", buffering=1024 * 1024) as f:
+            yield from stream_body_shapes(f, file_format, chunk_rows, id_column)
+        return
+
+    reader = read_ndjson_chunks if file_format == "ndjson" else read_csv_chunks
+    for ids, columns in reader(source, chunk_rows, id_column):
+        yield ids, compute_body_shapes(columns)
+
+def write_csv_chunk(output: TextIO, ids: Optional[List[str]], shapes: Dict[str, np.ndarray]):
+    """Append body shapes as CSV rows (bodyType as its name)"""
+    columns = [np.array(BODY_TYPES)[shapes["bodyType"]].tolist()]
+    columns += [shapes[name].tolist() for name in OUTPUT_COLUMNS]
+    row_format = "%s," + ",".join(["%.4f"] * len(OUTPUT_COLUMNS)) + "\n"
+    if ids is not None:
+        columns.insert(0, ids)
+        row_format = "%s," + row_format
+    output.write("".join([row_format % row for row in zip(*columns)]))
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compute body shapes for a measurements file")
+    parser.add_argument("input", help="CSV (with header) or NDJSON measurements")
+    parser.add_argument("--format", choices=("csv", "ndjson"))
+    parser.add_argument("--id-column", help="column copied to the output, e.g. customer_id")
+    parser.add_argument("--output", help="CSV file for the results (default: summary only)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    output = open(args.output, "w") if args.output else None
+    counts = np.zeros(len(BODY_TYPES), dtype=np.int64)
+    started = time.perf_counter()
+    try:
+        if output is not None:
+            id_header = f"{args.id_column}," if args.id_column else ""
+            output.write(f"{id_header}bodyType,{','.join(OUTPUT_COLUMNS)}\n")
+        for ids, shapes in stream_body_shapes(args.input, args.format, args.chunk_rows, args.id_column):
+            counts += np.bincount(shapes["bodyType"], minlength=len(BODY_TYPES))
+            if output is not None:
+                write_csv_chunk(output, ids, shapes)
+    finally:
+        if output is not None:
+            output.close()
+
+    elapsed = time.perf_counter() - started
+    rows = int(counts.sum())
+    print(f"{rows} rows in {elapsed:.2f}s ({rows / elapsed if elapsed else 0:,.0f} rows/s)")
+    for name, count in zip(BODY_TYPES, counts):
+        print(f"  {name:<10}{count:>12}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
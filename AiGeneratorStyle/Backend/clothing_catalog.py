@@ -0,0 +1,391 @@
+# Backend/clothing_catalog.py
+"""
+Clothing Catalog
+Columnar, array-backed catalog with inverted indexes on type, color, size and
+brand and a sorted price index. Queries filter with boolean masks over the
+columns and only build dicts for the rows on the requested page.
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_ITEMS = [
+    {
+        "id": "shirt_001",
+        "name": "Basic T-Shirt",
+        "type": "shirt",
+        "brand": "StyleIt",
+        "modelUrl": "https://example.com/tshirt.glb",
+        "thumbnailUrl": "https://example.com/tshirt.png",
+        "sizes": ["XS", "S", "M", "L", "XL"],
+        "colors": ["white", "black", "blue", "red"],
+        "price": 29.99
+    },
+    {
+        "id": "pants_001",
+        "name": "Classic Jeans",
+        "type": "pants",
+        "brand": "StyleIt",
+        "modelUrl": "https://example.com/jeans.glb",
+        "thumbnailUrl": "https://example.com/jeans.png",
+        "sizes": ["XS", "S", "M", "L", "XL"],
+        "colors": ["blue", "black", "grey"],
+        "price": 79.99
+    },
+    {
+        "id": "dress_001",
+        "name": "Summer Dress",
+        "type": "dress",
+        "brand": "StyleIt",
+        "modelUrl": "https://example.com/dress.glb",
+        "thumbnailUrl": "https://example.com/dress.png",
+        "sizes": ["XS", "S", "M", "L", "XL"],
+        "colors": ["red", "blue", "floral"],
+        "price": 59.99
+    }
+]
+
+SORT_ORDERS = ("default", "price_asc", "price_desc")
+
+class _Dictionary:
+    """Maps string values to dense integer codes"""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+class _SingleValuedColumn:
+    """One dictionary-encoded value per row plus an inverted index"""
+
+    def __init__(self, dictionary: _Dictionary, codes: List[int]):
+        self.values = dictionary.values
+        self.lookup = dictionary.codes
+        self.codes = np.asarray(codes, dtype=np.int32)
+        # Rows sorted by code; postings for code c are rows[offsets[c]:offsets[c + 1]]
+        self.rows = np.argsort(self.codes, kind="stable").astype(np.int32)
+        self.offsets = np.concatenate(
+            [[0], np.cumsum(np.bincount(self.codes, minlength=len(self.values)))]
+        )
+
+    def postings(self, value: str) -> np.ndarray:
+        code = self.lookup.get(value)
+        if code is None:
+            return self.rows[:0]
+        return self.rows[self.offsets[code]:self.offsets[code + 1]]
+
+    def row_values(self, row: int) -> str:
+        return self.values[self.codes[row]]
+
+    def counts(self, mask: Optional[np.ndarray], rows: Optional[np.ndarray]) -> np.ndarray:
+        codes = self.codes if mask is None else self.codes[rows]
+        return np.bincount(codes, minlength=len(self.values))
+
+class _MultiValuedColumn:
+    """Several dictionary-encoded values per row (CSR layout) plus an inverted index"""
+
+    def __init__(self, dictionary: _Dictionary, codes: List[int], lengths: List[int]):
+        self.values = dictionary.values
+        self.lookup = dictionary.codes
+        self.codes = np.asarray(codes, dtype=np.int32)
+        self.row_offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        # Owning row of every entry, used for facet counting
+        self.owners = np.repeat(np.arange(len(lengths), dtype=np.int32), lengths)
+
+        order = np.argsort(self.codes, kind="stable")
+        self.rows = self.owners[order]
+        self.offsets = np.concatenate(
+            [[0], np.cumsum(np.bincount(self.codes, minlength=len(self.values)))]
+        )
+
+    def postings(self, value: str) -> np.ndarray:
+        code = self.lookup.get(value)
+        if code is None:
+            return self.rows[:0]
+        return self.rows[self.offsets[code]:self.offsets[code + 1]]
+
+    def row_values(self, row: int) -> List[str]:
+        start, end = self.row_offsets[row], self.row_offsets[row + 1]
+        return [self.values[code] for code in self.codes[start:end]]
+
+    def counts(self, mask: Optional[np.ndarray], rows: Optional[np.ndarray]) -> np.ndarray:
+        if mask is None:
+            codes = self.codes
+        elif len(rows) * 4 < len(self.row_offsets):
+            # Few matches: gather just their entries from the CSR layout
+            starts = self.row_offsets[rows]
+            lengths = self.row_offsets[rows + 1] - starts
+            entry_starts = np.cumsum(lengths) - lengths
+            entries = np.arange(lengths.sum()) + np.repeat(starts - entry_starts, lengths)
+            codes = self.codes[entries]
+        else:
+            codes = self.codes[mask[self.owners]]
+        return np.bincount(codes, minlength=len(self.values))
+
+class ClothingCatalog:
+    """Immutable, indexed clothing catalog"""
+
+    FACET_FIELDS = ("type", "brand", "color", "size")
+
+    def __init__(self, items: Iterable[Dict]):
+        ids, names, model_urls, thumbnail_urls, prices = [], [], [], [], []
+        dictionaries = {field: _Dictionary() for field in self.FACET_FIELDS}
+        type_codes, brand_codes = [], []
+        color_codes, color_lengths = [], []
+        size_codes, size_lengths = [], []
+
+        for item in items:
+            ids.append(item["id"])
+            names.append(item.get("name", ""))
+            model_urls.append(item.get("modelUrl"))
+            thumbnail_urls.append(item.get("thumbnailUrl"))
+            prices.append(float(item.get("price", 0.0)))
+            type_codes.append(dictionaries["type"].encode(item.get("type", "")))
+            brand_codes.append(dictionaries["brand"].encode(item.get("brand", "")))
+
+            colors = item.get("colors", [])
+            color_codes.extend(dictionaries["color"].encode(c) for c in colors)
+            color_lengths.append(len(colors))
+
+            sizes = item.get("sizes", [])
+            size_codes.extend(dictionaries["size"].encode(s) for s in sizes)
+            size_lengths.append(len(sizes))
+
+        self.ids = ids
+        self.names = names
+        self.model_urls = model_urls
+        self.thumbnail_urls = thumbnail_urls
+        self.size = len(ids)
+
+        self.columns = {
+            "type": _SingleValuedColumn(dictionaries["type"], type_codes),
+            "brand": _SingleValuedColumn(dictionaries["brand"], brand_codes),
+            "color": _MultiValuedColumn(dictionaries["color"], color_codes, color_lengths),
+            "size": _MultiValuedColumn(dictionaries["size"], size_codes, size_lengths)
+        }
+
+        self.prices = np.asarray(prices, dtype=np.float64)
+        self.price_order = np.argsort(self.prices, kind="stable").astype(np.int32)
+        self.sorted_prices = self.prices[self.price_order]
+        self.orders = {
+            "default": None,
+            "price_asc": self.price_order,
+            "price_desc": self.price_order[::-1]
+        }
+
+        self.version = self._content_digest()
+        self.loaded_at = datetime.now()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _content_digest(self) -> str:
+        """Hash of every column, used as the catalog version in HTTP validators"""
+        hasher = hashlib.sha256()
+        for strings in (self.ids, self.names, self.model_urls, self.thumbnail_urls):
+            hasher.update("\0".join(s or "" for s in strings).encode())
+        hasher.update(self.prices.tobytes())
+        for column in self.columns.values():
+            hasher.update("\0".join(column.values).encode())
+            hasher.update(column.codes.tobytes())
+            if isinstance(column, _MultiValuedColumn):
+                hasher.update(column.row_offsets.tobytes())
+        return hasher.hexdigest()
+
+    def query(
+        self,
+        filters: Optional[Dict[str, List[str]]] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        sort: str = "default",
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        facets: bool = False
+    ) -> Dict:
+        """
+        Filter, facet and page through the catalog
+
+        Args:
+            filters: Field name (type, brand, color, size) -> accepted values.
+                Values within a field are OR-ed, fields are AND-ed.
+            min_price, max_price: Inclusive price range
+            sort: default, price_asc or price_desc
+            limit: Page size
+            cursor: Opaque cursor returned by the previous page
+            facets: Include per-value counts for the matching items
+
+        Returns:
+            Dictionary with items, total, nextCursor and optionally facets
+        """
+        if sort not in SORT_ORDERS:
+            raise ValueError(f"Unknown sort order: {sort}")
+
+        mask = self._match(filters or {}, min_price, max_price)
+        start = self._decode_cursor(cursor, sort)
+        rows, next_position = self._page(mask, self.orders[sort], start, limit)
+
+        result = {
+            "items": [self._row(row) for row in rows],
+            "total": self.size if mask is None else int(np.count_nonzero(mask)),
+            "nextCursor": self._encode_cursor(sort, next_position) if next_position is not None else None
+        }
+
+        if facets:
+            result["facets"] = self._facets(mask)
+
+        return result
+
+    def _match(
+        self,
+        filters: Dict[str, List[str]],
+        min_price: Optional[float],
+        max_price: Optional[float]
+    ) -> Optional[np.ndarray]:
+        """Boolean row mask for the filters, or None when everything matches"""
+        mask = None
+
+        for field, values in filters.items():
+            if not values:
+                continue
+            column = self.columns.get(field)
+            if column is None:
+                raise ValueError(f"Unknown filter field: {field}")
+
+            field_mask = np.zeros(self.size, dtype=bool)
+            for value in values:
+                field_mask[column.postings(value)] = True
+            mask = field_mask if mask is None else mask & field_mask
+
+        if min_price is not None or max_price is not None:
+            lo = 0 if min_price is None else np.searchsorted(self.sorted_prices, min_price, side="left")
+            hi = self.size if max_price is None else np.searchsorted(self.sorted_prices, max_price, side="right")
+            price_mask = np.zeros(self.size, dtype=bool)
+            price_mask[self.price_order[lo:hi]] = True
+            mask = price_mask if mask is None else mask & price_mask
+
+        return mask
+
+    def _page(
+        self,
+        mask: Optional[np.ndarray],
+        order: Optional[np.ndarray],
+        start: int,
+        limit: int
+    ):
+        """Return up to limit matching rows from position start of the sort order"""
+        if mask is None:
+            end = min(start + limit, self.size)
+            positions = np.arange(start, end)
+            rows = positions if order is None else order[start:end]
+            return rows, (end if end < self.size else None)
+
+        # Scan the sort order in growing chunks so selective filters stay cheap
+        found = []
+        needed = limit
+        position = start
+        chunk = max(limit * 4, 1024)
+        while needed > 0 and position < self.size:
+            end = min(position + chunk, self.size)
+            candidates = np.arange(position, end) if order is None else order[position:end]
+            hits = np.flatnonzero(mask[candidates])
+            if len(hits) >= needed:
+                hits = hits[:needed]
+                found.append(candidates[hits])
+                position += int(hits[-1]) + 1
+                needed = 0
+                break
+            found.append(candidates[hits])
+            needed -= len(hits)
+            position = end
+            chunk *= 4
+
+        rows = np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+        more = needed == 0 and position < self.size and bool(
+            mask[position:].any() if order is None else mask[order[position:]].any()
+        )
+        return rows, (position if more else None)
+
+    def _facets(self, mask: Optional[np.ndarray]) -> Dict:
+        facets = {}
+        rows = None if mask is None else np.flatnonzero(mask)
+        for field, column in self.columns.items():
+            counts = column.counts(mask, rows)
+            nonzero = np.flatnonzero(counts)
+            facets[field] = {column.values[code]: int(counts[code]) for code in nonzero}
+
+        prices = self.prices if mask is None else self.prices[rows]
+        facets["price"] = {
+            "min": float(prices.min()) if len(prices) else None,
+            "max": float(prices.max()) if len(prices) else None
+        }
+        return facets
+
+    def _row(self, row: int) -> Dict:
+        row = int(row)
+        return {
+            "id": self.ids[row],
+            "name": self.names[row],
+            "type": self.columns["type"].row_values(row),
+            "brand": self.columns["brand"].row_values(row),
+            "modelUrl": self.model_urls[row],
+            "thumbnailUrl": self.thumbnail_urls[row],
+            "sizes": self.columns["size"].row_values(row),
+            "colors": self.columns["color"].row_values(row),
+            "price": float(self.prices[row])
+        }
+
+    @staticmethod
+    def _encode_cursor(sort: str, position: int) -> str:
+        return base64.urlsafe_b64encode(f"{sort}:{position}".encode()).decode().rstrip("=")
+
+    def _decode_cursor(self, cursor: Optional[str], sort: str) -> int:
+        if not cursor:
+            return 0
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            cursor_sort, _, position = base64.urlsafe_b64decode(padded).decode().partition(":")
+            position = int(position)
+        except ValueError:
+            raise ValueError("Invalid cursor")
+        if cursor_sort != sort or not 0 <= position <= self.size:
+            raise ValueError("Cursor does not match this query")
+        return position
+
+def load_catalog(path: Optional[str] = None) -> ClothingCatalog:
+    """
+    Load the catalog from CATALOG_PATH (JSON array or NDJSON), or the built-in items
+
+    Args:
+        path: Catalog file; defaults to the CATALOG_PATH environment variable
+
+    Returns:
+        Indexed catalog
+    """
+    path = path or os.getenv("CATALOG_PATH")
+    if not path:
+        return ClothingCatalog(DEFAULT_CATALOG_ITEMS)
+
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith((".ndjson", ".jsonl")):
+            catalog = ClothingCatalog(json.loads(line) for line in f if line.strip())
+        else:
+            catalog = ClothingCatalog(json.load(f))
+
+    logger.info(f"Loaded {len(catalog)} catalog items from {path}")
+    return catalog
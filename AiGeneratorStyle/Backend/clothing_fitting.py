@@ -1,16 +1,35 @@
 # Backend/clothing_fitting.py
+from __future__ import annotations
+
 import numpy as np
-import torch
-import trimesh
 from typing import Dict, List, Tuple, Optional
 from fastapi import HTTPException
 from pydantic import BaseModel
-import cv2
-from scipy.spatial import cKDTree
 import logging
+from lazy_imports import lazy_import
+from size_charts import SizeChartIndex, get_size_charts
+from glb_codec import read_mesh, read_skinned_mesh, save_mesh, save_skinned_mesh
+from fitting_backend import FittingBackend, blend_skin_weights, create_fitting_backend, unique_edges
+
+# Loaded on first use; annotations are strings so they do not trigger the import
+trimesh = lazy_import("trimesh")
+cv2 = lazy_import("cv2")
+spatial = lazy_import("scipy.spatial")
 
 logger = logging.getLogger(__name__)
 
+# Body parts in the order their bounds are tested; the first containing box wins
+BODY_PARTS = ("head", "torso", "legs", "chest", "waist")
+
+# Draping: per-iteration gravity step and the clearance kept from the body (m)
+GRAVITY_STEP = np.array([0.0, -0.01, 0.0])
+DRAPE_CLEARANCE = 0.02
+# Penetrations left after draping are pushed this far outside the body (m)
+COLLISION_CLEARANCE = 0.005
+
+# Joints per garment vertex in skinned exports (glTF JOINTS_0/WEIGHTS_0)
+MAX_SKIN_INFLUENCES = 4
+
 class ClothingFitRequest(BaseModel):
     avatar_id: str
     clothing_id: str
@@ -29,20 +48,23 @@ class ClothingMetadata(BaseModel):
 class ClothingFitter:
     """Handles clothing fitting operations"""
     
-    def __init__(self):
-        self.size_mappings = self._init_size_mappings()
+    def __init__(self, size_charts: Optional[SizeChartIndex] = None, backend: Optional[FittingBackend] = None):
+        self.size_charts = size_charts if size_charts is not None else get_size_charts()
+        self.backend = backend if backend is not None else create_fitting_backend()
         self.clothing_templates = self._load_clothing_templates()
         
-    def _init_size_mappings(self) -> Dict:
-        """Initialize standard size mappings"""
-        return {
-            "XS": {"chest": 86, "waist": 71, "hips": 89},
-            "S": {"chest": 91, "waist": 76, "hips": 94},
-            "M": {"chest": 97, "waist": 81, "hips": 99},
-            "L": {"chest": 107, "waist": 91, "hips": 109},
-            "XL": {"chest": 117, "waist": 101, "hips": 119},
-            "XXL": {"chest": 127, "waist": 111, "hips": 129}
-        }
+    def _size_chart(self, clothing_metadata: ClothingMetadata) -> Tuple[SizeChartIndex, int]:
+        """
+        The garment's own size_chart if it has one, else its brand's chart
+
+        Raises:
+            ValueError: The garment's size_chart has no sizes
+        """
+        if clothing_metadata.size_chart:
+            # The garment's chart is the first in its own index, whatever brand and garment it names
+            return SizeChartIndex([clothing_metadata.size_chart]), 0
+        charts = self.size_charts
+        return charts, charts.find_chart(clothing_metadata.brand, clothing_metadata.type)
     
     def _load_clothing_templates(self) -> Dict:
         """Load base clothing templates"""
@@ -58,14 +80,34 @@ class ClothingFitter:
         avatar_mesh: trimesh.Trimesh, 
         clothing_mesh: trimesh.Trimesh,
         avatar_measurements: Dict,
-        clothing_metadata: ClothingMetadata
+        clothing_metadata: ClothingMetadata,
+        avatar_skin: Optional[Dict] = None,
+        size: str = "M",
+        auto_fit: bool = True
     ) -> trimesh.Trimesh:
-        """Main fitting function"""
+        """
+        Main fitting function
+        
+        The garment is scaled from its size (ClothingFitRequest.size) in its
+        size chart to the avatar's measurements; without auto_fit it is only
+        scaled uniformly instead of per body part.
+        
+        With avatar_skin (see load_skinned_avatar) the fitted garment is also
+        bound to the avatar's skeleton: its joints, weights and skeleton are
+        kept in metadata["skin"] and export_glb_mesh writes a skinned GLB
+        that animates with the avatar on the client.
+        """
         
-        logger.info(f"Fitting clothing type: {clothing_metadata.type}")
+        logger.info(f"Fitting clothing type: {clothing_metadata.type} ({self.backend.name} backend)")
         
         # Step 1: Analyze avatar body parts
+        avatar_vertices = np.asarray(avatar_mesh.vertices)
         body_parts = self._segment_avatar(avatar_mesh)
+        vertex_parts = self._body_part_indices(avatar_vertices, body_parts)
+        
+        # Avatar arrays and nearest-vertex index shared by every step below
+        topology = self.backend.prepare_topology(avatar_mesh.faces, len(avatar_vertices))
+        surface = self.backend.prepare_surface(avatar_vertices, topology)
         
         # Step 2: Extract clothing anchor points
         anchor_points = self._extract_anchor_points(clothing_mesh, clothing_metadata.type)
@@ -74,32 +116,119 @@ class ClothingFitter:
         scale_factors = self._calculate_scale_factors(
             avatar_measurements, 
             clothing_metadata,
-            anchor_points
+            anchor_points,
+            size
         )
         
         # Step 4: Apply deformation
-        if clothing_metadata.auto_fit:
+        if auto_fit:
             fitted_mesh = self._apply_smart_deformation(
                 clothing_mesh,
-                avatar_mesh,
                 scale_factors,
-                body_parts
+                vertex_parts,
+                surface
             )
         else:
             fitted_mesh = self._apply_simple_scaling(clothing_mesh, scale_factors)
         
         # Step 5: Physics simulation for realistic draping
-        fitted_mesh = self._simulate_cloth_physics(fitted_mesh, avatar_mesh)
+        fitted_mesh = self._simulate_cloth_physics(fitted_mesh, surface)
         
         # Step 6: Collision detection and adjustment
-        fitted_mesh = self._resolve_collisions(fitted_mesh, avatar_mesh)
+        fitted_mesh = self._resolve_collisions(fitted_mesh, surface)
+        
+        # Step 7: Bind the garment to the avatar's skeleton
+        if avatar_skin is not None:
+            joints, weights = self._transfer_skin_weights(fitted_mesh, avatar_mesh, surface, avatar_skin)
+            fitted_mesh.metadata["skin"] = {
+                "joints": joints,
+                "weights": weights,
+                "skeleton": avatar_skin["skeleton"]
+            }
         
         return fitted_mesh
     
+    def fit_clothing_to_poses(
+        self,
+        avatar_poses: np.ndarray,
+        avatar_faces: np.ndarray,
+        clothing_mesh: trimesh.Trimesh,
+        avatar_measurements: Dict,
+        clothing_metadata: ClothingMetadata,
+        iterations: int = 10,
+        size: str = "M",
+        auto_fit: bool = True,
+        reference_pose: Optional[np.ndarray] = None,
+        settle_iterations: int = 3
+    ) -> np.ndarray:
+        """
+        Drape one garment over several poses of the same avatar at once
+        
+        The garment is deformed and draped once, in the reference pose it
+        was modelled for, then bound to the avatar surface there and carried
+        to every pose. Only settle_iterations draping steps and the collision
+        pass run per pose, over the whole (P, V, 3) stack; topology-dependent
+        work (vertex-face rows, garment edges, body part labels, scale
+        factors) is also done once.
+        
+        Args:
+            avatar_poses: (P, V, 3) avatar vertices per pose, sharing avatar_faces
+            avatar_faces: (F, 3) avatar triangles
+            clothing_mesh: Garment at rest
+            avatar_measurements: Body measurements in cm
+            clothing_metadata: Garment type, size chart and stretchiness
+            iterations: Draping iterations in the reference pose
+            size: Garment size in its size chart
+            auto_fit: Per-body-part deformation rather than uniform scaling
+            reference_pose: (V, 3) avatar vertices in the garment's pose, used for
+                body part segmentation and the full drape (defaults to avatar_poses[0]);
+                fitting poses one at a time against the same reference gives the same result
+            settle_iterations: Draping iterations per pose after the garment is carried over
+        
+        Returns:
+            (P, N, 3) fitted garment vertices per pose, for clothing_mesh.faces
+        """
+        backend = self.backend
+        poses = np.asarray(avatar_poses, dtype=np.float64)
+        if poses.ndim != 3 or poses.shape[2] != 3:
+            raise ValueError("avatar_poses must have shape (P, V, 3)")
+        reference = poses[0] if reference_pose is None else np.asarray(reference_pose, dtype=np.float64)
+        if reference.shape != poses.shape[1:]:
+            raise ValueError("reference_pose must have shape (V, 3) matching avatar_poses")
+        
+        logger.info(
+            f"Fitting clothing type: {clothing_metadata.type} over {len(poses)} poses ({backend.name} backend)"
+        )
+        
+        topology = backend.prepare_topology(avatar_faces, poses.shape[1])
+        reference_surface = backend.prepare_surface(reference, topology)
+        vertex_parts = self._body_part_indices(reference, self._segment_vertices(reference))
+        
+        anchor_points = self._extract_anchor_points(clothing_mesh, clothing_metadata.type)
+        scale_factors = self._calculate_scale_factors(avatar_measurements, clothing_metadata, anchor_points, size)
+        
+        rest = np.asarray(clothing_mesh.vertices, dtype=np.float64)
+        if auto_fit:
+            vertices = self._deform_vertices(backend.asarray(rest), scale_factors, vertex_parts, reference_surface)
+        else:
+            vertices = backend.asarray(rest * np.mean(list(scale_factors.values())))
+        
+        edges, rest_lengths = self._garment_edges(clothing_mesh)
+        vertices = self._drape(vertices, edges, rest_lengths, reference_surface, iterations)
+        
+        # The drape follows the body into every pose; a few steps let it settle there
+        surface = backend.prepare_surface(poses, topology)
+        vertices = backend.carry_to_poses(reference_surface, vertices, surface)
+        vertices = self._drape(vertices, edges, rest_lengths, surface, settle_iterations)
+        vertices = self._push_out_penetrations(vertices, surface)
+        return backend.to_numpy(vertices)
+    
     def _segment_avatar(self, avatar_mesh: trimesh.Trimesh) -> Dict:
         """Segment avatar into body parts"""
-        vertices = avatar_mesh.vertices
-        
+        return self._segment_vertices(np.asarray(avatar_mesh.vertices))
+    
+    def _segment_vertices(self, vertices: np.ndarray) -> Dict:
+        """Body part vertex sets of one avatar pose"""
         # Simple height-based segmentation (can be improved with ML)
         min_y, max_y = vertices[:, 1].min(), vertices[:, 1].max()
         height = max_y - min_y
@@ -189,25 +318,24 @@ class ClothingFitter:
         self,
         avatar_measurements: Dict,
         clothing_metadata: ClothingMetadata,
-        anchor_points: Dict
+        anchor_points: Dict,
+        size: str = "M"
     ) -> Dict[str, float]:
         """Calculate scaling factors for different body parts"""
         
         # Get target size measurements
-        target_size = clothing_metadata.size or "M"
-        size_measurements = self.size_mappings.get(target_size, self.size_mappings["M"])
+        charts, chart = self._size_chart(clothing_metadata)
+        size_measurements = charts.size_measurements(chart, size)
+        if size_measurements is None:
+            logger.warning(f"Size {size} is not in the {clothing_metadata.type} size chart; scaling against M")
+            size_measurements = charts.size_measurements(charts.default_chart, "M") or {}
         
         scale_factors = {}
         
         # Calculate scales based on measurement differences
-        if "chest" in avatar_measurements:
-            scale_factors["chest"] = avatar_measurements["chest"] / size_measurements["chest"]
-        
-        if "waist" in avatar_measurements:
-            scale_factors["waist"] = avatar_measurements["waist"] / size_measurements["waist"]
-        
-        if "hips" in avatar_measurements:
-            scale_factors["hips"] = avatar_measurements["hips"] / size_measurements["hips"]
+        for key in ("chest", "waist", "hips"):
+            if key in avatar_measurements and key in size_measurements:
+                scale_factors[key] = avatar_measurements[key] / size_measurements[key]
         
         # Apply stretchiness factor
         stretch_factor = 1.0 + clothing_metadata.stretchiness
@@ -219,50 +347,42 @@ class ClothingFitter:
     def _apply_smart_deformation(
         self,
         clothing_mesh: trimesh.Trimesh,
-        avatar_mesh: trimesh.Trimesh,
         scale_factors: Dict[str, float],
-        body_parts: Dict
+        vertex_parts: np.ndarray,
+        surface: Dict
     ) -> trimesh.Trimesh:
         """Apply intelligent mesh deformation"""
+        backend = self.backend
+        deformed = self._deform_vertices(
+            backend.asarray(clothing_mesh.vertices),
+            scale_factors,
+            vertex_parts,
+            surface
+        )
         
-        # Create a copy of the clothing mesh
         deformed_mesh = clothing_mesh.copy()
-        vertices = deformed_mesh.vertices.copy()
-        
-        # Build KD-tree for nearest neighbor search
-        avatar_tree = cKDTree(avatar_mesh.vertices)
-        
-        # For each clothing vertex, find nearest avatar vertex and apply weighted deformation
-        for i, vertex in enumerate(vertices):
-            # Find nearest avatar vertex
-            dist, idx = avatar_tree.query(vertex)
-            nearest_avatar_vertex = avatar_mesh.vertices[idx]
-            
-            # Determine which body part this belongs to
-            body_part = self._get_body_part(nearest_avatar_vertex, body_parts)
-            
-            # Get appropriate scale factor
-            if body_part == "chest":
-                scale = scale_factors.get("chest", 1.0)
-            elif body_part == "waist":
-                scale = scale_factors.get("waist", 1.0)
-            else:
-                scale = 1.0
-            
-            # Apply radial scaling from body center
-            center = avatar_mesh.center_mass
-            direction = vertex - center
-            direction[1] = 0  # Don't scale vertically
-            
-            # Apply scaling with distance-based falloff
-            falloff = np.exp(-dist * 0.5)  # Exponential falloff
-            effective_scale = 1.0 + (scale - 1.0) * falloff
-            
-            vertices[i] = center + direction * effective_scale
-        
-        deformed_mesh.vertices = vertices
+        deformed_mesh.vertices = backend.to_numpy(deformed)
         return deformed_mesh
     
+    def _deform_vertices(self, vertices, scale_factors: Dict[str, float], vertex_parts: np.ndarray, surface: Dict):
+        """
+        Scale garment vertices (..., N, 3) about the body's vertical axis by
+        the scale factor of the body part their nearest avatar vertex is in
+        """
+        backend = self.backend
+        distances, nearest = backend.nearest_vertices(surface, vertices)
+        
+        # Chest and waist follow their scale factors; other parts keep their size
+        part_scales = np.array([
+            scale_factors.get(part, 1.0) if part in ("chest", "waist") else 1.0
+            for part in BODY_PARTS
+        ] + [1.0])
+        scales = part_scales[vertex_parts][backend.to_numpy(nearest)]
+        
+        # Radial scaling about the body's vertical axis, fading with distance from the body
+        center = backend.center_of_mass(surface["vertices"], surface["faces"])
+        return backend.deform_radial(vertices, center[..., None, :], backend.asarray(scales), distances)
+    
     def _apply_simple_scaling(
         self,
         clothing_mesh: trimesh.Trimesh,
@@ -283,74 +403,121 @@ class ClothingFitter:
     def _simulate_cloth_physics(
         self,
         clothing_mesh: trimesh.Trimesh,
-        avatar_mesh: trimesh.Trimesh,
+        surface: Dict,
         iterations: int = 10
     ) -> trimesh.Trimesh:
         """Simple cloth physics simulation for draping effect"""
+        backend = self.backend
+        edges, rest_lengths = self._garment_edges(clothing_mesh)
+        vertices = self._drape(backend.asarray(clothing_mesh.vertices), edges, rest_lengths, surface, iterations)
+        clothing_mesh.vertices = backend.to_numpy(vertices)
+        return clothing_mesh
+    
+    def _garment_edges(self, clothing_mesh: trimesh.Trimesh) -> Tuple:
+        """Native (E, 2) edges of the garment and their lengths as fitted"""
+        vertices = np.asarray(clothing_mesh.vertices)
+        edges = unique_edges(np.asarray(clothing_mesh.faces))
+        rest_lengths = np.linalg.norm(vertices[edges[:, 1]] - vertices[edges[:, 0]], axis=1)
+        return self.backend.asarray(edges, dtype="int64"), self.backend.asarray(rest_lengths)
+    
+    def _drape(self, vertices, edges, rest_lengths, surface: Dict, iterations: int):
+        """Let garment vertices (..., N, 3) settle under gravity around the body"""
         
         # This is a simplified version - in production, use a proper physics engine
-        vertices = clothing_mesh.vertices.copy()
-        
-        # Gravity vector
-        gravity = np.array([0, -0.01, 0])
+        backend = self.backend
+        gravity = backend.asarray(GRAVITY_STEP)
         
-        # Build collision detection tree
-        avatar_tree = cKDTree(avatar_mesh.vertices)
+        # One full nearest-vertex query; later steps only follow the small moves
+        _, nearest = backend.nearest_vertices(surface, vertices)
         
         for _ in range(iterations):
-            # Apply gravity
-            vertices += gravity
+            vertices = vertices + gravity
             
-            # Collision detection and response
-            for i, vertex in enumerate(vertices):
-                dist, _ = avatar_tree.query(vertex)
-                
-                # If vertex is inside avatar, push it out
-                if dist < 0.02:  # 2cm threshold
-                    # Find surface normal and push vertex out
-                    closest_point, _, triangle_id = trimesh.proximity.closest_point(
-                        avatar_mesh, 
-                        vertex.reshape(1, 3)
-                    )
-                    
-                    normal = avatar_mesh.face_normals[triangle_id[0]]
-                    vertices[i] = closest_point[0] + normal * 0.02
-        
-        clothing_mesh.vertices = vertices
-        return clothing_mesh
+            # Edges keep their fitted lengths while the garment settles
+            vertices = backend.project_edges(vertices, edges, rest_lengths)
+            
+            # Vertices within the clearance of the body go back onto its surface, pushed out along the normal
+            distances, nearest = backend.track_nearest(surface, vertices, nearest)
+            vertices, _ = backend.push_out(
+                vertices, surface, DRAPE_CLEARANCE, DRAPE_CLEARANCE, nearest=(distances, nearest)
+            )
+        
+        return vertices
     
     def _resolve_collisions(
         self,
         clothing_mesh: trimesh.Trimesh,
-        avatar_mesh: trimesh.Trimesh
+        surface: Dict
     ) -> trimesh.Trimesh:
         """Resolve any remaining collisions between clothing and avatar"""
-        
-        # Check for intersections
-        collision = trimesh.collision.CollisionManager()
-        collision.add_object('avatar', avatar_mesh)
-        collision.add_object('clothing', clothing_mesh)
-        
-        colliding = collision.in_collision_internal()
-        
-        if colliding:
-            # Simple resolution: inflate clothing slightly
-            clothing_mesh.vertices *= 1.02
-        
+        clothing_mesh.vertices = self.backend.to_numpy(
+            self._push_out_penetrations(self.backend.asarray(clothing_mesh.vertices), surface)
+        )
         return clothing_mesh
     
-    def _get_body_part(self, vertex: np.ndarray, body_parts: Dict) -> str:
-        """Determine which body part a vertex belongs to"""
-        for part_name, part_vertices in body_parts.items():
-            if len(part_vertices) > 0:
-                # Check if vertex is within bounds of this body part
-                min_bounds = part_vertices.min(axis=0)
-                max_bounds = part_vertices.max(axis=0)
-                
-                if np.all(vertex >= min_bounds) and np.all(vertex <= max_bounds):
-                    return part_name
-        
-        return "unknown"
+    def _push_out_penetrations(self, vertices, surface: Dict):
+        """Move garment vertices behind the avatar surface (inside the body) just outside it"""
+        vertices, moved = self.backend.push_out(
+            vertices,
+            surface,
+            threshold=np.inf,
+            offset=COLLISION_CLEARANCE,
+            inside_only=True
+        )
+        if moved:
+            logger.info(f"Pushed {moved} penetrating clothing vertices out of the avatar")
+        return vertices
+    
+    def _transfer_skin_weights(
+        self,
+        clothing_mesh: trimesh.Trimesh,
+        avatar_mesh: trimesh.Trimesh,
+        surface: Dict,
+        avatar_skin: Dict
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Joints and weights of every garment vertex, interpolated from the
+        closest point on the avatar surface
+        
+        Returns:
+            (joints (V, 4) int64, weights (V, 4) float32)
+        """
+        if len(avatar_skin["joints"]) != len(avatar_mesh.vertices):
+            raise ValueError("avatar_skin does not match the avatar mesh's vertices")
+        
+        backend = self.backend
+        vertices = backend.asarray(clothing_mesh.vertices)
+        _, nearest = backend.nearest_vertices(surface, vertices)
+        _, face_ids, barycentric = backend.closest_surface_points(surface, vertices, nearest)
+        
+        corners = np.asarray(avatar_mesh.faces)[backend.to_numpy(face_ids)]
+        return blend_skin_weights(
+            avatar_skin["joints"][corners],
+            avatar_skin["weights"][corners],
+            backend.to_numpy(barycentric).astype(np.float64),
+            MAX_SKIN_INFLUENCES
+        )
+    
+    def _body_part_indices(self, points: np.ndarray, body_parts: Dict) -> np.ndarray:
+        """
+        Index into BODY_PARTS of the first part whose bounds contain each
+        point, len(BODY_PARTS) for none
+        """
+        indices = np.full(len(points), len(BODY_PARTS), dtype=np.int64)
+        unassigned = np.ones(len(points), dtype=bool)
+        for index, part_name in enumerate(BODY_PARTS):
+            part_vertices = body_parts.get(part_name)
+            if part_vertices is None or len(part_vertices) == 0:
+                continue
+            # Check if points are within bounds of this body part
+            inside = np.all(
+                (points >= part_vertices.min(axis=0)) & (points <= part_vertices.max(axis=0)),
+                axis=1
+            )
+            hits = inside & unassigned
+            indices[hits] = index
+            unassigned &= ~hits
+        return indices
     
     def auto_size_recommendation(
         self,
@@ -359,24 +526,13 @@ class ClothingFitter:
     ) -> str:
         """Recommend best clothing size based on avatar measurements"""
         
-        best_size = "M"
-        min_difference = float('inf')
-        
-        for size, size_measurements in self.size_mappings.items():
-            # Calculate total difference
-            diff = 0
-            for key in ["chest", "waist", "hips"]:
-                if key in avatar_measurements and key in size_measurements:
-                    diff += abs(avatar_measurements[key] - size_measurements[key])
-            
-            if diff < min_difference:
-                min_difference = diff
-                best_size = size
+        charts, chart = self._size_chart(clothing_metadata)
+        best_size, _ = charts.nearest(avatar_measurements, chart)
         
         # Adjust for stretchiness
         if clothing_metadata.stretchiness > 0.3:
             # Can go one size down for stretchy materials
-            sizes = list(self.size_mappings.keys())
+            sizes = charts.sizes(chart)
             current_idx = sizes.index(best_size)
             if current_idx > 0:
                 best_size = sizes[current_idx - 1]
@@ -384,6 +540,45 @@ class ClothingFitter:
         return best_size
 
 # Additional utility functions
+def load_glb_mesh(path: str) -> trimesh.Trimesh:
+    """
+    Load a GLB (e.g. a Ready Player Me avatar) as one rest-pose mesh
+    
+    Reads the memory-mapped file's accessors directly instead of a full
+    trimesh scene load, and skips trimesh's processing of the result.
+    """
+    vertices, faces = read_mesh(path)
+    return trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
+
+def load_skinned_avatar(path: str) -> Tuple[trimesh.Trimesh, Dict]:
+    """
+    load_glb_mesh() plus the avatar's skin (per-vertex joints and weights
+    and its skeleton) for fitting garments that animate with it
+    """
+    skin = read_skinned_mesh(path)
+    mesh = trimesh.Trimesh(vertices=skin["vertices"], faces=skin["faces"], process=False)
+    return mesh, skin
+
+def export_glb_mesh(mesh: trimesh.Trimesh, path: str):
+    """
+    Write a fitted mesh to a GLB file straight from its vertex and face arrays
+    
+    Meshes fitted with an avatar_skin are written as skinned meshes.
+    """
+    skin = mesh.metadata.get("skin")
+    if skin is None:
+        save_mesh(path, mesh.vertices, mesh.faces, normals=mesh.vertex_normals)
+        return
+    save_skinned_mesh(
+        path,
+        mesh.vertices,
+        mesh.faces,
+        skin["joints"],
+        skin["weights"],
+        skin["skeleton"],
+        normals=mesh.vertex_normals
+    )
+
 def load_clothing_from_image(image_path: str) -> Optional[trimesh.Trimesh]:
     """Convert 2D clothing image to 3D mesh (placeholder)"""
     # This would use AI models like PIFu or similar
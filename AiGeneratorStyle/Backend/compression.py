@@ -0,0 +1,323 @@
+# Backend/compression.py
+"""
+Response Compression
+ASGI middleware that gzip- or brotli-encodes text responses according to
+Accept-Encoding. Bodies carrying an ETag identify their content, so they
+are compressed once at a high level and later requests are served from a
+byte-bounded cache keyed by (path, ETag, encoding); other bodies are
+compressed per request at a fast level.
+
+Responses that already have a Content-Encoding or Content-Range, media that
+is compressed by nature (images, GLB models) and bodies below the minimum
+size pass through untouched.
+"""
+
+import asyncio
+import gzip
+import logging
+import os
+import zlib
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Server preference when the client weighs encodings equally
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# (per-request level, cached level); cached bodies are compressed once, so they can afford more
+COMPRESSION_LEVELS = {"gzip": (6, 9), "br": (4, 9)}
+
+# Media types worth compressing; everything else (images, models, archives) passes through
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/x-ndjson",
+    "image/svg+xml"
+)
+COMPRESSIBLE_SUFFIXES = ("+json", "+xml")
+
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+# Bodies at least this large are compressed off the event loop
+THREAD_MIN_SIZE = 64 * 1024
+
+# Cached marker for bodies that did not get smaller
+_INCOMPRESSIBLE = b""
+
+def accepted_encodings(header: str) -> Dict[str, float]:
+    """Content codings of an Accept-Encoding header with their q-values"""
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        name, _, value = params.strip().partition("=")
+        if name.strip().lower() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+def negotiate_encoding(header: str) -> Optional[str]:
+    """
+    Best supported content coding for an Accept-Encoding header
+
+    Returns:
+        "br", "gzip", or None for the identity encoding
+    """
+    if not header:
+        return None
+    accepted = accepted_encodings(header)
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def compress(encoding: str, data: bytes, level: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.partition(";")[0].strip().lower()
+    return media_type.startswith(COMPRESSIBLE_TYPES) or media_type.endswith(COMPRESSIBLE_SUFFIXES)
+
+class CompressedBodyCache:
+    """Byte-bounded LRU of compressed bodies keyed by (path, ETag, encoding)"""
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.entries: "OrderedDict[Tuple[str, str, str], bytes]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[bytes]:
+        body = self.entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return body
+
+    def set(self, key: Tuple[str, str, str], body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.total_bytes -= len(previous)
+        self.entries[key] = body
+        self.total_bytes += len(body)
+        while self.total_bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.total_bytes -= len(evicted)
+
+    def metrics(self) -> Dict:
+        return {
+            "entries": len(self.entries),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+class ResponseCompressor:
+    """Compression settings, the compressed body cache and counters of one worker"""
+
+    def __init__(self, min_size: int = DEFAULT_MIN_SIZE, cache_bytes: int = DEFAULT_CACHE_BYTES):
+        self.min_size = min_size
+        self.cache = CompressedBodyCache(cache_bytes)
+        self.compressed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    async def encode(self, path: str, etag: Optional[str], encoding: str, body: bytes) -> bytes:
+        """Compressed body, or the original when compression doesn't make it smaller"""
+        key = (path, etag, encoding) if etag else None
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached or body
+
+        level = COMPRESSION_LEVELS[encoding][key is not None]
+        if len(body) >= THREAD_MIN_SIZE:
+            encoded = await asyncio.to_thread(compress, encoding, body, level)
+        else:
+            encoded = compress(encoding, body, level)
+        if len(encoded) >= len(body):
+            encoded = _INCOMPRESSIBLE
+
+        if key is not None:
+            self.cache.set(key, encoded)
+        return encoded or body
+
+    def metrics(self) -> Dict:
+        return {
+            "encodings": list(SUPPORTED_ENCODINGS),
+            "compressedResponses": self.compressed,
+            "bytesIn": self.bytes_in,
+            "bytesOut": self.bytes_out,
+            "cache": self.cache.metrics()
+        }
+
+class CompressionMiddleware:
+    """Negotiate Accept-Encoding and compress eligible HTTP responses"""
+
+    def __init__(self, app, compressor: ResponseCompressor):
+        self.app = app
+        self.compressor = compressor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        responder = _Responder(self.compressor, scope, send)
+        await self.app(scope, receive, responder.send)
+
+class _Responder:
+    """Holds back the response start until the first body chunk shows how to encode"""
+
+    def __init__(self, owner: ResponseCompressor, scope, send):
+        self.owner = owner
+        self.path = scope["path"]
+        request_headers = Headers(scope=scope)
+        self.encoding = negotiate_encoding(request_headers.get("accept-encoding", ""))
+        self.if_none_match = request_headers.get("if-none-match", "")
+        self.downstream = send
+        self.start = None
+        self.passthrough = False
+        self.stream = None
+
+    async def send(self, message):
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            if message["status"] == 304:
+                self._match_validator(message)
+            if self._eligible(message):
+                self.start = message
+            else:
+                self.passthrough = True
+                await self.downstream(message)
+            return
+
+        if message_type != "http.response.body" or self.passthrough:
+            await self.downstream(message)
+            return
+
+        if self.stream is not None:
+            await self._stream(message)
+            return
+
+        start, self.start = self.start, None
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        headers = MutableHeaders(raw=start["headers"])
+
+        if not more_body and len(body) < self.owner.min_size:
+            self.passthrough = True
+            await self.downstream(start)
+            await self.downstream(message)
+            return
+
+        headers.add_vary_header("Accept-Encoding")
+        if self.encoding is None:
+            self.passthrough = True
+            await self.downstream(start)
+            await self.downstream(message)
+            return
+
+        if more_body:
+            # Streamed bodies are compressed chunk by chunk and never cached
+            self.stream = _StreamCompressor(self.encoding)
+            headers["Content-Encoding"] = self.encoding
+            del headers["Content-Length"]
+            _weaken_etag(headers)
+            await self.downstream(start)
+            await self._stream(message)
+            return
+
+        encoded = await self.owner.encode(self.path, headers.get("etag"), self.encoding, body)
+        if encoded is not body:
+            headers["Content-Encoding"] = self.encoding
+            headers["Content-Length"] = str(len(encoded))
+            _weaken_etag(headers)
+            self.owner.compressed += 1
+        self.owner.bytes_in += len(body)
+        self.owner.bytes_out += len(encoded)
+        await self.downstream(start)
+        await self.downstream({"type": "http.response.body", "body": encoded})
+
+    async def _stream(self, message):
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        chunk = self.stream.process(body)
+        if not more_body:
+            chunk += self.stream.finish()
+            self.owner.compressed += 1
+        self.owner.bytes_in += len(body)
+        self.owner.bytes_out += len(chunk)
+        if chunk or not more_body:
+            await self.downstream({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    def _match_validator(self, message):
+        """Answer a revalidation of an encoded copy with the same weak ETag it was served with"""
+        headers = MutableHeaders(raw=message["headers"])
+        etag = headers.get("etag")
+        if etag and f"W/{etag}" in self.if_none_match:
+            _weaken_etag(headers)
+
+    def _eligible(self, message) -> bool:
+        status = message["status"]
+        if status < 200 or status >= 300 or status in (204, 206):
+            return False
+        headers = Headers(raw=message["headers"])
+        if "content-encoding" in headers or "content-range" in headers:
+            return False
+        if "no-transform" in headers.get("cache-control", "").lower():
+            return False
+        return is_compressible(headers.get("content-type", ""))
+
+class _StreamCompressor:
+    def __init__(self, encoding: str):
+        level = COMPRESSION_LEVELS[encoding][0]
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=level)
+            self.process = self._compressor.process
+            self.finish = self._compressor.finish
+        else:
+            # wbits 31: gzip container
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+            self.process = self._compressor.compress
+            self.finish = self._compressor.flush
+
+def _weaken_etag(headers: MutableHeaders):
+    """An encoded body is a different representation, so its validator can only be weak"""
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["ETag"] = f"W/{etag}"
+
+def create_response_compressor() -> ResponseCompressor:
+    """Response compression configured by COMPRESSION_MIN_SIZE and COMPRESSION_CACHE_BYTES"""
+    return ResponseCompressor(
+        min_size=int(os.getenv("COMPRESSION_MIN_SIZE", str(DEFAULT_MIN_SIZE))),
+        cache_bytes=int(os.getenv("COMPRESSION_CACHE_BYTES", str(DEFAULT_CACHE_BYTES)))
+    )
@@ -0,0 +1,199 @@
+# Backend/conftest.py
+"""
+Shared test fixtures: a local stub origin server for outbound HTTP tests,
+a client for the API app, a call counter for checking how often a method
+runs, and a small avatar and garment scene for the fitting tests
+
+Wall-clock assertions are marked timing and only run with --timing, as
+they are unreliable on loaded machines.
+"""
+
+import asyncio
+import inspect
+from typing import Callable, Dict, List, Tuple
+
+import httpx
+import numpy as np
+import pytest
+import pytest_asyncio
+
+# AVATAR_BATCH_MAX of the api_client app
+API_BATCH_MAX = 5
+
+# Body measurements (cm) of the garment_scene avatar
+MEASUREMENTS = {"height": 175, "weight": 70, "chest": 96, "waist": 82, "hips": 98}
+
+def pytest_addoption(parser):
+    parser.addoption("--timing", action="store_true", help="run wall-clock timing tests")
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "timing: wall-clock assertion, only run with --timing")
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--timing"):
+        return
+    skip = pytest.mark.skip(reason="timing test, run with --timing")
+    for item in items:
+        if "timing" in item.keywords:
+            item.add_marker(skip)
+
+class StubOrigin:
+    """
+    Minimal HTTP/1.1 server on 127.0.0.1 answering from a route table
+
+    routes maps a path to handler(method, headers) returning
+    (status, headers, body), directly or as a coroutine. Every request is
+    recorded, and connections counts accepted sockets (keep-alive reuse).
+    """
+
+    def __init__(self):
+        self.routes: Dict[str, Callable] = {}
+        self.requests: List[Tuple[str, str, Dict[str, str]]] = []
+        self.connections = 0
+        self.server = None
+        self.port = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def hits(self, path: str) -> int:
+        return sum(1 for _, target, _ in self.requests if target.split("?")[0] == path)
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line.strip():
+                    break
+                method, target, _ = line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if not header.strip():
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                await reader.readexactly(int(headers.get("content-length", "0")))
+                self.requests.append((method, target, headers))
+
+                handler = self.routes.get(target.split("?")[0])
+                if handler is None:
+                    status, extra, body = 404, {}, b""
+                else:
+                    result = handler(method, headers)
+                    if inspect.isawaitable(result):
+                        result = await result
+                    status, extra, body = result
+                head = [f"HTTP/1.1 {status} Stub", f"Content-Length: {len(body)}"]
+                head += [f"{name}: {value}" for name, value in extra.items()]
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+                if method != "HEAD":
+                    writer.write(body)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+class RedirectToOrigin(httpx.AsyncBaseTransport):
+    """Sends every request, whatever its host and scheme, to the stub origin"""
+
+    def __init__(self, origin: StubOrigin):
+        self.origin = origin
+        self.inner = httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request.url = request.url.copy_with(scheme="http", host="127.0.0.1", port=self.origin.port)
+        return await self.inner.handle_async_request(request)
+
+    async def aclose(self):
+        await self.inner.aclose()
+
+@pytest_asyncio.fixture
+async def stub_origin():
+    origin = StubOrigin()
+    await origin.start()
+    yield origin
+    await origin.close()
+
+@pytest.fixture(scope="session")
+def api_client(tmp_path_factory):
+    """
+    TestClient on main.app, started once per session, with storage in a
+    temporary directory, the in-process cache and no outbound calls
+    """
+    from fastapi.testclient import TestClient
+
+    storage = tmp_path_factory.mktemp("api")
+    with pytest.MonkeyPatch.context() as patch:
+        for name in ("ARTIFACT_STORAGE_PATH", "ASSET_CACHE_PATH", "BLOB_STORAGE_PATH", "TEXTURE_STORAGE_PATH", "METRICS_DIR"):
+            patch.setenv(name, str(storage / name.lower()))
+        patch.setenv("DATABASE_URL", f"sqlite:///{storage / 'avatars.db'}")
+        patch.setenv("ARTIFACT_STORAGE", "local")
+        patch.setenv("TEXTURE_STORAGE", "local")
+        patch.delenv("REDIS_URL", raising=False)
+        patch.setenv("VALIDATE_AVATAR_URLS", "false")
+        patch.setenv("THUMBNAILS_ENABLED", "false")
+        patch.setenv("AVATAR_BATCH_MAX", str(API_BATCH_MAX))
+
+        import main
+        with TestClient(main.app) as client:
+            yield client
+
+@pytest.fixture
+def count_calls(monkeypatch):
+    """
+    count_calls(owner, name, record) wraps owner.name, plain or async, for
+    the rest of the test and returns the list of record(*args) of its calls
+    """
+    def count(owner, name: str, record: Callable = lambda *args: args) -> list:
+        calls = []
+        original = getattr(owner, name)
+        if inspect.iscoroutinefunction(original):
+            async def counted(*args, **kwargs):
+                calls.append(record(*args, **kwargs))
+                return await original(*args, **kwargs)
+        else:
+            def counted(*args, **kwargs):
+                calls.append(record(*args, **kwargs))
+                return original(*args, **kwargs)
+        monkeypatch.setattr(owner, name, counted)
+        return calls
+
+    return count
+
+def garment_scene(pose_count: int, subdivisions: int = 3):
+    """
+    An ellipsoid body, poses bending its upper half, and a close-fitting garment around it
+
+    Returns:
+        (poses (P, V, 3), body faces (F, 3), garment trimesh)
+    """
+    import trimesh
+
+    body = trimesh.creation.icosphere(subdivisions=subdivisions, radius=0.2)
+    body.vertices *= [1.0, 4.2, 0.8]
+    body.vertices[:, 1] += 0.9
+
+    poses = []
+    for index in range(pose_count):
+        vertices = body.vertices.copy()
+        lift = np.clip((vertices[:, 1] - 1.2) / 0.5, 0, 1)
+        vertices[:, 0] += 0.1 * np.sin(0.15 * index) * lift * np.sign(vertices[:, 0])
+        vertices[:, 2] += 0.01 * index * np.sin(8 * vertices[:, 1])
+        poses.append(vertices)
+
+    garment = trimesh.creation.icosphere(subdivisions=subdivisions, radius=0.2)
+    garment.vertices *= [1.08, 4.2 * 1.04, 0.8 * 1.08]
+    garment.vertices[:, 1] += 0.9
+    return np.array(poses), np.asarray(body.faces), garment
@@ -1,16 +1,19 @@
 # Backend/face_reconstruction.py
+from __future__ import annotations
+
 import numpy as np
-import cv2
-import trimesh
-import mediapipe as mp
 from typing import Dict, List, Tuple, Optional
-import torch
-import torch.nn as nn
 from PIL import Image
-import dlib
 import logging
 from fastapi import UploadFile
 import io
+from lazy_imports import lazy_import
+
+# Loaded on first use; annotations are strings so they do not trigger the import
+cv2 = lazy_import("cv2")
+trimesh = lazy_import("trimesh")
+mp = lazy_import("mediapipe")
+dlib = lazy_import("dlib")
 
 logger = logging.getLogger(__name__)
 
@@ -72,21 +75,7 @@ class FaceReconstructor:
             if landmarks is None:
                 raise ValueError("No face detected in image")
             
-            # Generate 3D face mesh
-            face_mesh = self._reconstruct_3d_face(landmarks, image_rgb)
-            
-            # Extract face texture
-            texture = self._extract_face_texture(image_rgb, landmarks)
-            
-            # Align face mesh to SMPL head
-            aligned_mesh = self._align_to_smpl_head(face_mesh)
-            
-            return {
-                "face_mesh": aligned_mesh,
-                "texture": texture,
-                "landmarks": landmarks,
-                "success": True
-            }
+            return self.reconstruct_from_landmarks(landmarks, image_rgb)
             
         except Exception as e:
             logger.error(f"Face processing failed: {e}")
@@ -95,6 +84,42 @@ class FaceReconstructor:
                 "error": str(e)
             }
     
+    def reconstruct_from_landmarks(
+        self,
+        landmarks: np.ndarray,
+        image_rgb: np.ndarray,
+        texture_landmarks: Optional[np.ndarray] = None
+    ) -> Dict:
+        """
+        Build the aligned face mesh and texture from already detected landmarks
+        
+        Args:
+            landmarks: (N, 3) landmarks used for the geometry
+            image_rgb: Image the texture is sampled from
+            texture_landmarks: Image-space landmarks for texturing, when the
+                geometry landmarks are not in image space (e.g. fused video capture)
+            
+        Returns:
+            Dictionary with face mesh, texture and landmarks
+        """
+        # Generate 3D face mesh
+        face_mesh = self._reconstruct_3d_face(landmarks, image_rgb)
+        
+        # Extract face texture
+        if texture_landmarks is None:
+            texture_landmarks = landmarks
+        texture = self._extract_face_texture(image_rgb, texture_landmarks)
+        
+        # Align face mesh to SMPL head
+        aligned_mesh = self._align_to_smpl_head(face_mesh)
+        
+        return {
+            "face_mesh": aligned_mesh,
+            "texture": texture,
+            "landmarks": landmarks,
+            "success": True
+        }
+    
     def _detect_landmarks(self, image: np.ndarray) -> Optional[np.ndarray]:
         """Detect facial landmarks using MediaPipe"""
         results = self.mp_face_mesh.process(image)
@@ -0,0 +1,278 @@
+# Backend/face_tracking.py
+"""
+Streaming face capture
+Runs MediaPipe Face Mesh in tracking mode over a sequence of webcam frames,
+fuses the landmarks over time and hands the stable estimate to FaceReconstructor.
+"""
+
+import numpy as np
+import logging
+import time
+from collections import deque
+from typing import Dict, Optional, Tuple
+from lazy_imports import lazy_import
+
+cv2 = lazy_import("cv2")
+mp = lazy_import("mediapipe")
+
+logger = logging.getLogger(__name__)
+
+class LandmarkFuser:
+    """
+    Temporal fusion of face landmarks with outlier rejection
+
+    Every frame is aligned to the current estimate with a similarity transform
+    so head motion does not blur the result. Whole frames whose alignment
+    residual is far above the recent median are rejected, and within the window
+    individual landmarks that stray from the per-landmark median are ignored.
+    """
+
+    def __init__(
+        self,
+        window: int = 30,
+        min_frames: int = 10,
+        outlier_k: float = 3.0,
+        stable_tolerance: float = 2e-3,
+        stable_frames: int = 5
+    ):
+        self.window = window
+        self.min_frames = min_frames
+        self.outlier_k = outlier_k
+        self.stable_tolerance = stable_tolerance
+        self.stable_frames = stable_frames
+        self.reset()
+
+    def reset(self):
+        """Drop all accumulated frames"""
+        self.frames = deque(maxlen=self.window)
+        self.residuals = deque(maxlen=self.window)
+        self.displacements = deque(maxlen=self.stable_frames)
+        self.fused: Optional[np.ndarray] = None
+        self.accepted = 0
+        self.rejected = 0
+        self.best_residual = float("inf")
+        self.best_index = -1
+
+    @property
+    def is_stable(self) -> bool:
+        """True once the fused estimate has stopped moving"""
+        return (
+            self.accepted >= self.min_frames and
+            len(self.displacements) == self.stable_frames and
+            max(self.displacements) < self.stable_tolerance
+        )
+
+    def add(self, landmarks: np.ndarray) -> bool:
+        """
+        Add one frame of landmarks
+
+        Args:
+            landmarks: (N, 3) landmark array in image space
+
+        Returns:
+            True if the frame was accepted into the window
+        """
+        normalized = self._normalize(landmarks)
+        if self.fused is None:
+            # First frame becomes the reference everything else is aligned to. It has
+            # no residual of its own, so it is the best frame only until another is accepted
+            self.frames.append(normalized)
+            self.fused = normalized
+            self.accepted += 1
+            self.best_index = self.accepted
+            return True
+
+        aligned, residual = self._align(normalized, self.fused)
+
+        # Reject whole frames with an unusually poor fit (blur, occlusion, mistracking)
+        if len(self.residuals) >= 5:
+            median = float(np.median(self.residuals))
+            mad = float(np.median(np.abs(np.asarray(self.residuals) - median)))
+            spread = max(1.4826 * mad, 0.1 * median, 1e-6)
+            if residual > median + self.outlier_k * spread:
+                self.rejected += 1
+                return False
+
+        self.frames.append(aligned)
+        self.residuals.append(residual)
+        self.accepted += 1
+
+        if residual <= self.best_residual:
+            self.best_residual = residual
+            self.best_index = self.accepted
+
+        previous = self.fused
+        self.fused = self._fuse()
+        self.displacements.append(
+            float(np.sqrt(((self.fused - previous) ** 2).sum(axis=1).mean()))
+        )
+
+        return True
+
+    def _fuse(self) -> np.ndarray:
+        """Robust per-landmark mean over the window"""
+        stack = np.stack(self.frames)  # (W, N, 3)
+        if len(stack) < 3:
+            return stack.mean(axis=0)
+
+        median = np.median(stack, axis=0)
+        deviation = np.linalg.norm(stack - median, axis=2)  # (W, N)
+        mad = np.median(deviation, axis=0) * 1.4826 + 1e-6
+        inliers = deviation <= self.outlier_k * mad
+
+        weights = inliers.astype(np.float64)
+        counts = weights.sum(axis=0)
+        fused = (stack * weights[:, :, np.newaxis]).sum(axis=0)
+        # Landmarks where every sample was rejected fall back to the median
+        valid = counts > 0
+        fused[valid] /= counts[valid, np.newaxis]
+        fused[~valid] = median[~valid]
+        return fused
+
+    @staticmethod
+    def _normalize(landmarks: np.ndarray) -> np.ndarray:
+        """Center landmarks and scale them to unit RMS radius"""
+        centered = landmarks - landmarks.mean(axis=0)
+        scale = np.sqrt((centered ** 2).sum(axis=1).mean())
+        return centered / max(scale, 1e-9)
+
+    @staticmethod
+    def _align(source: np.ndarray, target: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Rotate normalized source onto target and return it with the RMS residual"""
+        H = source.T @ target
+        U, _, Vt = np.linalg.svd(H)
+        d = np.sign(np.linalg.det(Vt.T @ U.T))
+        D = np.diag([1.0, 1.0, d])
+        R = Vt.T @ D @ U.T
+        aligned = source @ R.T
+        residual = float(np.sqrt(((aligned - target) ** 2).sum(axis=1).mean()))
+        return aligned, residual
+
+class FaceTrackingSession:
+    """
+    One webcam capture session
+
+    MediaPipe runs with static_image_mode=False, so full face detection only
+    happens on the first frame and whenever tracking is lost; the frames in
+    between use the much cheaper landmark tracker.
+    """
+
+    def __init__(
+        self,
+        reconstructor=None,
+        fuser: Optional[LandmarkFuser] = None,
+        max_frame_width: int = 640
+    ):
+        self.face_mesh = mp.solutions.face_mesh.FaceMesh(
+            static_image_mode=False,
+            max_num_faces=1,
+            refine_landmarks=True,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        )
+        self.reconstructor = reconstructor
+        self.fuser = fuser or LandmarkFuser()
+        self.max_frame_width = max_frame_width
+
+        self.frames_received = 0
+        self.frames_tracked = 0
+        self.tracking = False
+        self.started_at = time.perf_counter()
+
+        # Raw image-space landmarks and frame of the best aligned sample, for texturing
+        self.best_frame: Optional[np.ndarray] = None
+        self.best_landmarks: Optional[np.ndarray] = None
+
+    def process_frame(self, frame) -> Dict:
+        """
+        Track landmarks in one frame and fuse them
+
+        Args:
+            frame: Encoded image bytes (JPEG/PNG/WebP) or an RGB array
+
+        Returns:
+            Session status after this frame
+        """
+        image_rgb = self._decode_frame(frame)
+        self.frames_received += 1
+
+        results = self.face_mesh.process(image_rgb)
+        self.tracking = bool(results.multi_face_landmarks)
+
+        if self.tracking:
+            self.frames_tracked += 1
+            h, w = image_rgb.shape[:2]
+            landmarks = np.array([
+                [lm.x * w, lm.y * h, lm.z * w]
+                for lm in results.multi_face_landmarks[0].landmark
+            ])
+
+            if self.fuser.add(landmarks) and self.fuser.best_index == self.fuser.accepted:
+                self.best_frame = image_rgb
+                self.best_landmarks = landmarks
+
+        return self.status()
+
+    def status(self) -> Dict:
+        """Current tracking and fusion state"""
+        elapsed = time.perf_counter() - self.started_at
+        return {
+            "type": "status",
+            "framesReceived": self.frames_received,
+            "framesTracked": self.frames_tracked,
+            "framesFused": self.fuser.accepted,
+            "framesRejected": self.fuser.rejected,
+            "tracking": self.tracking,
+            "stable": self.fuser.is_stable,
+            "fps": round(self.frames_received / elapsed, 1) if elapsed > 0 else 0.0
+        }
+
+    def reconstruct(self) -> Dict:
+        """Reconstruct the face mesh from the fused landmark estimate"""
+        if self.fuser.fused is None or self.best_frame is None:
+            return {"success": False, "error": "No face tracked yet"}
+
+        if self.reconstructor is None:
+            from face_reconstruction import FaceReconstructor
+            self.reconstructor = FaceReconstructor()
+
+        # Fused landmarks live in a normalized frame; reconstruction rescales them anyway
+        result = self.reconstructor.reconstruct_from_landmarks(
+            self.fuser.fused,
+            self.best_frame,
+            texture_landmarks=self.best_landmarks
+        )
+        result["framesUsed"] = self.fuser.accepted
+        return result
+
+    def reset(self):
+        """Start fusing from scratch, e.g. after the user moved away"""
+        self.fuser.reset()
+        self.best_frame = None
+        self.best_landmarks = None
+
+    def close(self):
+        """Release the MediaPipe graph"""
+        self.face_mesh.close()
+
+    def _decode_frame(self, frame) -> np.ndarray:
+        """Decode a frame and downscale it so tracking keeps up with 30 fps on CPU"""
+        if isinstance(frame, np.ndarray):
+            image_rgb = frame
+        else:
+            nparr = np.frombuffer(frame, np.uint8)
+            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            if image is None:
+                raise ValueError("Could not decode frame")
+            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+        h, w = image_rgb.shape[:2]
+        if w > self.max_frame_width:
+            scale = self.max_frame_width / w
+            image_rgb = cv2.resize(
+                image_rgb,
+                (self.max_frame_width, int(h * scale)),
+                interpolation=cv2.INTER_AREA
+            )
+
+        return image_rgb
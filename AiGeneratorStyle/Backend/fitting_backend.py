@@ -0,0 +1,685 @@
+# Backend/fitting_backend.py
+"""
+Fitting Backend
+Array engines for the garment fitting math: nearest-vertex queries,
+closest points on the avatar surface, radial deformation, edge-length
+constraint projection and collision push-out, each over all garment
+vertices at once.
+
+The algorithms are written once against operations NumPy arrays and torch
+tensors share; a backend supplies the few primitives that differ. Avatar
+arrays may carry a leading pose axis, (P, V, 3), so one garment is draped
+over several poses of the same avatar in the same array operations. NumPy
+(with SciPy's KD-tree) suits small fits and machines without torch; the
+torch CPU backend runs the same math on intra-op thread pools so one
+large fit uses every core. FITTING_BACKEND picks one per deployment.
+"""
+
+import logging
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from lazy_imports import lazy_import
+
+torch = lazy_import("torch")
+spatial = lazy_import("scipy.spatial")
+
+logger = logging.getLogger(__name__)
+
+# Squared-length floor for degenerate triangles and edges
+EPSILON = 1e-12
+
+# Starting minimum for per-point squared-distance reductions
+_FAR = 1e30
+
+def vertex_faces(faces: np.ndarray, vertex_count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Faces around every vertex in compressed rows
+
+    Returns:
+        (offsets (V + 1,), face ids): vertex v's faces are
+        face_ids[offsets[v]:offsets[v + 1]]
+    """
+    corners = faces.reshape(-1)
+    order = np.argsort(corners, kind="stable")
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(corners, minlength=vertex_count))])
+    return offsets.astype(np.int64), (order // 3).astype(np.int64)
+
+def vertex_neighbors(faces: np.ndarray, vertex_count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Every vertex and its edge-connected neighbours in compressed rows
+
+    Returns:
+        (offsets (V + 1,), vertex ids), each row starting with the vertex itself
+    """
+    edges = unique_edges(faces)
+    loops = np.repeat(np.arange(vertex_count, dtype=np.int64)[:, None], 2, axis=1)
+    pairs = np.concatenate([loops, edges, edges[:, ::-1]])
+    # Rows sorted by source; the self loops come first within each row
+    pairs = pairs[np.argsort(pairs[:, 0], kind="stable")]
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(pairs[:, 0], minlength=vertex_count))])
+    return offsets.astype(np.int64), pairs[:, 1].copy()
+
+def unique_edges(faces: np.ndarray) -> np.ndarray:
+    """(E, 2) int64 vertex pairs of every mesh edge, each once"""
+    edges = np.sort(faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1)
+    return np.unique(edges, axis=0).astype(np.int64)
+
+def blend_skin_weights(
+    joints: np.ndarray,
+    weights: np.ndarray,
+    barycentric: np.ndarray,
+    max_influences: int = 4
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Skin weights at points inside triangles, from the triangles' corners
+
+    Corner weights are scaled by the point's barycentric weights, summed
+    per joint, and the strongest max_influences joints are kept and
+    renormalised.
+
+    Args:
+        joints: (Q, 3, K) joint indices of each triangle corner
+        weights: (Q, 3, K) their weights
+        barycentric: (Q, 3)
+
+    Returns:
+        (joints (Q, max_influences) int64, weights (Q, max_influences) float32)
+    """
+    count = len(barycentric)
+    joints = joints.reshape(count, -1).astype(np.int64)
+    weights = (weights * barycentric[:, :, None]).reshape(count, -1)
+    width = joints.shape[1]
+
+    # Sort each row by joint so equal joints are adjacent, then sum each run
+    order = np.argsort(joints, axis=1, kind="stable")
+    joints = np.take_along_axis(joints, order, axis=1)
+    weights = np.take_along_axis(weights, order, axis=1)
+    run_starts = np.ones(joints.shape, dtype=bool)
+    run_starts[:, 1:] = joints[:, 1:] != joints[:, :-1]
+    slots = (np.cumsum(run_starts, axis=1) - 1 + np.arange(count)[:, None] * width).reshape(-1)
+    summed = np.bincount(slots, weights=weights.reshape(-1), minlength=count * width).reshape(count, width)
+    run_joints = np.zeros(count * width, dtype=np.int64)
+    run_joints[slots] = joints.reshape(-1)
+    run_joints = run_joints.reshape(count, width)
+
+    strongest = np.argsort(-summed, axis=1, kind="stable")[:, :max_influences]
+    weights = np.take_along_axis(summed, strongest, axis=1)
+    joints = np.take_along_axis(run_joints, strongest, axis=1)
+    if weights.shape[1] < max_influences:
+        padding = max_influences - weights.shape[1]
+        weights = np.pad(weights, ((0, 0), (0, padding)))
+        joints = np.pad(joints, ((0, 0), (0, padding)))
+
+    joints[weights <= 0] = 0
+    weights = np.maximum(weights, 0)
+    totals = weights.sum(axis=1, keepdims=True)
+    unweighted = totals[:, 0] <= 0
+    # Points on unweighted geometry follow the first joint
+    weights[unweighted, 0] = 1
+    totals[unweighted] = 1
+    return joints, (weights / totals).astype(np.float32)
+
+class FittingBackend:
+    """
+    Fitting math shared by the array engines
+
+    Methods take and return the backend's native arrays (see asarray and
+    to_numpy). Vertex arrays are (..., N, 3).
+    """
+
+    name = "base"
+    xp = None
+    dtype = None
+
+    # Primitives ---------------------------------------------------------
+
+    def asarray(self, array, dtype=None):
+        raise NotImplementedError
+
+    def to_numpy(self, array) -> np.ndarray:
+        raise NotImplementedError
+
+    def copy(self, array):
+        raise NotImplementedError
+
+    def cross(self, a, b):
+        raise NotImplementedError
+
+    def take_along(self, array, indices, axis: int):
+        raise NotImplementedError
+
+    def index_add(self, size: int, index, values):
+        """Sum rows of values (..., E, C) into (..., size, C) at index (E,)"""
+        raise NotImplementedError
+
+    def arange(self, count: int):
+        raise NotImplementedError
+
+    def repeat(self, values, counts):
+        """Each of values repeated counts times (np.repeat)"""
+        raise NotImplementedError
+
+    def segment_min(self, values, segments, count: int, initial):
+        """Minimum of values per segment id (0..count-1); initial for empty segments"""
+        raise NotImplementedError
+
+    def build_index(self, points):
+        """Nearest-neighbour structure over fixed (N, 3) or (P, N, 3) points"""
+        raise NotImplementedError
+
+    def nearest(self, index, queries) -> Tuple:
+        """
+        Nearest indexed point to every query, per pose for a (P, N, 3) index
+
+        Returns:
+            (distances (..., Q), indices (..., Q) int64)
+        """
+        raise NotImplementedError
+
+    # Shared algorithms -------------------------------------------------
+
+    def prepare_topology(self, faces: np.ndarray, vertex_count: int) -> Dict:
+        """
+        Pose-independent avatar arrays: faces, the vertex-face and
+        vertex-neighbour rows and the vertices that have faces (None when all do)
+        """
+        faces = np.asarray(faces, dtype=np.int64)
+        offsets, face_ids = vertex_faces(faces, vertex_count)
+        neighbor_offsets, neighbor_ids = vertex_neighbors(faces, vertex_count)
+        # Loose vertices have no surface to project onto, so they are never "nearest"
+        indexed = np.flatnonzero(np.diff(offsets) > 0)
+        return {
+            "faces": self.asarray(faces, dtype="int64"),
+            "face_offsets": self.asarray(offsets, dtype="int64"),
+            "face_ids": self.asarray(face_ids, dtype="int64"),
+            "neighbor_offsets": self.asarray(neighbor_offsets, dtype="int64"),
+            "neighbor_ids": self.asarray(neighbor_ids, dtype="int64"),
+            "indexed": None if len(indexed) == vertex_count else self.asarray(indexed, dtype="int64")
+        }
+
+    def prepare_surface(self, vertices: np.ndarray, topology: Dict) -> Dict:
+        """
+        Avatar arrays reused by every query of one fit
+
+        Args:
+            vertices: (V, 3), or (P, V, 3) for P poses sharing the topology
+            topology: prepare_topology() result
+
+        Returns:
+            The topology plus vertices, face normals and a nearest-vertex
+            index (one per pose), all native
+        """
+        surface = dict(topology)
+        surface["vertices"] = self.asarray(vertices)
+        surface["face_normals"] = self.face_normals(surface["vertices"], surface["faces"])
+        indexed = surface["indexed"]
+        surface["index"] = self.build_index(
+            surface["vertices"] if indexed is None else surface["vertices"][..., indexed, :]
+        )
+        return surface
+
+    def nearest_vertices(self, surface: Dict, points) -> Tuple:
+        """
+        Nearest avatar surface vertex of every point (in the point's pose)
+
+        Returns:
+            (distances (..., Q), avatar vertex ids (..., Q))
+        """
+        distances, nearest = self.nearest(surface["index"], points)
+        if surface["indexed"] is not None:
+            nearest = surface["indexed"][nearest]
+        return distances, nearest
+
+    def track_nearest(self, surface: Dict, points, nearest, steps: int = 8) -> Tuple:
+        """
+        Update nearest avatar vertices after points moved a little
+
+        Each step moves every point's nearest vertex to the closest among
+        itself and its neighbours, until none moves or after `steps`, so the
+        cost is a few rows of the shared neighbour table instead of a tree
+        query per pose.
+
+        Args:
+            points: (..., Q, 3)
+            nearest: (..., Q) previous nearest_vertices() result
+
+        Returns:
+            (distances, avatar vertex ids), shaped like nearest
+        """
+        shape = nearest.shape
+        flat_points = points.reshape(-1, 3)
+        current = self.copy(nearest.reshape(-1))
+        squared = flat_points[:, 0] * 0
+        poses = None
+        if len(shape) == 2:
+            poses = (self.arange(shape[0])[:, None] + nearest * 0).reshape(-1)
+
+        # Only points whose nearest vertex changed take another step
+        active = self.arange(len(current))
+        for _ in range(steps):
+            pair_point, slots = self._expand_rows(surface["neighbor_offsets"], current[active])
+            candidates = surface["neighbor_ids"][slots]
+            if poses is None:
+                positions = surface["vertices"][candidates]
+            else:
+                positions = surface["vertices"][poses[active][pair_point], candidates]
+            offset = flat_points[active][pair_point] - positions
+            minimum, best = self._segment_argmin((offset * offset).sum(-1), pair_point, len(active))
+            moved = candidates[best] != current[active]
+            current[active] = candidates[best]
+            squared[active] = minimum
+            active = active[moved]
+            if len(active) == 0:
+                break
+
+        return self.xp.sqrt(squared).reshape(shape), current.reshape(shape)
+
+    def _expand_rows(self, offsets, rows) -> Tuple:
+        """(position in rows, slot) pairs covering the compressed row of every id in rows"""
+        starts = offsets[rows]
+        counts = offsets[rows + 1] - starts
+        owners = self.repeat(self.arange(len(rows)), counts)
+        first = self.repeat(counts.cumsum(0) - counts, counts)
+        return owners, self.arange(len(owners)) - first + self.repeat(starts, counts)
+
+    def _segment_argmin(self, values, owners, count: int) -> Tuple:
+        """Per owner, the minimum of its values and the first entry holding it"""
+        minimum = self.segment_min(values, owners, count, _FAR)
+        entries = self.arange(len(values))
+        best = self.segment_min(
+            self.xp.where(values <= minimum[owners], entries, entries * 0 + len(values)),
+            owners,
+            count,
+            len(values)
+        )
+        return minimum, best
+
+    def center_of_mass(self, vertices, faces):
+        """
+        Volume centroid of a closed mesh (..., V, 3), falling back to the
+        mean vertex where the enclosed volume vanishes
+        """
+        a, b, c = vertices[..., faces[:, 0], :], vertices[..., faces[:, 1], :], vertices[..., faces[:, 2], :]
+        volumes = (a * self.cross(b, c)).sum(-1)
+        total = volumes.sum(-1)
+        valid = self.xp.abs(total) > EPSILON
+        safe_total = self.xp.where(valid, total, total * 0 + 1)
+        centroid = (volumes[..., None] * (a + b + c)).sum(-2) / (4 * safe_total[..., None])
+        return self.xp.where(valid[..., None], centroid, vertices.mean(-2))
+
+    def face_normals(self, vertices, faces):
+        """Unit normals of (M, 3) faces over (..., N, 3) vertices"""
+        a = vertices[..., faces[:, 0], :]
+        normals = self.cross(vertices[..., faces[:, 1], :] - a, vertices[..., faces[:, 2], :] - a)
+        return self._normalize(normals)
+
+    def vertex_normals(self, vertices, faces):
+        """Unit normals of (..., N, 3) vertices, averaging their faces' normals by area"""
+        a = vertices[..., faces[:, 0], :]
+        # Unnormalised face normals are twice the face area long
+        normals = self.cross(vertices[..., faces[:, 1], :] - a, vertices[..., faces[:, 2], :] - a)
+        count = vertices.shape[-2]
+        summed = sum(self.index_add(count, faces[:, corner], normals) for corner in range(3))
+        return self._normalize(summed)
+
+    def _normalize(self, vectors):
+        lengths = self.xp.sqrt((vectors * vectors).sum(-1))[..., None]
+        return vectors / lengths.clip(EPSILON, None)
+
+    def closest_on_triangles(self, points, triangles) -> Tuple:
+        """
+        Closest point on a triangle, per point
+
+        Args:
+            points: (T, 3)
+            triangles: (T, 3, 3) corner positions
+
+        Returns:
+            (closest points (T, 3), barycentric weights (T, 3))
+        """
+        xp = self.xp
+        a, b, c = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+
+        # Projection onto the triangle's plane, kept when it falls inside
+        ab, ac, ap = b - a, c - a, points - a
+        d00, d01, d11 = (ab * ab).sum(-1), (ab * ac).sum(-1), (ac * ac).sum(-1)
+        d20, d21 = (ap * ab).sum(-1), (ap * ac).sum(-1)
+        denominator = d00 * d11 - d01 * d01
+        safe = denominator.clip(EPSILON, None)
+        v = (d11 * d20 - d01 * d21) / safe
+        w = (d00 * d21 - d01 * d20) / safe
+        u = 1 - v - w
+        inside = (u >= 0) & (v >= 0) & (w >= 0) & (denominator > EPSILON)
+        plane_point = a + v[:, None] * ab + w[:, None] * ac
+        plane_weights = xp.stack([u, v, w], -1)
+
+        # Otherwise the closest point lies on one of the three edges
+        edge_points, edge_weights, edge_distances = [], [], []
+        zero = u * 0
+        for start, end, corners in ((a, b, (0, 1)), (b, c, (1, 2)), (c, a, (2, 0))):
+            direction = end - start
+            t = (((points - start) * direction).sum(-1) / (direction * direction).sum(-1).clip(EPSILON, None)).clip(0, 1)
+            point = start + t[:, None] * direction
+            weights = [zero, zero, zero]
+            weights[corners[0]] = 1 - t
+            weights[corners[1]] = t
+            offset = points - point
+            edge_points.append(point)
+            edge_weights.append(xp.stack(weights, -1))
+            edge_distances.append((offset * offset).sum(-1))
+
+        best_edge = xp.stack(edge_distances, -1).argmin(-1)[:, None, None]
+        edge_point = self.take_along(xp.stack(edge_points, 1), best_edge, 1)[:, 0]
+        edge_weight = self.take_along(xp.stack(edge_weights, 1), best_edge, 1)[:, 0]
+
+        closest = xp.where(inside[:, None], plane_point, edge_point)
+        weights = xp.where(inside[:, None], plane_weights, edge_weight)
+        return closest, weights
+
+    def closest_surface_points(self, surface: Dict, points, nearest_vertices, poses=None) -> Tuple:
+        """
+        Closest point on the avatar surface among the faces around each
+        point's nearest avatar vertex
+
+        Every (point, face) candidate pair is evaluated in one flat batch,
+        so the cost follows the mesh's actual valences.
+
+        Args:
+            surface: prepare_surface() result
+            points: (Q, 3)
+            nearest_vertices: (Q,) nearest avatar vertex per point (with faces)
+            poses: (Q,) pose of each point when the surface has a pose axis
+
+        Returns:
+            (closest points (Q, 3), face ids (Q,), barycentric weights (Q, 3))
+        """
+        pair_point, slots = self._expand_rows(surface["face_offsets"], nearest_vertices)
+        pair_face = surface["face_ids"][slots]
+
+        pair_points = points[pair_point]
+        corners = surface["faces"][pair_face]
+        if poses is None:
+            triangles = surface["vertices"][corners]
+        else:
+            triangles = surface["vertices"][poses[pair_point][:, None], corners]
+        closest, weights = self.closest_on_triangles(pair_points, triangles)
+        offset = pair_points - closest
+        distances = (offset * offset).sum(-1)
+
+        _, best = self._segment_argmin(distances, pair_point, len(points))
+        return closest[best], pair_face[best], weights[best]
+
+    def carry_to_poses(self, reference: Dict, points, surface: Dict):
+        """
+        Move points placed around one pose of the avatar to each of its poses
+
+        Every point is bound to its closest point on the reference surface
+        (a face and barycentric weights) and keeps its offset from it, with
+        the part along the surface normal there turning with the surface.
+        Normals are interpolated from the vertex normals, so a point bound
+        to an edge or corner moves the same whichever face it was bound to.
+
+        Args:
+            reference: prepare_surface() result for one pose (V, 3)
+            points: (N, 3) around the reference surface
+            surface: prepare_surface() result for (P, V, 3) poses with the same topology
+
+        Returns:
+            (P, N, 3) points per pose
+        """
+        _, nearest = self.nearest_vertices(reference, points)
+        closest, face_ids, weights = self.closest_surface_points(reference, points, nearest)
+        corners = reference["faces"][face_ids]
+        weights = weights[:, :, None]
+
+        vertex_normals = self.vertex_normals(reference["vertices"], reference["faces"])
+        normals = self._normalize((vertex_normals[corners] * weights).sum(-2))
+        offset = points - closest
+        height = (offset * normals).sum(-1)[:, None]
+
+        posed = (surface["vertices"][:, corners] * weights).sum(-2)
+        vertex_normals = self.vertex_normals(surface["vertices"], surface["faces"])
+        posed_normals = self._normalize((vertex_normals[:, corners] * weights).sum(-2))
+        return posed + (offset - normals * height) + posed_normals * height
+
+    def deform_radial(self, vertices, center, scales, distances, falloff: float = 0.5):
+        """
+        Scale each vertex's horizontal offset from the body's vertical axis
+
+        Args:
+            vertices: (..., N, 3)
+            center: (..., 1, 3) point on the axis (per pose)
+            scales: (..., N) target scale per vertex
+            distances: (..., N) distance to the avatar; the scale fades with exp(-falloff * d)
+        """
+        offset = vertices - center
+        offset[..., 1] = 0
+        effective = 1 + (scales - 1) * self.xp.exp(-distances * falloff)
+        return vertices + offset * (effective - 1)[..., None]
+
+    def project_edges(self, vertices, edges, rest_lengths, stiffness: float = 1.0):
+        """
+        One Jacobi pass of edge-length constraints
+
+        Every edge moves both ends halfway towards its rest length; each
+        vertex takes the mean of its edges' corrections.
+
+        Args:
+            vertices: (..., N, 3)
+            edges: (E, 2) vertex indices
+            rest_lengths: (E,)
+            stiffness: Fraction of the correction applied, 0-1
+        """
+        count = vertices.shape[-2]
+        start, end = edges[:, 0], edges[:, 1]
+        delta = vertices[..., end, :] - vertices[..., start, :]
+        lengths = self.xp.sqrt((delta * delta).sum(-1))
+        correction = delta * ((lengths - rest_lengths) / lengths.clip(EPSILON, None) * (0.5 * stiffness))[..., None]
+
+        moves = self.index_add(count, start, correction) - self.index_add(count, end, correction)
+        valence = self.index_add(count, start, correction[..., :1] * 0 + 1) + self.index_add(count, end, correction[..., :1] * 0 + 1)
+        return vertices + moves / valence.clip(1, None)
+
+    def push_out(
+        self,
+        vertices,
+        surface: Dict,
+        threshold: float,
+        offset: float,
+        inside_only: bool = False,
+        nearest: Optional[Tuple] = None
+    ):
+        """
+        Move garment vertices near (or inside) the avatar onto its surface plus an offset
+
+        Args:
+            vertices: (N, 3), or (P, N, 3) against a surface with P poses
+            surface: prepare_surface() result
+            threshold: Vertices whose nearest avatar vertex is closer than this are candidates
+            offset: Distance kept from the surface along the face normal
+            inside_only: Only move vertices behind the surface (penetrations)
+            nearest: (distances, avatar vertex ids) when already known, e.g. from track_nearest()
+
+        Returns:
+            (moved vertices, number moved)
+        """
+        distances, nearest = nearest if nearest is not None else self.nearest_vertices(surface, vertices)
+        mask = distances < threshold
+        if not bool(mask.any()):
+            return vertices, 0
+
+        points = vertices[mask]
+        if len(vertices.shape) == 2:
+            closest, face_ids, _ = self.closest_surface_points(surface, points, nearest[mask])
+            normals = surface["face_normals"][face_ids]
+        else:
+            poses = (self.arange(vertices.shape[0])[:, None] + nearest * 0)[mask]
+            closest, face_ids, _ = self.closest_surface_points(surface, points, nearest[mask], poses)
+            normals = surface["face_normals"][poses, face_ids]
+        if inside_only:
+            behind = ((points - closest) * normals).sum(-1) < 0
+            points = self.xp.where(behind[..., None], closest + normals * offset, points)
+            moved = int(behind.sum())
+        else:
+            points = closest + normals * offset
+            moved = len(points)
+
+        vertices = self.copy(vertices)
+        vertices[mask] = points
+        return vertices, moved
+
+class NumpyFittingBackend(FittingBackend):
+    """float64 NumPy arrays; nearest queries on a SciPy KD-tree"""
+
+    name = "numpy"
+    xp = np
+    dtype = np.float64
+
+    def __init__(self, threads: int = 1):
+        self.threads = threads
+
+    def asarray(self, array, dtype=None):
+        return np.ascontiguousarray(array, dtype=np.int64 if dtype == "int64" else self.dtype)
+
+    def to_numpy(self, array) -> np.ndarray:
+        return np.asarray(array)
+
+    def copy(self, array):
+        return array.copy()
+
+    def cross(self, a, b):
+        return np.cross(a, b)
+
+    def take_along(self, array, indices, axis: int):
+        return np.take_along_axis(array, indices, axis)
+
+    def index_add(self, size: int, index, values):
+        # One bincount per column beats np.add.at by an order of magnitude
+        columns = np.moveaxis(values, -2, 0).reshape(len(index), -1)
+        sums = np.stack(
+            [np.bincount(index, weights=columns[:, k], minlength=size) for k in range(columns.shape[1])],
+            axis=-1
+        )
+        return np.moveaxis(sums.reshape((size,) + values.shape[:-2] + values.shape[-1:]), 0, -2)
+
+    def arange(self, count: int):
+        return np.arange(count, dtype=np.int64)
+
+    def repeat(self, values, counts):
+        return np.repeat(values, counts)
+
+    def segment_min(self, values, segments, count: int, initial):
+        result = np.full(count, initial, dtype=values.dtype)
+        if len(values):
+            # Segments arrive grouped, so each one is a contiguous run
+            starts = np.flatnonzero(np.concatenate([[True], segments[1:] != segments[:-1]]))
+            result[segments[starts]] = np.minimum.reduceat(values, starts)
+        return result
+
+    def build_index(self, points):
+        if points.ndim == 3:
+            return [spatial.cKDTree(pose) for pose in points]
+        return spatial.cKDTree(points)
+
+    def nearest(self, index, queries) -> Tuple:
+        if isinstance(index, list):
+            results = [self.nearest(tree, pose) for tree, pose in zip(index, queries)]
+            return np.stack([distances for distances, _ in results]), np.stack([indices for _, indices in results])
+        distances, indices = index.query(queries, workers=self.threads)
+        return distances, indices.astype(np.int64)
+
+class TorchFittingBackend(FittingBackend):
+    """
+    float32 torch tensors on the CPU
+
+    Nearest queries are brute force in blocks (one GEMM per block), which
+    spreads across cores better than a tree walk for avatar-sized meshes.
+    """
+
+    name = "torch"
+
+    # Query rows per block times indexed points, bounding the distance matrix
+    BLOCK_ELEMENTS = 1 << 24
+
+    def __init__(self, threads: Optional[int] = None):
+        self.xp = torch
+        self.dtype = torch.float32
+        if threads:
+            torch.set_num_threads(threads)
+        self.threads = torch.get_num_threads()
+
+    def asarray(self, array, dtype=None):
+        if dtype == "int64":
+            return torch.as_tensor(np.asarray(array, dtype=np.int64))
+        return torch.as_tensor(np.asarray(array), dtype=self.dtype)
+
+    def to_numpy(self, array) -> np.ndarray:
+        return array.numpy()
+
+    def copy(self, array):
+        return array.clone()
+
+    def cross(self, a, b):
+        return torch.cross(a, b, dim=-1)
+
+    def take_along(self, array, indices, axis: int):
+        return torch.take_along_dim(array, indices, dim=axis)
+
+    def index_add(self, size: int, index, values):
+        shape = values.shape[:-2] + (size, values.shape[-1])
+        return values.new_zeros(shape).index_add_(values.dim() - 2, index, values)
+
+    def arange(self, count: int):
+        return torch.arange(count, dtype=torch.int64)
+
+    def repeat(self, values, counts):
+        return torch.repeat_interleave(values, counts)
+
+    def segment_min(self, values, segments, count: int, initial):
+        result = torch.full((count,), initial, dtype=values.dtype)
+        return result.scatter_reduce_(0, segments, values, "amin")
+
+    def build_index(self, points):
+        return points, (points * points).sum(-1)
+
+    def nearest(self, index, queries) -> Tuple:
+        points, squared_norms = index
+        count = queries.shape[-2]
+        if count == 0:
+            return queries.new_zeros(queries.shape[:-1]), torch.zeros(queries.shape[:-1], dtype=torch.int64)
+
+        poses = queries[..., 0, 0].numel()
+        block = max(1, self.BLOCK_ELEMENTS // max(points.shape[-2] * poses, 1))
+        indices = []
+        for start in range(0, count, block):
+            rows = queries[..., start:start + block, :]
+            # |q - p|^2 up to the per-row constant |q|^2, which doesn't change the argmin
+            scores = squared_norms[..., None, :] - 2 * (rows @ points.transpose(-1, -2))
+            indices.append(scores.argmin(-1))
+        indices = torch.cat(indices, -1)
+        offset = queries - torch.take_along_dim(points, indices[..., None], dim=-2)
+        return torch.sqrt((offset * offset).sum(-1)), indices
+
+def create_fitting_backend(name: Optional[str] = None, threads: Optional[int] = None) -> FittingBackend:
+    """
+    Fitting backend configured by FITTING_BACKEND (numpy|torch) and FITTING_THREADS
+
+    FITTING_THREADS=0 uses every core. Falls back to NumPy when torch
+    isn't installed.
+    """
+    name = (name or os.getenv("FITTING_BACKEND", "numpy")).lower()
+    if threads is None:
+        threads = int(os.getenv("FITTING_THREADS", "0"))
+    threads = threads or os.cpu_count() or 1
+
+    if name == "torch":
+        try:
+            return TorchFittingBackend(threads)
+        except ImportError:
+            logger.warning("FITTING_BACKEND=torch but torch is not installed; using numpy")
+    elif name != "numpy":
+        raise ValueError(f"Unknown fitting backend: {name}")
+    return NumpyFittingBackend(threads)
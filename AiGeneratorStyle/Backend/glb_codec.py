@@ -0,0 +1,656 @@
+# Backend/glb_codec.py
+"""
+GLB Codec
+Reads glTF 2.0 binaries without copying them: files are memory-mapped (or
+an in-memory buffer is wrapped) and accessors come back as read-only NumPy
+views into the BIN chunk, strided for interleaved buffer views. GLBWriter
+collects array buffers for a new BIN chunk and writes them out without
+first concatenating them.
+
+    with GLB.open("avatar.glb") as glb:
+        vertices, faces = read_mesh(glb)
+"""
+
+import json
+import mmap
+import os
+import struct
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+GLB_MAGIC = b"glTF"
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+COMPONENT_DTYPES = {
+    5120: np.dtype("<i1"),
+    5121: np.dtype("<u1"),
+    5122: np.dtype("<i2"),
+    5123: np.dtype("<u2"),
+    5125: np.dtype("<u4"),
+    5126: np.dtype("<f4")
+}
+COMPONENT_TYPES = {dtype: component for component, dtype in COMPONENT_DTYPES.items()}
+
+TYPE_SIZES = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4, "MAT2": 4, "MAT3": 9, "MAT4": 16}
+SIZE_TYPES = {1: "SCALAR", 2: "VEC2", 3: "VEC3", 4: "VEC4", 16: "MAT4"}
+
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+
+TRIANGLES = 4
+
+class GLB:
+    """
+    A parsed GLB: its JSON document and a zero-copy view of its BIN chunk
+
+    Arrays returned by accessor() share memory with the file and stay
+    valid after close().
+    """
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview, mmap.mmap], mapping: Optional[mmap.mmap] = None):
+        buffer = memoryview(data)
+        if len(buffer) < 12:
+            raise ValueError("Not a GLB file")
+        magic, version, length = struct.unpack_from("<4sII", buffer, 0)
+        if magic != GLB_MAGIC or version != 2:
+            raise ValueError("Not a glTF 2.0 binary file")
+
+        gltf = None
+        binary = memoryview(b"")
+        offset = 12
+        end = min(length, len(buffer))
+        while offset + 8 <= end:
+            chunk_length, chunk_type = struct.unpack_from("<II", buffer, offset)
+            offset += 8
+            chunk = buffer[offset:offset + chunk_length]
+            offset += chunk_length
+            if chunk_type == CHUNK_JSON:
+                gltf = json.loads(bytes(chunk))
+            elif chunk_type == CHUNK_BIN and not len(binary):
+                binary = chunk
+
+        if gltf is None:
+            raise ValueError("GLB has no JSON chunk")
+        self.gltf: Dict = gltf
+        self.binary = binary
+        self._mapping = mapping
+
+    @classmethod
+    def open(cls, path: str) -> "GLB":
+        """Memory-map a GLB file"""
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError("Not a GLB file")
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return cls(mapping, mapping)
+        except Exception:
+            mapping.close()
+            raise
+
+    def close(self):
+        """
+        Drop this GLB's hold on the file
+
+        The mapping is not closed explicitly: NumPy views keep the mmap
+        object alive, and it is unmapped once the last of them is gone.
+        """
+        self.binary = memoryview(b"")
+        self._mapping = None
+
+    def __enter__(self) -> "GLB":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def buffer_view(self, index: int) -> memoryview:
+        """Bytes of a buffer view (e.g. an embedded image), without copying"""
+        view = self.gltf["bufferViews"][index]
+        if view.get("buffer", 0) != 0:
+            raise ValueError("Only the GLB binary buffer is supported")
+        start = view.get("byteOffset", 0)
+        return self.binary[start:start + view["byteLength"]]
+
+    def accessor(self, index: int) -> np.ndarray:
+        """
+        An accessor as a (count, components) array of its stored type
+
+        Plain accessors are read-only views into the BIN chunk; sparse
+        accessors (and ones without a buffer view) are materialized.
+        """
+        accessor = self.gltf["accessors"][index]
+        dtype = COMPONENT_DTYPES[accessor["componentType"]]
+        components = TYPE_SIZES[accessor["type"]]
+        count = accessor["count"]
+
+        if "bufferView" in accessor:
+            view = self.gltf["bufferViews"][accessor["bufferView"]]
+            if view.get("buffer", 0) != 0:
+                raise ValueError("Only the GLB binary buffer is supported")
+            item_size = dtype.itemsize * components
+            stride = view.get("byteStride") or item_size
+            array = np.ndarray(
+                (count, components),
+                dtype=dtype,
+                buffer=self.binary,
+                offset=view.get("byteOffset", 0) + accessor.get("byteOffset", 0),
+                strides=(stride, dtype.itemsize)
+            )
+        else:
+            array = np.zeros((count, components), dtype=dtype)
+
+        sparse = accessor.get("sparse")
+        if sparse:
+            array = array.copy()
+            indices_info = sparse["indices"]
+            values_info = sparse["values"]
+            sparse_count = sparse["count"]
+            index_view = self.gltf["bufferViews"][indices_info["bufferView"]]
+            value_view = self.gltf["bufferViews"][values_info["bufferView"]]
+            indices = np.frombuffer(
+                self.binary,
+                dtype=COMPONENT_DTYPES[indices_info["componentType"]],
+                count=sparse_count,
+                offset=index_view.get("byteOffset", 0) + indices_info.get("byteOffset", 0)
+            )
+            values = np.frombuffer(
+                self.binary,
+                dtype=dtype,
+                count=sparse_count * components,
+                offset=value_view.get("byteOffset", 0) + values_info.get("byteOffset", 0)
+            ).reshape(sparse_count, components)
+            array[indices.astype(np.int64)] = values
+
+        return array
+
+    def accessor_float(self, index: int) -> np.ndarray:
+        """An accessor as float32, undoing normalization; float accessors stay views"""
+        return as_float(self.accessor(index), self.gltf["accessors"][index].get("normalized", False))
+
+    def world_matrices(self) -> Dict[int, np.ndarray]:
+        """World transform of every node reachable from the default scene"""
+        nodes = self.gltf.get("nodes", [])
+        scenes = self.gltf.get("scenes", [])
+        if scenes:
+            roots = scenes[self.gltf.get("scene", 0)].get("nodes", [])
+        else:
+            children = {child for node in nodes for child in node.get("children", [])}
+            roots = [i for i in range(len(nodes)) if i not in children]
+
+        world = {}
+        stack = [(root, np.eye(4)) for root in roots]
+        while stack:
+            index, parent = stack.pop()
+            world[index] = parent @ node_matrix(nodes[index])
+            stack.extend((child, world[index]) for child in nodes[index].get("children", []))
+        return world
+
+    def joint_matrices(self, node: Dict, world: Dict[int, np.ndarray]) -> Optional[np.ndarray]:
+        """Bind-pose skinning matrices (J, 4, 4) of a node's skin, or None if it has none"""
+        skins = self.gltf.get("skins")
+        if "skin" not in node or not skins:
+            return None
+        skin = skins[node["skin"]]
+        joints = skin["joints"]
+        if "inverseBindMatrices" in skin:
+            inverse_bind = self.accessor(skin["inverseBindMatrices"]).astype(np.float64)
+            inverse_bind = inverse_bind.reshape(-1, 4, 4).transpose(0, 2, 1)
+        else:
+            inverse_bind = np.tile(np.eye(4), (len(joints), 1, 1))
+        return np.stack([world.get(joint, np.eye(4)) @ inverse_bind[i] for i, joint in enumerate(joints)])
+
+    def posed_positions(
+        self,
+        primitive: Dict,
+        matrix: np.ndarray,
+        joint_matrices: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        World-space (V, 3) float64 positions of a primitive at rest pose
+
+        Skinned primitives are posed with their joints' bind transforms so
+        models authored with scaled or rotated armatures (Mixamo, Ready
+        Player Me) come out the right size and way up; others use the
+        node's world matrix.
+        """
+        attributes = primitive["attributes"]
+        positions = self.accessor_float(attributes["POSITION"]).astype(np.float64)
+        homogeneous = np.concatenate([positions, np.ones((len(positions), 1))], axis=1)
+
+        if joint_matrices is not None and "JOINTS_0" in attributes and "WEIGHTS_0" in attributes:
+            joint_indices = self.accessor(attributes["JOINTS_0"]).astype(np.int64)
+            weights = self.accessor_float(attributes["WEIGHTS_0"]).astype(np.float64)
+            weights /= np.maximum(weights.sum(axis=1, keepdims=True), 1e-8)
+            joint_indices = np.clip(joint_indices, 0, len(joint_matrices) - 1)
+            blended = np.einsum("vk,vkij->vij", weights, joint_matrices[joint_indices])
+            return np.einsum("vij,vj->vi", blended, homogeneous)[:, :3]
+        return (homogeneous @ matrix.T)[:, :3]
+
+    def faces(self, primitive: Dict, vertex_count: int) -> np.ndarray:
+        """(F, 3) int64 vertex indices of a triangle-list primitive"""
+        if "indices" in primitive:
+            indices = self.accessor(primitive["indices"]).reshape(-1).astype(np.int64)
+        else:
+            indices = np.arange(vertex_count, dtype=np.int64)
+        return indices[: len(indices) // 3 * 3].reshape(-1, 3)
+
+def node_matrix(node: Dict) -> np.ndarray:
+    """Local transform of a glTF node"""
+    if "matrix" in node:
+        return np.array(node["matrix"], dtype=np.float64).reshape(4, 4).T
+
+    x, y, z, w = node.get("rotation", [0.0, 0.0, 0.0, 1.0])
+    rotation = np.array([
+        [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+        [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)]
+    ])
+    matrix = np.eye(4)
+    matrix[:3, :3] = rotation * np.array(node.get("scale", [1.0, 1.0, 1.0]))
+    matrix[:3, 3] = node.get("translation", [0.0, 0.0, 0.0])
+    return matrix
+
+def as_float(array: np.ndarray, normalized: bool) -> np.ndarray:
+    """Float values of an accessor array, undoing normalization (float32 input is returned as is)"""
+    if array.dtype == np.float32:
+        return array
+    if not normalized:
+        return array.astype(np.float32)
+    info = np.iinfo(array.dtype)
+    return np.maximum(array.astype(np.float32) / info.max, -1.0)
+
+def _rest_primitives(glb: GLB):
+    """(node index, primitive, world-space rest positions) of every triangle primitive"""
+    world = glb.world_matrices()
+    for node_index, matrix in world.items():
+        node = glb.gltf["nodes"][node_index]
+        if "mesh" not in node:
+            continue
+        joint_matrices = glb.joint_matrices(node, world)
+        for primitive in glb.gltf["meshes"][node["mesh"]]["primitives"]:
+            if primitive.get("mode", TRIANGLES) != TRIANGLES or "POSITION" not in primitive["attributes"]:
+                continue
+            yield node_index, primitive, glb.posed_positions(primitive, matrix, joint_matrices)
+
+def read_mesh(source: Union[str, bytes, GLB]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    All triangle primitives of a GLB merged into one world-space mesh at rest pose
+
+    Args:
+        source: Path (memory-mapped), GLB bytes or an open GLB
+
+    Returns:
+        (vertices (V, 3) float32, faces (F, 3) int64)
+    """
+    if not isinstance(source, GLB):
+        glb = GLB.open(source) if isinstance(source, str) else GLB(source)
+        with glb:
+            return read_mesh(glb)
+
+    all_vertices: List[np.ndarray] = []
+    all_faces: List[np.ndarray] = []
+    vertex_count = 0
+    for _, primitive, vertices in _rest_primitives(source):
+        all_vertices.append(vertices.astype(np.float32))
+        all_faces.append(source.faces(primitive, len(vertices)) + vertex_count)
+        vertex_count += len(vertices)
+
+    if not all_vertices:
+        return np.zeros((0, 3), dtype=np.float32), np.zeros((0, 3), dtype=np.int64)
+    return np.concatenate(all_vertices), np.concatenate(all_faces)
+
+def read_skinned_mesh(source: Union[str, bytes, GLB]) -> Dict:
+    """
+    read_mesh() plus each vertex's joints and weights on one merged skeleton
+
+    Joints of every skin are gathered into one list. Vertices of unskinned
+    primitives are bound rigidly to their own node, which joins the list,
+    so every vertex follows the node it moves with.
+
+    Returns:
+        vertices (V, 3) float32, faces (F, 3) int64, joints (V, 4) int64
+        (into skeleton["joints"]), weights (V, 4) float32 summing to 1, and
+        skeleton (see skeleton_document)
+    """
+    if not isinstance(source, GLB):
+        glb = GLB.open(source) if isinstance(source, str) else GLB(source)
+        with glb:
+            return read_skinned_mesh(glb)
+
+    glb = source
+    nodes = glb.gltf.get("nodes", [])
+    skins = glb.gltf.get("skins", [])
+    joint_nodes: List[int] = []
+    joint_slots: Dict[int, int] = {}
+
+    def joint_slot(node_index: int) -> int:
+        if node_index not in joint_slots:
+            joint_slots[node_index] = len(joint_nodes)
+            joint_nodes.append(node_index)
+        return joint_slots[node_index]
+
+    all_vertices, all_faces, all_joints, all_weights = [], [], [], []
+    vertex_count = 0
+    for node_index, primitive, vertices in _rest_primitives(glb):
+        attributes = primitive["attributes"]
+        node = nodes[node_index]
+        count = len(vertices)
+        if "skin" in node and skins and "JOINTS_0" in attributes and "WEIGHTS_0" in attributes:
+            skin_joints = skins[node["skin"]]["joints"]
+            slots = np.array([joint_slot(joint) for joint in skin_joints], dtype=np.int64)
+            indices = np.clip(glb.accessor(attributes["JOINTS_0"]).astype(np.int64), 0, len(slots) - 1)
+            weights = glb.accessor_float(attributes["WEIGHTS_0"]).astype(np.float32)
+            weights /= np.maximum(weights.sum(axis=1, keepdims=True), 1e-8)
+            joints = slots[indices]
+        else:
+            joints = np.zeros((count, 4), dtype=np.int64)
+            joints[:, 0] = joint_slot(node_index)
+            weights = np.zeros((count, 4), dtype=np.float32)
+            weights[:, 0] = 1.0
+
+        all_vertices.append(vertices.astype(np.float32))
+        all_faces.append(glb.faces(primitive, count) + vertex_count)
+        all_joints.append(joints)
+        all_weights.append(weights)
+        vertex_count += count
+
+    if not all_vertices:
+        raise ValueError("GLB has no triangle meshes")
+    return {
+        "vertices": np.concatenate(all_vertices),
+        "faces": np.concatenate(all_faces),
+        "joints": np.concatenate(all_joints),
+        "weights": np.concatenate(all_weights),
+        "skeleton": skeleton_document(nodes, joint_nodes)
+    }
+
+def skeleton_document(nodes: List[Dict], joint_nodes: List[int]) -> Dict:
+    """
+    The joints of a glTF node list and their ancestors, as standalone nodes
+
+    Returns:
+        nodes (name, transform and children only, renumbered), roots and
+        joints (indices into the new nodes)
+    """
+    parents = {child: index for index, node in enumerate(nodes) for child in node.get("children", [])}
+    kept = set()
+    for joint in joint_nodes:
+        while joint is not None and joint not in kept:
+            kept.add(joint)
+            joint = parents.get(joint)
+
+    order = sorted(kept)
+    renumbered = {old: new for new, old in enumerate(order)}
+    skeleton_nodes = []
+    for old in order:
+        node = {key: nodes[old][key] for key in ("name", "matrix", "translation", "rotation", "scale") if key in nodes[old]}
+        children = [renumbered[child] for child in nodes[old].get("children", []) if child in kept]
+        if children:
+            node["children"] = children
+        skeleton_nodes.append(node)
+
+    return {
+        "nodes": skeleton_nodes,
+        "roots": [renumbered[old] for old in order if parents.get(old) not in kept],
+        "joints": [renumbered[joint] for joint in joint_nodes]
+    }
+
+class GLBWriter:
+    """
+    Accumulates a new BIN chunk with its bufferViews and accessors
+
+    Views keep references to the caller's buffers (arrays, memoryviews of
+    another GLB); bytes are only gathered when the file is written.
+    """
+
+    def __init__(self):
+        self.chunks: List = []
+        self.length = 0
+        self.buffer_views: List[Dict] = []
+        self.accessors: List[Dict] = []
+
+    def add_view(self, data, target: Optional[int] = None, stride: Optional[int] = None) -> int:
+        padding = -self.length % 4
+        if padding:
+            self.chunks.append(b"\0" * padding)
+            self.length += padding
+
+        size = memoryview(data).nbytes
+        view = {"buffer": 0, "byteOffset": self.length, "byteLength": size}
+        if stride is not None:
+            view["byteStride"] = stride
+        if target is not None:
+            view["target"] = target
+        self.chunks.append(data)
+        self.length += size
+        self.buffer_views.append(view)
+        return len(self.buffer_views) - 1
+
+    def add_accessor(
+        self,
+        array: np.ndarray,
+        normalized: bool = False,
+        target: Optional[int] = None,
+        bounds: bool = False
+    ) -> int:
+        array = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder("<"))
+        if array.ndim == 1:
+            array = array[:, None]
+        count, components = array.shape
+        item_size = array.dtype.itemsize * components
+
+        stride = None
+        data = array.reshape(-1).view(np.uint8)
+        if target == ARRAY_BUFFER and item_size % 4:
+            # Vertex attribute elements must start on 4-byte boundaries
+            stride = item_size + (-item_size % 4)
+            padded = np.zeros((count, stride), dtype=np.uint8)
+            padded[:, :item_size] = data.reshape(count, item_size)
+            data = padded.reshape(-1)
+
+        accessor = {
+            "bufferView": self.add_view(data, target, stride),
+            "componentType": COMPONENT_TYPES[array.dtype],
+            "count": count,
+            "type": SIZE_TYPES[components]
+        }
+        if normalized:
+            accessor["normalized"] = True
+        if bounds and count:
+            accessor["min"] = array.min(axis=0).tolist()
+            accessor["max"] = array.max(axis=0).tolist()
+        self.accessors.append(accessor)
+        return len(self.accessors) - 1
+
+    def parts(self, gltf: Dict) -> List:
+        """
+        The GLB as a list of buffers, after pointing gltf at this writer's
+        accessors, bufferViews and buffer
+        """
+        for key, values in (("accessors", self.accessors), ("bufferViews", self.buffer_views)):
+            if values:
+                gltf[key] = values
+            else:
+                gltf.pop(key, None)
+        binary_length = self.length + (-self.length % 4)
+        if binary_length:
+            gltf["buffers"] = [{"byteLength": self.length}]
+        else:
+            gltf.pop("buffers", None)
+
+        json_chunk = json.dumps(gltf, separators=(",", ":")).encode()
+        json_chunk += b" " * (-len(json_chunk) % 4)
+        length = 12 + 8 + len(json_chunk) + (8 + binary_length if binary_length else 0)
+        parts = [
+            struct.pack("<4sII", GLB_MAGIC, 2, length),
+            struct.pack("<II", len(json_chunk), CHUNK_JSON),
+            json_chunk
+        ]
+        if binary_length:
+            parts.append(struct.pack("<II", binary_length, CHUNK_BIN))
+            parts.extend(self.chunks)
+            parts.append(b"\0" * (binary_length - self.length))
+        return parts
+
+    def to_bytes(self, gltf: Dict) -> bytes:
+        return b"".join(self.parts(gltf))
+
+    def write(self, path: str, gltf: Dict):
+        """Write the GLB to a file (atomically), buffer by buffer"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.writelines(self.parts(gltf))
+        os.replace(tmp_path, path)
+
+def _mesh_document(
+    vertices: np.ndarray,
+    faces: np.ndarray,
+    normals: Optional[np.ndarray] = None,
+    uvs: Optional[np.ndarray] = None,
+    name: str = "mesh"
+) -> Tuple[Dict, GLBWriter]:
+    writer = GLBWriter()
+    attributes = {
+        "POSITION": writer.add_accessor(np.asarray(vertices, dtype=np.float32), target=ARRAY_BUFFER, bounds=True)
+    }
+    if normals is not None:
+        attributes["NORMAL"] = writer.add_accessor(np.asarray(normals, dtype=np.float32), target=ARRAY_BUFFER)
+    if uvs is not None:
+        attributes["TEXCOORD_0"] = writer.add_accessor(np.asarray(uvs, dtype=np.float32), target=ARRAY_BUFFER)
+
+    faces = np.asarray(faces)
+    index_dtype = np.uint16 if faces.size and faces.max() < 65535 else np.uint32
+    indices = writer.add_accessor(faces.reshape(-1).astype(index_dtype, copy=False), target=ELEMENT_ARRAY_BUFFER)
+
+    gltf = {
+        "asset": {"version": "2.0", "generator": "styleit-glb-codec"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"mesh": 0, "name": name}],
+        "meshes": [{"name": name, "primitives": [{"attributes": attributes, "indices": indices, "mode": TRIANGLES}]}]
+    }
+    return gltf, writer
+
+def _skinned_mesh_document(
+    vertices: np.ndarray,
+    faces: np.ndarray,
+    joints: np.ndarray,
+    weights: np.ndarray,
+    skeleton: Dict,
+    normals: Optional[np.ndarray] = None,
+    uvs: Optional[np.ndarray] = None,
+    name: str = "mesh"
+) -> Tuple[Dict, GLBWriter]:
+    gltf, writer = _mesh_document(vertices, faces, normals, uvs, name)
+    joint_dtype = np.uint8 if len(skeleton["joints"]) <= 256 else np.uint16
+    attributes = gltf["meshes"][0]["primitives"][0]["attributes"]
+    attributes["JOINTS_0"] = writer.add_accessor(np.asarray(joints).astype(joint_dtype), target=ARRAY_BUFFER)
+    attributes["WEIGHTS_0"] = writer.add_accessor(np.asarray(weights, dtype=np.float32), target=ARRAY_BUFFER)
+
+    # Skeleton nodes follow the mesh node; vertices are world-space rest
+    # positions, so each inverse bind matrix undoes its joint's rest transform
+    offset = len(gltf["nodes"])
+    for node in skeleton["nodes"]:
+        node = dict(node)
+        if "children" in node:
+            node["children"] = [child + offset for child in node["children"]]
+        gltf["nodes"].append(node)
+
+    world = {}
+    stack = [(root, np.eye(4)) for root in skeleton["roots"]]
+    while stack:
+        index, parent = stack.pop()
+        world[index] = parent @ node_matrix(skeleton["nodes"][index])
+        stack.extend((child, world[index]) for child in skeleton["nodes"][index].get("children", []))
+    inverse_bind = np.stack([np.linalg.inv(world[joint]).T.reshape(16) for joint in skeleton["joints"]])
+
+    gltf["skins"] = [{
+        "joints": [joint + offset for joint in skeleton["joints"]],
+        "inverseBindMatrices": writer.add_accessor(inverse_bind.astype(np.float32)),
+        "skeleton": skeleton["roots"][0] + offset
+    }]
+    gltf["nodes"][0]["skin"] = 0
+    gltf["scenes"][0]["nodes"] += [root + offset for root in skeleton["roots"]]
+    return gltf, writer
+
+def encode_mesh(
+    vertices: np.ndarray,
+    faces: np.ndarray,
+    normals: Optional[np.ndarray] = None,
+    uvs: Optional[np.ndarray] = None,
+    name: str = "mesh"
+) -> bytes:
+    """
+    A single-mesh GLB of vertices and triangles
+
+    Args:
+        vertices: (V, 3) positions
+        faces: (F, 3) vertex indices
+        normals: Optional (V, 3) vertex normals
+        uvs: Optional (V, 2) texture coordinates
+        name: Node and mesh name
+
+    Returns:
+        GLB bytes
+    """
+    gltf, writer = _mesh_document(vertices, faces, normals, uvs, name)
+    return writer.to_bytes(gltf)
+
+def save_mesh(
+    path: str,
+    vertices: np.ndarray,
+    faces: np.ndarray,
+    normals: Optional[np.ndarray] = None,
+    uvs: Optional[np.ndarray] = None,
+    name: str = "mesh"
+):
+    """Write encode_mesh() output straight to a file, without assembling it in memory"""
+    gltf, writer = _mesh_document(vertices, faces, normals, uvs, name)
+    writer.write(path, gltf)
+
+def encode_skinned_mesh(
+    vertices: np.ndarray,
+    faces: np.ndarray,
+    joints: np.ndarray,
+    weights: np.ndarray,
+    skeleton: Dict,
+    normals: Optional[np.ndarray] = None,
+    uvs: Optional[np.ndarray] = None,
+    name: str = "mesh"
+) -> bytes:
+    """
+    A single skinned-mesh GLB that animates with the skeleton it was bound to
+
+    Args:
+        vertices: (V, 3) world-space rest positions
+        faces: (F, 3) vertex indices
+        joints: (V, 4) indices into skeleton["joints"]
+        weights: (V, 4) joint weights summing to 1
+        skeleton: read_skinned_mesh()["skeleton"] of the avatar
+        normals: Optional (V, 3) vertex normals
+        uvs: Optional (V, 2) texture coordinates
+        name: Node and mesh name
+
+    Returns:
+        GLB bytes
+    """
+    gltf, writer = _skinned_mesh_document(vertices, faces, joints, weights, skeleton, normals, uvs, name)
+    return writer.to_bytes(gltf)
+
+def save_skinned_mesh(
+    path: str,
+    vertices: np.ndarray,
+    faces: np.ndarray,
+    joints: np.ndarray,
+    weights: np.ndarray,
+    skeleton: Dict,
+    normals: Optional[np.ndarray] = None,
+    uvs: Optional[np.ndarray] = None,
+    name: str = "mesh"
+):
+    """Write encode_skinned_mesh() output straight to a file"""
+    gltf, writer = _skinned_mesh_document(vertices, faces, joints, weights, skeleton, normals, uvs, name)
+    writer.write(path, gltf)
@@ -0,0 +1,463 @@
+# Backend/glb_optimizer.py
+"""
+GLB Optimization Pipeline
+Produces lighter variants of avatar models: vertex-clustering LOD
+decimation, quantized vertex attributes (KHR_mesh_quantization), morph
+target and animation stripping, and downscaled embedded textures.
+"""
+
+import io
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from glb_codec import GLB, GLBWriter, ARRAY_BUFFER, ELEMENT_ARRAY_BUFFER, TRIANGLES
+
+logger = logging.getLogger(__name__)
+
+# Bump when the output for a given input and variant changes
+OPTIMIZER_VERSION = "2"
+
+# Compressed geometry is opaque to this pipeline; such files are served as-is
+UNSUPPORTED_EXTENSIONS = {
+    "KHR_draco_mesh_compression",
+    "EXT_meshopt_compression",
+    "EXT_mesh_gpu_instancing"
+}
+
+# Small primitives (eyes, teeth) are left intact by decimation
+MIN_DECIMATION_TRIANGLES = 64
+
+# UV grid used to keep texture seams from being merged by decimation
+UV_SEAM_CELLS = 8
+
+# Oculus viseme blend shapes Ready Player Me exports for lip sync
+OCULUS_VISEMES = [
+    "viseme_sil", "viseme_PP", "viseme_FF", "viseme_TH", "viseme_DD",
+    "viseme_kk", "viseme_CH", "viseme_SS", "viseme_nn", "viseme_RR",
+    "viseme_aa", "viseme_E", "viseme_I", "viseme_O", "viseme_U"
+]
+
+@dataclass
+class OptimizeOptions:
+    """
+    Settings for one model variant
+
+    Attributes:
+        lod_ratio: Fraction of triangles to keep (1.0 disables decimation)
+        quantize: Store normals, tangents, UVs, colors, joints and weights
+            in small integer types; positions stay float because skinned
+            meshes ignore the node transform that would dequantize them
+        keep_morph_targets: Target names to keep; None keeps all, [] drops all
+        keep_animations: Keep animation clips
+        max_texture_size: Longest side for embedded textures (None keeps size)
+    """
+    lod_ratio: float = 1.0
+    quantize: bool = False
+    keep_morph_targets: Optional[List[str]] = None
+    keep_animations: bool = True
+    max_texture_size: Optional[int] = None
+
+# "high" is the original file
+VARIANTS: Dict[str, Optional[OptimizeOptions]] = {
+    "high": None,
+    "medium": OptimizeOptions(
+        lod_ratio=0.5,
+        quantize=True,
+        keep_morph_targets=OCULUS_VISEMES,
+        keep_animations=True,
+        max_texture_size=1024
+    ),
+    "low": OptimizeOptions(
+        lod_ratio=0.2,
+        quantize=True,
+        keep_morph_targets=[],
+        keep_animations=False,
+        max_texture_size=512
+    )
+}
+
+def select_variant(requested: Optional[str], headers) -> str:
+    """
+    Variant for a request: an explicit ?variant= wins, then device hints
+
+    Save-Data asks for the smallest file; mobile clients (Sec-CH-UA-Mobile,
+    or a "Mobi" user agent when the hint is absent) get the medium variant.
+    """
+    if requested:
+        if requested not in VARIANTS:
+            raise ValueError(f"Unknown variant '{requested}', expected one of {', '.join(VARIANTS)}")
+        return requested
+
+    if headers.get("save-data", "").lower() == "on":
+        return "low"
+    mobile_hint = headers.get("sec-ch-ua-mobile")
+    if mobile_hint is not None:
+        return "medium" if mobile_hint.strip() == "?1" else "high"
+    if "Mobi" in headers.get("user-agent", ""):
+        return "medium"
+    return "high"
+
+def _decimate(
+    positions: np.ndarray,
+    triangles: np.ndarray,
+    ratio: float,
+    uvs: Optional[np.ndarray] = None
+) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Vertex-clustering decimation to roughly ratio of the triangles
+
+    Vertices are snapped to a uniform grid and each cell collapses onto its
+    lowest-index vertex, which keeps that vertex's UVs and skin weights.
+    A coarse UV cell is part of the key so vertices on opposite sides of a
+    texture seam are not merged. The grid resolution is binary-searched for
+    the largest triangle count not above the target (or the smallest count
+    reached when the target is unreachable).
+
+    Returns:
+        (triangles over the kept vertices, indices of the kept vertices), or
+        None when every triangle would collapse
+    """
+    target = max(int(len(triangles) * ratio), 1)
+    lower = positions.min(axis=0)
+    extent = float((positions.max(axis=0) - lower).max()) or 1.0
+    uv_cells = None
+    if uvs is not None:
+        uv_cells = np.floor(uvs * UV_SEAM_CELLS).astype(np.int64)
+        uv_cells -= uv_cells.min(axis=0)
+
+    best = None
+    smallest = None
+    low, high = 1.0, 4096.0
+    for _ in range(14):
+        resolution = (low + high) / 2
+        clustered = _cluster(positions, triangles, lower, extent / resolution, uv_cells)
+        if len(clustered) <= target:
+            best = clustered
+            low = resolution
+        else:
+            high = resolution
+            if smallest is None or len(clustered) < len(smallest):
+                smallest = clustered
+    if best is None or len(best) == 0:
+        best = smallest
+    if best is None or len(best) == 0 or len(best) >= len(triangles):
+        return None
+
+    kept = np.unique(best)
+    remap = np.full(len(positions), -1, dtype=np.int64)
+    remap[kept] = np.arange(len(kept))
+    return remap[best], kept
+
+def _cluster(
+    positions: np.ndarray,
+    triangles: np.ndarray,
+    lower: np.ndarray,
+    cell_size: float,
+    uv_cells: Optional[np.ndarray]
+) -> np.ndarray:
+    cells = np.floor((positions - lower) / cell_size).astype(np.int64)
+    if uv_cells is not None:
+        cells = np.concatenate([cells, uv_cells], axis=1)
+    _, first, inverse = np.unique(cells, axis=0, return_index=True, return_inverse=True)
+    representative = first[inverse.reshape(-1)]
+
+    collapsed = representative[triangles]
+    valid = (
+        (collapsed[:, 0] != collapsed[:, 1])
+        & (collapsed[:, 1] != collapsed[:, 2])
+        & (collapsed[:, 0] != collapsed[:, 2])
+    )
+    collapsed = collapsed[valid]
+
+    # Drop duplicates of the same triangle regardless of vertex order
+    _, unique = np.unique(np.sort(collapsed, axis=1), axis=0, return_index=True)
+    return collapsed[np.sort(unique)]
+
+def _quantize_attribute(name: str, array: np.ndarray, normalized: bool) -> Tuple[np.ndarray, bool, bool]:
+    """
+    Smallest storage for a vertex attribute
+
+    Returns:
+        (array, normalized, requires KHR_mesh_quantization)
+    """
+    if name in ("NORMAL", "TANGENT") and array.dtype == np.float32:
+        return np.round(np.clip(array, -1.0, 1.0) * 127).astype(np.int8), True, True
+
+    if name.startswith("TEXCOORD_") and array.dtype == np.float32:
+        if array.size and array.min() >= 0.0 and array.max() <= 1.0:
+            return np.round(array * 65535).astype(np.uint16), True, False
+        return array, normalized, False
+
+    if name.startswith("COLOR_") and array.dtype == np.float32:
+        return np.round(np.clip(array, 0.0, 1.0) * 255).astype(np.uint8), True, False
+
+    if name.startswith("JOINTS_") and array.dtype != np.uint8:
+        if array.size == 0 or array.max() < 256:
+            return array.astype(np.uint8), False, False
+        return array.astype(np.uint16), False, False
+
+    if name.startswith("WEIGHTS_") and array.dtype == np.float32:
+        scaled = np.round(array * 65535).astype(np.int64)
+        # Keep each vertex's weights summing to exactly one after rounding
+        largest = np.argmax(scaled, axis=1)
+        rows = np.arange(len(scaled))
+        scaled[rows, largest] += 65535 - scaled.sum(axis=1)
+        return np.clip(scaled, 0, 65535).astype(np.uint16), True, False
+
+    return array, normalized, False
+
+def _resize_image(data: bytes, mime_type: str, max_size: int) -> bytes:
+    """Downscale an encoded image so its longest side is at most max_size"""
+    image = Image.open(io.BytesIO(data))
+    if max(image.size) <= max_size:
+        return data
+
+    scale = max_size / max(image.size)
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    image = image.resize(size, Image.LANCZOS)
+
+    buffer = io.BytesIO()
+    if mime_type == "image/jpeg":
+        image.convert("RGB").save(buffer, format="JPEG", quality=85, optimize=True)
+    elif mime_type == "image/webp":
+        image.save(buffer, format="WEBP", quality=85)
+    else:
+        image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+def optimize_glb(data: bytes, options: OptimizeOptions) -> bytes:
+    """
+    Build an optimized copy of a GLB
+
+    Args:
+        data: Source GLB bytes
+        options: Variant settings
+
+    Returns:
+        Optimized GLB bytes
+
+    Raises:
+        ValueError: The file is not a GLB this pipeline can rewrite
+    """
+    glb = GLB(data)
+    gltf = glb.gltf
+    unsupported = UNSUPPORTED_EXTENSIONS.intersection(gltf.get("extensionsUsed", []))
+    if unsupported:
+        raise ValueError(f"Unsupported extensions: {', '.join(sorted(unsupported))}")
+    if any("uri" in buffer for buffer in gltf.get("buffers", [])):
+        raise ValueError("External buffers are not supported")
+
+    accessors = gltf.get("accessors", [])
+    builder = GLBWriter()
+    copied: Dict[Tuple[int, str], int] = {}
+    needs_quantization_extension = False
+
+    def copy_accessor(index: int, target: Optional[int] = None) -> int:
+        key = (index, "copy")
+        if key not in copied:
+            source = accessors[index]
+            copied[key] = builder.add_accessor(
+                glb.accessor(index),
+                normalized=source.get("normalized", False),
+                target=target,
+                bounds="min" in source
+            )
+        return copied[key]
+
+    def write_attribute(name: str, index: int, kept: Optional[np.ndarray]) -> int:
+        nonlocal needs_quantization_extension
+        key = (index, name)
+        if kept is None and key in copied:
+            return copied[key]
+
+        source = accessors[index]
+        array = glb.accessor(index)
+        if kept is not None:
+            array = array[kept]
+        normalized = source.get("normalized", False)
+        if options.quantize:
+            array, normalized, extension = _quantize_attribute(name, array, normalized)
+            needs_quantization_extension |= extension
+
+        new_index = builder.add_accessor(
+            array,
+            normalized=normalized,
+            target=ARRAY_BUFFER,
+            bounds=name == "POSITION" or "min" in source
+        )
+        if kept is None:
+            copied[key] = new_index
+        return new_index
+
+    keep_names = None if options.keep_morph_targets is None else set(options.keep_morph_targets)
+    # Mesh index -> (kept target indices, original target count) for meshes that lost targets
+    filtered_targets: Dict[int, Tuple[List[int], int]] = {}
+
+    for mesh_index, mesh in enumerate(gltf.get("meshes", [])):
+        extras = mesh.get("extras") or {}
+        target_names = extras.get("targetNames") or []
+        target_count = max((len(p.get("targets", [])) for p in mesh["primitives"]), default=0)
+        if keep_names is None:
+            kept_targets = list(range(target_count))
+        else:
+            kept_targets = [
+                i for i in range(target_count)
+                if i < len(target_names) and target_names[i] in keep_names
+            ]
+
+        if len(kept_targets) < target_count:
+            filtered_targets[mesh_index] = (kept_targets, target_count)
+
+        if target_count:
+            if "weights" in mesh:
+                mesh["weights"] = [mesh["weights"][i] for i in kept_targets]
+            if target_names:
+                extras["targetNames"] = [target_names[i] for i in kept_targets]
+            if not kept_targets:
+                mesh.pop("weights", None)
+                extras.pop("targetNames", None)
+                if not extras:
+                    mesh.pop("extras", None)
+
+        for primitive in mesh["primitives"]:
+            attributes = primitive["attributes"]
+            kept = None
+
+            if "indices" in primitive:
+                indices = glb.accessor(primitive["indices"]).reshape(-1).astype(np.int64)
+            else:
+                indices = None
+
+            if (
+                options.lod_ratio < 1.0
+                and primitive.get("mode", TRIANGLES) == TRIANGLES
+                and "POSITION" in attributes
+            ):
+                positions = glb.accessor_float(attributes["POSITION"])
+                if indices is None:
+                    indices = np.arange(len(positions), dtype=np.int64)
+                uvs = None
+                if "TEXCOORD_0" in attributes:
+                    uvs = glb.accessor_float(attributes["TEXCOORD_0"])
+                if len(indices) >= 3 * MIN_DECIMATION_TRIANGLES:
+                    decimated = _decimate(
+                        positions, indices[: len(indices) // 3 * 3].reshape(-1, 3), options.lod_ratio, uvs
+                    )
+                    if decimated is not None:
+                        triangles, kept = decimated
+                        indices = triangles.reshape(-1)
+
+            primitive["attributes"] = {
+                name: write_attribute(name, index, kept) for name, index in attributes.items()
+            }
+
+            if primitive.get("targets"):
+                targets = []
+                for i in kept_targets:
+                    if i >= len(primitive["targets"]):
+                        continue
+                    target = primitive["targets"][i]
+                    new_target = {}
+                    for name, index in target.items():
+                        array = glb.accessor(index)
+                        if kept is not None:
+                            array = array[kept]
+                        new_target[name] = builder.add_accessor(
+                            array,
+                            normalized=accessors[index].get("normalized", False),
+                            target=ARRAY_BUFFER,
+                            bounds=name == "POSITION"
+                        )
+                    targets.append(new_target)
+                if targets:
+                    primitive["targets"] = targets
+                else:
+                    primitive.pop("targets")
+
+            if indices is not None:
+                if kept is None and not options.quantize:
+                    primitive["indices"] = copy_accessor(primitive["indices"], ELEMENT_ARRAY_BUFFER)
+                else:
+                    index_dtype = np.uint16 if indices.size and indices.max() < 65535 else np.uint32
+                    primitive["indices"] = builder.add_accessor(
+                        indices.astype(index_dtype), target=ELEMENT_ARRAY_BUFFER
+                    )
+
+    for skin in gltf.get("skins", []):
+        if "inverseBindMatrices" in skin:
+            skin["inverseBindMatrices"] = copy_accessor(skin["inverseBindMatrices"])
+
+    animations = []
+    if options.keep_animations:
+        nodes = gltf.get("nodes", [])
+        for animation in gltf.get("animations", []):
+            channels = []
+            filtered_samplers: Dict[int, Tuple[List[int], int]] = {}
+            for channel in animation["channels"]:
+                target = channel["target"]
+                mesh_index = nodes[target["node"]].get("mesh") if "node" in target else None
+                if target["path"] == "weights" and mesh_index in filtered_targets:
+                    if not filtered_targets[mesh_index][0]:
+                        continue
+                    filtered_samplers[channel["sampler"]] = filtered_targets[mesh_index]
+                channels.append(channel)
+            if not channels:
+                continue
+
+            used = sorted({channel["sampler"] for channel in channels})
+            samplers = []
+            for sampler_index in used:
+                sampler = animation["samplers"][sampler_index]
+                sampler["input"] = copy_accessor(sampler["input"])
+                if sampler_index in filtered_samplers:
+                    # Each keyframe holds one weight per morph target (three for CUBICSPLINE)
+                    kept_targets, target_count = filtered_samplers[sampler_index]
+                    weights = glb.accessor(sampler["output"]).reshape(-1, target_count)[:, kept_targets]
+                    sampler["output"] = builder.add_accessor(
+                        weights.reshape(-1),
+                        normalized=accessors[sampler["output"]].get("normalized", False)
+                    )
+                else:
+                    sampler["output"] = copy_accessor(sampler["output"])
+                samplers.append(sampler)
+
+            renumbered = {old: new for new, old in enumerate(used)}
+            for channel in channels:
+                channel["sampler"] = renumbered[channel["sampler"]]
+            animation["channels"] = channels
+            animation["samplers"] = samplers
+            animations.append(animation)
+    if animations:
+        gltf["animations"] = animations
+    else:
+        gltf.pop("animations", None)
+
+    for image in gltf.get("images", []):
+        if "bufferView" not in image:
+            continue
+        image_data = glb.buffer_view(image["bufferView"])
+        if options.max_texture_size:
+            try:
+                image_data = _resize_image(image_data, image.get("mimeType", "image/png"), options.max_texture_size)
+            except Exception as e:
+                logger.warning(f"Keeping texture at original size: {e}")
+        image["bufferView"] = builder.add_view(image_data)
+
+    if needs_quantization_extension:
+        for key in ("extensionsUsed", "extensionsRequired"):
+            extensions = gltf.setdefault(key, [])
+            if "KHR_mesh_quantization" not in extensions:
+                extensions.append("KHR_mesh_quantization")
+
+    return builder.to_bytes(gltf)
+
+def optimize_variant(data: bytes, variant: str) -> bytes:
+    """Bytes for a named variant; the original for "high" """
+    options = VARIANTS[variant]
+    if options is None:
+        return data
+    return optimize_glb(data, options)
@@ -0,0 +1,117 @@
+# Backend/http_caching.py
+"""
+HTTP Conditional Caching
+Strong ETags, Last-Modified and per-route Cache-Control policies, with
+If-None-Match / If-Modified-Since handling that answers 304 before a
+response body is built.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+logger = logging.getLogger(__name__)
+
+# Cache-Control per route template; override with HTTP_CACHE_POLICIES (JSON object)
+DEFAULT_CACHE_POLICIES = {
+    # Avatars change on update: always revalidate, but a 304 costs almost nothing
+    "/api/avatar/{avatar_id}": "private, no-cache",
+    "/api/avatar/iframe-config": "public, max-age=300, stale-while-revalidate=3600",
+    "/api/clothing/catalog": "public, max-age=60, stale-while-revalidate=600",
+    "/api/assets/glb": "public, max-age=86400",
+    # Keyed by model content and render settings
+    "/api/avatar/{avatar_id}/thumbnail": "public, max-age=3600, stale-while-revalidate=86400"
+}
+
+def load_cache_policies() -> Dict[str, str]:
+    """Default policies merged with the HTTP_CACHE_POLICIES environment override"""
+    policies = dict(DEFAULT_CACHE_POLICIES)
+    override = os.getenv("HTTP_CACHE_POLICIES")
+    if override:
+        try:
+            policies.update(json.loads(override))
+        except ValueError as e:
+            logger.error(f"Ignoring invalid HTTP_CACHE_POLICIES: {e}")
+    return policies
+
+CACHE_POLICIES = load_cache_policies()
+
+def strong_etag(*parts) -> str:
+    """Quoted strong ETag derived from version identifiers or content"""
+    hasher = hashlib.sha256()
+    for part in parts:
+        hasher.update(part if isinstance(part, bytes) else str(part).encode())
+        hasher.update(b"\0")
+    return f'"{hasher.hexdigest()[:32]}"'
+
+def http_date(value: datetime) -> str:
+    """Format a datetime as an HTTP date (naive values are taken as local time)"""
+    if value.tzinfo is None:
+        value = value.astimezone()
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+def validator_headers(
+    route: str,
+    etag: str,
+    last_modified: Optional[datetime] = None
+) -> Dict[str, str]:
+    """ETag, Last-Modified and the route's Cache-Control policy"""
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    policy = CACHE_POLICIES.get(route)
+    if policy:
+        headers["Cache-Control"] = policy
+    return headers
+
+def is_not_modified(
+    request: Request,
+    etag: str,
+    last_modified: Optional[datetime] = None
+) -> bool:
+    """
+    Evaluate the request's conditional headers (RFC 9110 section 13.2.2)
+
+    If-None-Match takes precedence; If-Modified-Since is only consulted when the
+    client sent no entity tags.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # Weak comparison is correct for GET/HEAD
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag.removeprefix("W/") in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        modified = last_modified if last_modified.tzinfo else last_modified.astimezone()
+        # HTTP dates have one-second resolution
+        return modified.replace(microsecond=0) <= since
+
+    return False
+
+def conditional_response(
+    request: Request,
+    route: str,
+    etag: str,
+    last_modified: Optional[datetime] = None
+) -> Optional[Response]:
+    """Return a 304 response when the client's copy is current, otherwise None"""
+    if request.method not in ("GET", "HEAD"):
+        return None
+    if not is_not_modified(request, etag, last_modified):
+        return None
+    return Response(status_code=304, headers=validator_headers(route, etag, last_modified))
@@ -0,0 +1,272 @@
+# Backend/http_client.py
+"""
+Outbound HTTP Client
+One pooled httpx.AsyncClient per worker for calls to Ready Player Me and
+other model hosts: keep-alive connections, HTTP/2 when available, per-host
+concurrency limits, jittered retries, coalescing of identical in-flight
+requests and a per-host circuit breaker.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from single_flight import SingleFlight
+
+try:
+    import h2  # noqa: F401  (httpx negotiates HTTP/2 only when h2 is installed)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Responses worth retrying for idempotent requests
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+COALESCED_METHODS = {"GET", "HEAD"}
+
+class CircuitOpenError(Exception):
+    """Requests to a host are being short-circuited after repeated failures"""
+
+class _CircuitBreaker:
+    """
+    Per-host breaker: closed -> open after consecutive failures, then one
+    half-open trial request after the reset timeout decides which way it goes
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_request(self, host: str) -> bool:
+        """Raise CircuitOpenError, or admit the request; True when it is the half-open trial"""
+        state = self.state
+        if state == "open" or (state == "half-open" and self.trial_in_flight):
+            raise CircuitOpenError(f"Circuit open for {host}")
+        if state == "half-open":
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def end_trial(self):
+        """The trial finished without a verdict (cancelled, or failed before reaching the host)"""
+        self.trial_in_flight = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.trial_in_flight = False
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            # A failed trial restarts the open period
+            self.opened_at = time.monotonic()
+
+class OutboundClient:
+    """
+    Shared async HTTP client
+
+    request() retries idempotent requests on transport errors and
+    429/502/503/504 with full-jitter exponential backoff (honouring
+    Retry-After), and concurrent GET/HEAD requests for the same URL share a
+    single upstream call. stream() applies the host limit and breaker but
+    neither retries nor coalesces, since the body is consumed by the caller.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        per_host_limit: int = 10,
+        timeout: float = 10.0,
+        retries: int = 2,
+        backoff_base: float = 0.2,
+        backoff_max: float = 5.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        http2: bool = True,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.transport = transport
+        self.client: Optional[httpx.AsyncClient] = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._breakers: Dict[str, _CircuitBreaker] = {}
+        self._inflight = SingleFlight()
+
+    async def start(self):
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2,
+                follow_redirects=True,
+                transport=self.transport
+            )
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a request and read the whole response
+
+        Raises:
+            CircuitOpenError: The host's breaker is open
+            httpx.HTTPError: The request failed after all retries
+        """
+        method = method.upper()
+        if method in COALESCED_METHODS and not kwargs:
+            return await self._inflight.run((method, url), lambda: self._send_with_retries(method, url))
+
+        return await self._send_with_retries(method, url, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def head(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("HEAD", url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs):
+        """Streaming request through the host limit and circuit breaker"""
+        await self.start()
+        host = _host(url)
+        breaker = self._breaker(host)
+        trial = breaker.before_request(host)
+        try:
+            async with self._slot(host):
+                try:
+                    async with self.client.stream(method, url, **kwargs) as response:
+                        if response.status_code >= 500:
+                            breaker.record_failure()
+                        else:
+                            breaker.record_success()
+                        yield response
+                except httpx.TransportError:
+                    breaker.record_failure()
+                    raise
+        finally:
+            if trial:
+                breaker.end_trial()
+
+    def status(self) -> Dict[str, Dict]:
+        """Breaker state per host, for health reporting"""
+        return {
+            host: {"state": breaker.state, "failures": breaker.failures}
+            for host, breaker in self._breakers.items()
+        }
+
+    async def _send_with_retries(self, method: str, url: str, **kwargs) -> httpx.Response:
+        await self.start()
+        host = _host(url)
+        breaker = self._breaker(host)
+        attempts = self.retries + 1 if method in IDEMPOTENT_METHODS else 1
+
+        attempt = 0
+        while True:
+            trial = breaker.before_request(host)
+            try:
+                async with self._slot(host):
+                    response = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                breaker.record_failure()
+                if attempt + 1 == attempts:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"{method} {url} failed ({e!r}); retrying in {delay:.2f}s")
+            else:
+                if response.status_code >= 500:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                if response.status_code not in RETRY_STATUS_CODES or attempt + 1 == attempts:
+                    return response
+                delay = _retry_after(response) or self._backoff(attempt)
+                logger.warning(f"{method} {url} returned {response.status_code}; retrying in {delay:.2f}s")
+            finally:
+                # Cancellation and non-transport errors (redirect loops, bad URLs, decoding)
+                # give no verdict; the breaker must not wait on that trial forever
+                if trial:
+                    breaker.end_trial()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter keeps retries from many workers from synchronising
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _slot(self, host: str) -> asyncio.Semaphore:
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = asyncio.Semaphore(self.per_host_limit)
+        return slot
+
+    def _breaker(self, host: str) -> _CircuitBreaker:
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = _CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return breaker
+
+def _host(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return min(max(float(value), 0.0), 30.0)
+    except ValueError:
+        return None
+
+def create_http_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> OutboundClient:
+    """Create the outbound client configured by environment variables"""
+    return OutboundClient(
+        max_connections=int(os.getenv("OUTBOUND_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(os.getenv("OUTBOUND_MAX_KEEPALIVE", "20")),
+        per_host_limit=int(os.getenv("OUTBOUND_PER_HOST_LIMIT", "10")),
+        timeout=float(os.getenv("OUTBOUND_TIMEOUT", "10")),
+        retries=int(os.getenv("OUTBOUND_RETRIES", "2")),
+        failure_threshold=int(os.getenv("OUTBOUND_BREAKER_FAILURES", "5")),
+        reset_timeout=float(os.getenv("OUTBOUND_BREAKER_RESET", "30")),
+        http2=os.getenv("OUTBOUND_HTTP2", "true").lower() == "true",
+        transport=transport
+    )
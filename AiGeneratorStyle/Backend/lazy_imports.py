@@ -0,0 +1,214 @@
+# Backend/lazy_imports.py
+"""
+Lazy Imports
+Defers heavy optional dependencies (torch, OpenCV, MediaPipe, trimesh,
+dlib, SciPy) until first use so the API process starts with little more
+than FastAPI in memory, and records how long each one took to load.
+
+Run as a script for an import-time report of the API, or with --check to
+fail (exit status 1) when cold start exceeds the configured budget:
+
+    python lazy_imports.py --check
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+import types
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Modules the API must not import at startup
+HEAVY_MODULES = ("torch", "cv2", "mediapipe", "trimesh", "dlib", "scipy", "open3d", "smplx")
+
+# Cold start budget for "import main" in a fresh interpreter
+DEFAULT_BUDGET_SECONDS = 3.0
+DEFAULT_BUDGET_MB = 250.0
+
+_load_records: List[Dict] = []
+_load_lock = threading.RLock()
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB (peak RSS where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS bytes
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+class LazyModule(types.ModuleType):
+    """Module stand-in that imports the real module on first attribute access"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_module"]
+        if module is not None:
+            return module
+
+        with _load_lock:
+            module = self.__dict__["_module"]
+            if module is None:
+                started = time.perf_counter()
+                rss_before = current_rss_mb()
+                module = importlib.import_module(self.__name__)
+                record = {
+                    "module": self.__name__,
+                    "seconds": round(time.perf_counter() - started, 4),
+                    "rssDeltaMb": round(current_rss_mb() - rss_before, 1),
+                    "loadedAt": time.time()
+                }
+                _load_records.append(record)
+                logger.info(
+                    f"Loaded {self.__name__} on first use in {record['seconds']:.2f}s "
+                    f"(+{record['rssDeltaMb']:.0f} MB)"
+                )
+                self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attribute: str):
+        return getattr(self._load(), attribute)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    Module that is imported when first used
+
+    Already-imported modules are returned as-is. Missing modules only raise
+    ImportError when an attribute is accessed.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
+
+def preload(names: List[str]):
+    """Import modules now, e.g. in a worker that will need them anyway"""
+    for name in names:
+        lazy = LazyModule(name)
+        try:
+            lazy._load()
+        except ImportError as e:
+            logger.warning(f"Could not preload {name}: {e}")
+
+def load_report() -> List[Dict]:
+    """Modules loaded through lazy_import/preload, in load order"""
+    with _load_lock:
+        return [dict(record) for record in _load_records]
+
+def loaded_heavy_modules() -> List[str]:
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+def startup_report(import_seconds: float) -> Dict:
+    """Snapshot logged when the API starts"""
+    return {
+        "importSeconds": round(import_seconds, 3),
+        "rssMb": round(current_rss_mb(), 1),
+        "modules": len(sys.modules),
+        "heavyModulesLoaded": loaded_heavy_modules()
+    }
+
+def measure_cold_start(module: str = "main", top: int = 15) -> Dict:
+    """
+    Import module in a fresh interpreter and report time, memory and the
+    slowest imports (from python -X importtime)
+    """
+    probe = (
+        "import json, sys, time\n"
+        "started = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - started\n"
+        "from lazy_imports import current_rss_mb, loaded_heavy_modules\n"
+        "print(json.dumps({'seconds': elapsed, 'rssMb': current_rss_mb(),"
+        " 'heavyModulesLoaded': loaded_heavy_modules()}))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    # Lines look like "import time:   self [us] | cumulative | imported package"
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        imports.append({
+            "module": name.strip(),
+            "selfMs": int(self_us) / 1000,
+            "cumulativeMs": int(cumulative_us) / 1000
+        })
+
+    summary = json.loads(result.stdout.strip().splitlines()[-1])
+    summary["slowest"] = sorted(imports, key=lambda e: e["cumulativeMs"], reverse=True)[:top]
+    return summary
+
+def check_budget(
+    report: Dict,
+    budget_seconds: float,
+    budget_mb: float
+) -> List[str]:
+    """Budget violations in a cold start report (empty when within budget)"""
+    problems = []
+    if report["seconds"] > budget_seconds:
+        problems.append(f"import took {report['seconds']:.2f}s (budget {budget_seconds:.2f}s)")
+    if report["rssMb"] > budget_mb:
+        problems.append(f"RSS after import is {report['rssMb']:.0f} MB (budget {budget_mb:.0f} MB)")
+    if report["heavyModulesLoaded"]:
+        problems.append(f"heavy modules loaded at startup: {', '.join(report['heavyModulesLoaded'])}")
+    return problems
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="API cold start import report")
+    parser.add_argument("--module", default="main", help="module to import (default: main)")
+    parser.add_argument("--check", action="store_true", help="exit with status 1 when over budget")
+    parser.add_argument(
+        "--budget-seconds",
+        type=float,
+        default=float(os.getenv("IMPORT_BUDGET_SECONDS", DEFAULT_BUDGET_SECONDS))
+    )
+    parser.add_argument(
+        "--budget-mb",
+        type=float,
+        default=float(os.getenv("IMPORT_BUDGET_MB", DEFAULT_BUDGET_MB))
+    )
+    args = parser.parse_args(argv)
+
+    report = measure_cold_start(args.module)
+    print(f"import {args.module}: {report['seconds']:.2f}s, {report['rssMb']:.0f} MB RSS")
+    print("slowest imports (cumulative):")
+    for entry in report["slowest"]:
+        print(f"  {entry['cumulativeMs']:9.1f} ms  {entry['module']}")
+
+    problems = check_budget(report, args.budget_seconds, args.budget_mb)
+    for problem in problems:
+        print(f"OVER BUDGET: {problem}")
+    if args.check and problems:
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,39 @@
 # backend/main.py
-from fastapi import FastAPI, HTTPException, UploadFile, File
+import time
+IMPORT_STARTED = time.perf_counter()  # measured for the startup report
+
+from fastapi import FastAPI, HTTPException, UploadFile, File, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, ValidationError
 from typing import Optional, List, Dict, Any
 import uuid
+import asyncio
 from datetime import datetime
 import logging
 import json
 import os
-import requests
 import base64
+from functools import partial
+from urllib.parse import parse_qs, urlsplit
 import httpx
+from texture_store import create_texture_store, MEDIA_TYPES, IMMUTABLE_CACHE_CONTROL
+from blob_storage import create_blob_storage, content_key, is_digest
+from avatar_store import create_avatar_store
+from avatar_cache import create_avatar_cache
+from clothing_catalog import load_catalog
+from size_charts import get_size_charts
+from http_caching import conditional_response, strong_etag, validator_headers, CACHE_POLICIES
+from serialization import RawJSONResponse, EncodedBodyCache, dumps
+from asset_proxy import create_asset_cache, proxied_url, AssetFetchError, _parse_range
+from http_client import create_http_client, CircuitOpenError
+from glb_optimizer import select_variant, optimize_variant, OPTIMIZER_VERSION
+from thumbnail_renderer import create_thumbnail_service
+from lazy_imports import startup_report, load_report, current_rss_mb
+from admission_control import AdmissionControlMiddleware, create_admission_control
+from compression import CompressionMiddleware, create_response_compressor
+from request_metrics import RequestMetricsMiddleware, create_request_metrics, label_string, PROMETHEUS_CONTENT_TYPE
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -33,12 +55,27 @@ RPM_APP_ID = os.getenv("READYME_APP_ID")
 RPM_ORG_ID = os.getenv("READYME_ORG_ID")
 RPM_SUBDOMAIN = os.getenv("READYME_SUBDOMAIN", "styleit")
 
+# Public base URL for links the browser follows back to this API (proxied models)
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", f"http://localhost:{API_PORT}")
+ASSET_PROXY_ENABLED = os.getenv("ASSET_PROXY_ENABLED", "true").lower() == "true"
+
+# Render avatar thumbnails server-side (placeholder image when disabled)
+THUMBNAILS_ENABLED = os.getenv("THUMBNAILS_ENABLED", "true").lower() == "true"
+PLACEHOLDER_THUMBNAIL_URL = "data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMjAwIiBoZWlnaHQ9IjIwMCIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj4KICA8cmVjdCB3aWR0aD0iMjAwIiBoZWlnaHQ9IjIwMCIgZmlsbD0iI2U0ZTRlNCIvPgogIDxjaXJjbGUgY3g9IjEwMCIgY3k9IjcwIiByPSI0MCIgZmlsbD0iIzk5OSIvPgogIDxwYXRoIGQ9Ik01MCAxNTBoMTAwYzAgMjcuNi0yMi40IDUwLTUwIDUwcy01MC0yMi40LTUwLTUweiIgZmlsbD0iIzk5OSIvPgo8L3N2Zz4="
+
+# Check that exported Ready Player Me URLs exist before saving them
+VALIDATE_AVATAR_URLS = os.getenv("VALIDATE_AVATAR_URLS", "true").lower() == "true"
+
 # CORS Origins
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:4200,http://localhost:4300,*").split(",")
 
 # Initialize FastAPI app
 app = FastAPI(title="AI Avatar Clothing Fit API", version="1.0.0")
 
+# Concurrency limits and wait queues for CPU-heavy routes (inside CORS so 429s carry CORS headers)
+admission_control = create_admission_control()
+app.add_middleware(AdmissionControlMiddleware, control=admission_control)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -48,8 +85,58 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory storage for development
-avatars_db = {}
+# gzip/brotli response encoding; bodies with an ETag are compressed once and cached
+response_compressor = create_response_compressor()
+app.add_middleware(CompressionMiddleware, compressor=response_compressor)
+
+# Per-route latency and size histograms, outermost so rejected requests are counted too
+request_metrics = create_request_metrics()
+app.add_middleware(RequestMetricsMiddleware, metrics=request_metrics)
+
+# Persistent avatar storage (PostgreSQL in deployments, SQLite locally)
+avatar_store = create_avatar_store()
+
+# Read-through cache in front of the store (Redis shared tier + per-worker L1)
+avatar_cache = create_avatar_cache(avatar_store)
+
+# Indexed clothing catalog, loaded once per process
+clothing_catalog = load_catalog()
+
+# Brand size charts used by fitting and size recommendations (built before workers fork)
+size_charts = get_size_charts()
+
+# Encoded catalog pages keyed by ETag (the catalog never changes while running)
+catalog_responses = EncodedBodyCache(max_entries=int(os.getenv("CATALOG_RESPONSE_CACHE_SIZE", "2048")))
+
+# Upper bound on items per bulk avatar request
+AVATAR_BATCH_MAX = int(os.getenv("AVATAR_BATCH_MAX", "1000"))
+
+# Pooled client for all outbound calls (Ready Player Me, model hosts)
+http_client = create_http_client()
+
+# Third-party GLB models, fetched once and served from local disk
+asset_cache = create_asset_cache(client=http_client)
+
+# Encoded face/garment textures, stored by content hash
+texture_store = create_texture_store()
+
+# Avatar/outfit thumbnails rendered in a process pool, kept in texture storage
+thumbnail_service = create_thumbnail_service(asset_cache, texture_store.backend)
+
+# Uploaded meshes and garment assets, stored once per content hash (local disk or S3/MinIO)
+artifact_storage = create_blob_storage(
+    kind=os.getenv("ARTIFACT_STORAGE", "local"),
+    path=os.getenv("ARTIFACT_STORAGE_PATH", "./storage/artifacts"),
+    prefix="artifacts",
+    cache_control=IMMUTABLE_CACHE_CONTROL
+)
+ARTIFACT_MAX_BYTES = int(os.getenv("ARTIFACT_MAX_BYTES", str(512 * 1024 * 1024)))
+ARTIFACT_TYPES = {
+    "glb": "model/gltf-binary",
+    "gltf": "model/gltf+json",
+    "bin": "application/octet-stream",
+    **MEDIA_TYPES
+}
 
 # Pydantic models
 class SimpleMeasurements(BaseModel):
@@ -76,6 +163,43 @@ class IframeAvatarRequest(BaseModel):
     avatarUrl: str
     measurements: SimpleMeasurements
 
+# Bulk requests take raw items so one invalid entry doesn't reject the batch
+class BatchGenerateRequest(BaseModel):
+    measurements: List[Dict[str, Any]]
+
+class BatchGetRequest(BaseModel):
+    avatarIds: List[str]
+
+class BatchUpdateRequest(BaseModel):
+    updates: List[Dict[str, Any]]
+
+@app.on_event("startup")
+async def log_startup_report():
+    report = startup_report(time.perf_counter() - IMPORT_STARTED)
+    logger.info(
+        f"API started in {report['importSeconds']:.2f}s with {report['rssMb']:.0f} MB RSS, "
+        f"{report['modules']} modules loaded"
+    )
+    if report["heavyModulesLoaded"]:
+        logger.warning(f"Heavy modules loaded at startup: {', '.join(report['heavyModulesLoaded'])}")
+
+@app.on_event("startup")
+async def open_avatar_store():
+    await request_metrics.start()
+    await http_client.start()
+    await thumbnail_service.start()
+    await avatar_store.connect()
+    await avatar_cache.start()
+
+@app.on_event("shutdown")
+async def close_avatar_store():
+    await avatar_cache.close()
+    await avatar_store.close()
+    await thumbnail_service.close()
+    await asset_cache.close()
+    await http_client.close()
+    await request_metrics.close()
+
 @app.get("/")
 def read_root():
     return {
@@ -96,45 +220,80 @@ def health_check():
             "avatar": "operational",
             "api": "operational",
             "readyPlayerMe": "configured" if RPM_API_KEY else "not configured"
-        }
+        },
+        "runtime": {
+            "rssMb": round(current_rss_mb(), 1),
+            "lazyModules": load_report()
+        },
+        "admission": admission_control.metrics(),
+        "compression": response_compressor.metrics()
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus metrics, merged across workers when METRICS_DIR is set"""
+    return Response(await request_metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+def _admission_gauges() -> Dict[str, Dict[str, float]]:
+    active = {}
+    queued = {}
+    for route, gate in admission_control.metrics().items():
+        active[label_string(route=route)] = gate["active"]
+        for priority, depth in gate["queued"].items():
+            queued[label_string(route=route, priority=priority)] = depth
+    return {"admission_requests_active": active, "admission_queue_depth": queued}
+
+request_metrics.add_collector(_admission_gauges)
+
+def _compression_gauges() -> Dict[str, Dict[str, float]]:
+    cache = response_compressor.cache
+    return {
+        "compression_cache_bytes": {"": cache.total_bytes},
+        "compression_cache_entries": {"": len(cache.entries)}
+    }
+
+request_metrics.add_collector(_compression_gauges)
+
 @app.post("/api/avatar/generate", response_model=SimpleAvatarResponse)
 async def generate_avatar(measurements: SimpleMeasurements):
     """Generate a 3D avatar from measurements using Ready Player Me API"""
     try:
-        # Generate unique avatar ID
-        avatar_id = f"rpm_avatar_{uuid.uuid4().hex[:8]}"
-        
-        # Since Ready Player Me API requires authentication that we don't have properly configured,
-        # we'll use the iframe approach which is more reliable
-        avatar_data = {
-            "avatarId": avatar_id,
-            "avatarUrl": get_default_avatar_url(measurements.dict()),
-            "thumbnailUrl": generate_thumbnail_url(),
-            "metadata": {
-                "created_at": datetime.now().isoformat(),
-                "measurements": measurements.dict(),
-                "provider": "readyplayerme-default",
-                "version": "1.0",
-                "isHumanModel": True,
-                "note": "Use the iframe integration for custom avatars"
-            }
-        }
+        avatar_data = _build_default_avatar(measurements)
+        record = await avatar_cache.put(avatar_data)
+        _schedule_thumbnails([avatar_data])
         
-        # Store in memory
-        avatars_db[avatar_id] = avatar_data
-        
-        logger.info(f"Avatar generated successfully: {avatar_id}")
-        return avatar_data
+        logger.info(f"Avatar generated successfully: {record.avatar_id}")
+        return RawJSONResponse(record.body)
         
     except Exception as e:
         logger.error(f"Avatar generation failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/avatar/iframe-config")
-async def get_iframe_config():
-    """Get Ready Player Me iframe configuration"""
+def _build_default_avatar(measurements: SimpleMeasurements) -> Dict:
+    """Avatar record for generated (non-iframe) avatars"""
+    # Generate unique avatar ID
+    avatar_id = f"rpm_avatar_{uuid.uuid4().hex[:8]}"
+    
+    # Since Ready Player Me API requires authentication that we don't have properly configured,
+    # we'll use the iframe approach which is more reliable
+    source_url = get_default_avatar_url(measurements.dict())
+    return {
+        "avatarId": avatar_id,
+        "avatarUrl": public_asset_url(source_url),
+        "thumbnailUrl": generate_thumbnail_url(avatar_id, source_url),
+        "metadata": {
+            "created_at": datetime.now().isoformat(),
+            "measurements": measurements.dict(),
+            "provider": "readyplayerme-default",
+            "version": "1.0",
+            "isHumanModel": True,
+            "note": "Use the iframe integration for custom avatars",
+            "sourceUrl": source_url
+        }
+    }
+
+def _build_iframe_config() -> Dict:
+    """Build the Ready Player Me iframe configuration (static for the process)"""
     # Build the correct iframe URL with all necessary parameters
     base_url = f"https://{RPM_SUBDOMAIN}.readyplayer.me/avatar"
     
@@ -207,9 +366,29 @@ async def get_iframe_config():
         """
     }
 
+# Rendered once at startup; every request serves the same bytes
+IFRAME_CONFIG_BODY = dumps(_build_iframe_config())
+IFRAME_CONFIG_ETAG = strong_etag(IFRAME_CONFIG_BODY)
+IFRAME_CONFIG_MODIFIED = datetime.now()
+
+@app.get("/api/avatar/iframe-config")
+async def get_iframe_config(request: Request):
+    """Get Ready Player Me iframe configuration"""
+    route = "/api/avatar/iframe-config"
+    not_modified = conditional_response(request, route, IFRAME_CONFIG_ETAG, IFRAME_CONFIG_MODIFIED)
+    if not_modified is not None:
+        return not_modified
+    
+    return RawJSONResponse(
+        IFRAME_CONFIG_BODY,
+        headers=validator_headers(route, IFRAME_CONFIG_ETAG, IFRAME_CONFIG_MODIFIED)
+    )
+
 @app.post("/api/avatar/from-iframe", response_model=SimpleAvatarResponse)
 async def save_avatar_from_iframe(request: IframeAvatarRequest):
     """Save avatar URL received from Ready Player Me iframe"""
+    await _validate_avatar_url(request.avatarUrl)
+    
     try:
         avatar_id = f"rpm_avatar_{uuid.uuid4().hex[:8]}"
         
@@ -221,52 +400,192 @@ async def save_avatar_from_iframe(request: IframeAvatarRequest):
         
         avatar_data = {
             "avatarId": avatar_id,
-            "avatarUrl": request.avatarUrl,
-            "thumbnailUrl": request.avatarUrl.replace(".glb", ".png"),
+            "avatarUrl": public_asset_url(request.avatarUrl),
+            "thumbnailUrl": generate_thumbnail_url(
+                avatar_id,
+                request.avatarUrl,
+                fallback=request.avatarUrl.replace(".glb", ".png")
+            ),
             "metadata": {
                 "created_at": datetime.now().isoformat(),
                 "measurements": request.measurements.dict(),
                 "provider": "readyplayerme-iframe",
                 "version": "1.0",
                 "isHumanModel": True,
-                "rpmId": rpm_id
+                "rpmId": rpm_id,
+                "sourceUrl": request.avatarUrl
             }
         }
         
-        avatars_db[avatar_id] = avatar_data
+        record = await avatar_cache.put(avatar_data)
+        _schedule_thumbnails([avatar_data])
         
         logger.info(f"Avatar saved from iframe: {avatar_id}")
-        return avatar_data
+        return RawJSONResponse(record.body)
         
     except Exception as e:
         logger.error(f"Failed to save iframe avatar: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _validate_avatar_url(avatar_url: str):
+    """Reject model URLs the host reports as missing; unreachable hosts don't block saving"""
+    if not VALIDATE_AVATAR_URLS or not asset_cache.is_allowed(avatar_url):
+        return
+    try:
+        response = await http_client.head(avatar_url)
+    except (CircuitOpenError, httpx.HTTPError) as e:
+        logger.warning(f"Could not validate avatar URL {avatar_url}: {e}")
+        return
+    if response.status_code in (404, 410):
+        raise HTTPException(status_code=422, detail="Avatar URL does not exist")
+
+# Bulk routes are declared before /api/avatar/{avatar_id} so "batch" isn't taken as an ID
+
+@app.post("/api/avatar/batch/generate")
+async def generate_avatars_batch(request: BatchGenerateRequest):
+    """Generate many avatars; invalid items are reported, valid ones are stored in one write"""
+    _check_batch_size(len(request.measurements))
+    
+    results: List[Optional[bytes]] = [None] * len(request.measurements)
+    avatars = []
+    positions = []
+    for index, item in enumerate(request.measurements):
+        try:
+            measurements = SimpleMeasurements.model_validate(item)
+        except ValidationError as e:
+            results[index] = _batch_error(index, None, _validation_message(e))
+            continue
+        avatars.append(_build_default_avatar(measurements))
+        positions.append(index)
+    
+    try:
+        records = await avatar_cache.put_many(avatars)
+    except Exception as e:
+        logger.error(f"Batch avatar generation failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    for index, record in zip(positions, records):
+        results[index] = _batch_success(index, record)
+    _schedule_thumbnails(avatars)
+    
+    logger.info(f"Batch generated {len(records)} of {len(results)} avatars")
+    return _batch_response(results, len(records))
+
+@app.post("/api/avatar/batch/get")
+async def get_avatars_batch(request: BatchGetRequest):
+    """Fetch many avatars by ID; missing IDs are reported per item"""
+    _check_batch_size(len(request.avatarIds))
+    
+    records = await avatar_cache.get_many(request.avatarIds)
+    results = [
+        _batch_success(index, records[avatar_id]) if avatar_id in records
+        else _batch_error(index, avatar_id, "Avatar not found")
+        for index, avatar_id in enumerate(request.avatarIds)
+    ]
+    return _batch_response(results, sum(avatar_id in records for avatar_id in request.avatarIds))
+
+@app.put("/api/avatar/batch/update")
+async def update_avatars_batch(request: BatchUpdateRequest):
+    """Update measurements of many avatars in one storage round trip"""
+    _check_batch_size(len(request.updates))
+    
+    results: List[Optional[bytes]] = [None] * len(request.updates)
+    updates: Dict[str, Dict] = {}
+    positions: Dict[str, int] = {}
+    for index, item in enumerate(request.updates):
+        avatar_id = item.get("avatarId")
+        if not isinstance(avatar_id, str) or not avatar_id:
+            results[index] = _batch_error(index, None, "avatarId is required")
+            continue
+        if avatar_id in positions:
+            results[index] = _batch_error(index, avatar_id, "Duplicate avatarId in batch")
+            continue
+        try:
+            measurements = SimpleMeasurements.model_validate(item.get("measurements"))
+        except ValidationError as e:
+            results[index] = _batch_error(index, avatar_id, _validation_message(e))
+            continue
+        updates[avatar_id] = measurements.dict()
+        positions[avatar_id] = index
+    
+    try:
+        records = await avatar_cache.update_measurements_many(updates, datetime.now().isoformat())
+    except Exception as e:
+        logger.error(f"Batch avatar update failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    for avatar_id, index in positions.items():
+        record = records.get(avatar_id)
+        results[index] = (
+            _batch_success(index, record) if record is not None
+            else _batch_error(index, avatar_id, "Avatar not found")
+        )
+    return _batch_response(results, len(records))
+
+def _check_batch_size(size: int):
+    if size > AVATAR_BATCH_MAX:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {size} items exceeds the limit of {AVATAR_BATCH_MAX}"
+        )
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'measurements'}: {item['msg']}"
+        for item in error.errors()
+    )
+
+def _batch_success(index: int, record) -> bytes:
+    # Splice the record's stored bytes in rather than re-encoding the avatar
+    head = dumps({"index": index, "avatarId": record.avatar_id, "success": True})
+    return head[:-1] + b',"avatar":' + record.body + b"}"
+
+def _batch_error(index: int, avatar_id: Optional[str], message: str) -> bytes:
+    return dumps({"index": index, "avatarId": avatar_id, "success": False, "error": message})
+
+def _batch_response(results: List[bytes], succeeded: int) -> RawJSONResponse:
+    return RawJSONResponse(
+        b'{"results":[' + b",".join(results) + b"]," + dumps({
+            "total": len(results),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded
+        })[1:]
+    )
+
 @app.get("/api/avatar/{avatar_id}", response_model=SimpleAvatarResponse)
-async def get_avatar(avatar_id: str):
+async def get_avatar(avatar_id: str, request: Request):
     """Get avatar by ID"""
-    if avatar_id not in avatars_db:
+    record = await avatar_cache.get(avatar_id)
+    if record is None:
         raise HTTPException(status_code=404, detail="Avatar not found")
     
-    return avatars_db[avatar_id]
+    route = "/api/avatar/{avatar_id}"
+    etag = _avatar_etag(record)
+    not_modified = conditional_response(request, route, etag, record.updated_at)
+    if not_modified is not None:
+        return not_modified
+    
+    # Serve the bytes encoded when the record was written; no model validation
+    return RawJSONResponse(record.body, headers=validator_headers(route, etag, record.updated_at))
 
 @app.put("/api/avatar/{avatar_id}/update", response_model=SimpleAvatarResponse)
 async def update_avatar(avatar_id: str, measurements: SimpleMeasurements):
     """Update avatar measurements"""
-    if avatar_id not in avatars_db:
+    record = await avatar_cache.update_measurements(
+        avatar_id,
+        measurements.dict(),
+        datetime.now().isoformat()
+    )
+    if record is None:
         raise HTTPException(status_code=404, detail="Avatar not found")
     
-    # Update measurements
-    avatars_db[avatar_id]["metadata"]["measurements"] = measurements.dict()
-    avatars_db[avatar_id]["metadata"]["updated_at"] = datetime.now().isoformat()
-    
-    return avatars_db[avatar_id]
+    return RawJSONResponse(record.body)
 
 @app.post("/api/avatar/{avatar_id}/face")
 async def process_face_photo(avatar_id: str, face_photo: UploadFile = File(...)):
     """Process face photo for avatar - guides user to use iframe instead"""
     try:
-        if avatar_id not in avatars_db:
+        if await avatar_cache.get(avatar_id) is None:
             raise HTTPException(status_code=404, detail="Avatar not found")
         
         # Since we can't directly process photos with RPM API without proper auth,
@@ -291,7 +610,135 @@ async def process_face_photo(avatar_id: str, face_photo: UploadFile = File(...))
             "error": str(e)
         }
 
+@app.websocket("/api/avatar/{avatar_id}/face/stream")
+async def stream_face_capture(websocket: WebSocket, avatar_id: str):
+    """
+    Stream webcam frames for tracked face capture
+    
+    The client sends encoded frames as binary messages and gets a status message
+    back for every processed frame. Frames arriving while the previous one is still
+    being processed are dropped, so the session never falls behind the camera.
+    Text messages "reset" and "reconstruct" restart fusion or force reconstruction.
+    Once the fused landmarks are stable the face is reconstructed and sent back.
+    If reconstruction fails, the error is sent and fusion starts over, so the
+    next attempt waits for fresh stable frames. If tracking is unavailable or
+    the session fails, an error message is sent and the socket closed with
+    code 1011.
+    """
+    await websocket.accept()
+    
+    if await avatar_cache.get(avatar_id) is None:
+        await websocket.close(code=4404, reason="Avatar not found")
+        return
+    
+    try:
+        # MediaPipe and OpenCV are only needed for this endpoint
+        from face_tracking import FaceTrackingSession
+        # Building the MediaPipe graph takes a while; keep it off the event loop
+        session = await run_in_threadpool(FaceTrackingSession)
+    except Exception as e:
+        logger.exception(f"Face tracking unavailable: {e}")
+        await _close_with_error(websocket, "Face tracking is unavailable")
+        return
+    pending = {"frame": None, "reconstruct": False}
+    wakeup = asyncio.Event()
+    
+    async def receive_frames():
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("bytes") is not None:
+                # Keep only the newest frame
+                pending["frame"] = message["bytes"]
+            elif message.get("text") == "reset":
+                session.reset()
+            elif message.get("text") == "reconstruct":
+                pending["reconstruct"] = True
+            wakeup.set()
+    
+    async def process_frames():
+        while True:
+            await wakeup.wait()
+            wakeup.clear()
+            
+            frame, pending["frame"] = pending["frame"], None
+            if frame is not None:
+                try:
+                    status = await run_in_threadpool(session.process_frame, frame)
+                except ValueError as e:
+                    await websocket.send_json({"type": "error", "error": str(e)})
+                    continue
+                await websocket.send_json(status)
+                if status["stable"]:
+                    pending["reconstruct"] = True
+            
+            if pending["reconstruct"]:
+                pending["reconstruct"] = False
+                result = await run_in_threadpool(session.reconstruct)
+                if not result["success"]:
+                    # Otherwise the still-stable estimate would trigger a reconstruction on every frame
+                    session.reset()
+                    await websocket.send_json({"type": "error", "error": result["error"]})
+                    continue
+                
+                texture = await texture_store.put_texture(result["texture"])
+                await websocket.send_json(_face_capture_payload(avatar_id, result, texture))
+                logger.info(f"Face captured from {result['framesUsed']} frames: {avatar_id}")
+                return
+    
+    receiver = asyncio.create_task(receive_frames())
+    processor = asyncio.create_task(process_frames())
+    try:
+        done, _ = await asyncio.wait(
+            {receiver, processor}, return_when=asyncio.FIRST_COMPLETED
+        )
+        for task in done:
+            task.result()
+        if processor in done:
+            await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.exception(f"Face stream failed for {avatar_id}: {e}")
+        await _close_with_error(websocket, "Face capture failed")
+    finally:
+        receiver.cancel()
+        processor.cancel()
+        session.close()
+
+async def _close_with_error(websocket: WebSocket, error: str):
+    """Tell a stream client why its session ends, then close with 1011 (internal error)"""
+    try:
+        await websocket.send_json({"type": "error", "error": error})
+        await websocket.close(code=1011, reason=error)
+    except Exception:
+        # The client is already gone
+        pass
+
 # Helper functions
+def _avatar_etag(record) -> str:
+    """ETag for an avatar record, derived from its version rather than its body"""
+    return strong_etag(record.avatar_id, record.revision, record.updated_at.isoformat())
+
+def _face_capture_payload(avatar_id: str, result: Dict, texture: Dict) -> Dict:
+    """Serialize a face reconstruction result for the capture stream"""
+    face_mesh = result["face_mesh"]
+    return {
+        "type": "result",
+        "avatarId": avatar_id,
+        "framesUsed": result["framesUsed"],
+        "vertices": face_mesh.vertices.round(5).tolist(),
+        "faces": face_mesh.faces.tolist(),
+        "texture": {
+            "url": texture["url"],
+            "mips": [
+                {"width": mip["width"], "height": mip["height"], "url": mip["url"]}
+                for mip in texture["mips"]
+            ]
+        }
+    }
+
 def get_default_avatar_url(measurements: Dict) -> str:
     """Get a default avatar URL based on gender"""
     gender = measurements.get("gender", "neutral")
@@ -313,9 +760,238 @@ def get_default_avatar_url(measurements: Dict) -> str:
     
     return default_avatars.get(gender, default_avatars["neutral"])
 
-def generate_thumbnail_url() -> str:
-    """Generate a placeholder thumbnail"""
-    return "data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMjAwIiBoZWlnaHQ9IjIwMCIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj4KICA8cmVjdCB3aWR0aD0iMjAwIiBoZWlnaHQ9IjIwMCIgZmlsbD0iI2U0ZTRlNCIvPgogIDxjaXJjbGUgY3g9IjEwMCIgY3k9IjcwIiByPSI0MCIgZmlsbD0iIzk5OSIvPgogIDxwYXRoIGQ9Ik01MCAxNTBoMTAwYzAgMjcuNi0yMi40IDUwLTUwIDUwcy01MC0yMi40LTUwLTUweiIgZmlsbD0iIzk5OSIvPgo8L3N2Zz4="
+def public_asset_url(url: str) -> str:
+    """URL the browser should load a model from: our proxy when the host is proxied"""
+    if ASSET_PROXY_ENABLED and asset_cache.is_allowed(url):
+        return proxied_url(url, PUBLIC_BASE_URL)
+    return url
+
+def generate_thumbnail_url(avatar_id: str, model_url: str, fallback: Optional[str] = None) -> str:
+    """Rendered thumbnail URL for models we can fetch, otherwise the fallback or placeholder"""
+    if THUMBNAILS_ENABLED and asset_cache.is_allowed(model_url):
+        return f"{PUBLIC_BASE_URL}/api/avatar/{avatar_id}/thumbnail"
+    return fallback or PLACEHOLDER_THUMBNAIL_URL
+
+def _schedule_thumbnails(avatars: List[Dict]):
+    """Start rendering new avatars' thumbnails (once per distinct model)"""
+    if not THUMBNAILS_ENABLED:
+        return
+    sources = {
+        avatar["metadata"]["sourceUrl"]
+        for avatar in avatars
+        if asset_cache.is_allowed(avatar["metadata"].get("sourceUrl", ""))
+    }
+    for source_url in sources:
+        thumbnail_service.schedule([source_url])
+
+def _model_source_url(avatar: Dict) -> str:
+    """Original model URL of an avatar, also for records saved before sourceUrl existed"""
+    source_url = avatar["metadata"].get("sourceUrl")
+    if source_url:
+        return source_url
+    avatar_url = avatar["avatarUrl"]
+    if avatar_url.startswith(f"{PUBLIC_BASE_URL}/api/assets/glb?"):
+        return parse_qs(urlsplit(avatar_url).query).get("src", [avatar_url])[0]
+    return avatar_url
+
+@app.get("/api/avatar/{avatar_id}/thumbnail")
+async def get_avatar_thumbnail(
+    avatar_id: str,
+    request: Request,
+    garments: Optional[List[str]] = Query(None)
+):
+    """Rendered thumbnail of an avatar, optionally wearing fitted garment models"""
+    record = await avatar_cache.get(avatar_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Avatar not found")
+    
+    model_urls = [_model_source_url(record.data)] + (garments or [])
+    try:
+        key, digests = await thumbnail_service.render_key(model_urls)
+    except ValueError as e:
+        if garments:
+            raise HTTPException(status_code=400, detail=str(e))
+        return _placeholder_thumbnail()
+    except AssetFetchError as e:
+        logger.error(f"Thumbnail model fetch failed: {e}")
+        return _placeholder_thumbnail()
+    
+    route = "/api/avatar/{avatar_id}/thumbnail"
+    etag = f'"{key}"'
+    not_modified = conditional_response(request, route, etag)
+    if not_modified is not None:
+        return not_modified
+    
+    try:
+        data = await thumbnail_service.get(key, digests)
+    except Exception as e:
+        logger.error(f"Thumbnail render failed for {avatar_id}: {e}")
+        return _placeholder_thumbnail()
+    
+    return Response(
+        content=data,
+        media_type=thumbnail_service.media_type,
+        headers=validator_headers(route, etag)
+    )
+
+def _placeholder_thumbnail() -> Response:
+    # Short-lived so a later successful render replaces it
+    return Response(
+        content=base64.b64decode(PLACEHOLDER_THUMBNAIL_URL.partition(",")[2]),
+        media_type="image/svg+xml",
+        headers={"Cache-Control": "public, max-age=60"}
+    )
+
+
+@app.get("/api/textures/{artifact}")
+async def get_texture(artifact: str):
+    """Serve an encoded texture artifact by content hash"""
+    data = await texture_store.get_artifact(artifact)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Texture not found")
+    
+    digest, _, extension = artifact.partition(".")
+    return Response(
+        content=data,
+        media_type=MEDIA_TYPES[extension],
+        headers={
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+            "ETag": f'"{digest}"'
+        }
+    )
+
+@app.post("/api/artifacts")
+async def upload_artifact(request: Request, extension: str = Query("glb")):
+    """Store a mesh or texture streamed in the request body; identical uploads are kept once"""
+    if extension not in ARTIFACT_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported artifact type: {extension}")
+    
+    content_length = request.headers.get("content-length")
+    if content_length is not None:
+        try:
+            declared = int(content_length)
+        except ValueError:
+            declared = -1
+        if declared < 0:
+            raise HTTPException(status_code=400, detail="Invalid Content-Length header")
+        if declared > ARTIFACT_MAX_BYTES:
+            raise HTTPException(status_code=413, detail="Artifact too large")
+    
+    try:
+        stored = await artifact_storage.put_content(
+            request.stream(),
+            ARTIFACT_TYPES[extension],
+            prefix="sha256",
+            suffix=f".{extension}",
+            max_bytes=ARTIFACT_MAX_BYTES
+        )
+    except ValueError:
+        raise HTTPException(status_code=413, detail="Artifact too large")
+    
+    name = f"{stored['digest']}.{extension}"
+    return JSONResponse(
+        status_code=201 if stored["created"] else 200,
+        content={
+            "digest": stored["digest"],
+            "bytes": stored["size"],
+            "created": stored["created"],
+            "url": f"/api/artifacts/{name}"
+        }
+    )
+
+@app.api_route("/api/artifacts/{name}", methods=["GET", "HEAD"])
+async def get_artifact(request: Request, name: str):
+    """Stream a stored artifact by content hash, honoring single byte ranges"""
+    digest, _, extension = name.partition(".")
+    if extension not in ARTIFACT_TYPES or not is_digest(digest):
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    
+    etag = f'"{digest}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "Accept-Ranges": "bytes"
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}:
+        return Response(status_code=304, headers=headers)
+    
+    key = content_key(digest, suffix=f".{extension}")
+    size = await artifact_storage.size(key)
+    if size is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    
+    status_code, start, length = 200, 0, size
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == etag):
+        byte_range = _parse_range(range_header, size)
+        if byte_range is None:
+            headers["Content-Range"] = f"bytes */{size}"
+            return Response(status_code=416, headers=headers)
+        if byte_range != (0, size - 1):
+            start, end = byte_range
+            status_code, length = 206, end - start + 1
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    
+    headers["Content-Length"] = str(length)
+    media_type = ARTIFACT_TYPES[extension]
+    if request.method == "HEAD":
+        return Response(status_code=status_code, headers=headers, media_type=media_type)
+    return StreamingResponse(
+        artifact_storage.stream(key, start, length),
+        status_code=status_code,
+        headers=headers,
+        media_type=media_type
+    )
+
+@app.api_route("/api/assets/glb", methods=["GET", "HEAD"])
+async def get_proxied_asset(request: Request, src: str = Query(...), variant: Optional[str] = None):
+    """Serve a third-party GLB from the local asset cache, fetching it on first use"""
+    try:
+        digest = await asset_cache.resolve(src)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except AssetFetchError as e:
+        logger.error(f"Asset proxy fetch failed: {e}")
+        raise HTTPException(status_code=502, detail=str(e))
+    
+    # The origin may change what this URL points at, so revalidate eventually
+    return await _serve_asset_variant(request, digest, variant, CACHE_POLICIES["/api/assets/glb"])
+
+@app.api_route("/api/assets/{digest}.glb", methods=["GET", "HEAD"])
+async def get_cached_asset(request: Request, digest: str, variant: Optional[str] = None):
+    """Serve a cached GLB by content hash"""
+    if not await asset_cache.contains(digest):
+        raise HTTPException(status_code=404, detail="Asset not found")
+    return await _serve_asset_variant(request, digest, variant, IMMUTABLE_CACHE_CONTROL)
+
+async def _serve_asset_variant(
+    request: Request,
+    digest: str,
+    requested: Optional[str],
+    cache_control: str
+) -> Response:
+    """Serve the LOD variant chosen by ?variant= or the client's device hints"""
+    try:
+        variant = select_variant(requested, request.headers)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if variant != "high":
+        digest = await asset_cache.derive(
+            digest,
+            f"{variant}-v{OPTIMIZER_VERSION}",
+            partial(optimize_variant, variant=variant)
+        )
+    
+    response = await asset_cache.serve(request, digest, cache_control)
+    if requested is None:
+        # The same URL yields different bytes per device class
+        response.headers["Vary"] = "Accept-Encoding, Sec-CH-UA-Mobile, Save-Data, User-Agent"
+        response.headers["Accept-CH"] = "Sec-CH-UA-Mobile, Save-Data"
+    response.headers["X-Asset-Variant"] = variant
+    return response
 
 @app.get("/api/test-rpm")
 async def test_ready_player_me():
@@ -338,40 +1014,63 @@ async def test_ready_player_me():
     }
 
 @app.get("/api/clothing/catalog")
-async def get_clothing_catalog():
-    """Get available clothing items (mock data for now)"""
-    return [
-        {
-            "id": "shirt_001",
-            "name": "Basic T-Shirt",
-            "type": "shirt",
-            "modelUrl": "https://example.com/tshirt.glb",
-            "thumbnailUrl": "https://example.com/tshirt.png",
-            "sizes": ["XS", "S", "M", "L", "XL"],
-            "colors": ["white", "black", "blue", "red"],
-            "price": 29.99
-        },
-        {
-            "id": "pants_001", 
-            "name": "Classic Jeans",
-            "type": "pants",
-            "modelUrl": "https://example.com/jeans.glb",
-            "thumbnailUrl": "https://example.com/jeans.png",
-            "sizes": ["XS", "S", "M", "L", "XL"],
-            "colors": ["blue", "black", "grey"],
-            "price": 79.99
-        },
-        {
-            "id": "dress_001",
-            "name": "Summer Dress",
-            "type": "dress",
-            "modelUrl": "https://example.com/dress.glb", 
-            "thumbnailUrl": "https://example.com/dress.png",
-            "sizes": ["XS", "S", "M", "L", "XL"],
-            "colors": ["red", "blue", "floral"],
-            "price": 59.99
-        }
-    ]
+async def get_clothing_catalog(
+    request: Request,
+    item_type: Optional[List[str]] = Query(None, alias="type"),
+    color: Optional[List[str]] = Query(None),
+    size: Optional[List[str]] = Query(None),
+    brand: Optional[List[str]] = Query(None),
+    min_price: Optional[float] = Query(None, alias="minPrice"),
+    max_price: Optional[float] = Query(None, alias="maxPrice"),
+    sort: str = Query("default"),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
+    facets: bool = Query(False)
+):
+    """
+    Get clothing items with filtering, facet counts and cursor pagination
+    
+    Filter parameters can be repeated or comma-separated (?color=red,blue).
+    """
+    # The catalog is immutable per process, so the version plus query identifies the body
+    route = "/api/clothing/catalog"
+    etag = strong_etag(clothing_catalog.version, sorted(request.query_params.multi_items()))
+    not_modified = conditional_response(request, route, etag, clothing_catalog.loaded_at)
+    if not_modified is not None:
+        return not_modified
+    
+    headers = validator_headers(route, etag, clothing_catalog.loaded_at)
+    body = catalog_responses.get(etag)
+    if body is not None:
+        return RawJSONResponse(body, headers=headers)
+    
+    try:
+        page = clothing_catalog.query(
+            filters={
+                "type": _split_values(item_type),
+                "color": _split_values(color),
+                "size": _split_values(size),
+                "brand": _split_values(brand)
+            },
+            min_price=min_price,
+            max_price=max_price,
+            sort=sort,
+            limit=limit,
+            cursor=cursor,
+            facets=facets
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    body = dumps(page)
+    catalog_responses.set(etag, body)
+    return RawJSONResponse(body, headers=headers)
+
+def _split_values(values: Optional[List[str]]) -> List[str]:
+    """Flatten repeated and comma-separated query values"""
+    if not values:
+        return []
+    return [v.strip() for value in values for v in value.split(",") if v.strip()]
 
 @app.post("/api/clothing/fit")
 async def fit_clothing_to_avatar(request: Dict[str, Any]):
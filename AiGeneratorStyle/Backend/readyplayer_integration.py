@@ -10,6 +10,8 @@ import logging
 from typing import Dict, Optional, Tuple
 import numpy as np
 from datetime import datetime
+from body_shape import compute_body_shapes, body_shape_record, MEASUREMENT_COLUMNS, MEASUREMENT_DEFAULTS
+from size_charts import get_size_charts
 
 logger = logging.getLogger(__name__)
 
@@ -112,52 +114,13 @@ class ReadyPlayerMeIntegration:
         Returns:
             Body shape parameters for Ready Player Me
         """
-        # Calculate BMI
-        height_m = measurements.get("height", 170) / 100
-        weight = measurements.get("weight", 70)
-        bmi = weight / (height_m ** 2)
-        
-        # Determine body type
-        body_types = {
-            "thin": {"bmi_range": (0, 18.5), "muscle": 0.0, "weight": -0.5},
-            "athletic": {"bmi_range": (18.5, 22), "muscle": 0.5, "weight": 0.0},
-            "average": {"bmi_range": (22, 25), "muscle": 0.2, "weight": 0.3},
-            "muscular": {"bmi_range": (25, 28), "muscle": 0.8, "weight": 0.5},
-            "heavy": {"bmi_range": (28, 100), "muscle": 0.1, "weight": 1.0}
-        }
-        
-        selected_type = "average"
-        for body_type, params in body_types.items():
-            if params["bmi_range"][0] <= bmi < params["bmi_range"][1]:
-                selected_type = body_type
-                break
-        
-        # Calculate proportions
-        chest = measurements.get("chest", 95)
-        waist = measurements.get("waist", 80)
-        hips = measurements.get("hips", 95)
-        
-        # Normalize measurements (Ready Player Me uses -1 to 1 scale)
-        chest_ratio = (chest - 95) / 30  # Normalize around average
-        waist_ratio = (waist - 80) / 25
-        hip_ratio = (hips - 95) / 30
-        
-        return {
-            "bodyType": selected_type,
-            "morphTargets": {
-                "weight": np.clip(body_types[selected_type]["weight"], -1, 1),
-                "muscle": np.clip(body_types[selected_type]["muscle"], 0, 1),
-                "chest": np.clip(chest_ratio, -1, 1),
-                "waist": np.clip(waist_ratio, -1, 1),
-                "hips": np.clip(hip_ratio, -1, 1),
-                "height": height_m / 1.7  # Normalize to average height
-            },
-            "metadata": {
-                "bmi": round(bmi, 2),
-                "bodyType": selected_type,
-                "measurements": measurements
-            }
+        columns = {
+            name: np.array([measurements.get(name, MEASUREMENT_DEFAULTS[name])], dtype=np.float64)
+            for name in MEASUREMENT_COLUMNS
         }
+        shape = body_shape_record(compute_body_shapes(columns), 0)
+        shape["metadata"]["measurements"] = measurements
+        return shape
     
     def generate_iframe_html(self, options: Dict = None) -> str:
         """
@@ -313,36 +276,30 @@ class ReadyPlayerMeIntegration:
 """
         return html
     
-    def get_size_recommendation(self, measurements: Dict) -> str:
+    def get_size_recommendation(
+        self,
+        measurements: Dict,
+        brand: Optional[str] = None,
+        garment: Optional[str] = None
+    ) -> str:
         """
         Get clothing size recommendation based on measurements
         
         Args:
             measurements: Body measurements
+            brand: Brand whose size chart applies (default chart when unknown)
+            garment: Garment type, e.g. shirt or pants
             
         Returns:
-            Recommended size (XS, S, M, L, XL, XXL)
+            Recommended size label from the chart (XS-XXL for the default chart)
         """
-        # Average the key measurements
-        chest = measurements.get("chest", 95)
-        waist = measurements.get("waist", 80)
-        hips = measurements.get("hips", 95)
-        
-        avg = (chest + waist + hips) / 3
-        
-        # Size mapping
-        if avg < 80:
-            return "XS"
-        elif avg < 87:
-            return "S"
-        elif avg < 95:
-            return "M"
-        elif avg < 105:
-            return "L"
-        elif avg < 115:
-            return "XL"
-        else:
-            return "XXL"
+        body = {
+            "chest": measurements.get("chest", 95),
+            "waist": measurements.get("waist", 80),
+            "hips": measurements.get("hips", 95),
+            "height": measurements.get("height")
+        }
+        return get_size_charts().recommend(body, brand, garment)
 
 # Example usage
 def get_integration_example():
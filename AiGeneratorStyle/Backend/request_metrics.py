@@ -0,0 +1,320 @@
+# Backend/request_metrics.py
+"""
+Request Metrics
+ASGI middleware recording per-route latency histograms, request and response
+sizes and in-flight requests, exported in the Prometheus text format.
+
+With METRICS_DIR set, every worker periodically writes its totals to
+<METRICS_DIR>/worker-<pid>.json and /metrics merges all of them, so a
+scrape of any worker reports the whole server.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Histogram upper bounds (the +Inf bucket is implied)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Route label for requests that matched no route, to keep label cardinality bounded
+UNMATCHED_ROUTE = "unmatched"
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+class _Series:
+    """Histograms for one (method, route, status) combination"""
+
+    __slots__ = ("latency", "latency_sum", "request_bytes", "request_bytes_sum",
+                 "response_bytes", "response_bytes_sum")
+
+    def __init__(self):
+        self.latency = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.request_bytes = [0] * (len(SIZE_BUCKETS) + 1)
+        self.request_bytes_sum = 0
+        self.response_bytes = [0] * (len(SIZE_BUCKETS) + 1)
+        self.response_bytes_sum = 0
+
+    def to_dict(self) -> Dict:
+        """Copy of the counters, safe to read while requests keep updating them"""
+        return {
+            slot: list(value) if isinstance(value, list) else value
+            for slot, value in ((slot, getattr(self, slot)) for slot in self.__slots__)
+        }
+
+    def merge(self, data: Dict):
+        for slot in ("latency", "request_bytes", "response_bytes"):
+            counts = getattr(self, slot)
+            for i, count in enumerate(data[slot]):
+                counts[i] += count
+        self.latency_sum += data["latency_sum"]
+        self.request_bytes_sum += data["request_bytes_sum"]
+        self.response_bytes_sum += data["response_bytes_sum"]
+
+class RequestMetrics:
+    """
+    Metrics of one worker process
+
+    Gauge collectors registered with add_collector() are sampled on every
+    flush and scrape; they return {metric name: {label string: value}}.
+    Counters are only read on the event loop that updates them (snapshot());
+    file I/O and formatting run in a thread on the copies.
+    """
+
+    def __init__(self, directory: Optional[str] = None, flush_interval: float = 5.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.series: Dict[Tuple[str, str, str], _Series] = {}
+        self.in_flight = 0
+        self.collectors: List[Callable[[], Dict[str, Dict[str, float]]]] = []
+        self._templates: Dict[Callable, str] = {}
+        self._flusher: Optional[asyncio.Task] = None
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def add_collector(self, collector: Callable[[], Dict[str, Dict[str, float]]]):
+        self.collectors.append(collector)
+
+    async def start(self):
+        if self.directory and self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def close(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        if self.directory:
+            await self.flush()
+
+    def observe(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        seconds: float,
+        request_bytes: int,
+        response_bytes: int
+    ):
+        key = (method, route, str(status))
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = _Series()
+        series.latency[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        series.latency_sum += seconds
+        series.request_bytes[bisect_left(SIZE_BUCKETS, request_bytes)] += 1
+        series.request_bytes_sum += request_bytes
+        series.response_bytes[bisect_left(SIZE_BUCKETS, response_bytes)] += 1
+        series.response_bytes_sum += response_bytes
+
+    def route_template(self, scope) -> str:
+        """Path template of the route that handled the request, e.g. /api/avatar/{avatar_id}"""
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        template = self._templates.get(endpoint)
+        if template is None:
+            for route in getattr(scope.get("app"), "routes", ()):
+                if getattr(route, "endpoint", None) is not None:
+                    self._templates[route.endpoint] = route.path
+            template = self._templates.setdefault(endpoint, UNMATCHED_ROUTE)
+        return template
+
+    def snapshot(self) -> Dict:
+        """This worker's totals in a JSON-serialisable form (call on the event loop)"""
+        return {
+            "pid": os.getpid(),
+            "series": [[list(key), series.to_dict()] for key, series in self.series.items()],
+            "inFlight": self.in_flight,
+            "gauges": self._collect_gauges()
+        }
+
+    async def flush(self):
+        """Write the snapshot to this worker's file"""
+        await asyncio.to_thread(self._write, self.snapshot())
+
+    def _write(self, snapshot: Dict):
+        path = os.path.join(self.directory, f"worker-{snapshot['pid']}.json")
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write metrics to {path}: {e}")
+
+    async def render(self) -> str:
+        """All workers' metrics in the Prometheus text exposition format"""
+        return await asyncio.to_thread(self._render, self.snapshot())
+
+    def _render(self, own: Dict) -> str:
+        snapshots = self._worker_snapshots(own)
+        series: Dict[Tuple[str, str, str], _Series] = {}
+        in_flight = 0
+        gauges: Dict[str, Dict[str, float]] = {}
+        for snapshot in snapshots:
+            for key, data in snapshot["series"]:
+                key = tuple(key)
+                if key not in series:
+                    series[key] = _Series()
+                series[key].merge(data)
+            # Gauges of workers that have exited are dropped, their counters kept
+            if snapshot.get("alive", True):
+                in_flight += snapshot["inFlight"]
+                for name, values in snapshot["gauges"].items():
+                    merged = gauges.setdefault(name, {})
+                    for labels, value in values.items():
+                        merged[labels] = merged.get(labels, 0) + value
+
+        lines = []
+        _histogram(lines, "http_request_duration_seconds", "Request latency by route",
+                   series, "latency", LATENCY_BUCKETS)
+        _histogram(lines, "http_request_size_bytes", "Request body size by route",
+                   series, "request_bytes", SIZE_BUCKETS)
+        _histogram(lines, "http_response_size_bytes", "Response body size by route",
+                   series, "response_bytes", SIZE_BUCKETS)
+        lines.append("# HELP http_requests_in_flight Requests being handled")
+        lines.append("# TYPE http_requests_in_flight gauge")
+        lines.append(f"http_requests_in_flight {in_flight}")
+        lines.append("# HELP http_worker_processes Worker processes reporting metrics")
+        lines.append("# TYPE http_worker_processes gauge")
+        lines.append(f"http_worker_processes {sum(1 for s in snapshots if s.get('alive', True))}")
+        for name, values in sorted(gauges.items()):
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in sorted(values.items()):
+                lines.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+        lines.append("")
+        return "\n".join(lines)
+
+    def _worker_snapshots(self, own: Dict) -> List[Dict]:
+        if not self.directory:
+            return [own]
+
+        snapshots = [own]
+        for name in os.listdir(self.directory):
+            if not (name.startswith("worker-") and name.endswith(".json")):
+                continue
+            try:
+                pid = int(name[len("worker-"):-len(".json")])
+                if pid == own["pid"]:
+                    continue
+                with open(os.path.join(self.directory, name)) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            snapshot["alive"] = _pid_alive(pid)
+            snapshots.append(snapshot)
+        return snapshots
+
+    def _collect_gauges(self) -> Dict[str, Dict[str, float]]:
+        gauges: Dict[str, Dict[str, float]] = {}
+        for collector in self.collectors:
+            try:
+                for name, values in collector().items():
+                    gauges.setdefault(name, {}).update(values)
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+        return gauges
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+class RequestMetricsMiddleware:
+    """Time every HTTP request and record it under its route template"""
+
+    def __init__(self, app, metrics: RequestMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        started = time.perf_counter()
+        response = {"status": 500, "bytes": 0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        metrics.in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.in_flight -= 1
+            metrics.observe(
+                scope["method"],
+                metrics.route_template(scope),
+                response["status"],
+                time.perf_counter() - started,
+                _content_length(scope),
+                response["bytes"]
+            )
+
+def label_string(**labels) -> str:
+    """Prometheus label set, e.g. route="/api/clothing/fit",priority="batch" """
+    return ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items())
+
+def _histogram(
+    lines: List[str],
+    name: str,
+    help_text: str,
+    series: Dict[Tuple[str, str, str], _Series],
+    slot: str,
+    buckets: Tuple
+):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for (method, route, status), data in sorted(series.items()):
+        labels = label_string(method=method, route=route, status=status)
+        counts = getattr(data, slot)
+        cumulative = 0
+        for bound, count in zip(buckets, counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        cumulative += counts[-1]
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {getattr(data, slot + '_sum')}")
+        lines.append(f"{name}_count{{{labels}}} {cumulative}")
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _content_length(scope) -> int:
+    for name, value in scope["headers"]:
+        if name == b"content-length":
+            try:
+                return int(value)
+            except ValueError:
+                return 0
+    return 0
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def create_request_metrics() -> RequestMetrics:
+    """Request metrics configured by METRICS_DIR and METRICS_FLUSH_INTERVAL"""
+    return RequestMetrics(
+        directory=os.getenv("METRICS_DIR") or None,
+        flush_interval=float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+    )
@@ -0,0 +1,59 @@
+# Backend/single_flight.py
+"""
+Single-Flight Loads
+Coalesces concurrent loads of the same key within one worker: the first
+caller runs the load and everyone asking for that key meanwhile awaits its
+result (or its exception). A caller cancelled mid-load releases the waiters
+instead of leaving them hanging, and one of them runs the load again.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+class SingleFlight:
+    """Loads in flight, by key"""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def run(self, key: Hashable, load: Callable[[], Awaitable[T]]) -> T:
+        """
+        Result of load(), shared with concurrent callers for the same key
+
+        Args:
+            key: Identifies the result
+            load: Called only when no load for key is in flight
+        """
+        while True:
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # The loading caller was cancelled, not this one: take over the load
+                if not inflight.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await load()
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody else may be waiting; mark the exception as retrieved
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            # Cancelled (or interrupted) before finishing: wake the waiters
+            if not future.done():
+                future.cancel()
+            del self._inflight[key]
@@ -0,0 +1,256 @@
+# Backend/size_charts.py
+"""
+Size Charts
+Brand- and garment-specific size charts packed into flat arrays: one row of
+(chest, waist, hips, height) targets per size, grouped per chart. A lookup
+resolves the chart through a hash index and scans only that chart's few
+rows, so recommendations cost the same with ten charts or ten thousand.
+"""
+
+import json
+import logging
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = ("chest", "waist", "hips", "height")
+ANY = "*"
+
+# Used when no brand or garment chart matches
+DEFAULT_SIZE_CHART = {
+    "brand": ANY,
+    "garment": ANY,
+    "sizes": [
+        {"size": "XS", "chest": 86, "waist": 71, "hips": 89},
+        {"size": "S", "chest": 91, "waist": 76, "hips": 94},
+        {"size": "M", "chest": 97, "waist": 81, "hips": 99},
+        {"size": "L", "chest": 107, "waist": 91, "hips": 109},
+        {"size": "XL", "chest": 117, "waist": 101, "hips": 119},
+        {"size": "XXL", "chest": 127, "waist": 111, "hips": 129}
+    ]
+}
+
+def _target(value) -> float:
+    """A chart cell: a number, or a [min, max] range whose midpoint is the target"""
+    if value is None:
+        return np.nan
+    if isinstance(value, (list, tuple)):
+        return (float(value[0]) + float(value[-1])) / 2
+    return float(value)
+
+def _size_rows(chart: Dict) -> List[Dict]:
+    """
+    Sizes smallest first
+
+    Accepts "sizes" as a list of rows or a {size: measurements} object, or a
+    chart that is itself a {size: measurements} object (besides brand and garment).
+
+    Raises:
+        ValueError: The chart has no sizes in any of these shapes
+    """
+    sizes = chart.get("sizes")
+    if sizes is None:
+        sizes = {key: value for key, value in chart.items() if key not in ("brand", "garment")}
+        if not sizes or not all(isinstance(measurements, dict) for measurements in sizes.values()):
+            raise ValueError(f"Size chart has no sizes: {sorted(chart)}")
+    if isinstance(sizes, dict):
+        return [{"size": size, **measurements} for size, measurements in sizes.items()]
+    return sizes
+
+class SizeChartIndex:
+    """
+    Immutable set of size charts (see _size_rows for the accepted shapes)
+
+    Chart c owns rows offsets[c]:offsets[c + 1] of targets (float32, NaN
+    where the chart doesn't specify a dimension) and labels, smallest size
+    first. Charts are found by (brand, garment), falling back to
+    (brand, *), then (*, garment), then the default chart.
+    """
+
+    def __init__(self, charts: Iterable[Dict]):
+        targets, labels, offsets = [], [], [0]
+        self.keys: List[Tuple[str, str]] = []
+        self.lookup: Dict[Tuple[str, str], int] = {}
+
+        for chart in list(charts) + [DEFAULT_SIZE_CHART]:
+            key = (str(chart.get("brand") or ANY).lower(), str(chart.get("garment") or ANY).lower())
+            if key in self.lookup:
+                if key != (ANY, ANY):
+                    logger.warning(f"Duplicate size chart for {key[0]}/{key[1]}; keeping the first")
+                continue
+            rows = _size_rows(chart)
+            if not rows:
+                continue
+            self.lookup[key] = len(self.keys)
+            self.keys.append(key)
+            for row in rows:
+                labels.append(str(row["size"]))
+                targets.append([_target(row.get(dimension)) for dimension in DIMENSIONS])
+            offsets.append(len(labels))
+
+        self.targets = np.asarray(targets, dtype=np.float32).reshape(-1, len(DIMENSIONS))
+        self.labels = labels
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        # Chart of every size row, for cross-chart queries
+        self.chart_of_row = np.repeat(np.arange(len(self.keys)), np.diff(self.offsets))
+        self.default_chart = self.lookup[(ANY, ANY)]
+        self.brands = sorted({brand for brand, _ in self.keys if brand != ANY})
+        self._brand_chart_cache: Dict[Optional[str], Tuple[List[str], np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def find_chart(self, brand: Optional[str] = None, garment: Optional[str] = None) -> int:
+        brand = (brand or ANY).lower()
+        garment = (garment or ANY).lower()
+        for key in ((brand, garment), (brand, ANY), (ANY, garment)):
+            chart = self.lookup.get(key)
+            if chart is not None:
+                return chart
+        return self.default_chart
+
+    def sizes(self, chart: int) -> List[str]:
+        return self.labels[self.offsets[chart]:self.offsets[chart + 1]]
+
+    def size_measurements(self, chart: int, size: str) -> Optional[Dict[str, float]]:
+        """Target measurements of one size, or None if the chart doesn't have it"""
+        start, end = self.offsets[chart], self.offsets[chart + 1]
+        try:
+            row = start + self.labels[start:end].index(size)
+        except ValueError:
+            return None
+        return {
+            dimension: float(value)
+            for dimension, value in zip(DIMENSIONS, self.targets[row])
+            if not np.isnan(value)
+        }
+
+    def nearest(self, measurements: Dict, chart: int) -> Tuple[str, float]:
+        """
+        Closest size in a chart
+
+        The distance is the summed absolute difference over the dimensions
+        both the body and the chart specify; ties go to the smaller size.
+
+        Returns:
+            (size label, distance)
+        """
+        start, end = self.offsets[chart], self.offsets[chart + 1]
+        distances = _distances(self.targets[start:end], _query(measurements))
+        best = int(np.argmin(distances))
+        return self.labels[start + best], float(distances[best])
+
+    def recommend(
+        self,
+        measurements: Dict,
+        brand: Optional[str] = None,
+        garment: Optional[str] = None,
+        size_offset: int = 0
+    ) -> str:
+        """
+        Recommended size for a body
+
+        Args:
+            measurements: chest, waist, hips and/or height in cm
+            brand: Brand whose chart applies
+            garment: Garment type (shirt, pants, ...)
+            size_offset: Move this many sizes up (positive) or down from the
+                nearest, clamped to the chart, e.g. -1 for stretchy fabric
+
+        Returns:
+            Size label
+        """
+        chart = self.find_chart(brand, garment)
+        size, _ = self.nearest(measurements, chart)
+        if size_offset:
+            sizes = self.sizes(chart)
+            index = min(max(sizes.index(size) + size_offset, 0), len(sizes) - 1)
+            size = sizes[index]
+        return size
+
+    def recommend_all(self, measurements: Dict, garment: Optional[str] = None) -> Dict[str, str]:
+        """
+        Nearest size in every brand's chart at once
+
+        Args:
+            measurements: Body measurements in cm
+            garment: Garment type; brands fall back to their brand-wide chart
+
+        Returns:
+            Brand -> size label
+        """
+        distances = _distances(self.targets, _query(measurements))
+        # First row per chart at the chart's minimum distance (rows are grouped by chart)
+        minimums = np.minimum.reduceat(distances, self.offsets[:-1])
+        hits = np.flatnonzero(distances == minimums[self.chart_of_row])
+        _, first = np.unique(self.chart_of_row[hits], return_index=True)
+        best_rows = hits[first]
+
+        brands, charts = self._brand_charts(garment)
+        return dict(zip(brands, [self.labels[row] for row in best_rows[charts].tolist()]))
+
+    def _brand_charts(self, garment: Optional[str]) -> Tuple[List[str], np.ndarray]:
+        """Brands with a chart for the garment and that chart, resolved once per garment"""
+        resolved = self._brand_chart_cache.get(garment)
+        if resolved is None:
+            brands, charts = [], []
+            for brand in self.brands:
+                chart = self.find_chart(brand, garment)
+                # Brands without a chart for this garment would only get the default chart
+                if self.keys[chart][0] == brand:
+                    brands.append(brand)
+                    charts.append(chart)
+            resolved = self._brand_chart_cache[garment] = (brands, np.asarray(charts, dtype=np.int64))
+        return resolved
+
+def _query(measurements: Dict) -> np.ndarray:
+    values = []
+    for dimension in DIMENSIONS:
+        value = measurements.get(dimension)
+        values.append(np.nan if value is None else float(value))
+    return np.asarray(values, dtype=np.float32)
+
+def _distances(targets: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """Summed absolute differences over shared dimensions (inf when none are shared)"""
+    dimensions = np.flatnonzero(~np.isnan(query))
+    differences = np.abs(targets[:, dimensions] - query[dimensions])
+    unknown = np.isnan(differences)
+    differences[unknown] = 0
+    distances = differences.sum(axis=1)
+    distances[unknown.all(axis=1)] = np.inf
+    return distances
+
+def load_size_charts(path: Optional[str] = None) -> SizeChartIndex:
+    """
+    Load size charts from SIZE_CHARTS_PATH (JSON array or NDJSON), or only the default chart
+
+    Args:
+        path: Chart file; defaults to the SIZE_CHARTS_PATH environment variable
+
+    Returns:
+        Indexed size charts
+    """
+    path = path or os.getenv("SIZE_CHARTS_PATH")
+    if not path:
+        return SizeChartIndex([])
+
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith((".ndjson", ".jsonl")):
+            charts = SizeChartIndex(json.loads(line) for line in f if line.strip())
+        else:
+            charts = SizeChartIndex(json.load(f))
+
+    logger.info(f"Loaded {len(charts)} size charts from {path}")
+    return charts
+
+_size_charts: Optional[SizeChartIndex] = None
+
+def get_size_charts() -> SizeChartIndex:
+    """Process-wide size charts, loaded on first use"""
+    global _size_charts
+    if _size_charts is None:
+        _size_charts = load_size_charts()
+    return _size_charts
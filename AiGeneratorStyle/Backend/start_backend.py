@@ -1,24 +1,153 @@
 #!/usr/bin/env python3
 """
 Single entry point for the AI Avatar Clothing Fit API
+
+Development (DEV_MODE=true, the default) runs one uvicorn process with
+auto-reload. Production (DEV_MODE=false or --production) runs gunicorn with
+one uvicorn worker per available core on uvloop/httptools; the app and its
+read-only state (catalog indexes, size tables) are built once in the master
+and shared copy-on-write with the forked workers.
 """
+import argparse
+import gc
+import importlib.util
 import os
+import shutil
 import sys
+import tempfile
 import uvicorn
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Seconds a worker gets to finish in-flight requests after SIGTERM
+GRACEFUL_TIMEOUT = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+# Workers silent for longer than this are restarted
+WORKER_TIMEOUT = int(os.getenv("WORKER_TIMEOUT", "60"))
+KEEPALIVE_TIMEOUT = int(os.getenv("KEEPALIVE_TIMEOUT", "5"))
+# Recycle workers after this many requests (0 disables)
+MAX_REQUESTS = int(os.getenv("MAX_REQUESTS", "0"))
+# Heavy modules to import before forking, e.g. "scipy.spatial,trimesh"
+PRELOAD_MODULES = [name for name in os.getenv("PRELOAD_MODULES", "").split(",") if name]
+
+def available_cpus() -> int:
+    """CPUs this process may run on, honouring affinity and cgroup (container) quotas"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+def worker_count() -> int:
+    """WEB_CONCURRENCY if set, otherwise one worker per available core"""
+    configured = os.getenv("WEB_CONCURRENCY")
+    if configured:
+        return max(1, int(configured))
+    return available_cpus()
+
+def server_implementation() -> dict:
+    """Fastest event loop and HTTP parser that are installed"""
+    return {
+        "loop": "uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        "http": "httptools" if importlib.util.find_spec("httptools") else "h11"
+    }
+
+def preload_app():
+    """
+    Import the app in the master process before workers are forked
+
+    Module-level state (catalog indexes, size tables, compiled models) is
+    built once and shared copy-on-write. gc.freeze() moves it out of the
+    collector's generations so worker garbage collections don't touch, and
+    thereby copy, the shared pages.
+    """
+    gc.disable()
+    from main import app
+    from lazy_imports import preload
+    preload(PRELOAD_MODULES)
+    gc.collect()
+    gc.freeze()
+    gc.enable()
+    return app
+
+def run_production(host: str, port: int, workers: int, log_level: str):
+    """Serve with gunicorn managing uvicorn workers"""
+    implementation = server_implementation()
+    print(f"🏭 Production mode: {workers} workers, {implementation['loop']} + {implementation['http']}")
+
+    # Workers share their request metrics through files; start each run from an empty directory
+    metrics_dir = os.getenv("METRICS_DIR") or os.path.join(tempfile.gettempdir(), f"avatar-api-metrics-{os.getpid()}")
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.environ["METRICS_DIR"] = metrics_dir
+
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        # gunicorn is POSIX-only; uvicorn's own supervisor spawns workers without preloading
+        print("⚠️  gunicorn not installed, using uvicorn workers (no preload)")
+        uvicorn.run(
+            "main:app",
+            host=host,
+            port=port,
+            workers=workers,
+            timeout_graceful_shutdown=GRACEFUL_TIMEOUT,
+            timeout_keep_alive=KEEPALIVE_TIMEOUT,
+            log_level=log_level,
+            **implementation
+        )
+        return
+
+    class ProductionServer(BaseApplication):
+        def __init__(self, options: dict):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return preload_app()
+
+    ProductionServer({
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        # Picks uvloop and httptools when installed (uvicorn[standard])
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": True,
+        "graceful_timeout": GRACEFUL_TIMEOUT,
+        "timeout": WORKER_TIMEOUT,
+        "keepalive": KEEPALIVE_TIMEOUT,
+        "max_requests": MAX_REQUESTS,
+        "max_requests_jitter": MAX_REQUESTS // 10,
+        "loglevel": log_level
+    }).run()
+
 def main():
     """Start the main API server"""
+    parser = argparse.ArgumentParser(description="AI Avatar Clothing Fit API")
+    parser.add_argument("--production", action="store_true", help="multi-worker server without reload")
+    parser.add_argument("--workers", type=int, help="worker processes (default: available cores)")
+    args = parser.parse_args()
+
+    production = args.production or os.getenv("DEV_MODE", "true").lower() != "true"
+
     print("🚀 Starting AI Avatar Clothing Fit API...")
     print("=" * 50)
-    
+
     # Check configuration
     api_key = os.getenv("READYME_API_KEY")
     partner_id = os.getenv("READYME_PARTNER_ID")
-    
+
     if api_key and partner_id:
         print("✅ Ready Player Me configured")
         print(f"   Partner ID: {partner_id}")
@@ -26,27 +155,29 @@ def main():
     else:
         print("⚠️  Ready Player Me not fully configured")
         print("   Please check your .env file")
-    
+
     print("=" * 50)
-    
-    # Import main app
-    from main import app
-    
+
     # Run server
     host = os.getenv("API_HOST", "0.0.0.0")
     port = int(os.getenv("API_PORT", "8000"))
-    
+    log_level = os.getenv("LOG_LEVEL", "INFO").lower()
+
     print(f"🌐 Server starting at http://{host}:{port}")
     print(f"📚 API docs at http://{host}:{port}/docs")
     print(f"🔧 Interactive API at http://{host}:{port}/redoc")
-    
+
+    if production:
+        run_production(host, port, args.workers or worker_count(), log_level)
+        return
+
     uvicorn.run(
         "main:app",  # Pass as string instead of object for reload to work
         host=host,
         port=port,
-        reload=os.getenv("DEV_MODE", "true").lower() == "true",
-        log_level=os.getenv("LOG_LEVEL", "INFO").lower()
+        reload=True,
+        log_level=log_level
     )
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
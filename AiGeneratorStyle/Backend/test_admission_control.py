@@ -0,0 +1,179 @@
+# Backend/test_admission_control.py
+"""
+Tests for the admission gate's priority queue and the 429 middleware
+"""
+
+import asyncio
+
+import pytest
+
+from admission_control import (
+    PRIORITIES,
+    AdmissionControl,
+    AdmissionControlMiddleware,
+    AdmissionGate,
+    Overloaded
+)
+
+INTERACTIVE, BATCH = PRIORITIES["interactive"], PRIORITIES["batch"]
+
+async def _queue(gate: AdmissionGate, priority=None) -> asyncio.Task:
+    """Start an acquire and let it reach the wait queue"""
+    task = asyncio.create_task(gate.acquire(priority))
+    await asyncio.sleep(0)
+    return task
+
+@pytest.mark.asyncio
+async def test_released_slot_goes_straight_to_the_waiter():
+    gate = AdmissionGate("test", concurrency=1, queue=2)
+    await gate.acquire()
+    waiter = await _queue(gate)
+    assert gate.queued == 1
+
+    gate.release()
+    await waiter
+    assert gate.active == 1 and gate.queued == 0
+
+    # The slot was handed over, so a late arrival still has to queue
+    late = await _queue(gate)
+    assert not late.done()
+    gate.release()
+    await late
+    assert gate.admitted == 3
+
+@pytest.mark.asyncio
+async def test_interactive_waiters_go_before_earlier_batch_waiters():
+    gate = AdmissionGate("test", concurrency=1, queue=4)
+    await gate.acquire()
+    order = []
+
+    async def wait(name, priority):
+        await gate.acquire(priority)
+        order.append(name)
+
+    tasks = [asyncio.create_task(wait("batch-1", BATCH)), asyncio.create_task(wait("batch-2", BATCH))]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(wait("interactive", INTERACTIVE)))
+    await asyncio.sleep(0)
+
+    for _ in range(3):
+        gate.release()
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    assert order == ["interactive", "batch-1", "batch-2"]
+
+@pytest.mark.asyncio
+async def test_full_queue_displaces_only_lower_priority_waiters():
+    gate = AdmissionGate("test", concurrency=1, queue=2)
+    await gate.acquire()
+    first, second = await _queue(gate, BATCH), await _queue(gate, BATCH)
+
+    # Equal priority is turned away at once
+    with pytest.raises(Overloaded):
+        await gate.acquire(BATCH)
+
+    # Higher priority takes the place of the newest batch waiter
+    interactive = await _queue(gate, INTERACTIVE)
+    with pytest.raises(Overloaded):
+        await second
+    assert gate.metrics()["queued"] == {"interactive": 1, "batch": 1}
+    assert gate.rejected == 2
+
+    gate.release()
+    await interactive
+    assert not first.done()
+    first.cancel()
+    await asyncio.gather(first, return_exceptions=True)
+
+@pytest.mark.asyncio
+async def test_wait_times_out():
+    gate = AdmissionGate("test", concurrency=1, queue=2, timeout=0.01)
+    await gate.acquire()
+    with pytest.raises(Overloaded) as raised:
+        await gate.acquire()
+    assert raised.value.retry_after >= 1
+    assert gate.timed_out == 1 and gate.queued == 0
+
+    # The timed-out waiter doesn't swallow the next released slot
+    gate.release()
+    assert gate.active == 0
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_queue():
+    gate = AdmissionGate("test", concurrency=1, queue=2)
+    await gate.acquire()
+    waiter = await _queue(gate)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert gate.queued == 0
+
+    gate.release()
+    assert gate.active == 0
+
+@pytest.mark.asyncio
+async def test_requested_priority_cannot_exceed_the_route_default():
+    gate = AdmissionGate("test", concurrency=1, queue=2, priority="batch")
+    await gate.acquire()
+    waiter = await _queue(gate, INTERACTIVE)
+    assert gate.metrics()["queued"] == {"interactive": 0, "batch": 1}
+
+    # ...but an interactive route's requests may ask to be treated as batch
+    interactive_gate = AdmissionGate("test", concurrency=1, queue=2)
+    await interactive_gate.acquire()
+    lowered = await _queue(interactive_gate, BATCH)
+    assert interactive_gate.metrics()["queued"] == {"interactive": 0, "batch": 1}
+
+    for task in (waiter, lowered):
+        task.cancel()
+    await asyncio.gather(waiter, lowered, return_exceptions=True)
+
+class _App:
+    """ASGI app that blocks until released"""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.calls = 0
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        await self.release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+async def _request(middleware, method: str, path: str, headers=()) -> list:
+    scope = {"type": "http", "method": method, "path": path, "headers": list(headers)}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    await middleware(scope, receive, send)
+    return sent
+
+@pytest.mark.asyncio
+async def test_middleware_rejects_with_retry_after():
+    app = _App()
+    control = AdmissionControl({
+        "POST /api/avatar/batch/get": {"concurrency": 1, "queue": 0, "priority": "batch"}
+    })
+    middleware = AdmissionControlMiddleware(app, control)
+
+    running = asyncio.create_task(_request(
+        middleware, "POST", "/api/avatar/batch/get", [(b"x-request-priority", b"interactive")]
+    ))
+    await asyncio.sleep(0)
+    rejected = await _request(middleware, "POST", "/api/avatar/batch/get")
+    start = rejected[0]
+    assert start["status"] == 429
+    assert int(dict(start["headers"])[b"retry-after"]) >= 1
+
+    # Unlimited routes pass straight through
+    app.release.set()
+    assert (await _request(middleware, "GET", "/health"))[0]["status"] == 200
+    assert (await running)[0]["status"] == 200
+    gate = control.gate("POST", "/api/avatar/batch/get")
+    assert gate.active == 0 and gate.admitted == 1 and gate.rejected == 1
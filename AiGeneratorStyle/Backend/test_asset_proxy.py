@@ -0,0 +1,154 @@
+# Backend/test_asset_proxy.py
+"""
+Tests for the GLB asset proxy cache against a local stub origin
+"""
+
+import asyncio
+import gzip
+import os
+
+import httpx
+import pytest
+from starlette.requests import Request
+
+from asset_proxy import AssetCache, AssetFetchError
+from conftest import RedirectToOrigin
+
+ORIGIN = "https://raw.githubusercontent.com"
+
+def _model(seed: int, size: int = 4096) -> bytes:
+    # Repetitive enough for the compressed variants to be kept
+    return bytes([seed]) * 16 + b"glTF" * (size // 4)
+
+def _request(**headers) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    })
+
+async def _body(response) -> bytes:
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+def _cache(root, origin, **kwargs) -> AssetCache:
+    client = httpx.AsyncClient(transport=RedirectToOrigin(origin))
+    return AssetCache(str(root), client=client, **kwargs)
+
+def _serve_models(origin, count: int):
+    models = {}
+    for index in range(count):
+        models[f"/m{index}.glb"] = _model(index)
+        origin.routes[f"/m{index}.glb"] = lambda method, headers, data=models[f"/m{index}.glb"]: (200, {}, data)
+    return models
+
+@pytest.mark.asyncio
+async def test_each_url_is_fetched_once(tmp_path, stub_origin):
+    models = _serve_models(stub_origin, 1)
+    cache = _cache(tmp_path, stub_origin)
+    try:
+        digests = await asyncio.gather(*[cache.resolve(f"{ORIGIN}/m0.glb") for _ in range(5)])
+        assert len(set(digests)) == 1
+        assert await cache.resolve(f"{ORIGIN}/m0.glb") == digests[0]
+    finally:
+        await cache.close()
+    assert stub_origin.hits("/m0.glb") == 1
+    with open(cache.object_path(digests[0]), "rb") as f:
+        assert f.read() == models["/m0.glb"]
+
+@pytest.mark.asyncio
+async def test_rejects_other_hosts_and_origin_errors(tmp_path, stub_origin):
+    cache = _cache(tmp_path, stub_origin)
+    try:
+        with pytest.raises(ValueError):
+            await cache.resolve("https://example.com/model.glb")
+        with pytest.raises(AssetFetchError):
+            await cache.resolve(f"{ORIGIN}/missing.glb")
+    finally:
+        await cache.close()
+    assert os.listdir(tmp_path / "tmp") == []
+
+@pytest.mark.asyncio
+async def test_serves_ranges_validators_and_compressed_variants(tmp_path, stub_origin):
+    models = _serve_models(stub_origin, 1)
+    data = models["/m0.glb"]
+    cache = _cache(tmp_path, stub_origin)
+    try:
+        digest = await cache.resolve(f"{ORIGIN}/m0.glb")
+
+        response = await cache.serve(_request(range="bytes=10-19"), digest, "public")
+        assert response.status_code == 206
+        assert response.headers["content-range"] == f"bytes 10-19/{len(data)}"
+        assert await _body(response) == data[10:20]
+
+        response = await cache.serve(_request(range=f"bytes={len(data)}-"), digest, "public")
+        assert response.status_code == 416
+
+        response = await cache.serve(_request(if_none_match=f'"{digest}"'), digest, "public")
+        assert response.status_code == 304
+
+        response = await cache.serve(_request(accept_encoding="gzip"), digest, "public")
+        assert response.headers["content-encoding"] == "gzip"
+        assert gzip.decompress(await _body(response)) == data
+
+        response = await cache.serve(_request(), digest, "public")
+        assert await _body(response) == data
+    finally:
+        await cache.close()
+
+@pytest.mark.asyncio
+async def test_workers_sharing_a_directory_refetch_evicted_objects(tmp_path, stub_origin):
+    models = _serve_models(stub_origin, 3)
+    # Room for two objects across both workers
+    budget = 2 * max(len(data) for data in models.values()) + 1024
+    first = _cache(tmp_path, stub_origin, max_bytes=budget, eviction_grace=0)
+    second = _cache(tmp_path, stub_origin, max_bytes=budget, eviction_grace=0)
+    try:
+        digest = await first.resolve(f"{ORIGIN}/m0.glb")
+        await asyncio.sleep(0.01)
+        await second.resolve(f"{ORIGIN}/m1.glb")
+        await asyncio.sleep(0.01)
+        await second.resolve(f"{ORIGIN}/m2.glb")
+
+        # The second worker evicted the first worker's object to keep the shared budget
+        assert not os.path.exists(first.object_path(digest))
+        assert sum(second.entries.values()) <= budget
+
+        # The first worker notices and fetches it again instead of answering 404
+        assert await first.resolve(f"{ORIGIN}/m0.glb") == digest
+        assert stub_origin.hits("/m0.glb") == 2
+        response = await first.serve(_request(), digest, "public")
+        assert response.status_code == 200
+        assert await _body(response) == models["/m0.glb"]
+    finally:
+        await first.close()
+        await second.close()
+
+@pytest.mark.asyncio
+async def test_recently_used_objects_are_not_evicted(tmp_path, stub_origin):
+    _serve_models(stub_origin, 3)
+    cache = _cache(tmp_path, stub_origin, max_bytes=1, eviction_grace=60)
+    try:
+        digests = [await cache.resolve(f"{ORIGIN}/m{index}.glb") for index in range(3)]
+    finally:
+        await cache.close()
+    assert all(os.path.exists(cache.object_path(digest)) for digest in digests)
+
+@pytest.mark.asyncio
+async def test_derived_files_are_built_once(tmp_path, stub_origin):
+    _serve_models(stub_origin, 1)
+    cache = _cache(tmp_path, stub_origin)
+    calls = []
+
+    def transform(data: bytes) -> bytes:
+        calls.append(len(data))
+        return data[:64]
+
+    try:
+        digest = await cache.resolve(f"{ORIGIN}/m0.glb")
+        derived = await asyncio.gather(*[cache.derive(digest, "head-v1", transform) for _ in range(3)])
+        assert len(set(derived)) == 1 and derived[0] != digest
+        assert await cache.derive(digest, "head-v1", transform) == derived[0]
+    finally:
+        await cache.close()
+    assert len(calls) == 1
@@ -0,0 +1,97 @@
+# Backend/test_avatar_batch.py
+"""
+Tests for the bulk avatar endpoints: per-item results, partial failures and
+the batch size limit
+"""
+
+from conftest import API_BATCH_MAX
+
+BODY = {"height": 170, "weight": 65, "chest": 90, "waist": 75, "hips": 95}
+
+def _generate(api_client, count: int) -> list:
+    response = api_client.post("/api/avatar/batch/generate", json={"measurements": [BODY] * count})
+    assert response.status_code == 200
+    return [result["avatarId"] for result in response.json()["results"]]
+
+def test_generate_reports_invalid_items(api_client):
+    response = api_client.post("/api/avatar/batch/generate", json={"measurements": [
+        BODY,
+        {**BODY, "height": "tall"},
+        {key: value for key, value in BODY.items() if key != "hips"},
+        {**BODY, "gender": "female"}
+    ]})
+    assert response.status_code == 200
+    payload = response.json()
+    assert (payload["total"], payload["succeeded"], payload["failed"]) == (4, 2, 2)
+
+    results = payload["results"]
+    assert [result["index"] for result in results] == [0, 1, 2, 3]
+    assert [result["success"] for result in results] == [True, False, False, True]
+    assert results[1]["avatarId"] is None
+    assert results[1]["error"].startswith("height:")
+    assert results[2]["error"].startswith("hips:")
+    assert results[3]["avatar"]["metadata"]["measurements"]["gender"] == "female"
+
+    # Stored avatars are the ones returned
+    avatar = results[0]["avatar"]
+    assert results[0]["avatarId"] == avatar["avatarId"]
+    assert api_client.get(f"/api/avatar/{avatar['avatarId']}").json() == avatar
+
+def test_get_reports_missing_ids(api_client):
+    first, second = _generate(api_client, 2)
+    response = api_client.post("/api/avatar/batch/get", json={"avatarIds": [second, "rpm_avatar_missing", first, second]})
+    assert response.status_code == 200
+    payload = response.json()
+    assert (payload["total"], payload["succeeded"], payload["failed"]) == (4, 3, 1)
+
+    results = payload["results"]
+    assert [result["avatarId"] for result in results] == [second, "rpm_avatar_missing", first, second]
+    assert results[1] == {"index": 1, "avatarId": "rpm_avatar_missing", "success": False, "error": "Avatar not found"}
+    assert results[0]["avatar"] == results[3]["avatar"]
+    assert results[2]["avatar"]["avatarId"] == first
+
+def test_update_reports_per_item_errors(api_client):
+    first, second = _generate(api_client, 2)
+    response = api_client.put("/api/avatar/batch/update", json={"updates": [
+        {"avatarId": first, "measurements": {**BODY, "weight": 72}},
+        {"measurements": BODY},
+        {"avatarId": first, "measurements": {**BODY, "weight": 80}},
+        {"avatarId": second, "measurements": {**BODY, "waist": "wide"}},
+        {"avatarId": "rpm_avatar_missing", "measurements": BODY}
+    ]})
+    assert response.status_code == 200
+    payload = response.json()
+    assert (payload["total"], payload["succeeded"], payload["failed"]) == (5, 1, 4)
+
+    results = payload["results"]
+    assert results[0]["success"]
+    assert results[0]["avatar"]["metadata"]["measurements"]["weight"] == 72
+    assert results[1]["error"] == "avatarId is required"
+    assert results[2]["error"] == "Duplicate avatarId in batch"
+    assert results[3]["avatarId"] == second
+    assert results[3]["error"].startswith("waist:")
+    assert results[4]["error"] == "Avatar not found"
+
+    # Only the valid update was written
+    stored = api_client.post("/api/avatar/batch/get", json={"avatarIds": [first, second]}).json()["results"]
+    assert stored[0]["avatar"]["metadata"]["measurements"]["weight"] == 72
+    assert stored[1]["avatar"]["metadata"]["measurements"]["waist"] == BODY["waist"]
+
+def test_empty_batches(api_client):
+    response = api_client.post("/api/avatar/batch/get", json={"avatarIds": []})
+    assert response.json() == {"results": [], "total": 0, "succeeded": 0, "failed": 0}
+    response = api_client.post("/api/avatar/batch/generate", json={"measurements": []})
+    assert response.json() == {"results": [], "total": 0, "succeeded": 0, "failed": 0}
+
+def test_batches_over_the_limit_are_rejected(api_client):
+    assert len(_generate(api_client, API_BATCH_MAX)) == API_BATCH_MAX
+
+    oversized = API_BATCH_MAX + 1
+    for method, path, payload in (
+        ("POST", "/api/avatar/batch/generate", {"measurements": [BODY] * oversized}),
+        ("POST", "/api/avatar/batch/get", {"avatarIds": ["rpm_avatar_missing"] * oversized}),
+        ("PUT", "/api/avatar/batch/update", {"updates": [{"avatarId": "rpm_avatar_missing", "measurements": BODY}] * oversized})
+    ):
+        response = api_client.request(method, path, json=payload)
+        assert response.status_code == 413
+        assert response.json()["detail"] == f"Batch of {oversized} items exceeds the limit of {API_BATCH_MAX}"
@@ -0,0 +1,141 @@
+# Backend/test_avatar_cache.py
+"""
+Tests for the avatar record cache over the in-process backend: coalesced
+and batched loads, and invalidation between workers
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+
+from avatar_cache import AvatarCache, MemoryCacheBackend
+from avatar_store import SQLiteAvatarStore
+
+START = datetime(2024, 1, 1)
+
+def _avatar(index: int) -> dict:
+    created_at = (START + timedelta(minutes=index)).isoformat()
+    return {
+        "avatarId": f"avatar_{index}",
+        "metadata": {"measurements": {"height": 170, "userId": "user-1"}, "created_at": created_at}
+    }
+
+@pytest_asyncio.fixture
+async def store(tmp_path):
+    store = SQLiteAvatarStore(str(tmp_path / "avatars.db"))
+    await store.connect()
+    await store.put_many([_avatar(index) for index in range(5)])
+    yield store
+    await store.close()
+
+async def _worker(store, backend) -> AvatarCache:
+    cache = AvatarCache(store, backend)
+    await cache.start()
+    return cache
+
+@pytest.mark.asyncio
+async def test_concurrent_gets_share_one_store_load(store, count_calls):
+    cache = await _worker(store, MemoryCacheBackend())
+    loads = count_calls(store, "get_many", sorted)
+
+    records = await asyncio.gather(*[cache.get("avatar_1") for _ in range(10)])
+    assert {record.avatar_id for record in records} == {"avatar_1"}
+    assert loads == [["avatar_1"]]
+
+    # Served from L1 afterwards
+    await cache.get("avatar_1")
+    assert len(loads) == 1
+
+@pytest.mark.asyncio
+async def test_get_many_queries_the_store_once_for_all_misses(store, count_calls):
+    backend = MemoryCacheBackend()
+    first = await _worker(store, backend)
+    await first.get("avatar_0")
+
+    second = await _worker(store, backend)
+    loads = count_calls(store, "get_many", sorted)
+    found = await second.get_many(["avatar_0", "avatar_1", "avatar_2", "avatar_1", "missing"])
+
+    assert sorted(found) == ["avatar_0", "avatar_1", "avatar_2"]
+    # avatar_0 came from the shared tier
+    assert loads == [["avatar_1", "avatar_2", "missing"]]
+
+    # Hits and the remembered miss are answered without the store
+    assert sorted(await second.get_many(["avatar_1", "missing"])) == ["avatar_1"]
+    assert await second.get("missing") is None
+    assert len(loads) == 1
+
+@pytest.mark.asyncio
+async def test_writes_invalidate_other_workers(store, count_calls):
+    backend = MemoryCacheBackend()
+    writer, reader = await _worker(store, backend), await _worker(store, backend)
+    assert (await reader.get("avatar_1")).revision == 1
+
+    record = await writer.update_measurements("avatar_1", {"height": 190}, datetime(2024, 2, 1).isoformat())
+    assert record.revision == 2
+    assert "avatar_1" not in reader.local.entries
+    assert "avatar_1" in writer.local.entries
+
+    loads = count_calls(store, "get_many", sorted)
+    assert (await reader.get("avatar_1")).data["metadata"]["measurements"] == {"height": 190}
+    # Refreshed from the shared tier, not the store
+    assert loads == []
+
+@pytest.mark.asyncio
+async def test_bulk_writes_invalidate_every_avatar(store):
+    backend = MemoryCacheBackend()
+    writer, reader = await _worker(store, backend), await _worker(store, backend)
+    await reader.get_many(["avatar_0", "avatar_1", "avatar_2"])
+
+    updated = await writer.update_measurements_many(
+        {"avatar_0": {"height": 150}, "avatar_2": {"height": 160}},
+        datetime(2024, 2, 1).isoformat()
+    )
+    assert sorted(updated) == ["avatar_0", "avatar_2"]
+    assert sorted(reader.local.entries) == ["avatar_1"]
+
+    found = await reader.get_many(["avatar_0", "avatar_2"])
+    assert found["avatar_2"].data["metadata"]["measurements"] == {"height": 160}
+
+@pytest.mark.asyncio
+async def test_shared_tier_failures_fall_back_to_the_store(store):
+    class BrokenBackend(MemoryCacheBackend):
+        async def get(self, key):
+            raise ConnectionError("cache down")
+
+        async def get_many(self, keys):
+            raise ConnectionError("cache down")
+
+    cache = await _worker(store, BrokenBackend())
+    assert (await cache.get("avatar_1")).avatar_id == "avatar_1"
+    assert sorted(await cache.get_many(["avatar_2", "avatar_3"])) == ["avatar_2", "avatar_3"]
+
+@pytest.mark.asyncio
+async def test_bulk_fill_does_not_overwrite_a_racing_update(store):
+    backend = MemoryCacheBackend()
+    writer, reader = await _worker(store, backend), await _worker(store, backend)
+
+    # Hold the reader's store query open until the writer has published a newer revision
+    loading, release = asyncio.Event(), asyncio.Event()
+    get_many = store.get_many
+
+    async def slow_get_many(avatar_ids):
+        records = await get_many(avatar_ids)
+        loading.set()
+        await release.wait()
+        return records
+
+    store.get_many = slow_get_many
+    read = asyncio.create_task(reader.get_many(["avatar_1", "avatar_2"]))
+    await loading.wait()
+    await writer.update_measurements("avatar_1", {"height": 190}, datetime(2024, 2, 1).isoformat())
+    release.set()
+    assert (await read)["avatar_1"].revision == 1
+    store.get_many = get_many
+
+    # Neither the shared tier nor the reader's L1 keeps the stale copy
+    assert (await reader.get("avatar_1")).revision == 2
+    assert (await (await _worker(store, backend)).get("avatar_1")).revision == 2
+    assert (await reader.get("avatar_2")).revision == 1
@@ -0,0 +1,133 @@
+# Backend/test_avatar_store.py
+"""
+Tests for the SQLite avatar store: batched writes, the dedicated writer
+connection, and measurement updates
+"""
+
+import asyncio
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+
+from avatar_store import SQLiteAvatarStore
+
+START = datetime(2024, 1, 1)
+
+def _avatar(index: int, user_id: str = "user-1") -> dict:
+    created_at = (START + timedelta(minutes=index)).isoformat()
+    return {
+        "avatarId": f"avatar_{index}",
+        "avatarUrl": f"https://models.example/{index}.glb",
+        "metadata": {
+            "measurements": {"height": 170 + index, "userId": user_id},
+            "created_at": created_at,
+            "updated_at": created_at
+        }
+    }
+
+@pytest_asyncio.fixture(params=["file", "memory"])
+async def store(request, tmp_path):
+    path = str(tmp_path / "avatars.db") if request.param == "file" else ":memory:"
+    store = SQLiteAvatarStore(path, pool_size=3)
+    await store.connect()
+    yield store
+    await store.close()
+
+@pytest.mark.asyncio
+async def test_concurrent_puts_share_one_write(store, count_calls):
+    writes = count_calls(store, "_write_records", len)
+    records = await asyncio.gather(*[store.put(_avatar(index)) for index in range(20)])
+
+    assert writes == [20]
+    assert [record.avatar_id for record in records] == [f"avatar_{index}" for index in range(20)]
+    stored = await store.get_many([f"avatar_{index}" for index in range(20)] + ["missing"])
+    assert sorted(stored) == sorted(f"avatar_{index}" for index in range(20))
+    assert stored["avatar_3"].data == _avatar(3)
+
+@pytest.mark.asyncio
+async def test_close_waits_for_timer_flushes(tmp_path, monkeypatch):
+    store = SQLiteAvatarStore(str(tmp_path / "avatars.db"))
+    await store.connect()
+    release = asyncio.Event()
+    write = store._write_records
+
+    async def slow_write(records):
+        await release.wait()
+        await write(records)
+
+    monkeypatch.setattr(store, "_write_records", slow_write)
+    put = asyncio.create_task(store.put(_avatar(0)))
+    await asyncio.sleep(0.05)
+    # The batch timer has started a flush, and the store holds on to it
+    assert len(store._flushes) == 1
+
+    closing = asyncio.create_task(store.close())
+    await asyncio.sleep(0.05)
+    assert not closing.done()
+    release.set()
+    await closing
+    assert (await put).avatar_id == "avatar_0"
+    assert not store._flushes
+
+@pytest.mark.asyncio
+async def test_writes_and_reads_interleave_without_lock_errors(store):
+    await store.put_many([_avatar(index) for index in range(50)])
+    updated_at = (START + timedelta(days=1)).isoformat()
+
+    results = await asyncio.gather(
+        *[store.update_measurements(f"avatar_{index}", {"height": 180}, updated_at) for index in range(50)],
+        *[store.put(_avatar(index)) for index in range(50, 100)],
+        *[store.get(f"avatar_{index}") for index in range(50)]
+    )
+
+    assert all(result is not None for result in results)
+    assert len(await store.get_many([f"avatar_{index}" for index in range(100)])) == 100
+
+@pytest.mark.asyncio
+async def test_read_connections_cannot_write(tmp_path):
+    store = SQLiteAvatarStore(str(tmp_path / "avatars.db"), pool_size=2)
+    await store.connect()
+    try:
+        async with store._acquire() as connection:
+            with pytest.raises(sqlite3.OperationalError):
+                await connection.execute("DELETE FROM avatars")
+    finally:
+        await store.close()
+
+@pytest.mark.asyncio
+async def test_update_measurements_bumps_revision(store):
+    await store.put(_avatar(1))
+    updated_at = (START + timedelta(days=1)).isoformat()
+
+    record = await store.update_measurements("avatar_1", {"height": 190, "userId": "user-2"}, updated_at)
+    assert record.revision == 2
+    assert record.user_id == "user-2"
+    assert record.data["metadata"]["measurements"] == {"height": 190, "userId": "user-2"}
+    assert record.data["metadata"]["updated_at"] == updated_at
+    assert (await store.get("avatar_1")).body == record.body
+
+    assert await store.update_measurements("missing", {"height": 190}, updated_at) is None
+
+@pytest.mark.asyncio
+async def test_update_measurements_many_skips_unknown_ids(store):
+    await store.put_many([_avatar(index) for index in range(3)])
+    updated_at = (START + timedelta(days=1)).isoformat()
+
+    records = await store.update_measurements_many(
+        {"avatar_0": {"height": 150}, "avatar_2": {"height": 160}, "missing": {"height": 170}},
+        updated_at
+    )
+    assert sorted(records) == ["avatar_0", "avatar_2"]
+    assert (await store.get("avatar_1")).revision == 1
+
+@pytest.mark.asyncio
+async def test_list_by_user_pages_newest_first(store):
+    await store.put_many([_avatar(index, "user-1" if index % 2 else "user-2") for index in range(10)])
+
+    page = await store.list_by_user("user-1", limit=3)
+    assert [record.avatar_id for record in page] == ["avatar_9", "avatar_7", "avatar_5"]
+
+    page = await store.list_by_user("user-1", limit=3, before=page[-1].created_at)
+    assert [record.avatar_id for record in page] == ["avatar_3", "avatar_1"]
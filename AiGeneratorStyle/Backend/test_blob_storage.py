@@ -0,0 +1,96 @@
+# Backend/test_blob_storage.py
+"""
+Tests for the in-memory and local disk blob backends: streaming, ranged
+reads and content-addressed uploads
+"""
+
+import os
+
+import pytest
+
+from blob_storage import CHUNK_SIZE, BlobNotFoundError, LocalBlobStorage, MemoryBlobStorage, content_key, is_digest
+
+# Spans several chunks, with a partial last one
+DATA = bytes(range(256)) * ((2 * CHUNK_SIZE + 1000) // 256)
+
+@pytest.fixture(params=["memory", "local"])
+def storage(request, tmp_path):
+    if request.param == "memory":
+        storage = MemoryBlobStorage()
+        storage.spool_dir = str(tmp_path / "spool")
+        return storage
+    return LocalBlobStorage(str(tmp_path / "blobs"))
+
+async def _chunks(data: bytes, size: int = 10000):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+async def _collect(stream) -> list:
+    return [chunk async for chunk in stream]
+
+@pytest.mark.asyncio
+async def test_stream_reads_in_chunks_and_ranges(storage):
+    assert await storage.write_stream("meshes/a.glb", _chunks(DATA), "model/gltf-binary") == len(DATA)
+    assert await storage.size("meshes/a.glb") == len(DATA)
+
+    chunks = await _collect(storage.stream("meshes/a.glb"))
+    assert b"".join(chunks) == DATA
+    assert max(len(chunk) for chunk in chunks) <= CHUNK_SIZE
+
+    offset = CHUNK_SIZE - 10
+    assert b"".join(await _collect(storage.stream("meshes/a.glb", offset, 20))) == DATA[offset:offset + 20]
+    assert b"".join(await _collect(storage.stream("meshes/a.glb", len(DATA) - 5, 100))) == DATA[-5:]
+
+@pytest.mark.asyncio
+async def test_missing_objects(storage):
+    assert not await storage.exists("meshes/missing.glb")
+    assert await storage.size("meshes/missing.glb") is None
+    assert await storage.read("meshes/missing.glb") is None
+    with pytest.raises(BlobNotFoundError):
+        await _collect(storage.stream("meshes/missing.glb"))
+
+@pytest.mark.asyncio
+async def test_put_content_stores_identical_uploads_once(storage):
+    first = await storage.put_content(_chunks(DATA), "model/gltf-binary", prefix="meshes", suffix=".glb")
+    second = await storage.put_content(_chunks(DATA, 777), "model/gltf-binary", prefix="meshes", suffix=".glb")
+
+    assert first["created"] and not second["created"]
+    assert first["key"] == second["key"] == content_key(first["digest"], "meshes", ".glb")
+    assert is_digest(first["digest"])
+    assert first["size"] == len(DATA)
+    assert await storage.read(first["key"]) == DATA
+    assert os.listdir(storage._spool_directory()) == []
+
+@pytest.mark.asyncio
+async def test_put_content_rejects_oversized_streams(storage):
+    with pytest.raises(ValueError):
+        await storage.put_content(_chunks(DATA), "model/gltf-binary", max_bytes=len(DATA) - 1)
+    assert os.listdir(storage._spool_directory()) == []
+
+@pytest.mark.asyncio
+async def test_download_copies_to_a_file(storage, tmp_path):
+    downloads = tmp_path / "downloads"
+    downloads.mkdir()
+    await storage.write("textures/a.webp", DATA, "image/webp")
+    await storage.download("textures/a.webp", str(downloads / "a.webp"))
+    assert (downloads / "a.webp").read_bytes() == DATA
+
+    await storage.delete("textures/a.webp")
+    with pytest.raises(BlobNotFoundError):
+        await storage.download("textures/a.webp", str(downloads / "b.webp"))
+    # The partial file of the failed download is removed
+    assert os.listdir(downloads) == ["a.webp"]
+
+def test_is_digest():
+    digest = "0123456789abcdef" * 4
+    assert is_digest(digest)
+    assert not is_digest(digest.upper())
+    assert not is_digest(digest[:-1])
+    assert not is_digest(digest[:-2] + "../")
+    assert not is_digest("")
+
+def test_local_keys_stay_under_the_root(tmp_path):
+    storage = LocalBlobStorage(str(tmp_path))
+    for key in ("../escape", "a//b", "a/./b", ""):
+        with pytest.raises(ValueError):
+            storage.path(key)
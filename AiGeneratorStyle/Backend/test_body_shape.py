@@ -0,0 +1,154 @@
+# Backend/test_body_shape.py
+"""
+Tests for the vectorised body shapes against the per-person implementation
+they replaced, and for the chunked CSV/NDJSON readers
+"""
+
+import io
+import json
+
+import numpy as np
+import pytest
+
+from body_shape import (
+    BODY_TYPES, MEASUREMENT_COLUMNS, body_shape_record, compute_body_shapes, stream_body_shapes
+)
+
+def _scalar_body_shape(measurements):
+    """ReadyPlayerMeIntegration.calculate_body_shape_from_measurements before vectorisation"""
+    height_m = measurements.get("height", 170) / 100
+    weight = measurements.get("weight", 70)
+    bmi = weight / (height_m ** 2)
+
+    body_types = {
+        "thin": {"bmi_range": (0, 18.5), "muscle": 0.0, "weight": -0.5},
+        "athletic": {"bmi_range": (18.5, 22), "muscle": 0.5, "weight": 0.0},
+        "average": {"bmi_range": (22, 25), "muscle": 0.2, "weight": 0.3},
+        "muscular": {"bmi_range": (25, 28), "muscle": 0.8, "weight": 0.5},
+        "heavy": {"bmi_range": (28, 100), "muscle": 0.1, "weight": 1.0}
+    }
+    selected_type = "average"
+    for body_type, params in body_types.items():
+        if params["bmi_range"][0] <= bmi < params["bmi_range"][1]:
+            selected_type = body_type
+            break
+
+    chest = measurements.get("chest", 95)
+    waist = measurements.get("waist", 80)
+    hips = measurements.get("hips", 95)
+    return {
+        "bodyType": selected_type,
+        "morphTargets": {
+            "weight": np.clip(body_types[selected_type]["weight"], -1, 1),
+            "muscle": np.clip(body_types[selected_type]["muscle"], 0, 1),
+            "chest": np.clip((chest - 95) / 30, -1, 1),
+            "waist": np.clip((waist - 80) / 25, -1, 1),
+            "hips": np.clip((hips - 95) / 30, -1, 1),
+            "height": height_m / 1.7
+        },
+        "metadata": {"bmi": round(bmi, 2), "bodyType": selected_type}
+    }
+
+def _records(people):
+    """Vectorised records for a list of measurement dicts (absent keys as NaN)"""
+    columns = {
+        name: np.array([person.get(name, np.nan) for person in people], dtype=np.float64)
+        for name in MEASUREMENT_COLUMNS
+    }
+    shapes = compute_body_shapes(columns)
+    return [body_shape_record(shapes, index) for index in range(len(people))]
+
+def _assert_matches_scalar(people):
+    for person, record in zip(people, _records(people)):
+        expected = _scalar_body_shape(person)
+        assert record["bodyType"] == expected["bodyType"], person
+        assert record["metadata"] == expected["metadata"], person
+        for name, value in expected["morphTargets"].items():
+            assert record["morphTargets"][name] == pytest.approx(float(value), abs=1e-12), (person, name)
+
+def test_bmi_bin_edges_match_scalar():
+    # At 2 m, weight / 4 is the exact BMI, so each edge is hit exactly
+    people = []
+    for edge in (18.5, 22.0, 25.0, 28.0):
+        for bmi in (np.nextafter(edge, 0), edge, np.nextafter(edge, 100)):
+            people.append({"height": 200, "weight": bmi * 4, "chest": 95, "waist": 80, "hips": 95})
+    _assert_matches_scalar(people)
+
+    records = _records(people)
+    assert [record["bodyType"] for record in records[1::3]] == ["athletic", "average", "muscular", "heavy"]
+    assert [record["bodyType"] for record in records[0::3]] == ["thin", "athletic", "average", "muscular"]
+
+def test_out_of_range_bmi_matches_scalar():
+    people = [
+        {"height": 200, "weight": 400},
+        {"height": 200, "weight": 399.99},
+        {"height": 100, "weight": 250},
+        {"height": 170, "weight": 0},
+        {"height": 170, "weight": -5}
+    ]
+    _assert_matches_scalar(people)
+    # BMI 100 and above, or below 0, classify as average
+    assert [record["bodyType"] for record in _records(people)] == ["average", "heavy", "average", "thin", "average"]
+
+def test_missing_fields_match_scalar():
+    people = [
+        {},
+        {"height": 182},
+        {"weight": 95, "waist": 101},
+        {"height": 160, "weight": 48, "chest": 70, "hips": 140},
+        {"chest": 200, "waist": 20}
+    ]
+    _assert_matches_scalar(people)
+
+    # Absent columns behave like all-NaN ones
+    shapes = compute_body_shapes({"weight": np.array([95.0, np.nan])})
+    expected = compute_body_shapes({name: np.array([95.0 if name == "weight" else np.nan, np.nan]) for name in MEASUREMENT_COLUMNS})
+    for name, values in expected.items():
+        np.testing.assert_array_equal(shapes[name], values)
+
+def test_random_people_match_scalar():
+    rng = np.random.default_rng(0)
+    people = [
+        {
+            "height": float(rng.uniform(140, 210)),
+            "weight": float(rng.uniform(35, 160)),
+            "chest": float(rng.uniform(60, 140)),
+            "waist": float(rng.uniform(50, 130)),
+            "hips": float(rng.uniform(70, 150))
+        }
+        for _ in range(500)
+    ]
+    _assert_matches_scalar(people)
+    assert {record["bodyType"] for record in _records(people)} == set(BODY_TYPES)
+
+def test_readyplayer_integration_delegates():
+    from readyplayer_integration import ReadyPlayerMeIntegration
+
+    measurements = {"height": 168, "weight": 77, "chest": 104}
+    shape = ReadyPlayerMeIntegration().calculate_body_shape_from_measurements(measurements)
+    assert shape["metadata"]["measurements"] is measurements
+    del shape["metadata"]["measurements"]
+    assert shape == _records([measurements])[0]
+
+def test_csv_and_ndjson_stream_in_chunks():
+    people = [{"id": f"c{index}", "height": 150 + index, "weight": 50 + 3 * index, "waist": 70 + index} for index in range(7)]
+    people[3]["height"] = None
+
+    csv = "id,height,weight,waist,note\n" + "".join(
+        f"{person['id']},{'NaN' if person['height'] is None else person['height']},{person['weight']},{person['waist']},x\n"
+        for person in people
+    )
+    ndjson = "".join(json.dumps(person) + "\n" for person in people)
+    expected = _records([{key: value for key, value in person.items() if value is not None} for person in people])
+
+    for source, file_format in ((csv, "csv"), (ndjson, "ndjson")):
+        chunks = list(stream_body_shapes(io.StringIO(source), file_format, chunk_rows=3, id_column="id"))
+        assert [len(ids) for ids, _ in chunks] == [3, 3, 1]
+        ids = [person_id for chunk_ids, _ in chunks for person_id in chunk_ids]
+        records = [body_shape_record(shapes, index) for _, shapes in chunks for index in range(len(shapes["bmi"]))]
+        assert ids == [person["id"] for person in people]
+        assert records == expected
+
+def test_csv_needs_a_measurement_column():
+    with pytest.raises(ValueError):
+        list(stream_body_shapes(io.StringIO("id,name\n1,a\n"), "csv"))
@@ -0,0 +1,130 @@
+# Backend/test_clothing_catalog.py
+"""
+Tests for the indexed clothing catalog against a brute-force scan: filters,
+price ranges, sort orders, cursor paging and facets
+"""
+
+import json
+import random
+from collections import Counter
+
+import pytest
+
+from clothing_catalog import ClothingCatalog, load_catalog
+
+TYPES = ["shirt", "pants", "dress", "jacket"]
+BRANDS = ["StyleIt", "Acme", "Nord"]
+COLORS = ["white", "black", "blue", "red", "green"]
+SIZES = ["XS", "S", "M", "L", "XL"]
+
+def _items(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"item_{index}",
+            "name": f"Item {index}",
+            "type": rng.choice(TYPES),
+            "brand": rng.choice(BRANDS),
+            "colors": rng.sample(COLORS, rng.randint(0, 3)),
+            "sizes": rng.sample(SIZES, rng.randint(1, 5)),
+            # Few distinct prices, so sorting has to keep ties in catalog order
+            "price": rng.choice([9.99, 19.99, 29.99, 49.99, 79.99])
+        }
+        for index in range(count)
+    ]
+
+ITEMS = _items(3000)
+
+def _matches(item, filters, min_price, max_price) -> bool:
+    for field, values in filters.items():
+        if field in ("type", "brand"):
+            if values and item[field] not in values:
+                return False
+        elif values and not set(item[field + "s"]) & set(values):
+            return False
+    if min_price is not None and item["price"] < min_price:
+        return False
+    return max_price is None or item["price"] <= max_price
+
+def _expected(filters=None, min_price=None, max_price=None, sort="default"):
+    matching = [item for item in ITEMS if _matches(item, filters or {}, min_price, max_price)]
+    if sort != "default":
+        matching.sort(key=lambda item: item["price"])
+        if sort == "price_desc":
+            # The descending index is the ascending one reversed, ties included
+            matching.reverse()
+    return [item["id"] for item in matching]
+
+def _all_pages(catalog, limit, **query):
+    ids, cursor, pages = [], None, 0
+    while True:
+        page = catalog.query(limit=limit, cursor=cursor, **query)
+        assert len(page["items"]) <= limit
+        ids.extend(item["id"] for item in page["items"])
+        pages += 1
+        cursor = page["nextCursor"]
+        if cursor is None:
+            return ids, page["total"], pages
+
+@pytest.fixture(scope="module")
+def catalog():
+    return ClothingCatalog(ITEMS)
+
+@pytest.mark.parametrize("query", [
+    {},
+    {"filters": {"type": ["dress"]}},
+    {"filters": {"color": ["red", "green"], "size": ["XS"]}},
+    {"filters": {"brand": ["Nord"], "type": ["shirt", "jacket"]}, "min_price": 19.99, "max_price": 49.99},
+    {"filters": {"color": ["blue"]}, "sort": "price_asc"},
+    {"max_price": 19.99, "sort": "price_desc"},
+    {"filters": {"brand": ["Nobody"]}}
+])
+@pytest.mark.parametrize("limit", [7, 500])
+def test_pages_match_a_full_scan(catalog, query, limit):
+    expected = _expected(**query)
+    ids, total, pages = _all_pages(catalog, limit, **query)
+    assert ids == expected
+    assert total == len(expected)
+    assert pages == max(1, -(-len(expected) // limit))
+
+def test_page_items_carry_every_field(catalog):
+    item = catalog.query(filters={"type": ["pants"]}, limit=1)["items"][0]
+    source = next(source for source in ITEMS if source["type"] == "pants")
+    assert item == {**source, "modelUrl": None, "thumbnailUrl": None}
+
+@pytest.mark.parametrize("filters", [{}, {"type": ["shirt"]}, {"type": ["dress"], "color": ["white"], "brand": ["Acme"]}])
+def test_facets_count_matching_items(catalog, filters):
+    matching = [item for item in ITEMS if _matches(item, filters, None, None)]
+    facets = catalog.query(filters=filters, limit=1, facets=True)["facets"]
+
+    assert facets["type"] == dict(Counter(item["type"] for item in matching))
+    assert facets["brand"] == dict(Counter(item["brand"] for item in matching))
+    assert facets["color"] == dict(Counter(color for item in matching for color in item["colors"]))
+    assert facets["size"] == dict(Counter(size for item in matching for size in item["sizes"]))
+    prices = [item["price"] for item in matching]
+    assert facets["price"] == {"min": min(prices), "max": max(prices)}
+
+def test_rejects_bad_queries_and_cursors(catalog):
+    cursor = catalog.query(limit=5, sort="price_asc")["nextCursor"]
+    with pytest.raises(ValueError):
+        catalog.query(sort="name")
+    with pytest.raises(ValueError):
+        catalog.query(filters={"material": ["cotton"]})
+    with pytest.raises(ValueError):
+        catalog.query(cursor="not a cursor!")
+    # Cursors only continue the sort order they came from
+    with pytest.raises(ValueError):
+        catalog.query(cursor=cursor, sort="price_desc")
+
+def test_version_follows_content():
+    assert ClothingCatalog(_items(50)).version == ClothingCatalog(_items(50)).version
+    changed = _items(50)
+    changed[10]["colors"] = changed[10]["colors"] + ["pink"]
+    assert ClothingCatalog(changed).version != ClothingCatalog(_items(50)).version
+
+def test_loads_ndjson(tmp_path):
+    path = tmp_path / "catalog.ndjson"
+    path.write_text("\n".join(json.dumps(item) for item in ITEMS[:20]) + "\n\n")
+    catalog = load_catalog(str(path))
+    assert len(catalog) == 20
+    assert [item["id"] for item in catalog.query(limit=20)["items"]] == [item["id"] for item in ITEMS[:20]]
@@ -0,0 +1,99 @@
+# Backend/test_clothing_fitting.py
+"""
+Tests for fitting one garment over a stack of avatar poses
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+trimesh = pytest.importorskip("trimesh")
+pytest.importorskip("scipy")
+
+from clothing_fitting import DRAPE_CLEARANCE, GRAVITY_STEP, ClothingFitter, ClothingMetadata
+from conftest import MEASUREMENTS, garment_scene
+from fitting_backend import NumpyFittingBackend
+
+SHIRT = ClothingMetadata(clothing_id="shirt-1", type="shirt")
+
+def _fit(fitter: ClothingFitter, poses, faces, garment, **kwargs) -> np.ndarray:
+    return fitter.fit_clothing_to_poses(poses, faces, garment.copy(), MEASUREMENTS, SHIRT, **kwargs)
+
+@pytest.fixture
+def fitter():
+    return ClothingFitter(backend=NumpyFittingBackend())
+
+def test_one_pose_matches_fitting_to_the_avatar(fitter):
+    poses, faces, garment = garment_scene(1)
+    avatar = trimesh.Trimesh(poses[0], faces, process=False)
+    expected = fitter.fit_clothing_to_avatar(avatar, garment.copy(), MEASUREMENTS, SHIRT).vertices
+
+    # Carrying to the reference pose itself moves nothing; only the settle steps differ
+    carried = _fit(fitter, poses, faces, garment, settle_iterations=0)[0]
+    np.testing.assert_allclose(carried, expected, atol=1e-9)
+
+    settled = _fit(fitter, poses, faces, garment)[0]
+    assert np.linalg.norm(settled - expected, axis=1).max() < 3 * np.linalg.norm(GRAVITY_STEP) + DRAPE_CLEARANCE
+
+def test_carried_poses_stay_close_to_fitting_each_pose(fitter):
+    poses, faces, garment = garment_scene(4)
+    batched = _fit(fitter, poses, faces, garment)
+    for pose, vertices in zip(poses, batched):
+        avatar = trimesh.Trimesh(pose, faces, process=False)
+        expected = fitter.fit_clothing_to_avatar(avatar, garment.copy(), MEASUREMENTS, SHIRT).vertices
+        # Settling sags the garment by a few gravity steps; the carry itself adds little
+        assert np.median(np.linalg.norm(vertices - expected, axis=1)) < 3 * np.linalg.norm(GRAVITY_STEP) + DRAPE_CLEARANCE
+
+def test_pose_batch_matches_fitting_each_pose_alone(fitter):
+    poses, faces, garment = garment_scene(4)
+    batched = _fit(fitter, poses, faces, garment)
+
+    singles = np.stack([
+        _fit(fitter, poses[index:index + 1], faces, garment, reference_pose=poses[0])[0]
+        for index in range(len(poses))
+    ])
+    assert batched.shape == (4, len(garment.vertices), 3)
+    assert np.abs(batched - singles).max() == 0.0
+
+    # The reference pose itself needs no reference argument
+    assert np.abs(batched[0] - _fit(fitter, poses[:1], faces, garment)[0]).max() == 0.0
+
+def test_every_pose_ends_outside_its_body(fitter):
+    poses, faces, garment = garment_scene(4)
+    fitted = _fit(fitter, poses, faces, garment)
+
+    backend = fitter.backend
+    topology = backend.prepare_topology(faces, poses.shape[1])
+    for pose, vertices in zip(poses, fitted):
+        surface = backend.prepare_surface(pose, topology)
+        _, nearest = backend.nearest_vertices(surface, vertices)
+        closest, face_ids, _ = backend.closest_surface_points(surface, vertices, nearest)
+        heights = ((vertices - closest) * surface["face_normals"][face_ids]).sum(-1)
+        assert heights.min() > 0
+
+def test_rejects_mismatched_shapes(fitter):
+    poses, faces, garment = garment_scene(2)
+    with pytest.raises(ValueError):
+        _fit(fitter, poses[0], faces, garment)
+    with pytest.raises(ValueError):
+        _fit(fitter, poses, faces, garment, reference_pose=poses[0][:-1])
+
+@pytest.mark.timing
+def test_pose_batch_is_sub_linear(fitter):
+    pose_count = 6
+    poses, faces, garment = garment_scene(pose_count, subdivisions=4)
+    # Warm up imports and allocator
+    _fit(fitter, poses[:1], faces, garment)
+
+    started = time.perf_counter()
+    _fit(fitter, poses, faces, garment)
+    batched = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for index in range(pose_count):
+        _fit(fitter, poses[index:index + 1], faces, garment, reference_pose=poses[0])
+    singles = time.perf_counter() - started
+
+    # The full drape runs once instead of once per pose (about 0.45 here)
+    assert batched < 0.7 * singles, f"{pose_count} poses: batched {batched:.2f}s, one at a time {singles:.2f}s"
@@ -0,0 +1,178 @@
+# Backend/test_compression.py
+"""
+Tests for response compression: encoding negotiation, ETag handling,
+pass-through cases and the compressed body cache
+"""
+
+import gzip
+import json
+import random
+
+import pytest
+
+from compression import (
+    SUPPORTED_ENCODINGS,
+    CompressionMiddleware,
+    ResponseCompressor,
+    accepted_encodings,
+    negotiate_encoding
+)
+
+BODY = json.dumps([{"id": index, "name": f"item {index}"} for index in range(200)]).encode()
+
+def _app(status=200, headers=None, chunks=(BODY,)):
+    """ASGI app sending a fixed response, its body in the given chunks"""
+    headers = {"content-type": "application/json", **(headers or {})}
+    calls = []
+
+    async def app(scope, receive, send):
+        calls.append(scope["path"])
+        raw = [(name.encode(), value.encode()) for name, value in headers.items()]
+        await send({"type": "http.response.start", "status": status, "headers": raw})
+        for index, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": index < len(chunks) - 1})
+
+    app.calls = calls
+    return app
+
+async def _get(middleware, path="/items", method="GET", **headers):
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    await middleware(scope, receive, send)
+    start = sent[0]
+    body = b"".join(message.get("body", b"") for message in sent[1:])
+    return start["status"], {name.decode(): value.decode() for name, value in start["headers"]}, body
+
+def _middleware(app, **kwargs) -> CompressionMiddleware:
+    return CompressionMiddleware(app, ResponseCompressor(**kwargs))
+
+def test_accept_encoding_q_values():
+    assert accepted_encodings("gzip;q=0.5, br , identity; q=0") == {"gzip": 0.5, "br": 1.0, "identity": 0.0}
+    assert accepted_encodings("gzip;q=oops") == {"gzip": 0.0}
+
+    assert negotiate_encoding("") is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("deflate, gzip;q=0.1") == "gzip"
+    assert negotiate_encoding("*") == SUPPORTED_ENCODINGS[0]
+    assert negotiate_encoding("*;q=0.5, gzip;q=0") == ("br" if "br" in SUPPORTED_ENCODINGS else None)
+    if "br" in SUPPORTED_ENCODINGS:
+        assert negotiate_encoding("br;q=0.4, gzip;q=0.8") == "gzip"
+        assert negotiate_encoding("gzip, br") == "br"
+
+@pytest.mark.asyncio
+async def test_encoded_body_gets_weak_etag_and_vary():
+    middleware = _middleware(_app(headers={"etag": '"v1"'}))
+    status, headers, body = await _get(middleware, accept_encoding="gzip")
+
+    assert status == 200
+    assert headers["content-encoding"] == "gzip"
+    assert headers["etag"] == 'W/"v1"'
+    assert headers["vary"] == "Accept-Encoding"
+    assert int(headers["content-length"]) == len(body) < len(BODY)
+    assert gzip.decompress(body) == BODY
+
+    # Identity responses still vary, and keep their strong validator
+    status, headers, body = await _get(middleware)
+    assert body == BODY
+    assert "content-encoding" not in headers
+    assert headers["etag"] == '"v1"'
+    assert headers["vary"] == "Accept-Encoding"
+
+@pytest.mark.asyncio
+async def test_revalidation_of_encoded_copy_keeps_the_weak_etag():
+    middleware = _middleware(_app(status=304, headers={"etag": '"v1"'}, chunks=(b"",)))
+    status, headers, body = await _get(middleware, accept_encoding="gzip", if_none_match='W/"v1"')
+    assert (status, headers["etag"], body) == (304, 'W/"v1"', b"")
+    assert "content-encoding" not in headers
+
+    status, headers, _ = await _get(middleware, accept_encoding="gzip", if_none_match='"v1"')
+    assert headers["etag"] == '"v1"'
+
+@pytest.mark.parametrize("status, headers", [
+    (206, {"content-range": f"bytes 0-{len(BODY) - 1}/{len(BODY) * 2}"}),
+    (200, {"content-encoding": "gzip"}),
+    (200, {"cache-control": "no-transform"}),
+    (200, {"content-type": "model/gltf-binary"}),
+    (404, {})
+])
+@pytest.mark.asyncio
+async def test_ineligible_responses_pass_through(status, headers):
+    middleware = _middleware(_app(status=status, headers=headers))
+    got_status, got_headers, body = await _get(middleware, accept_encoding="gzip")
+    assert (got_status, body) == (status, BODY)
+    assert got_headers.get("content-encoding") == headers.get("content-encoding")
+    assert "vary" not in got_headers
+
+@pytest.mark.asyncio
+async def test_small_bodies_and_head_requests_pass_through():
+    small = _middleware(_app(chunks=(b'{"ok": true}',)))
+    _, headers, body = await _get(small, accept_encoding="gzip")
+    assert body == b'{"ok": true}' and "content-encoding" not in headers
+
+    _, headers, _ = await _get(_middleware(_app()), method="HEAD", accept_encoding="gzip")
+    assert "content-encoding" not in headers
+
+@pytest.mark.asyncio
+async def test_etagged_bodies_are_compressed_once_per_encoding():
+    middleware = _middleware(_app(headers={"etag": '"v1"'}))
+    cache = middleware.compressor.cache
+
+    first = await _get(middleware, accept_encoding="gzip")
+    second = await _get(middleware, accept_encoding="gzip")
+    assert first == second
+    assert (cache.misses, cache.hits) == (1, 1)
+    assert list(cache.entries) == [("/items", '"v1"', "gzip")]
+
+    # Another path with the same ETag is a different entry
+    await _get(middleware, path="/other", accept_encoding="gzip")
+    assert len(cache.entries) == 2
+
+    # Bodies without an ETag are never cached
+    plain = _middleware(_app())
+    await _get(plain, accept_encoding="gzip")
+    assert not plain.compressor.cache.entries
+
+@pytest.mark.asyncio
+async def test_cache_is_bounded_in_bytes():
+    middleware = _middleware(_app(headers={"etag": '"v1"'}), cache_bytes=1500)
+    for index in range(5):
+        await _get(middleware, path=f"/items/{index}", accept_encoding="gzip")
+    cache = middleware.compressor.cache
+    assert 0 < cache.total_bytes <= 1500
+    assert ("/items/4", '"v1"', "gzip") in cache.entries
+    assert ("/items/0", '"v1"', "gzip") not in cache.entries
+
+@pytest.mark.asyncio
+async def test_incompressible_bodies_are_sent_as_is():
+    data = random.Random(0).randbytes(4096)
+    middleware = _middleware(_app(headers={"etag": '"v1"', "content-type": "text/plain"}, chunks=(data,)))
+    for _ in range(2):
+        _, headers, body = await _get(middleware, accept_encoding="gzip")
+        assert body == data
+        assert "content-encoding" not in headers and headers["etag"] == '"v1"'
+    # The failed attempt is remembered too
+    assert middleware.compressor.cache.hits == 1
+
+@pytest.mark.asyncio
+async def test_streamed_bodies_are_compressed_chunk_by_chunk():
+    chunks = (BODY[:3000], BODY[3000:], b"")
+    middleware = _middleware(_app(headers={"etag": '"v1"', "content-length": str(len(BODY))}, chunks=chunks))
+    _, headers, body = await _get(middleware, accept_encoding="gzip")
+    assert headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+    assert headers["etag"] == 'W/"v1"'
+    assert gzip.decompress(body) == BODY
+    assert not middleware.compressor.cache.entries
@@ -0,0 +1,85 @@
+# Backend/test_face_tracking.py
+"""
+Tests for landmark fusion: best-frame selection, outlier rejection and
+stability detection
+"""
+
+import numpy as np
+
+from face_tracking import LandmarkFuser
+
+rng = np.random.default_rng(0)
+FACE = rng.normal(0, 50, (68, 3)) + [320, 240, 0]
+
+def _rotation(angle: float) -> np.ndarray:
+    c, s = np.cos(angle), np.sin(angle)
+    return np.array([[c, -s, 0], [s, c, 0], [0, 0, 1]])
+
+def _frame(noise: float = 0.5, angle: float = 0.0, scale: float = 1.0, shift=(0, 0, 0)) -> np.ndarray:
+    """The face moved by a similarity transform, with per-landmark jitter in pixels"""
+    center = FACE.mean(axis=0)
+    moved = (FACE - center) @ _rotation(angle).T * scale + center + shift
+    return moved + rng.normal(0, noise, FACE.shape)
+
+def test_first_frame_is_best_until_another_is_accepted():
+    fuser = LandmarkFuser()
+    assert fuser.add(_frame())
+    assert fuser.best_index == 1
+
+    assert fuser.add(_frame())
+    assert fuser.best_index == 2
+
+def test_best_frame_is_the_closest_fit():
+    fuser = LandmarkFuser()
+    for index in range(1, 13):
+        fuser.add(_frame(noise=0.01 if index == 8 else 1.0, angle=0.02 * index))
+    assert fuser.best_index == 8
+
+def test_head_motion_is_not_rejected():
+    fuser = LandmarkFuser()
+    for index in range(12):
+        assert fuser.add(_frame(angle=0.05 * index, scale=1 + 0.02 * index, shift=(5 * index, 0, 0)))
+    assert fuser.rejected == 0
+
+def test_outlier_frames_are_rejected():
+    fuser = LandmarkFuser()
+    for _ in range(10):
+        fuser.add(_frame())
+    fused = fuser.fused.copy()
+
+    # A mistracked frame is dropped whole
+    assert not fuser.add(_frame(noise=20.0))
+    assert fuser.rejected == 1
+    assert fuser.accepted == 10
+    np.testing.assert_array_equal(fuser.fused, fused)
+
+def test_stray_landmarks_are_ignored():
+    fuser = LandmarkFuser()
+    for _ in range(4):
+        fuser.add(_frame())
+    fused = fuser.fused.copy()
+
+    # Early frames are not gated yet; the stray landmark is left out of the fused estimate instead
+    stray = _frame()
+    stray[0] += 200
+    assert fuser.add(stray)
+    assert np.linalg.norm(fuser.fused[0] - fused[0]) < 0.01
+
+def test_stable_after_enough_consistent_frames():
+    fuser = LandmarkFuser(min_frames=10, stable_frames=5)
+    for _ in range(9):
+        fuser.add(_frame(noise=0.1))
+        assert not fuser.is_stable
+    fuser.add(_frame(noise=0.1))
+    assert fuser.is_stable
+
+    fuser.reset()
+    assert not fuser.is_stable
+    assert fuser.fused is None and fuser.best_index == -1
+
+def test_moving_estimate_is_not_stable():
+    fuser = LandmarkFuser(min_frames=3, window=3)
+    for index in range(12):
+        # A different expression every frame keeps the fused shape moving
+        fuser.add(_frame(noise=0.1) + np.sin(index) * rng.normal(0, 3, FACE.shape))
+    assert not fuser.is_stable
@@ -0,0 +1,96 @@
+# Backend/test_fitting_backend.py
+"""
+Tests for skin weight blending, and parity of the torch fitting backend
+with the NumPy one (skipped without torch)
+"""
+
+import numpy as np
+import pytest
+
+from conftest import MEASUREMENTS, garment_scene
+from fitting_backend import NumpyFittingBackend, TorchFittingBackend, blend_skin_weights, unique_edges
+
+@pytest.fixture(scope="module")
+def backends():
+    pytest.importorskip("torch")
+    pytest.importorskip("scipy")
+    pytest.importorskip("trimesh")
+    return NumpyFittingBackend(), TorchFittingBackend(threads=1)
+
+def test_blend_merges_duplicate_joints_and_renormalises():
+    # Corners share joint 2; the point sits mostly on corner 0
+    joints = np.array([[[2, 5], [2, 7], [3, 2]]])
+    weights = np.array([[[0.5, 0.5], [0.9, 0.1], [0.6, 0.4]]])
+    blended_joints, blended_weights = blend_skin_weights(joints, weights, np.array([[0.5, 0.25, 0.25]]), max_influences=2)
+
+    # Joint 2: 0.25 + 0.225 + 0.1; joint 5: 0.25; joints 3 and 7 are dropped
+    assert blended_joints.tolist() == [[2, 5]]
+    np.testing.assert_allclose(blended_weights, [[0.575 / 0.825, 0.25 / 0.825]], rtol=1e-6)
+    assert blended_weights.dtype == np.float32
+
+def test_blend_keeps_the_strongest_joints():
+    joints = np.arange(15).reshape(1, 3, 5)
+    weights = np.linspace(0.01, 0.15, 15).reshape(1, 3, 5)
+    blended_joints, blended_weights = blend_skin_weights(joints, weights, np.full((1, 3), 1 / 3))
+    assert blended_joints.tolist() == [[14, 13, 12, 11]]
+    np.testing.assert_allclose(blended_weights.sum(axis=1), 1, rtol=1e-6)
+
+def test_blend_pads_and_handles_unweighted_points():
+    joints = np.array([[[4], [4], [4]], [[1], [2], [3]]])
+    weights = np.array([[[1.0], [1.0], [1.0]], [[0.0], [0.0], [0.0]]])
+    blended_joints, blended_weights = blend_skin_weights(joints, weights, np.array([[0.2, 0.3, 0.5]] * 2))
+
+    # Unused influences are zero-weighted joint 0; unweighted points follow the first joint fully
+    assert blended_joints.tolist() == [[4, 0, 0, 0], [0, 0, 0, 0]]
+    np.testing.assert_allclose(blended_weights, [[1, 0, 0, 0], [1, 0, 0, 0]])
+
+def _on_both(backends, operation):
+    """operation(backend) on each backend, as NumPy arrays"""
+    results = []
+    for backend in backends:
+        result = operation(backend)
+        results.append([backend.to_numpy(value) for value in (result if isinstance(result, tuple) else (result,))])
+    return results
+
+def test_operations_match(backends):
+    poses, faces, garment = garment_scene(3)
+    # Off the avatar's vertex directions, so nearest vertices aren't float32 ties
+    points = np.asarray(garment.vertices) + np.random.default_rng(0).normal(0, 0.005, garment.vertices.shape)
+    edges = unique_edges(np.asarray(garment.faces))
+    lengths = 0.9 * np.linalg.norm(points[edges[:, 1]] - points[edges[:, 0]], axis=1)
+
+    def surfaces(backend):
+        topology = backend.prepare_topology(faces, poses.shape[1])
+        return backend.prepare_surface(poses[0], topology), backend.prepare_surface(poses, topology)
+
+    def closest(backend):
+        reference, _ = surfaces(backend)
+        distances, nearest = backend.nearest_vertices(reference, backend.asarray(points))
+        closest, _, _ = backend.closest_surface_points(reference, backend.asarray(points), nearest)
+        return distances, closest
+
+    def moves(backend):
+        reference, stack = surfaces(backend)
+        carried = backend.carry_to_poses(reference, backend.asarray(points), stack)
+        projected = backend.project_edges(carried, backend.asarray(edges, dtype="int64"), backend.asarray(lengths))
+        pushed, _ = backend.push_out(projected, stack, threshold=np.inf, offset=0.005, inside_only=True)
+        return carried, projected, pushed
+
+    for operation in (closest, moves):
+        expected, actual = _on_both(backends, operation)
+        for numpy_result, torch_result in zip(expected, actual):
+            np.testing.assert_allclose(numpy_result, torch_result, atol=1e-5)
+
+def test_fits_match(backends):
+    from clothing_fitting import DRAPE_CLEARANCE, ClothingFitter, ClothingMetadata
+
+    shirt = ClothingMetadata(clothing_id="shirt-1", type="shirt")
+    poses, faces, garment = garment_scene(3)
+    numpy_fit, torch_fit = [
+        ClothingFitter(backend=backend).fit_clothing_to_poses(poses, faces, garment.copy(), MEASUREMENTS, shirt)
+        for backend in backends
+    ]
+    errors = np.linalg.norm(numpy_fit - torch_fit, axis=-1)
+    # float32 rounding moves a few vertices across the drape clearance, which shifts them by up to one push-out
+    assert np.median(errors) < 1e-4
+    assert errors.max() < DRAPE_CLEARANCE
@@ -0,0 +1,153 @@
+# Backend/test_glb_codec.py
+"""
+Tests for the zero-copy GLB codec: accessor views, the writer's layout and
+plain and skinned mesh round trips
+"""
+
+import struct
+
+import numpy as np
+import pytest
+
+from glb_codec import (
+    ARRAY_BUFFER,
+    ELEMENT_ARRAY_BUFFER,
+    GLB,
+    GLBWriter,
+    encode_mesh,
+    read_mesh,
+    read_skinned_mesh,
+    save_mesh,
+    save_skinned_mesh
+)
+
+VERTICES = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1]], dtype=np.float32)
+FACES = np.array([[0, 1, 2], [0, 2, 3], [0, 3, 1], [1, 3, 2]], dtype=np.int64)
+
+def _document(writer: GLBWriter, node: dict) -> dict:
+    attributes = {"POSITION": writer.add_accessor(VERTICES, target=ARRAY_BUFFER, bounds=True)}
+    indices = writer.add_accessor(FACES.reshape(-1).astype(np.uint16), target=ELEMENT_ARRAY_BUFFER)
+    return {
+        "asset": {"version": "2.0"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"children": [1], **node}, {"mesh": 0}],
+        "meshes": [{"primitives": [{"attributes": attributes, "indices": indices}]}]
+    }
+
+def test_accessors_are_read_only_views_of_the_file():
+    glb = GLB(encode_mesh(VERTICES, FACES))
+    positions = glb.accessor(glb.gltf["meshes"][0]["primitives"][0]["attributes"]["POSITION"])
+    np.testing.assert_array_equal(positions, VERTICES)
+    assert not positions.flags.writeable
+    assert np.shares_memory(positions, np.frombuffer(glb.binary, dtype=np.uint8))
+
+def test_writer_pads_and_aligns():
+    writer = GLBWriter()
+    colors = np.arange(12, dtype=np.uint8).reshape(4, 3)
+    color_index = writer.add_accessor(colors, target=ARRAY_BUFFER)
+    tail_index = writer.add_accessor(np.array([7], dtype=np.uint16))
+    data = writer.to_bytes({"asset": {"version": "2.0"}})
+
+    magic, version, length = struct.unpack_from("<4sII", data)
+    assert (magic, version, length) == (b"glTF", 2, len(data))
+    assert len(data) % 4 == 0
+
+    glb = GLB(data)
+    views = glb.gltf["bufferViews"]
+    assert all(view["byteOffset"] % 4 == 0 for view in views)
+    # Vertex attribute elements are strided to 4 bytes
+    assert views[glb.gltf["accessors"][color_index]["bufferView"]]["byteStride"] == 4
+    np.testing.assert_array_equal(glb.accessor(color_index), colors)
+    assert glb.accessor(tail_index).tolist() == [[7]]
+
+def test_sparse_accessors_are_materialized():
+    writer = GLBWriter()
+    base = writer.add_accessor(np.zeros((5, 3), dtype=np.float32))
+    indices_view = writer.add_view(np.array([1, 3], dtype=np.uint16))
+    values_view = writer.add_view(np.array([[1, 2, 3], [4, 5, 6]], dtype=np.float32))
+    sparse = dict(writer.accessors[base])
+    sparse["sparse"] = {
+        "count": 2,
+        "indices": {"bufferView": indices_view, "componentType": 5123},
+        "values": {"bufferView": values_view}
+    }
+    writer.accessors.append(sparse)
+    glb = GLB(writer.to_bytes({"asset": {"version": "2.0"}}))
+
+    array = glb.accessor(1)
+    np.testing.assert_array_equal(array[[1, 3]], [[1, 2, 3], [4, 5, 6]])
+    assert not array[[0, 2, 4]].any()
+    # The base accessor it was built on is left alone
+    assert not glb.accessor(0).any()
+
+def test_rejects_other_files():
+    with pytest.raises(ValueError):
+        GLB(b"not a glb file")
+    with pytest.raises(ValueError):
+        GLB(struct.pack("<4sII", b"glTF", 1, 12))
+
+def test_saved_mesh_reads_back_from_a_memory_map(tmp_path):
+    path = str(tmp_path / "mesh.glb")
+    save_mesh(path, VERTICES, FACES)
+    with GLB.open(path) as glb:
+        vertices, faces = read_mesh(glb)
+    # Arrays stay valid after the GLB is closed
+    np.testing.assert_array_equal(vertices, VERTICES)
+    np.testing.assert_array_equal(faces, FACES)
+    assert list(tmp_path.iterdir()) == [tmp_path / "mesh.glb"]
+
+def test_read_mesh_applies_node_transforms():
+    writer = GLBWriter()
+    gltf = _document(writer, {"translation": [1, 2, 3], "scale": [2, 2, 2], "rotation": [0, 0, 0.7071068, 0.7071068]})
+    vertices, faces = read_mesh(writer.to_bytes(gltf))
+
+    # Scale, then a quarter turn about z, then the translation
+    expected = (2 * VERTICES) @ np.array([[0, 1, 0], [-1, 0, 0], [0, 0, 1]]) + [1, 2, 3]
+    np.testing.assert_allclose(vertices, expected, atol=1e-5)
+    np.testing.assert_array_equal(faces, FACES)
+
+def _skeleton() -> dict:
+    """Hips -> Spine -> Head, each moved and turned, with Hips and Head as joints"""
+    return {
+        "nodes": [
+            {"name": "Hips", "translation": [0, 1, 0], "rotation": [0, 0.3826834, 0, 0.9238795], "children": [1]},
+            {"name": "Spine", "translation": [0, 0.5, 0.1], "scale": [1.5, 1.5, 1.5], "children": [2]},
+            {"name": "Head", "translation": [0.2, 0.4, 0]}
+        ],
+        "roots": [0],
+        "joints": [2, 0]
+    }
+
+def test_skinned_mesh_round_trip(tmp_path):
+    joints = np.array([[0, 1, 0, 0], [1, 0, 0, 0], [0, 0, 0, 0], [1, 0, 0, 0]])
+    weights = np.array([[0.75, 0.25, 0, 0], [1, 0, 0, 0], [1, 0, 0, 0], [0.5, 0.5, 0, 0]], dtype=np.float32)
+    path = str(tmp_path / "garment.glb")
+    save_skinned_mesh(path, VERTICES, FACES, joints, weights, _skeleton())
+
+    with GLB.open(path) as glb:
+        gltf = glb.gltf
+        attributes = gltf["meshes"][0]["primitives"][0]["attributes"]
+        np.testing.assert_array_equal(glb.accessor(attributes["JOINTS_0"]), joints)
+        np.testing.assert_array_equal(glb.accessor(attributes["WEIGHTS_0"]), weights)
+
+        # Column-major inverse bind matrices undo each joint's world transform
+        skin = gltf["skins"][0]
+        inverse_bind = glb.accessor(skin["inverseBindMatrices"]).reshape(-1, 4, 4).transpose(0, 2, 1)
+        world = glb.world_matrices()
+        for joint, matrix in zip(skin["joints"], inverse_bind):
+            np.testing.assert_allclose(world[joint] @ matrix, np.eye(4), atol=1e-5)
+        # The translation sits in the last column, i.e. elements 12-14 as stored
+        head = glb.accessor(skin["inverseBindMatrices"])[0]
+        np.testing.assert_allclose(head[12:15], np.linalg.inv(world[skin["joints"][0]])[:3, 3], atol=1e-5)
+
+    mesh = read_skinned_mesh(path)
+    # Posed at rest with its own bind matrices, the mesh is where it was saved
+    np.testing.assert_allclose(mesh["vertices"], VERTICES, atol=1e-5)
+    np.testing.assert_array_equal(mesh["faces"], FACES)
+    np.testing.assert_allclose(mesh["weights"], weights, atol=1e-6)
+
+    skeleton = mesh["skeleton"]
+    names = [skeleton["nodes"][joint]["name"] for joint in skeleton["joints"]]
+    assert [names[joint] for joint in mesh["joints"][:, 0]] == ["Head", "Hips", "Head", "Hips"]
+    assert [node["name"] for node in skeleton["nodes"]] == ["Hips", "Spine", "Head"]
@@ -0,0 +1,154 @@
+# Backend/test_glb_optimizer.py
+"""
+Round trips of a small synthetic avatar through the GLB optimizer variants
+"""
+
+import numpy as np
+import pytest
+
+from glb_codec import ARRAY_BUFFER, ELEMENT_ARRAY_BUFFER, GLB, GLBWriter, TYPE_SIZES
+from glb_optimizer import OptimizeOptions, optimize_glb, optimize_variant
+
+TARGET_NAMES = ["viseme_aa", "eyeBlinkLeft", "viseme_O"]
+KEYFRAMES = 4
+
+def _avatar_glb(size: int = 20) -> bytes:
+    """A skinned, morphable grid with one blink-and-talk clip"""
+    x, y = np.meshgrid(np.linspace(0, 1, size), np.linspace(0, 1, size))
+    positions = np.stack([x.ravel(), y.ravel(), 0.1 * np.sin(3 * x.ravel())], axis=1).astype(np.float32)
+    normals = np.tile(np.array([0, 0, 1], dtype=np.float32), (len(positions), 1))
+    uvs = positions[:, :2].copy()
+    quads = np.array([(r * size + c) for r in range(size - 1) for c in range(size - 1)])
+    triangles = np.concatenate([
+        np.stack([quads, quads + 1, quads + size], axis=1),
+        np.stack([quads + 1, quads + size + 1, quads + size], axis=1)
+    ])
+    joints = np.zeros((len(positions), 4), dtype=np.uint16)
+    joints[:, 1] = 1
+    weights = np.zeros((len(positions), 4), dtype=np.float32)
+    weights[:, 0] = positions[:, 1]
+    weights[:, 1] = 1 - positions[:, 1]
+
+    writer = GLBWriter()
+    attributes = {
+        "POSITION": writer.add_accessor(positions, target=ARRAY_BUFFER, bounds=True),
+        "NORMAL": writer.add_accessor(normals, target=ARRAY_BUFFER),
+        "TEXCOORD_0": writer.add_accessor(uvs, target=ARRAY_BUFFER),
+        "JOINTS_0": writer.add_accessor(joints, target=ARRAY_BUFFER),
+        "WEIGHTS_0": writer.add_accessor(weights, target=ARRAY_BUFFER)
+    }
+    targets = [
+        {"POSITION": writer.add_accessor(np.full_like(positions, 0.01 * (i + 1)), target=ARRAY_BUFFER, bounds=True)}
+        for i in range(len(TARGET_NAMES))
+    ]
+    indices = writer.add_accessor(triangles.reshape(-1).astype(np.uint16), target=ELEMENT_ARRAY_BUFFER)
+    inverse_bind = writer.add_accessor(np.tile(np.eye(4, dtype=np.float32).reshape(16), (2, 1)))
+    times = writer.add_accessor(np.linspace(0, 1, KEYFRAMES, dtype=np.float32), bounds=True)
+    # Keyframe k sets target t to 10k + t, so the kept columns are recognisable
+    morph_weights = writer.add_accessor(
+        (10 * np.arange(KEYFRAMES)[:, None] + np.arange(len(TARGET_NAMES))).reshape(-1).astype(np.float32)
+    )
+    translations = writer.add_accessor(np.zeros((KEYFRAMES, 3), dtype=np.float32))
+
+    gltf = {
+        "asset": {"version": "2.0"},
+        "scene": 0,
+        "scenes": [{"nodes": [0, 1]}],
+        "nodes": [{"mesh": 0, "skin": 0}, {"name": "Hips", "children": [2]}, {"name": "Spine"}],
+        "meshes": [{
+            "primitives": [{"attributes": attributes, "indices": indices, "targets": targets}],
+            "weights": [0.0, 0.5, 1.0],
+            "extras": {"targetNames": TARGET_NAMES}
+        }],
+        "skins": [{"joints": [1, 2], "inverseBindMatrices": inverse_bind}],
+        "animations": [{
+            "channels": [
+                {"sampler": 0, "target": {"node": 2, "path": "translation"}},
+                {"sampler": 1, "target": {"node": 0, "path": "weights"}}
+            ],
+            "samplers": [
+                {"input": times, "output": translations},
+                {"input": times, "output": morph_weights}
+            ]
+        }]
+    }
+    return writer.to_bytes(gltf)
+
+def _check_accessors(glb: GLB):
+    """Every accessor fits its buffer view, and the BIN chunk holds every view"""
+    views = glb.gltf["bufferViews"]
+    for view in views:
+        assert view["byteOffset"] + view["byteLength"] <= len(glb.binary)
+    for index, accessor in enumerate(glb.gltf["accessors"]):
+        view = views[accessor["bufferView"]]
+        item_size = glb.accessor(index).dtype.itemsize * TYPE_SIZES[accessor["type"]]
+        stride = view.get("byteStride") or item_size
+        assert accessor.get("byteOffset", 0) + stride * (accessor["count"] - 1) + item_size <= view["byteLength"]
+
+@pytest.fixture(scope="module")
+def source() -> bytes:
+    return _avatar_glb()
+
+def test_medium_keeps_visemes_and_their_animation_columns(source):
+    glb = GLB(optimize_variant(source, "medium"))
+    _check_accessors(glb)
+    mesh = glb.gltf["meshes"][0]
+    primitive = mesh["primitives"][0]
+
+    assert mesh["extras"]["targetNames"] == ["viseme_aa", "viseme_O"]
+    assert mesh["weights"] == [0.0, 1.0]
+    assert len(primitive["targets"]) == 2
+
+    # One weight per kept target per keyframe, taken from the kept columns
+    animation = glb.gltf["animations"][0]
+    channel = next(channel for channel in animation["channels"] if channel["target"]["path"] == "weights")
+    sampler = animation["samplers"][channel["sampler"]]
+    assert glb.gltf["accessors"][sampler["input"]]["count"] == KEYFRAMES
+    assert glb.gltf["accessors"][sampler["output"]]["count"] == KEYFRAMES * 2
+    expected = 10 * np.arange(KEYFRAMES)[:, None] + np.array([0, 2])
+    np.testing.assert_array_equal(glb.accessor(sampler["output"]).reshape(-1), expected.reshape(-1))
+
+def test_medium_decimates_and_quantizes(source):
+    original = GLB(source)
+    glb = GLB(optimize_variant(source, "medium"))
+    primitive = glb.gltf["meshes"][0]["primitives"][0]
+    attributes = primitive["attributes"]
+
+    vertex_count = glb.gltf["accessors"][attributes["POSITION"]]["count"]
+    for index in list(attributes.values()) + [target["POSITION"] for target in primitive["targets"]]:
+        assert glb.gltf["accessors"][index]["count"] == vertex_count
+    triangles = glb.faces(primitive, vertex_count)
+    original_triangles = original.faces(original.gltf["meshes"][0]["primitives"][0], 400)
+    assert 0 < len(triangles) <= len(original_triangles) // 2
+    assert triangles.max() < vertex_count
+
+    assert "KHR_mesh_quantization" in glb.gltf["extensionsRequired"]
+    assert glb.accessor(attributes["NORMAL"]).dtype == np.int8
+    assert glb.accessor(attributes["TEXCOORD_0"]).dtype == np.uint16
+    assert glb.accessor(attributes["JOINTS_0"]).dtype == np.uint8
+    # Quantized skin weights still sum to exactly one
+    weights = glb.accessor(attributes["WEIGHTS_0"])
+    assert weights.dtype == np.uint16
+    assert (weights.astype(np.int64).sum(axis=1) == 65535).all()
+
+    skin = glb.gltf["skins"][0]
+    assert glb.gltf["accessors"][skin["inverseBindMatrices"]]["count"] == 2
+
+def test_low_drops_morph_targets_and_animations(source):
+    glb = GLB(optimize_variant(source, "low"))
+    _check_accessors(glb)
+    mesh = glb.gltf["meshes"][0]
+    assert "targets" not in mesh["primitives"][0]
+    assert "weights" not in mesh and "extras" not in mesh
+    assert "animations" not in glb.gltf
+
+def test_weights_channels_without_kept_targets_are_dropped(source):
+    glb = GLB(optimize_glb(source, OptimizeOptions(keep_morph_targets=[], keep_animations=True)))
+    _check_accessors(glb)
+    animation = glb.gltf["animations"][0]
+    assert [channel["target"]["path"] for channel in animation["channels"]] == ["translation"]
+    assert len(animation["samplers"]) == 1
+    assert animation["channels"][0]["sampler"] == 0
+
+def test_high_is_the_original(source):
+    assert optimize_variant(source, "high") is source
@@ -0,0 +1,111 @@
+# Backend/test_http_caching.py
+"""
+Tests for ETag/Last-Modified validators and 304 handling
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from fastapi import Request
+
+from http_caching import (
+    DEFAULT_CACHE_POLICIES, conditional_response, http_date, is_not_modified,
+    load_cache_policies, strong_etag, validator_headers
+)
+
+ETAG = strong_etag("catalog", 3)
+MODIFIED = datetime(2026, 3, 1, 12, 30, 15, 250000, tzinfo=timezone.utc)
+
+def _request(headers=None, method: str = "GET") -> Request:
+    return Request({
+        "type": "http",
+        "method": method,
+        "path": "/",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    })
+
+def test_strong_etag():
+    assert ETAG.startswith('"') and ETAG.endswith('"') and len(ETAG) == 34
+    assert strong_etag("catalog", 3) == ETAG
+    assert strong_etag(b"catalog", "3") == ETAG
+    # Parts are delimited, so they can't run into each other
+    assert strong_etag("catalog", 3) != strong_etag("catalo", "g3")
+    assert strong_etag("catalog", 4) != ETAG
+
+def test_validator_headers():
+    headers = validator_headers("/api/clothing/catalog", ETAG, MODIFIED)
+    assert headers == {
+        "ETag": ETAG,
+        "Last-Modified": "Sun, 01 Mar 2026 12:30:15 GMT",
+        "Cache-Control": DEFAULT_CACHE_POLICIES["/api/clothing/catalog"]
+    }
+    assert validator_headers("/api/unknown", ETAG) == {"ETag": ETAG}
+
+def test_http_date_takes_naive_values_as_local_time():
+    local = MODIFIED.astimezone().replace(tzinfo=None)
+    assert http_date(local) == http_date(MODIFIED)
+
+def test_if_none_match():
+    assert is_not_modified(_request({"If-None-Match": ETAG}), ETAG)
+    assert is_not_modified(_request({"If-None-Match": f'"other", {ETAG}'}), ETAG)
+    assert is_not_modified(_request({"If-None-Match": "*"}), ETAG)
+    assert not is_not_modified(_request({"If-None-Match": '"other"'}), ETAG)
+    assert not is_not_modified(_request(), ETAG, MODIFIED)
+
+def test_if_none_match_compares_weakly():
+    # Compression weakens the ETag it sends, and clients echo it back
+    assert is_not_modified(_request({"If-None-Match": f"W/{ETAG}"}), ETAG)
+    assert is_not_modified(_request({"If-None-Match": ETAG}), f"W/{ETAG}")
+
+def test_if_none_match_takes_precedence_over_if_modified_since():
+    current = http_date(MODIFIED + timedelta(days=1))
+    assert not is_not_modified(_request({"If-None-Match": '"other"', "If-Modified-Since": current}), ETAG, MODIFIED)
+    stale = http_date(MODIFIED - timedelta(days=1))
+    assert is_not_modified(_request({"If-None-Match": ETAG, "If-Modified-Since": stale}), ETAG, MODIFIED)
+
+def test_if_modified_since_has_one_second_resolution():
+    # The Last-Modified the client saw has the microseconds cut off
+    assert is_not_modified(_request({"If-Modified-Since": http_date(MODIFIED)}), ETAG, MODIFIED)
+    earlier = http_date(MODIFIED - timedelta(seconds=1))
+    assert not is_not_modified(_request({"If-Modified-Since": earlier}), ETAG, MODIFIED)
+
+def test_if_modified_since_ignored_without_a_valid_date():
+    assert not is_not_modified(_request({"If-Modified-Since": "yesterday"}), ETAG, MODIFIED)
+    assert not is_not_modified(_request({"If-Modified-Since": http_date(MODIFIED)}), ETAG)
+
+def test_conditional_response():
+    response = conditional_response(_request({"If-None-Match": ETAG}), "/api/clothing/catalog", ETAG, MODIFIED)
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == ETAG
+    assert response.headers["cache-control"] == DEFAULT_CACHE_POLICIES["/api/clothing/catalog"]
+
+    assert conditional_response(_request({"If-None-Match": ETAG}, "HEAD"), "/api/clothing/catalog", ETAG).status_code == 304
+    assert conditional_response(_request({"If-None-Match": '"other"'}), "/api/clothing/catalog", ETAG) is None
+    # Conditional headers on unsafe methods are preconditions, not cache validation
+    assert conditional_response(_request({"If-None-Match": ETAG}, "POST"), "/api/clothing/catalog", ETAG) is None
+
+def test_cache_policy_override(monkeypatch):
+    monkeypatch.setenv("HTTP_CACHE_POLICIES", '{"/api/clothing/catalog": "no-store", "/api/extra": "public"}')
+    policies = load_cache_policies()
+    assert policies["/api/clothing/catalog"] == "no-store"
+    assert policies["/api/extra"] == "public"
+    assert policies["/api/avatar/{avatar_id}"] == DEFAULT_CACHE_POLICIES["/api/avatar/{avatar_id}"]
+
+    monkeypatch.setenv("HTTP_CACHE_POLICIES", "not json")
+    assert load_cache_policies() == DEFAULT_CACHE_POLICIES
+
+def test_routes_answer_304(api_client):
+    for path in ("/api/avatar/iframe-config", "/api/clothing/catalog?limit=2"):
+        response = api_client.get(path)
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+
+        revalidated = api_client.get(path, headers={"If-None-Match": etag})
+        assert revalidated.status_code == 304
+        assert revalidated.content == b""
+        assert revalidated.headers["etag"] == etag
+        assert revalidated.headers["cache-control"] == response.headers["cache-control"]
+
+        since = api_client.get(path, headers={"If-Modified-Since": response.headers["last-modified"]})
+        assert since.status_code == 304
+        assert api_client.get(path, headers={"If-None-Match": '"other"'}).status_code == 200
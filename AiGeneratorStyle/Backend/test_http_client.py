@@ -0,0 +1,156 @@
+# Backend/test_http_client.py
+"""
+Tests for the outbound HTTP client against a local stub server
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from http_client import CircuitOpenError, OutboundClient
+
+def _client(**kwargs) -> OutboundClient:
+    options = {"retries": 2, "backoff_base": 0.001, "failure_threshold": 2, "reset_timeout": 0.05}
+    options.update(kwargs)
+    return OutboundClient(**options)
+
+@pytest.mark.asyncio
+async def test_connections_are_kept_alive(stub_origin):
+    stub_origin.routes["/avatar"] = lambda method, headers: (200, {}, b"glb")
+    client = _client()
+    try:
+        for _ in range(5):
+            response = await client.get(f"{stub_origin.url}/avatar")
+            assert response.content == b"glb"
+    finally:
+        await client.close()
+    assert stub_origin.hits("/avatar") == 5
+    assert stub_origin.connections == 1
+
+@pytest.mark.asyncio
+async def test_identical_requests_are_coalesced(stub_origin):
+    release = asyncio.Event()
+
+    async def slow(method, headers):
+        await release.wait()
+        return 200, {}, b"shared"
+
+    stub_origin.routes["/slow"] = slow
+    client = _client()
+    try:
+        tasks = [asyncio.create_task(client.get(f"{stub_origin.url}/slow")) for _ in range(8)]
+        while not stub_origin.requests:
+            await asyncio.sleep(0.001)
+        release.set()
+        responses = await asyncio.gather(*tasks)
+    finally:
+        await client.close()
+    assert {response.content for response in responses} == {b"shared"}
+    assert stub_origin.hits("/slow") == 1
+
+@pytest.mark.asyncio
+async def test_retries_honour_retry_status(stub_origin):
+    statuses = iter([503, 503, 200])
+    stub_origin.routes["/flaky"] = lambda method, headers: (next(statuses), {"Retry-After": "0"}, b"ok")
+    client = _client(failure_threshold=10)
+    try:
+        response = await client.get(f"{stub_origin.url}/flaky")
+    finally:
+        await client.close()
+    assert response.status_code == 200
+    assert stub_origin.hits("/flaky") == 3
+
+@pytest.mark.asyncio
+async def test_breaker_opens_then_closes_after_a_good_trial(stub_origin):
+    healthy = False
+    stub_origin.routes["/down"] = lambda method, headers: (200 if healthy else 500, {}, b"")
+    client = _client(retries=0)
+    try:
+        for _ in range(2):
+            await client.get(f"{stub_origin.url}/down")
+        with pytest.raises(CircuitOpenError):
+            await client.get(f"{stub_origin.url}/down")
+
+        await asyncio.sleep(0.06)
+        healthy = True
+        assert (await client.get(f"{stub_origin.url}/down")).status_code == 200
+        assert client.status()[stub_origin.url]["state"] == "closed"
+    finally:
+        await client.close()
+
+async def _open_breaker(client: OutboundClient, origin):
+    origin.routes["/down"] = lambda method, headers: (500, {}, b"")
+    for _ in range(client.failure_threshold):
+        await client.get(f"{origin.url}/down")
+    await asyncio.sleep(client.reset_timeout + 0.01)
+    assert client.status()[origin.url]["state"] == "half-open"
+
+@pytest.mark.asyncio
+async def test_cancelled_trial_does_not_keep_the_breaker_open(stub_origin):
+    client = _client(retries=0)
+    release = asyncio.Event()
+
+    async def hang(method, headers):
+        await release.wait()
+        return 200, {}, b""
+
+    try:
+        await _open_breaker(client, stub_origin)
+        stub_origin.routes["/hang"] = hang
+        trial = asyncio.create_task(client.get(f"{stub_origin.url}/hang"))
+        while stub_origin.hits("/hang") == 0:
+            await asyncio.sleep(0.001)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        release.set()
+
+        stub_origin.routes["/down"] = lambda method, headers: (200, {}, b"")
+        assert (await client.get(f"{stub_origin.url}/down")).status_code == 200
+    finally:
+        await client.close()
+
+@pytest.mark.asyncio
+async def test_non_transport_error_in_trial_does_not_keep_the_breaker_open(stub_origin):
+    client = _client(retries=0)
+    try:
+        await _open_breaker(client, stub_origin)
+        stub_origin.routes["/loop"] = lambda method, headers: (302, {"Location": "/loop"}, b"")
+        with pytest.raises(httpx.TooManyRedirects):
+            await client.get(f"{stub_origin.url}/loop")
+
+        stub_origin.routes["/down"] = lambda method, headers: (200, {}, b"")
+        assert (await client.get(f"{stub_origin.url}/down")).status_code == 200
+    finally:
+        await client.close()
+
+@pytest.mark.asyncio
+async def test_cancelled_stream_trial_does_not_keep_the_breaker_open(stub_origin):
+    client = _client(retries=0)
+    release = asyncio.Event()
+
+    async def hang(method, headers):
+        await release.wait()
+        return 200, {}, b""
+
+    async def consume():
+        async with client.stream("GET", f"{stub_origin.url}/hang") as response:
+            await response.aread()
+
+    try:
+        await _open_breaker(client, stub_origin)
+        stub_origin.routes["/hang"] = hang
+        trial = asyncio.create_task(consume())
+        while stub_origin.hits("/hang") == 0:
+            await asyncio.sleep(0.001)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        release.set()
+
+        stub_origin.routes["/down"] = lambda method, headers: (200, {}, b"")
+        async with client.stream("GET", f"{stub_origin.url}/down") as response:
+            assert response.status_code == 200
+    finally:
+        await client.close()
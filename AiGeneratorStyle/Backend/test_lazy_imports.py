@@ -0,0 +1,16 @@
+# Backend/test_lazy_imports.py
+"""
+Cold start budget for the API: importing main must stay fast, small and
+free of heavy optional dependencies
+"""
+
+from lazy_imports import DEFAULT_BUDGET_MB, DEFAULT_BUDGET_SECONDS, check_budget, measure_cold_start
+
+def test_main_imports_within_budget(tmp_path, monkeypatch):
+    # Keep the import's storage directories out of the working tree
+    for name in ("ARTIFACT_STORAGE_PATH", "ASSET_CACHE_PATH", "BLOB_STORAGE_PATH", "TEXTURE_STORAGE_PATH", "METRICS_DIR"):
+        monkeypatch.setenv(name, str(tmp_path / name.lower()))
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'avatars.db'}")
+
+    report = measure_cold_start("main")
+    assert check_budget(report, DEFAULT_BUDGET_SECONDS, DEFAULT_BUDGET_MB) == []
@@ -0,0 +1,108 @@
+# Backend/test_request_metrics.py
+"""
+Tests for request metrics: route labels, histogram buckets and merging the
+snapshots of several workers
+"""
+
+import subprocess
+import sys
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from request_metrics import (
+    LATENCY_BUCKETS,
+    SIZE_BUCKETS,
+    UNMATCHED_ROUTE,
+    RequestMetrics,
+    RequestMetricsMiddleware
+)
+
+def _dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+def _write_worker(metrics: RequestMetrics, pid: int, in_flight: int, gauge: float):
+    """Write metrics' counters to the snapshot file of another worker"""
+    snapshot = metrics.snapshot()
+    snapshot.update(pid=pid, inFlight=in_flight, gauges={"queue_depth": {'route="/fit"': gauge}})
+    metrics._write(snapshot)
+
+@pytest.mark.asyncio
+async def test_requests_are_labelled_by_route_template():
+    async def item(request):
+        return PlainTextResponse("x" * 300)
+
+    metrics = RequestMetrics()
+    app = Starlette(routes=[Route("/items/{item_id}", item, methods=["GET", "POST"])])
+    app.add_middleware(RequestMetricsMiddleware, metrics=metrics)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        await client.get("/items/1")
+        await client.post("/items/2", content=b"y" * 2000)
+        await client.get("/missing/3")
+
+    assert set(metrics.series) == {
+        ("GET", "/items/{item_id}", "200"),
+        ("POST", "/items/{item_id}", "200"),
+        ("GET", UNMATCHED_ROUTE, "404")
+    }
+    posted = metrics.series[("POST", "/items/{item_id}", "200")]
+    assert posted.request_bytes_sum == 2000 and posted.response_bytes_sum == 300
+    assert posted.request_bytes[SIZE_BUCKETS.index(4096)] == 1
+    assert posted.response_bytes[SIZE_BUCKETS.index(1024)] == 1
+    assert metrics.in_flight == 0
+
+def test_bucket_bounds_are_inclusive():
+    metrics = RequestMetrics()
+    for seconds in (0.001, 0.0011, 10.0, 60.0):
+        metrics.observe("GET", "/a", 200, seconds, 256, 0)
+    series = metrics.series[("GET", "/a", "200")]
+    assert series.latency[0] == 1
+    assert series.latency[1] == 1
+    assert series.latency[len(LATENCY_BUCKETS) - 1] == 1
+    assert series.latency[-1] == 1
+    assert series.request_bytes[0] == 4
+
+@pytest.mark.asyncio
+async def test_scrape_merges_worker_snapshots(tmp_path):
+    own = RequestMetrics(str(tmp_path))
+    own.add_collector(lambda: {"queue_depth": {'route="/fit"': 1}})
+    own.observe("GET", "/a", 200, 0.002, 0, 100)
+
+    # A live sibling worker and one that has exited, each with its own counters
+    sibling = RequestMetrics(str(tmp_path))
+    sibling.observe("GET", "/a", 200, 0.2, 0, 5000)
+    sibling.observe("GET", "/b", 500, 3.0, 0, 0)
+    _write_worker(sibling, pid=1, in_flight=2, gauge=4)
+    exited = RequestMetrics(str(tmp_path))
+    exited.observe("GET", "/a", 200, 0.02, 0, 100)
+    _write_worker(exited, pid=_dead_pid(), in_flight=7, gauge=50)
+
+    lines = (await own.render()).splitlines()
+    assert 'http_request_duration_seconds_count{method="GET",route="/a",status="200"} 3' in lines
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/a",status="200",le="0.0025"} 1' in lines
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/a",status="200",le="0.025"} 2' in lines
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/a",status="200",le="+Inf"} 3' in lines
+    assert 'http_response_size_bytes_sum{method="GET",route="/a",status="200"} 5200' in lines
+    assert 'http_request_duration_seconds_count{method="GET",route="/b",status="500"} 1' in lines
+
+    # Gauges of the exited worker are dropped; its counters above are kept
+    assert "http_requests_in_flight 2" in lines
+    assert "http_worker_processes 2" in lines
+    assert 'queue_depth{route="/fit"} 5' in lines
+
+@pytest.mark.asyncio
+async def test_flush_writes_this_workers_file(tmp_path):
+    metrics = RequestMetrics(str(tmp_path))
+    metrics.observe("GET", "/a", 200, 0.01, 0, 0)
+    await metrics.flush()
+    assert [path.name for path in tmp_path.iterdir()] == [f"worker-{metrics.snapshot()['pid']}.json"]
+
+    # The scraping worker's own file is not counted twice
+    lines = (await metrics.render()).splitlines()
+    assert 'http_request_duration_seconds_count{method="GET",route="/a",status="200"} 1' in lines
@@ -0,0 +1,87 @@
+# Backend/test_serialization.py
+"""
+Tests for JSON encoding, pre-encoded responses and the encoded body cache
+"""
+
+import json
+
+import pytest
+
+import serialization
+from serialization import EncodedBodyCache, RawJSONResponse, dumps, loads
+
+VALUE = {"name": "Chemise à carreaux", "sizes": ["S", "M"], "price": 29.5, "stock": None, "active": True}
+
+@pytest.fixture(params=["orjson", "json"])
+def encoder(request, monkeypatch):
+    """Runs a test with orjson (when installed) and with the standard library fallback"""
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(serialization, "orjson", None)
+    return request.param
+
+def test_dumps_is_compact_utf8(encoder):
+    encoded = dumps(VALUE)
+    assert isinstance(encoded, bytes)
+    # No whitespace between tokens, and non-ASCII text as UTF-8 rather than \u escapes
+    assert encoded == json.dumps(VALUE, separators=(",", ":"), ensure_ascii=False).encode()
+
+def test_loads_round_trips(encoder):
+    assert loads(dumps(VALUE)) == VALUE
+    assert loads(dumps(VALUE).decode()) == VALUE
+
+def test_raw_response_passes_bytes_through():
+    body = b'{"already":"encoded"}'
+    for content in (body, bytearray(body), memoryview(body)):
+        response = RawJSONResponse(content, headers={"ETag": '"x"'})
+        assert response.body == body
+        assert response.headers["content-type"] == "application/json"
+        assert response.headers["content-length"] == str(len(body))
+        assert response.headers["etag"] == '"x"'
+
+def test_raw_response_encodes_other_values():
+    assert RawJSONResponse(VALUE).body == dumps(VALUE)
+
+def test_body_cache_evicts_least_recently_used():
+    cache = EncodedBodyCache(max_entries=2)
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+    assert cache.get("a") == b"1"
+    cache.set("c", b"3")
+    # "b" was the least recently used once "a" was read
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1"
+    assert cache.get("c") == b"3"
+
+    cache.set("a", b"4")
+    cache.set("d", b"5")
+    assert list(cache.entries) == ["a", "d"]
+    assert cache.get("a") == b"4"
+
+def test_avatar_is_served_as_stored(api_client):
+    created = api_client.post(
+        "/api/avatar/generate",
+        json={"height": 170, "weight": 65, "chest": 90, "waist": 75, "hips": 95}
+    )
+    assert created.status_code == 200
+    avatar = created.json()
+
+    fetched = api_client.get(f"/api/avatar/{avatar['avatarId']}")
+    assert fetched.status_code == 200
+    assert fetched.content == created.content
+    assert avatar["metadata"]["measurements"]["height"] == 170
+
+def test_catalog_pages_are_encoded_once(api_client, count_calls):
+    import main
+
+    queries = count_calls(main.clothing_catalog, "query", record=lambda **kwargs: kwargs["filters"])
+    # A query no other test sends, so the first request misses the cache
+    path = "/api/clothing/catalog?type=shirt&facets=true&limit=7"
+    first = api_client.get(path)
+    second = api_client.get(path)
+    assert first.status_code == second.status_code == 200
+    assert second.content == first.content
+    assert len(queries) == 1
+    # Compression may weaken the ETag on the wire; the cache is keyed by the strong one
+    assert main.catalog_responses.get(first.headers["etag"].removeprefix("W/")) == first.content
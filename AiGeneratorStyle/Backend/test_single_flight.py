@@ -0,0 +1,90 @@
+# Backend/test_single_flight.py
+"""
+Tests for single-flight load coalescing
+"""
+
+import asyncio
+
+import pytest
+
+from single_flight import SingleFlight
+
+class _Load:
+    """Counted load that blocks until released"""
+
+    def __init__(self, result="value", error=None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        self.started.set()
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_load():
+    flight, load = SingleFlight(), _Load()
+    tasks = [asyncio.create_task(flight.run("key", load)) for _ in range(10)]
+    await load.started.wait()
+    load.release.set()
+
+    assert await asyncio.gather(*tasks) == ["value"] * 10
+    assert load.calls == 1
+    assert len(flight) == 0
+
+@pytest.mark.asyncio
+async def test_different_keys_load_separately():
+    flight, load = SingleFlight(), _Load()
+    load.release.set()
+    await asyncio.gather(flight.run("a", load), flight.run("b", load))
+    assert load.calls == 2
+
+@pytest.mark.asyncio
+async def test_exception_reaches_every_caller():
+    flight, load = SingleFlight(), _Load(error=KeyError("missing"))
+    tasks = [asyncio.create_task(flight.run("key", load)) for _ in range(3)]
+    await load.started.wait()
+    load.release.set()
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert all(isinstance(result, KeyError) for result in results)
+    assert len(flight) == 0
+
+@pytest.mark.asyncio
+async def test_waiter_takes_over_when_loader_is_cancelled():
+    flight, load = SingleFlight(), _Load()
+    leader = asyncio.create_task(flight.run("key", load))
+    await load.started.wait()
+    follower = asyncio.create_task(flight.run("key", load))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+    load.release.set()
+    assert await asyncio.wait_for(follower, 1) == "value"
+    assert load.calls == 2
+    assert len(flight) == 0
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_load_running():
+    flight, load = SingleFlight(), _Load()
+    leader = asyncio.create_task(flight.run("key", load))
+    await load.started.wait()
+    follower = asyncio.create_task(flight.run("key", load))
+    await asyncio.sleep(0)
+
+    follower.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await follower
+
+    load.release.set()
+    assert await leader == "value"
+    assert load.calls == 1
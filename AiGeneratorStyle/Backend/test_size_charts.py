@@ -0,0 +1,54 @@
+# Backend/test_size_charts.py
+"""
+Tests for size chart parsing and the sizes the fitter scales against
+"""
+
+import pytest
+
+from clothing_fitting import ClothingFitter, ClothingMetadata
+from fitting_backend import NumpyFittingBackend
+from size_charts import SizeChartIndex
+
+SIZES = {
+    "S": {"chest": 90, "waist": 75, "hips": 95},
+    "M": {"chest": 100, "waist": 85, "hips": 105},
+    "L": {"chest": 110, "waist": 95, "hips": 115}
+}
+
+@pytest.mark.parametrize("chart", [
+    {"brand": "acme", "garment": "shirt", "sizes": [{"size": size, **row} for size, row in SIZES.items()]},
+    {"brand": "acme", "garment": "shirt", "sizes": SIZES},
+    {"brand": "acme", "garment": "shirt", **SIZES}
+])
+def test_chart_shapes(chart):
+    charts = SizeChartIndex([chart])
+    index = charts.find_chart("acme", "shirt")
+    assert index != charts.default_chart
+    assert charts.sizes(index) == ["S", "M", "L"]
+    assert charts.size_measurements(index, "L")["chest"] == 110
+
+def test_chart_without_sizes_is_rejected():
+    with pytest.raises(ValueError):
+        SizeChartIndex([{"brand": "acme", "garment": "shirt"}])
+    with pytest.raises(ValueError):
+        SizeChartIndex([{"brand": "acme", "unit": "cm"}])
+
+def _scale_factors(metadata: ClothingMetadata, size: str):
+    fitter = ClothingFitter(size_charts=SizeChartIndex([]), backend=NumpyFittingBackend())
+    measurements = {"chest": 100, "waist": 85, "hips": 105}
+    return fitter._calculate_scale_factors(measurements, metadata, {}, size)
+
+def test_fitter_scales_against_the_requested_size_of_the_garment_chart():
+    metadata = ClothingMetadata(clothing_id="tee", type="shirt", size_chart=SIZES, stretchiness=0.5)
+    assert _scale_factors(metadata, "M") == {"chest": 1.0, "waist": 1.0, "hips": 1.0}
+    assert _scale_factors(metadata, "L")["chest"] == pytest.approx(100 / 110)
+    assert _scale_factors(metadata, "S")["chest"] == pytest.approx(100 / 90)
+
+def test_garment_chart_applies_whatever_brand_it_names():
+    chart = {"brand": "other", "garment": "pants", **SIZES}
+    metadata = ClothingMetadata(clothing_id="tee", type="shirt", brand="acme", size_chart=chart)
+    assert _scale_factors(metadata, "L")["waist"] == pytest.approx(85 / 95)
+
+def test_unknown_size_falls_back_to_m():
+    metadata = ClothingMetadata(clothing_id="tee", type="shirt", size_chart=SIZES, stretchiness=0.5)
+    assert _scale_factors(metadata, "XXXL") == {"chest": 1.0, "waist": 1.0, "hips": 1.0}
@@ -0,0 +1,79 @@
+# Backend/test_texture_store.py
+"""
+Tests for the texture artifact store over in-memory blob storage
+"""
+
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from blob_storage import MemoryBlobStorage
+from texture_store import TextureArtifactStore
+
+def _texture(seed: int = 0, size: int = 128, channels: int = 3) -> np.ndarray:
+    return np.random.default_rng(seed).integers(0, 256, (size, size, channels), dtype=np.uint8)
+
+def _store(**kwargs) -> TextureArtifactStore:
+    return TextureArtifactStore(MemoryBlobStorage(), **kwargs)
+
+@pytest.mark.asyncio
+async def test_mip_chain_is_encoded_and_stored():
+    store = _store(min_mip_size=16)
+    manifest = await store.put_texture(_texture())
+
+    assert manifest["format"] == "webp"
+    assert [(mip["width"], mip["height"]) for mip in manifest["mips"]] == [(128, 128), (64, 64), (32, 32), (16, 16)]
+    assert manifest["url"] == manifest["mips"][0]["url"]
+    for mip in manifest["mips"]:
+        data = await store.get_artifact(mip["url"].rsplit("/", 1)[-1])
+        assert len(data) == mip["bytes"]
+        assert Image.open(io.BytesIO(data)).size == (mip["width"], mip["height"])
+
+@pytest.mark.asyncio
+async def test_same_pixels_are_encoded_once(count_calls):
+    store = _store()
+    calls = count_calls(store, "_encode_mip_chain", lambda texture: texture.shape)
+    texture = _texture()
+
+    first = await store.put_texture(texture)
+    assert await store.put_texture(texture.copy()) == first
+    assert len(calls) == 1
+
+    # Different settings over the same pixels are a different artifact
+    other = TextureArtifactStore(store.backend, quality=50)
+    assert (await other.put_texture(texture))["sourceDigest"] != first["sourceDigest"]
+
+@pytest.mark.asyncio
+async def test_identical_levels_are_written_once():
+    store = _store()
+    await store.put_texture(_texture())
+    stored = dict(store.backend.objects)
+
+    # A new manifest for the same pixels reuses the encoded levels
+    await store.backend.delete(next(key for key in stored if key.startswith("manifests/")))
+    await store.put_texture(_texture())
+    assert store.backend.objects == stored
+
+@pytest.mark.asyncio
+async def test_jpeg_drops_the_alpha_channel():
+    store = _store(image_format="jpeg")
+    manifest = await store.put_texture(_texture(channels=4))
+    data = await store.get_artifact(manifest["url"].rsplit("/", 1)[-1])
+    assert Image.open(io.BytesIO(data)).mode == "RGB"
+
+@pytest.mark.asyncio
+async def test_artifact_names_are_validated():
+    store = _store()
+    manifest = await store.put_texture(_texture())
+    digest = manifest["mips"][0]["digest"]
+
+    assert await store.get_artifact(f"{digest}.exe") is None
+    assert await store.get_artifact(f"{digest[:10]}.webp") is None
+    assert await store.get_artifact("manifests/../x.webp") is None
+    assert await store.get_artifact(f"{'0' * 64}.webp") is None
+
+def test_rejects_unknown_formats():
+    with pytest.raises(ValueError):
+        _store(image_format="gif")
@@ -0,0 +1,75 @@
+# Backend/test_thumbnail_renderer.py
+"""
+Tests for the thumbnail service's single-flight rendering
+"""
+
+import asyncio
+
+import pytest
+
+from blob_storage import MemoryBlobStorage
+from thumbnail_renderer import ThumbnailService
+
+class _AssetCache:
+    def object_path(self, digest: str) -> str:
+        return f"/objects/{digest}.glb"
+
+class _BlockingService(ThumbnailService):
+    """Renders wait for release; every call is counted"""
+
+    def __init__(self):
+        super().__init__(_AssetCache(), MemoryBlobStorage(), workers=0)
+        self.renders = 0
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def _render(self, digests):
+        self.renders += 1
+        self.started.set()
+        await self.release.wait()
+        return b"thumbnail"
+
+@pytest.mark.asyncio
+async def test_concurrent_gets_share_one_render():
+    service = _BlockingService()
+    tasks = [asyncio.create_task(service.get("key", ["a"])) for _ in range(5)]
+    await service.started.wait()
+    service.release.set()
+
+    assert await asyncio.gather(*tasks) == [b"thumbnail"] * 5
+    assert service.renders == 1
+    assert await service.storage.read("thumbnails/key.webp") == b"thumbnail"
+
+@pytest.mark.asyncio
+async def test_waiter_takes_over_when_renderer_is_cancelled():
+    service = _BlockingService()
+    leader = asyncio.create_task(service.get("key", ["a"]))
+    await service.started.wait()
+    follower = asyncio.create_task(service.get("key", ["a"]))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+    service.release.set()
+    assert await asyncio.wait_for(follower, 1) == b"thumbnail"
+    assert service.renders == 2
+    assert not service._inflight
+
+@pytest.mark.asyncio
+async def test_failed_render_reaches_waiters():
+    service = _BlockingService()
+
+    async def failing(digests):
+        await service.release.wait()
+        raise RuntimeError("render failed")
+
+    service._render = failing
+    tasks = [asyncio.create_task(service.get("key", ["a"])) for _ in range(3)]
+    await asyncio.sleep(0)
+    service.release.set()
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert not service._inflight
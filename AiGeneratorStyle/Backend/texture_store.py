@@ -0,0 +1,150 @@
+# Backend/texture_store.py
+"""
+Texture Artifact Store
+Encodes face and garment textures once (WebP or JPEG plus a mip chain) and
+keeps the encoded files by content hash on local disk or S3-compatible storage.
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+from PIL import Image
+
+from blob_storage import BlobStorage, create_blob_storage, is_digest
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES = {
+    "webp": "image/webp",
+    "jpeg": "image/jpeg",
+    "png": "image/png"
+}
+
+# Encoded artifacts never change for a given hash
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+class TextureArtifactStore:
+    """Content-addressed store for encoded textures"""
+
+    def __init__(
+        self,
+        backend: BlobStorage,
+        image_format: str = "webp",
+        quality: int = 80,
+        min_mip_size: int = 16,
+        url_prefix: str = "/api/textures"
+    ):
+        if image_format not in ("webp", "jpeg"):
+            raise ValueError(f"Unsupported texture format: {image_format}")
+        self.backend = backend
+        self.image_format = image_format
+        self.quality = quality
+        self.min_mip_size = min_mip_size
+        self.url_prefix = url_prefix
+
+    async def put_texture(self, texture: np.ndarray) -> Dict:
+        """
+        Encode a texture and its mip chain and store every level
+
+        Args:
+            texture: (H, W, 3) or (H, W, 4) uint8 RGB(A) array
+
+        Returns:
+            Manifest with a URL, size and digest for every mip level
+        """
+        source_digest = self._source_digest(texture)
+        manifest_key = f"manifests/{source_digest}.json"
+
+        # The same pixels with the same settings are only ever encoded once
+        cached = await self.backend.read(manifest_key)
+        if cached is not None:
+            return json.loads(cached)
+
+        levels = await asyncio.to_thread(self._encode_mip_chain, texture)
+
+        mips = []
+        for level, (data, width, height) in enumerate(levels):
+            digest = hashlib.sha256(data).hexdigest()
+            name = f"{digest}.{self.image_format}"
+            if not await self.backend.exists(name):
+                await self.backend.write(name, data, MEDIA_TYPES[self.image_format])
+            mips.append({
+                "level": level,
+                "width": width,
+                "height": height,
+                "bytes": len(data),
+                "digest": digest,
+                "url": f"{self.url_prefix}/{name}"
+            })
+
+        manifest = {
+            "sourceDigest": source_digest,
+            "format": self.image_format,
+            "quality": self.quality,
+            "rawBytes": int(texture.nbytes),
+            "url": mips[0]["url"],
+            "mips": mips
+        }
+        await self.backend.write(manifest_key, json.dumps(manifest).encode(), "application/json")
+
+        logger.info(
+            f"Stored texture {source_digest[:12]}: {texture.nbytes} raw bytes -> "
+            f"{mips[0]['bytes']} encoded ({len(mips)} mip levels)"
+        )
+        return manifest
+
+    async def get_artifact(self, name: str) -> Optional[bytes]:
+        """Read an encoded artifact by its file name (<digest>.<ext>)"""
+        digest, _, extension = name.partition(".")
+        if extension not in MEDIA_TYPES or not is_digest(digest):
+            return None
+        return await self.backend.read(name)
+
+    def _source_digest(self, texture: np.ndarray) -> str:
+        """Hash of the raw pixels plus encoding settings"""
+        hasher = hashlib.sha256()
+        hasher.update(f"{texture.shape}|{texture.dtype}|{self.image_format}|{self.quality}".encode())
+        hasher.update(np.ascontiguousarray(texture).data)
+        return hasher.hexdigest()
+
+    def _encode_mip_chain(self, texture: np.ndarray) -> List:
+        """Encode the full-size texture and successive half-size levels"""
+        image = Image.fromarray(np.ascontiguousarray(texture, dtype=np.uint8))
+        if self.image_format == "jpeg" and image.mode != "RGB":
+            image = image.convert("RGB")
+
+        levels = []
+        while True:
+            buffer = io.BytesIO()
+            if self.image_format == "webp":
+                image.save(buffer, format="WEBP", quality=self.quality, method=4)
+            else:
+                image.save(buffer, format="JPEG", quality=self.quality, optimize=True, progressive=True)
+            levels.append((buffer.getvalue(), image.width, image.height))
+
+            if min(image.width, image.height) // 2 < self.min_mip_size:
+                break
+            image = image.reduce(2)
+
+        return levels
+
+def create_texture_store() -> TextureArtifactStore:
+    """Create the texture store configured by environment variables"""
+    backend = create_blob_storage(
+        kind=os.getenv("TEXTURE_STORAGE", "local"),
+        path=os.getenv("TEXTURE_STORAGE_PATH", "./storage/textures"),
+        prefix="textures",
+        cache_control=IMMUTABLE_CACHE_CONTROL
+    )
+
+    return TextureArtifactStore(
+        backend,
+        image_format=os.getenv("TEXTURE_FORMAT", "webp").lower(),
+        quality=int(os.getenv("TEXTURE_QUALITY", "80"))
+    )
@@ -0,0 +1,391 @@
+# Backend/thumbnail_renderer.py
+"""
+Thumbnail Renderer
+Headless CPU rasterizer in NumPy that renders GLB models (an avatar, plus
+any fitted garments) to small PNG/WebP thumbnails. Renders run in a
+background process pool and are stored by a hash of their inputs.
+"""
+
+import asyncio
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+from glb_codec import GLB, TRIANGLES
+from single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Bump when rendering changes so stored thumbnails are re-rendered
+RENDERER_VERSION = "1"
+
+THUMBNAIL_MEDIA_TYPES = {"webp": "image/webp", "png": "image/png"}
+
+# Rendered at this multiple of the output size, then downsampled (antialiasing)
+SUPERSAMPLE = 2
+
+# Upper bound on candidate pixels rasterized per NumPy batch
+MAX_BATCH_PIXELS = 2_000_000
+
+# Unit vector the key light comes from (camera looks down -Z)
+LIGHT_DIRECTION = np.array([-0.4, 0.5, 1.0]) / np.linalg.norm([-0.4, 0.5, 1.0])
+
+def _base_color_texture(glb: GLB, material: Dict, cache: Dict) -> Optional[np.ndarray]:
+    """Decoded base color texture (downscaled; thumbnails only need the average look)"""
+    info = material.get("pbrMetallicRoughness", {}).get("baseColorTexture")
+    if info is None:
+        return None
+    gltf = glb.gltf
+    texture = gltf["textures"][info["index"]]
+    source = texture.get("source")
+    if source is None:
+        return None
+    if source in cache:
+        return cache[source]
+
+    image_info = gltf["images"][source]
+    pixels = None
+    if "bufferView" in image_info:
+        try:
+            image = Image.open(io.BytesIO(glb.buffer_view(image_info["bufferView"]))).convert("RGBA")
+            image.thumbnail((128, 128))
+            pixels = np.asarray(image, dtype=np.float32) / 255.0
+        except Exception as e:
+            logger.warning(f"Could not decode texture {source}: {e}")
+    cache[source] = pixels
+    return pixels
+
+def _extract_triangles(model: Union[bytes, GLB]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    World-space triangles and per-face RGBA colors of a GLB at rest pose
+
+    Skinned meshes are posed with their joints' bind transforms so models
+    authored with scaled or rotated armatures (Mixamo, Ready Player Me)
+    come out the right size and way up.
+
+    Returns:
+        (triangles (F, 3, 3), colors (F, 4))
+    """
+    glb = model if isinstance(model, GLB) else GLB(model)
+    gltf = glb.gltf
+    world = glb.world_matrices()
+    materials = gltf.get("materials", [])
+    textures: Dict = {}
+
+    all_triangles = []
+    all_colors = []
+    for node_index, matrix in world.items():
+        node = gltf["nodes"][node_index]
+        if "mesh" not in node:
+            continue
+
+        joint_matrices = glb.joint_matrices(node, world)
+        for primitive in gltf["meshes"][node["mesh"]]["primitives"]:
+            attributes = primitive["attributes"]
+            if primitive.get("mode", TRIANGLES) != TRIANGLES or "POSITION" not in attributes:
+                continue
+
+            transformed = glb.posed_positions(primitive, matrix, joint_matrices)
+            faces = glb.faces(primitive, len(transformed))
+            if len(faces) == 0:
+                continue
+
+            material = materials[primitive["material"]] if "material" in primitive else {}
+            base_color = np.array(
+                material.get("pbrMetallicRoughness", {}).get("baseColorFactor", [0.8, 0.8, 0.8, 1.0])
+            )
+            colors = np.tile(base_color, (len(faces), 1))
+
+            texture = _base_color_texture(glb, material, textures)
+            if texture is not None and "TEXCOORD_0" in attributes:
+                uvs = glb.accessor_float(attributes["TEXCOORD_0"])
+                centroid_uv = uvs[faces].mean(axis=1) % 1.0
+                height, width = texture.shape[:2]
+                columns = np.minimum((centroid_uv[:, 0] * width).astype(np.int64), width - 1)
+                rows = np.minimum((centroid_uv[:, 1] * height).astype(np.int64), height - 1)
+                colors = colors * texture[rows, columns]
+
+            all_triangles.append(transformed[faces])
+            all_colors.append(colors)
+
+    if not all_triangles:
+        return np.zeros((0, 3, 3)), np.zeros((0, 4))
+    return np.concatenate(all_triangles), np.concatenate(all_colors)
+
+def _rasterize(screen: np.ndarray, colors: np.ndarray, size: int) -> np.ndarray:
+    """
+    Z-buffered rasterization of screen-space triangles
+
+    Triangles are bucketed by bounding-box size; each bucket tests every
+    pixel of every triangle's box at once, and the nearest fragment per
+    pixel wins via a sort on (pixel, depth).
+
+    Args:
+        screen: (F, 3, 3) x, y in pixels and depth (smaller is nearer)
+        colors: (F, 4) RGBA per face
+        size: Output width and height
+
+    Returns:
+        (size, size, 4) float image
+    """
+    image = np.zeros((size * size, 4))
+    if len(screen) == 0:
+        return image.reshape(size, size, 4)
+
+    x = screen[:, :, 0]
+    y = screen[:, :, 1]
+    z = screen[:, :, 2]
+    x_min = np.clip(np.floor(x.min(axis=1)), 0, size - 1).astype(np.int64)
+    x_max = np.clip(np.ceil(x.max(axis=1)), 0, size - 1).astype(np.int64)
+    y_min = np.clip(np.floor(y.min(axis=1)), 0, size - 1).astype(np.int64)
+    y_max = np.clip(np.ceil(y.max(axis=1)), 0, size - 1).astype(np.int64)
+
+    denominator = (y[:, 1] - y[:, 2]) * (x[:, 0] - x[:, 2]) + (x[:, 2] - x[:, 1]) * (y[:, 0] - y[:, 2])
+    visible = (
+        (np.abs(denominator) > 1e-12)
+        & (x.max(axis=1) >= 0) & (x.min(axis=1) <= size)
+        & (y.max(axis=1) >= 0) & (y.min(axis=1) <= size)
+    )
+    extent = np.maximum(x_max - x_min, y_max - y_min) + 1
+
+    fragment_pixels = []
+    fragment_depths = []
+    fragment_faces = []
+    bucket = 1
+    previous = 0
+    while previous < size:
+        selected = np.nonzero(visible & (extent > previous) & (extent <= bucket))[0]
+        offsets = np.arange(bucket)
+        dx = np.tile(offsets, bucket)
+        dy = np.repeat(offsets, bucket)
+        batch = max(1, MAX_BATCH_PIXELS // (bucket * bucket))
+
+        for start in range(0, len(selected), batch):
+            faces = selected[start:start + batch]
+            px = x_min[faces, None] + dx
+            py = y_min[faces, None] + dy
+            inside_box = (px <= x_max[faces, None]) & (py <= y_max[faces, None])
+
+            cx = px + 0.5
+            cy = py + 0.5
+            x0, x1, x2 = (x[faces, i, None] for i in range(3))
+            y0, y1, y2 = (y[faces, i, None] for i in range(3))
+            d = denominator[faces, None]
+            l0 = ((y1 - y2) * (cx - x2) + (x2 - x1) * (cy - y2)) / d
+            l1 = ((y2 - y0) * (cx - x2) + (x0 - x2) * (cy - y2)) / d
+            l2 = 1.0 - l0 - l1
+            inside = inside_box & (l0 >= -1e-6) & (l1 >= -1e-6) & (l2 >= -1e-6)
+
+            rows, columns = np.nonzero(inside)
+            if len(rows) == 0:
+                continue
+            depth = (
+                l0[rows, columns] * z[faces[rows], 0]
+                + l1[rows, columns] * z[faces[rows], 1]
+                + l2[rows, columns] * z[faces[rows], 2]
+            )
+            fragment_pixels.append(py[rows, columns] * size + px[rows, columns])
+            fragment_depths.append(depth)
+            fragment_faces.append(faces[rows])
+
+        previous = bucket
+        bucket *= 2
+
+    if not fragment_pixels:
+        return image.reshape(size, size, 4)
+
+    pixels = np.concatenate(fragment_pixels)
+    depths = np.concatenate(fragment_depths)
+    faces = np.concatenate(fragment_faces)
+    order = np.lexsort((depths, pixels))
+    pixels = pixels[order]
+    nearest = np.ones(len(pixels), dtype=bool)
+    nearest[1:] = pixels[1:] != pixels[:-1]
+
+    image[pixels[nearest]] = colors[faces[order][nearest]]
+    return image.reshape(size, size, 4)
+
+def render_models(models: List[Union[bytes, GLB]], size: int = 256, yaw_degrees: float = 20.0) -> Image.Image:
+    """
+    Render GLB models into one RGBA thumbnail
+
+    The first model frames the shot (e.g. the avatar); later models (fitted
+    garments) are drawn in the same space. Orthographic camera, slightly
+    turned by yaw_degrees, with flat Lambert shading from a key light.
+    """
+    triangles = []
+    colors = []
+    for model in models:
+        model_triangles, model_colors = _extract_triangles(model)
+        triangles.append(model_triangles)
+        colors.append(model_colors)
+
+    render_size = size * SUPERSAMPLE
+    frame = triangles[0] if len(triangles[0]) else np.concatenate(triangles)
+    triangles = np.concatenate(triangles)
+    colors = np.concatenate(colors)
+    if len(triangles) == 0:
+        return Image.new("RGBA", (size, size))
+
+    yaw = np.radians(yaw_degrees)
+    rotation = np.array([
+        [np.cos(yaw), 0.0, np.sin(yaw)],
+        [0.0, 1.0, 0.0],
+        [-np.sin(yaw), 0.0, np.cos(yaw)]
+    ])
+    triangles = triangles @ rotation.T
+    frame = frame.reshape(-1, 3) @ rotation.T
+
+    lower = frame.min(axis=0)
+    upper = frame.max(axis=0)
+    center = (lower + upper) / 2
+    scale = render_size * 0.9 / max(float((upper - lower)[:2].max()), 1e-6)
+
+    normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    normals /= np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), 1e-12)
+    # Winding isn't reliable across exporters; light both sides
+    shade = 0.35 + 0.65 * np.abs(normals @ LIGHT_DIRECTION)
+    shaded = colors.copy()
+    shaded[:, :3] = np.clip(colors[:, :3] * shade[:, None], 0.0, 1.0)
+    shaded[:, 3] = 1.0
+
+    screen = np.empty_like(triangles)
+    screen[:, :, 0] = (triangles[:, :, 0] - center[0]) * scale + render_size / 2
+    screen[:, :, 1] = render_size / 2 - (triangles[:, :, 1] - center[1]) * scale
+    screen[:, :, 2] = -triangles[:, :, 2]
+
+    pixels = _rasterize(screen, shaded, render_size)
+    image = Image.fromarray(np.round(pixels * 255).astype(np.uint8), "RGBA")
+    return image.reduce(SUPERSAMPLE) if SUPERSAMPLE > 1 else image
+
+def render_thumbnail_files(paths: List[str], size: int, image_format: str) -> bytes:
+    """Process-pool entry point: render GLB files and encode the thumbnail"""
+    models = [GLB.open(path) for path in paths]
+    try:
+        image = render_models(models, size)
+    finally:
+        for model in models:
+            model.close()
+    buffer = io.BytesIO()
+    if image_format == "webp":
+        image.save(buffer, format="WEBP", quality=85, method=4)
+    else:
+        image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+class ThumbnailService:
+    """
+    Renders and stores thumbnails for avatar (and outfit) models
+
+    Thumbnails are keyed by the content digests of the models plus the
+    render settings, stored under thumbnails/ in the texture storage
+    backend, and rendered at most once at a time per worker.
+    """
+
+    def __init__(
+        self,
+        asset_cache,
+        storage,
+        size: int = 256,
+        image_format: str = "webp",
+        workers: int = 2
+    ):
+        if image_format not in THUMBNAIL_MEDIA_TYPES:
+            raise ValueError(f"Unsupported thumbnail format: {image_format}")
+        self.asset_cache = asset_cache
+        self.storage = storage
+        self.size = size
+        self.image_format = image_format
+        self.media_type = THUMBNAIL_MEDIA_TYPES[image_format]
+        self.workers = workers
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self._inflight = SingleFlight()
+        self._background: Set[asyncio.Task] = set()
+
+    async def start(self):
+        if self.workers > 0 and self.executor is None:
+            # Spawned workers don't inherit the event loop or open sockets
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+
+    async def close(self):
+        for task in list(self._background):
+            task.cancel()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def render_key(self, model_urls: List[str]) -> Tuple[str, List[str]]:
+        """
+        Thumbnail key for a set of models, fetching them into the asset cache
+
+        Returns:
+            (key, model digests)
+        """
+        digests = [await self.asset_cache.resolve(url) for url in model_urls]
+        hasher = hashlib.sha256()
+        hasher.update(f"{RENDERER_VERSION}|{self.size}|{self.image_format}".encode())
+        for digest in digests:
+            hasher.update(digest.encode())
+        return hasher.hexdigest(), digests
+
+    async def get(self, key: str, digests: List[str]) -> bytes:
+        """Stored thumbnail for key, rendering it in the pool if needed"""
+        name = f"thumbnails/{key}.{self.image_format}"
+        data = await self.storage.read(name)
+        if data is not None:
+            return data
+
+        async def render() -> bytes:
+            data = await self._render(digests)
+            await self.storage.write(name, data, self.media_type)
+            return data
+
+        return await self._inflight.run(key, render)
+
+    def schedule(self, model_urls: List[str]):
+        """Render in the background so the first listing finds it ready"""
+        task = asyncio.get_running_loop().create_task(self._prerender(model_urls))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _prerender(self, model_urls: List[str]):
+        try:
+            key, digests = await self.render_key(model_urls)
+            await self.get(key, digests)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Thumbnail prerender failed for {model_urls[0]}: {e}")
+
+    async def _render(self, digests: List[str]) -> bytes:
+        # Marks the models recently used, so no worker evicts them mid-render
+        for digest in digests:
+            if not await self.asset_cache.contains(digest):
+                raise FileNotFoundError(f"Model {digest[:12]} was evicted before rendering")
+        paths = [self.asset_cache.object_path(digest) for digest in digests]
+        if self.executor is None:
+            return await asyncio.to_thread(render_thumbnail_files, paths, self.size, self.image_format)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, render_thumbnail_files, paths, self.size, self.image_format
+        )
+
+def create_thumbnail_service(asset_cache, storage) -> ThumbnailService:
+    """Create the thumbnail service configured by environment variables"""
+    return ThumbnailService(
+        asset_cache,
+        storage,
+        size=int(os.getenv("THUMBNAIL_SIZE", "256")),
+        image_format=os.getenv("THUMBNAIL_FORMAT", "webp").lower(),
+        workers=int(os.getenv("THUMBNAIL_WORKERS", "2"))
+    )
@@ -34,6 +34,13 @@ export interface IframeConfig {
   instructions?: string[];
 }
 
+export interface CatalogPage {
+  items: any[];
+  total: number;
+  nextCursor: string | null;
+  facets?: { [field: string]: any };
+}
+
 export interface FacePhotoResponse {
   success: boolean;
   avatarId: string;
@@ -173,11 +180,16 @@ export class AvatarService {
   
   // Get clothing catalog
   getClothingCatalog(): Observable<any[]> {
-    return this.http.get<any[]>(`${this.apiUrl}/clothing/catalog`)
+    return this.queryClothingCatalog().pipe(map(page => page.items));
+  }
+  
+  // Query the clothing catalog with filters, facets and cursor pagination
+  queryClothingCatalog(params: { [key: string]: string | string[] | number | boolean } = {}): Observable<CatalogPage> {
+    return this.http.get<CatalogPage>(`${this.apiUrl}/clothing/catalog`, { params })
       .pipe(
         catchError(error => {
           console.error('Get clothing catalog error:', error);
-          return of([]);
+          return of({ items: [], total: 0, nextCursor: null });
         })
       );
   }